@@ -4,7 +4,7 @@ import logging
 import os
 import time
 import unicodedata
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import asyncpg
 import firebase_admin
@@ -15,6 +15,11 @@ from pydantic import BaseModel, BaseSettings, Field
 from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
 import redis.asyncio as redis
 
+try:
+    from .occupation_index import OccupationIndex, build_occupation_index, fetch_occupation_catalog
+except ImportError:
+    from occupation_index import OccupationIndex, build_occupation_index, fetch_occupation_catalog  # type: ignore
+
 LOGGER = logging.getLogger("eco_cloud_run_service")
 logging.basicConfig(level=logging.INFO)
 
@@ -28,6 +33,9 @@ class Settings(BaseSettings):
     firebase_project_id: Optional[str] = Field(None, env="FIREBASE_PROJECT_ID")
     service_name: str = Field("eco-cloud-run-service", env="SERVICE_NAME")
     max_search_limit: int = Field(25, env="ECO_MAX_SEARCH_LIMIT")
+    batch_search_chunk_size: int = Field(50, env="ECO_BATCH_SEARCH_CHUNK_SIZE")
+    batch_search_concurrency: int = Field(4, env="ECO_BATCH_SEARCH_CONCURRENCY")
+    occupation_index_enabled: bool = Field(True, env="ECO_OCCUPATION_INDEX_ENABLED")
 
     class Config:
         env_file = ".env"
@@ -250,6 +258,9 @@ class AppState:
         self.last_config_loaded_at: Optional[float] = None
         self.config_refresh_interval = int(os.environ.get("ECO_CONFIG_REFRESH_SECONDS", "300"))
         self.pg_dsn_source = "ECO_PG_DSN"
+        self.occupation_index: Optional[OccupationIndex] = None
+        self.occupation_index_loaded_at: Optional[float] = None
+        self._occupation_index_task: Optional[asyncio.Task] = None
 
     async def init_resources(self) -> None:
         if not self.settings.pg_dsn:
@@ -268,13 +279,54 @@ class AppState:
                 self.supports_trgm = False
                 LOGGER.warning("pg_trgm extension not available, falling back to LIKE search")
 
+        await self.refresh_occupation_index(force=True)
+
+    async def refresh_occupation_index(self, force: bool = False) -> None:
+        """Load the in-memory occupation index; searches use Postgres while it is cold."""
+        if not self.settings.occupation_index_enabled or not self.pg_pool:
+            return
+        now = time.time()
+        if (
+            not force
+            and self.occupation_index_loaded_at
+            and (now - self.occupation_index_loaded_at) < self.config_refresh_interval
+        ):
+            return
+        self.occupation_index_loaded_at = now
+        try:
+            async with self.pg_pool.acquire() as conn:
+                occupations, aliases = await fetch_occupation_catalog(conn, self.supports_trgm)
+            # Building is CPU-bound; requests keep using the previous copy until the swap
+            self.occupation_index = await asyncio.get_event_loop().run_in_executor(
+                None, build_occupation_index, occupations, aliases, self.supports_trgm
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            DB_FAILURES.labels(operation="occupation_index").inc()
+            LOGGER.warning("Failed to load occupation index, keeping previous copy: %s", exc)
+
+    def schedule_occupation_index_refresh(self) -> None:
+        if not self.settings.occupation_index_enabled or not self.pg_pool:
+            return
+        if self._occupation_index_task and not self._occupation_index_task.done():
+            return
+        if (
+            self.occupation_index_loaded_at
+            and (time.time() - self.occupation_index_loaded_at) < self.config_refresh_interval
+        ):
+            return
+        self._occupation_index_task = asyncio.get_event_loop().create_task(self.refresh_occupation_index())
+
     async def close(self) -> None:
+        if self._occupation_index_task:
+            self._occupation_index_task.cancel()
         if self.pg_pool:
             await self.pg_pool.close()
         if self.redis:
             await self.redis.close()
 
     async def refresh_dynamic_config(self, force: bool = False) -> None:
+        # Reloads run in the background so requests keep using the current index
+        self.schedule_occupation_index_refresh()
         now = time.time()
         if not force and self.last_config_loaded_at and (now - self.last_config_loaded_at) < self.config_refresh_interval:
             return
@@ -453,6 +505,187 @@ async def run_search_query(
         raise
 
 
+async def run_batch_search_query(
+    conn: asyncpg.Connection,
+    normalized_queries: List[str],
+    locale: str,
+    country: str,
+    limit: int,
+) -> Dict[str, List[asyncpg.Record]]:
+    """Search several normalized titles in one round trip via unnest + LATERAL."""
+    if state.supports_trgm:
+        query = """
+            SELECT t.q AS query, m.*
+            FROM unnest($3::text[]) WITH ORDINALITY AS t(q, idx)
+            CROSS JOIN LATERAL (
+                SELECT o.eco_id,
+                       o.display_name,
+                       o.normalized_title,
+                       o.description,
+                       o.evidence_count,
+                       o.locale,
+                       o.country,
+                       a.alias,
+                       a.normalized_alias,
+                       a.confidence,
+                       GREATEST(
+                           CASE WHEN o.normalized_title = t.q THEN 1.0 ELSE 0 END,
+                           COALESCE(similarity(o.normalized_title, t.q), 0),
+                           COALESCE(similarity(COALESCE(a.normalized_alias, ''), t.q), 0)
+                       ) AS score
+                FROM eco_occupation o
+                LEFT JOIN eco_alias a ON a.eco_id = o.eco_id
+                WHERE o.locale = $1 AND o.country = $2
+                  AND ((o.normalized_title ILIKE t.q || '%')
+                       OR (a.normalized_alias ILIKE t.q || '%')
+                       OR (COALESCE(similarity(o.normalized_title, t.q), 0) > 0.2))
+                ORDER BY score DESC, o.evidence_count DESC
+                LIMIT $4
+            ) m
+            ORDER BY t.idx, m.score DESC, m.evidence_count DESC
+        """
+    else:
+        query = """
+            SELECT t.q AS query, m.*
+            FROM unnest($3::text[]) WITH ORDINALITY AS t(q, idx)
+            CROSS JOIN LATERAL (
+                SELECT o.eco_id,
+                       o.display_name,
+                       o.normalized_title,
+                       o.description,
+                       o.evidence_count,
+                       o.locale,
+                       o.country,
+                       NULL AS alias,
+                       NULL AS normalized_alias,
+                       NULL AS confidence,
+                       CASE WHEN o.normalized_title = t.q THEN 1.0 ELSE 0 END AS score
+                FROM eco_occupation o
+                WHERE o.locale = $1 AND o.country = $2
+                  AND (o.normalized_title = t.q OR o.normalized_title ILIKE t.q || '%')
+                ORDER BY score DESC, o.evidence_count DESC
+                LIMIT $4
+            ) m
+            ORDER BY t.idx, m.score DESC, m.evidence_count DESC
+        """
+
+    try:
+        rows = await conn.fetch(query, locale, country, normalized_queries, limit)
+        state.circuit_breaker.record_success()
+    except asyncpg.PostgresError as exc:
+        DB_FAILURES.labels(operation="batch_search").inc()
+        state.circuit_breaker.record_failure()
+        LOGGER.error("Batch search query failed: %s", exc)
+        raise
+
+    grouped: Dict[str, List[asyncpg.Record]] = {normalized: [] for normalized in normalized_queries}
+    for row in rows:
+        grouped[row["query"]].append(row)
+    return grouped
+
+
+def build_search_results(rows: List[Any]) -> List[OccupationSearchResult]:
+    results: List[OccupationSearchResult] = []
+    for row in rows:
+        occupation = OccupationSummary(
+            eco_id=row["eco_id"],
+            display_name=row["display_name"],
+            normalized_title=row["normalized_title"],
+            description=row["description"],
+            locale=row["locale"],
+            country=row["country"],
+            evidence_count=row["evidence_count"],
+        )
+        alias = None
+        if row.get("alias"):
+            alias = AliasInfo(
+                alias=row.get("alias"),
+                normalized_alias=row.get("normalized_alias"),
+                confidence=row.get("confidence"),
+            )
+        results.append(
+            OccupationSearchResult(
+                occupation=occupation,
+                alias=alias,
+                score=float(row.get("score", 0.0)),
+            )
+        )
+    return results
+
+
+async def search_uncached(
+    normalized_queries: List[str],
+    locale: str,
+    country: str,
+    limit: int,
+) -> Tuple[Dict[str, List[asyncpg.Record]], Dict[str, str]]:
+    """Run cache misses in chunks of set-based queries, bounded by a semaphore.
+
+    Returns rows per normalized query and an error detail for every query
+    whose chunk could not be served.
+    """
+    chunk_size = max(1, settings.batch_search_chunk_size)
+    semaphore = asyncio.Semaphore(max(1, settings.batch_search_concurrency))
+    found: Dict[str, List[asyncpg.Record]] = {}
+    failed: Dict[str, str] = {}
+
+    async def run_chunk(chunk: List[str]) -> None:
+        async with semaphore:
+            if not state.circuit_breaker.allow():
+                failed.update({normalized: "Search temporarily unavailable" for normalized in chunk})
+                return
+            try:
+                conn = await get_pg_connection()
+                try:
+                    if len(chunk) == 1:
+                        found[chunk[0]] = await run_search_query(conn, chunk[0], locale, country, limit)
+                    else:
+                        found.update(await run_batch_search_query(conn, chunk, locale, country, limit))
+                finally:
+                    await release_pg_connection(conn)
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Database search failed for %d titles: %s", len(chunk), exc)
+                DB_FAILURES.labels(operation="search").inc()
+                failed.update({normalized: "Search unavailable" for normalized in chunk})
+
+    chunks = [normalized_queries[i : i + chunk_size] for i in range(0, len(normalized_queries), chunk_size)]
+    await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+    return found, failed
+
+
+async def read_cached_searches(redis_client: redis.Redis, cache_keys: List[str]) -> List[Optional[SearchResponse]]:
+    """Fetch cached search responses with a single MGET; failures read as misses."""
+    if not cache_keys:
+        return []
+    try:
+        payloads = await redis_client.mget(cache_keys)
+    except redis.RedisError as exc:
+        REDIS_FAILURES.labels(operation="get").inc()
+        LOGGER.warning("Cache read failed: %s", exc)
+        return [None] * len(cache_keys)
+
+    cached: List[Optional[SearchResponse]] = []
+    for payload in payloads:
+        try:
+            cached.append(SearchResponse.parse_raw(payload) if payload else None)
+        except ValueError as exc:
+            LOGGER.warning("Ignoring unreadable cached search response: %s", exc)
+            cached.append(None)
+    return cached
+
+
+def search_occupation_index(
+    index: OccupationIndex, queries: List[str], locale: str, country: str, limit: int
+) -> Dict[str, List[Any]]:
+    """Search the in-memory index for each query; queries it cannot answer are left out"""
+    found: Dict[str, List[Any]] = {}
+    for normalized in queries:
+        rows = index.search(normalized, locale, country, limit)
+        if rows is not None:
+            found[normalized] = rows
+    return found
+
+
 @app.get("/occupations/search", response_model=BatchSearchResponse)
 async def search_occupations(
     request: Request,
@@ -476,108 +709,76 @@ async def search_occupations(
     if not queries:
         raise HTTPException(status_code=400, detail="Query parameter q or titles is required")
 
-    async def search_single(raw_query: str) -> SearchResponse:
-        normalized_query = normalize_title(raw_query)
-        cache_key = f"occ:search:{locale}:{country}:{normalized_query}:{limit}"
-        start = time.perf_counter()
+    start = time.perf_counter()
+    normalized_by_raw = {raw: normalize_title(raw) for raw in queries}
+    distinct = list(dict.fromkeys(normalized_by_raw.values()))
+    cache_keys = {
+        normalized: f"occ:search:{locale}:{country}:{normalized}:{limit}" for normalized in distinct
+    }
 
-        cached = None
-        try:
-            cached_data = await redis_client.get(cache_key)
-            if cached_data:
-                CACHE_HITS.labels(endpoint="/occupations/search").inc()
-                cached = SearchResponse.parse_raw(cached_data)
-        except redis.RedisError as exc:
-            REDIS_FAILURES.labels(operation="get").inc()
-            LOGGER.warning("Cache read failed: %s", exc)
+    cached_by_query = dict(zip(distinct, await read_cached_searches(redis_client, list(cache_keys.values()))))
+    misses = [normalized for normalized in distinct if cached_by_query[normalized] is None]
 
-        if cached:
-            duration = (time.perf_counter() - start) * 1000
-            cached.duration_ms = duration
-            cached.cache_hit = True
-            return cached
+    found: Dict[str, List[Any]] = {}
+    failed: Dict[str, str] = {}
+    index = state.occupation_index
+    if misses and index is not None:
+        # Scoring is CPU-bound: one executor call for the whole miss list keeps the event loop free
+        found = await asyncio.get_event_loop().run_in_executor(
+            None, search_occupation_index, index, misses, locale, country, limit
+        )
+        misses = [normalized for normalized in misses if normalized not in found]
+    if misses:
+        if state.circuit_breaker.allow():
+            fetched, failed = await search_uncached(misses, locale, country, limit)
+            found.update(fetched)
+        else:
+            failed = {normalized: "Search temporarily unavailable" for normalized in misses}
+
+    # A database failure can still be served from a cache entry written concurrently
+    stale: Dict[str, SearchResponse] = {}
+    fallback = [normalized for normalized, detail in failed.items() if detail == "Search unavailable"]
+    if fallback:
+        fallback_cached = await read_cached_searches(redis_client, [cache_keys[n] for n in fallback])
+        stale = {normalized: entry for normalized, entry in zip(fallback, fallback_cached) if entry}
+
+    duration = (time.perf_counter() - start) * 1000
+    aggregated: Dict[str, SearchResponse] = {}
+    batch_errors: Dict[str, str] = {}
+    fresh: Dict[str, SearchResponse] = {}
+    for raw, normalized in normalized_by_raw.items():
+        cached = cached_by_query[normalized]
+        if cached is not None:
+            CACHE_HITS.labels(endpoint="/occupations/search").inc()
+            aggregated[raw] = cached.copy(update={"duration_ms": duration, "cache_hit": True})
+            continue
 
         CACHE_MISSES.labels(endpoint="/occupations/search").inc()
-
-        if not state.circuit_breaker.allow():
-            raise HTTPException(status_code=503, detail="Search temporarily unavailable")
-
-        try:
-            conn = await get_pg_connection()
-            try:
-                rows = await run_search_query(conn, normalized_query, locale, country, limit)
-            finally:
-                await release_pg_connection(conn)
-        except Exception as exc:  # pylint: disable=broad-except
-            LOGGER.error("Database search failed: %s", exc)
-            DB_FAILURES.labels(operation="search").inc()
-            cached_only = None
-            try:
-                cached_fallback = await redis_client.get(cache_key)
-                if cached_fallback:
-                    cached_only = SearchResponse.parse_raw(cached_fallback)
-            except redis.RedisError:
-                cached_only = None
-            if cached_only:
-                cached_only.from_cache_only = True
-                cached_only.cache_hit = True
-                return cached_only
-            raise HTTPException(status_code=503, detail="Search unavailable") from exc
-
-        results: List[OccupationSearchResult] = []
-        for row in rows:
-            occupation = OccupationSummary(
-                eco_id=row["eco_id"],
-                display_name=row["display_name"],
-                normalized_title=row["normalized_title"],
-                description=row["description"],
-                locale=row["locale"],
-                country=row["country"],
-                evidence_count=row["evidence_count"],
-            )
-            alias = None
-            if row.get("alias"):
-                alias = AliasInfo(
-                    alias=row.get("alias"),
-                    normalized_alias=row.get("normalized_alias"),
-                    confidence=row.get("confidence"),
-                )
-            results.append(
-                OccupationSearchResult(
-                    occupation=occupation,
-                    alias=alias,
-                    score=float(row.get("score", 0.0)),
-                )
+        if normalized in stale:
+            aggregated[raw] = stale[normalized].copy(update={"from_cache_only": True, "cache_hit": True})
+        elif normalized in failed:
+            batch_errors[raw] = failed[normalized]
+        else:
+            response = SearchResponse(
+                query=raw,
+                normalized_query=normalized,
+                results=build_search_results(found.get(normalized, [])),
+                cache_hit=False,
+                duration_ms=duration,
             )
+            fresh.setdefault(normalized, response)
+            aggregated[raw] = response
 
-        duration = (time.perf_counter() - start) * 1000
-        response = SearchResponse(
-            query=raw_query,
-            normalized_query=normalized_query,
-            results=results,
-            cache_hit=False,
-            duration_ms=duration,
-        )
-
+    if fresh:
         try:
-            await redis_client.setex(cache_key, settings.cache_ttl_occupation, response.json())
+            pipe = redis_client.pipeline(transaction=False)
+            for normalized, response in fresh.items():
+                pipe.setex(cache_keys[normalized], settings.cache_ttl_occupation, response.json())
+            await pipe.execute()
         except redis.RedisError as exc:
             REDIS_FAILURES.labels(operation="set").inc()
             LOGGER.warning("Cache write failed: %s", exc)
 
-        return response
-
-    aggregated: Dict[str, SearchResponse] = {}
-    batch_errors: Dict[str, str] = {}
-    for raw in queries:
-        try:
-            aggregated[raw] = await search_single(raw)
-        except HTTPException as exc:
-            detail = exc.detail if isinstance(exc.detail, str) else str(exc.detail)
-            batch_errors[raw] = detail
-        except Exception as exc:  # pylint: disable=broad-except
-            batch_errors[raw] = str(exc)
-
     return BatchSearchResponse(results=aggregated, errors=batch_errors)
 
 
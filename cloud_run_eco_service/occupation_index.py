@@ -0,0 +1,251 @@
+"""In-memory occupation search index for the ECO Cloud Run service.
+
+The ECO catalog (``eco_occupation`` + ``eco_alias``) is small and changes
+rarely, so the service loads it once and answers ``/occupations/search``
+misses without a Postgres round trip. The index reproduces the semantics of
+``run_search_query``:
+
+- one candidate row per (occupation, alias) pair, like the LEFT JOIN
+- matches on title prefix, alias prefix, or title trigram similarity > 0.2
+- score = GREATEST(exact title match, similarity(title), similarity(alias))
+- ORDER BY score DESC, evidence_count DESC, LIMIT n
+
+``trigrams`` / ``similarity`` follow pg_trgm: words are alphanumeric runs,
+each padded with two leading blanks and one trailing blank, and similarity
+is shared / (|a| + |b| - shared) over the trigram sets.
+"""
+
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+LOGGER = logging.getLogger("eco_cloud_run_service")
+
+SIMILARITY_THRESHOLD = 0.2
+
+OCCUPATION_LOAD_SQL = """
+    SELECT eco_id, display_name, normalized_title, description, evidence_count, locale, country
+    FROM eco_occupation
+"""
+ALIAS_LOAD_SQL = """
+    SELECT eco_id, alias, normalized_alias, confidence
+    FROM eco_alias
+    ORDER BY eco_id, normalized_alias
+"""
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_LIKE_WILDCARDS = re.compile(r"[%_\\]")
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """Trigram set as computed by pg_trgm's ``show_trgm``."""
+    grams: Set[str] = set()
+    for word in _WORD_RE.findall((text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    if not left or not right:
+        return 0.0
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared)
+
+
+class _SortedPrefixIndex:
+    """Prefix lookups over a sorted key list (bisect range scan)."""
+
+    def __init__(self, entries: Iterable[Tuple[str, int]]) -> None:
+        pairs = sorted(entries)
+        self._keys = [key for key, _ in pairs]
+        self._values = [value for _, value in pairs]
+
+    def lookup(self, prefix: str) -> List[int]:
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + "\U0010ffff")
+        return self._values[start:end]
+
+
+class _Partition:
+    """Search structures for a single (locale, country) slice of the catalog."""
+
+    def __init__(
+        self,
+        occupations: List[Dict[str, Any]],
+        aliases: Dict[str, List[Dict[str, Any]]],
+        supports_trgm: bool,
+    ) -> None:
+        self.occupations = occupations
+        self.supports_trgm = supports_trgm
+        title_grams = [trigrams(occ["normalized_title"]) for occ in occupations]
+        self.title_sizes = [len(grams) for grams in title_grams]
+        self.exact: Dict[str, List[int]] = defaultdict(list)
+        for position, occ in enumerate(occupations):
+            self.exact[occ["normalized_title"] or ""].append(position)
+        self.title_prefix = _SortedPrefixIndex(
+            ((occ["normalized_title"] or "").lower(), position) for position, occ in enumerate(occupations)
+        )
+
+        # One row per (occupation, alias) pair; occupations without aliases get a NULL-alias row
+        self.rows: List[Tuple[int, Optional[Dict[str, Any]]]] = []
+        self.rows_by_occupation: List[List[int]] = []
+        alias_prefix_entries: List[Tuple[str, int]] = []
+        self.alias_sizes: List[int] = []
+        self.alias_postings: Dict[str, List[int]] = defaultdict(list)
+        for position, occ in enumerate(occupations):
+            row_ids: List[int] = []
+            for alias in aliases.get(occ["eco_id"], []) if supports_trgm else []:
+                row_id = len(self.rows)
+                row_ids.append(row_id)
+                alias_prefix_entries.append(((alias["normalized_alias"] or "").lower(), row_id))
+                grams = trigrams(alias["normalized_alias"])
+                for gram in grams:
+                    self.alias_postings[gram].append(row_id)
+                self.alias_sizes.append(len(grams))
+                self.rows.append((position, alias))
+            if not row_ids:
+                row_ids.append(len(self.rows))
+                self.alias_sizes.append(0)
+                self.rows.append((position, None))
+            self.rows_by_occupation.append(row_ids)
+        self.alias_prefix = _SortedPrefixIndex(alias_prefix_entries)
+
+        # Precomputed tie-break order: evidence_count DESC, then a stable (eco_id, alias) order
+        ordered = sorted(
+            range(len(self.rows)),
+            key=lambda row_id: (
+                -(occupations[self.rows[row_id][0]]["evidence_count"] or 0),
+                occupations[self.rows[row_id][0]]["eco_id"],
+                (self.rows[row_id][1] or {}).get("normalized_alias") or "",
+            ),
+        )
+        self.row_rank = [0] * len(self.rows)
+        for rank, row_id in enumerate(ordered):
+            self.row_rank[row_id] = rank
+
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        for position, grams in enumerate(title_grams):
+            for gram in grams:
+                self.postings[gram].append(position)
+
+    @staticmethod
+    def _similarities(
+        postings: Dict[str, List[int]], sizes: Sequence[int], query_grams: FrozenSet[str]
+    ) -> Dict[int, float]:
+        shared = Counter(chain.from_iterable(postings.get(gram, ()) for gram in query_grams))
+        query_size = len(query_grams)
+        return {key: count / (sizes[key] + query_size - count) for key, count in shared.items()}
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        if not self.supports_trgm:
+            # Mirrors the LIKE-only fallback query: no aliases, exact match scores 1.0
+            matches = set(self.exact.get(query, ())) | set(self.title_prefix.lookup(query))
+            scored = [
+                (1.0 if self.occupations[p]["normalized_title"] == query else 0.0, self.rows_by_occupation[p][0])
+                for p in matches
+            ]
+            return self._format(scored, limit)
+
+        query_grams = trigrams(query)
+        title_similarity = self._similarities(self.postings, self.title_sizes, query_grams)
+        alias_similarity = self._similarities(self.alias_postings, self.alias_sizes, query_grams)
+        matched_occupations = set(self.title_prefix.lookup(query))
+        matched_occupations.update(p for p, score in title_similarity.items() if score > SIMILARITY_THRESHOLD)
+
+        exact = set(self.exact.get(query, ()))
+        row_ids: Set[int] = set(self.alias_prefix.lookup(query))
+        for position in matched_occupations:
+            row_ids.update(self.rows_by_occupation[position])
+
+        rows = self.rows
+        scored = []
+        for row_id in row_ids:
+            position = rows[row_id][0]
+            score = 1.0 if position in exact else title_similarity.get(position, 0.0)
+            alias_score = alias_similarity.get(row_id, 0.0)
+            scored.append((alias_score if alias_score > score else score, row_id))
+        return self._format(scored, limit)
+
+    def _format(self, scored: List[Tuple[float, int]], limit: int) -> List[Dict[str, Any]]:
+        row_rank = self.row_rank
+        top = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], row_rank[item[1]]))
+        rows = []
+        for score, row_id in top:
+            position, alias = self.rows[row_id]
+            row = dict(self.occupations[position])
+            row["alias"] = alias["alias"] if alias else None
+            row["normalized_alias"] = alias["normalized_alias"] if alias else None
+            row["confidence"] = alias["confidence"] if alias else None
+            row["score"] = score
+            rows.append(row)
+        return rows
+
+
+class OccupationIndex:
+    """Exact-match, prefix and trigram lookups over the whole ECO catalog."""
+
+    def __init__(
+        self,
+        occupations: Sequence[Any],
+        aliases: Sequence[Any],
+        supports_trgm: bool = True,
+    ) -> None:
+        aliases_by_eco: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for alias in aliases:
+            aliases_by_eco[alias["eco_id"]].append(dict(alias))
+
+        grouped: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        for occupation in occupations:
+            occupation = dict(occupation)
+            grouped[(occupation["locale"], occupation["country"])].append(occupation)
+
+        self.supports_trgm = supports_trgm
+        self.occupation_count = sum(len(items) for items in grouped.values())
+        self.alias_count = sum(len(items) for items in aliases_by_eco.values())
+        self._partitions = {
+            key: _Partition(items, aliases_by_eco, supports_trgm) for key, items in grouped.items()
+        }
+
+    def search(self, normalized_query: str, locale: str, country: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Rows shaped like ``run_search_query`` records.
+
+        Returns None when the query contains LIKE wildcards, whose pattern
+        semantics are left to Postgres.
+        """
+        if _LIKE_WILDCARDS.search(normalized_query):
+            return None
+        partition = self._partitions.get((locale, country))
+        if partition is None:
+            return []
+        return partition.search(normalized_query, limit)
+
+
+async def fetch_occupation_catalog(conn: Any, supports_trgm: bool) -> Tuple[List[Any], List[Any]]:
+    occupations = await conn.fetch(OCCUPATION_LOAD_SQL)
+    aliases = await conn.fetch(ALIAS_LOAD_SQL) if supports_trgm else []
+    return occupations, aliases
+
+
+def build_occupation_index(occupations: Iterable[Any], aliases: Iterable[Any], supports_trgm: bool) -> OccupationIndex:
+    """CPU-bound; callers on the event loop run it in an executor."""
+    index = OccupationIndex(occupations, aliases, supports_trgm=supports_trgm)
+    LOGGER.info(
+        "Loaded occupation index (occupations=%d, aliases=%d, trgm=%s)",
+        index.occupation_count,
+        index.alias_count,
+        supports_trgm,
+    )
+    return index
+
+
+async def load_occupation_index(conn: Any, supports_trgm: bool) -> OccupationIndex:
+    occupations, aliases = await fetch_occupation_catalog(conn, supports_trgm)
+    return await asyncio.get_event_loop().run_in_executor(
+        None, build_occupation_index, occupations, aliases, supports_trgm
+    )
@@ -0,0 +1,146 @@
+"""
+Adaptive (AIMD) concurrency limiter for Together AI calls
+"""
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Slot:
+    """One admitted request; the caller reports how it went"""
+
+    __slots__ = ("started_at", "outcome", "latency")
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.outcome: Optional[str] = None
+        self.latency = 0.0
+
+    def success(self):
+        self.outcome = "success"
+        self.latency = time.monotonic() - self.started_at
+
+    def overload(self):
+        """429, 5xx or timeout: the provider is past its capacity"""
+        self.outcome = "overload"
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Additive-increase / multiplicative-decrease window on in-flight requests.
+
+    Each success grows the window by ``increase / window`` (about +``increase``
+    per window's worth of completions), but only while latency stays within
+    ``latency_tolerance`` x the best smoothed latency seen. An overload cuts
+    the window by ``decrease_factor``, at most once per round trip: requests
+    that started before the last cut do not cut it again. Slots exited
+    without a reported outcome (e.g. a 400) leave the window unchanged.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Need 1 <= min_limit <= initial_limit <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        self._window = float(initial_limit)
+        self._in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._last_decrease = 0.0
+        self._latency_ewma: Optional[float] = None
+        self._best_latency: Optional[float] = None
+
+        self.successes = 0
+        self.overloads = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._window)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _cond(self) -> asyncio.Condition:
+        # Created lazily so the limiter can be built outside a running loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[_Slot]:
+        """Wait for room in the window, then run one request"""
+        cond = self._cond()
+        async with cond:
+            await cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        slot = _Slot()
+        try:
+            yield slot
+        finally:
+            self._on_done(slot)
+            async with cond:
+                self._in_flight -= 1
+                cond.notify_all()
+
+    def _on_done(self, slot: _Slot):
+        if slot.outcome == "success":
+            self.successes += 1
+            self._latency_ewma = (
+                slot.latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * slot.latency
+            )
+            if self._best_latency is None or self._latency_ewma < self._best_latency:
+                self._best_latency = self._latency_ewma
+            if self._latency_ewma <= self._best_latency * self.latency_tolerance:
+                self._window = min(self.max_limit, self._window + self.increase / self._window)
+        elif slot.outcome == "overload":
+            self.overloads += 1
+            if slot.started_at >= self._last_decrease:
+                previous = self.limit
+                self._window = max(self.min_limit, self._window * self.decrease_factor)
+                self._last_decrease = time.monotonic()
+                self.decreases += 1
+                logger.info(f"Together AI overloaded; concurrency window {previous} -> {self.limit}")
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before retry ``attempt`` (0-based): full jitter over an
+        exponential cap, never less than the server's Retry-After
+        """
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after) + random.uniform(0, self.backoff_base)
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "window": round(self._window, 2),
+            "in_flight": self._in_flight,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "decreases": self.decreases,
+            "latency_ewma_seconds": self._latency_ewma or 0.0,
+        }
@@ -17,6 +17,8 @@ from .models import (
 )
 from .together_ai_client import TogetherAIClient
 from .firestore_client import FirestoreClient
+from .startup_profile import StartupProfile
+from .status_store import ProcessingStatusStore, create_status_store
 
 logger = logging.getLogger(__name__)
 
@@ -29,25 +31,32 @@ class CandidateProcessor:
         self.together_ai_client = TogetherAIClient(config)
         self.firestore_client = FirestoreClient(config)
         
-        # Processing status tracking
-        self._processing_status: Dict[str, ProcessingStatus] = {}
+        # Processing status and idempotency claims, shared across instances when Redis is configured
+        self.status_store: ProcessingStatusStore = create_status_store(config)
         
         # Retry configuration
         self.max_retries = config.retry_max_attempts
         self.base_delay = config.retry_base_delay
         
-    async def initialize(self):
-        """Initialize processor components"""
-        logger.info("Initializing Together AI client...")
-        await self.together_ai_client.initialize()
-        logger.info("Together AI client initialized")
-
-        logger.info("Initializing Firestore client...")
-        await self.firestore_client.initialize()
-        logger.info("Firestore client initialized")
-
+    async def initialize(self, profile: Optional[StartupProfile] = None):
+        """Initialize processor components concurrently, timing each client"""
+        profile = profile or StartupProfile()
+        
+        async def init_client(name: str, client):
+            with profile.phase(f"init:{name}"):
+                await client.initialize()
+            logger.info(f"{name} client initialized in {profile.phases[f'init:{name}']:.3f}s")
+        
+        await asyncio.gather(
+            init_client("together_ai", self.together_ai_client),
+            init_client("firestore", self.firestore_client),
+        )
         logger.info("Candidate processor initialized")
     
+    @property
+    def ready(self) -> bool:
+        return self.together_ai_client.session is not None and self.firestore_client.ready
+    
     async def shutdown(self):
         """Cleanup processor components"""
         await self.together_ai_client.shutdown()
@@ -192,7 +201,7 @@ class CandidateProcessor:
         try:
             # Update status
             logger.info(f"[DEBUG] Updating status to IN_PROGRESS for: {candidate_id}")
-            self.update_processing_status(candidate_id, ProcessingStatus.IN_PROGRESS)
+            await self.update_processing_status(candidate_id, ProcessingStatus.IN_PROGRESS)
 
             # Fetch candidate data
             logger.info(f"[DEBUG] Fetching candidate data for: {candidate_id}")
@@ -213,7 +222,7 @@ class CandidateProcessor:
                 raise Exception("Failed to store processing results")
             
             # Update status
-            self.update_processing_status(candidate_id, ProcessingStatus.COMPLETED)
+            await self.update_processing_status(candidate_id, ProcessingStatus.COMPLETED)
             
             processing_time = (datetime.now() - start_time).total_seconds()
             
@@ -226,7 +235,7 @@ class CandidateProcessor:
             
         except Exception as e:
             # Update status
-            self.update_processing_status(candidate_id, ProcessingStatus.FAILED)
+            await self.update_processing_status(candidate_id, ProcessingStatus.FAILED)
             
             return ProcessingResult(
                 candidate_id=candidate_id,
@@ -235,13 +244,16 @@ class CandidateProcessor:
                 timestamp=datetime.now().isoformat()
             )
     
-    async def process_batch(self, candidate_ids: List[str], max_concurrent: int = 5) -> List[ProcessingResult]:
+    async def process_batch(self, candidate_ids: List[str], max_concurrent: Optional[int] = None) -> List[ProcessingResult]:
         """
         Process multiple candidates concurrently
         
+        Together AI calls are throttled by the client's adaptive limiter, so
+        this bound only caps how many candidates are in the pipeline at once.
+        
         Args:
             candidate_ids: List of candidate IDs to process
-            max_concurrent: Maximum number of concurrent processes
+            max_concurrent: Maximum number of concurrent processes (default MAX_CONCURRENT_PROCESSES)
             
         Returns:
             List[ProcessingResult]: Results for each candidate
@@ -249,7 +261,7 @@ class CandidateProcessor:
         logger.info(f"Starting batch processing for {len(candidate_ids)} candidates")
         
         # Use semaphore to limit concurrency
-        semaphore = asyncio.Semaphore(max_concurrent)
+        semaphore = asyncio.Semaphore(max_concurrent or self.config.max_concurrent_processes)
         
         async def process_with_semaphore(candidate_id: str):
             async with semaphore:
@@ -315,14 +327,35 @@ class CandidateProcessor:
         # All retries exhausted
         raise last_exception
     
-    def update_processing_status(self, candidate_id: str, status: ProcessingStatus):
+    async def update_processing_status(self, candidate_id: str, status: ProcessingStatus):
         """Update processing status for a candidate"""
-        self._processing_status[candidate_id] = status
+        await self.status_store.set_status(candidate_id, status.value)
         logger.debug(f"Updated status for {candidate_id}: {status.value}")
     
-    def get_processing_status(self, candidate_id: str) -> Optional[ProcessingStatus]:
+    async def get_processing_status(self, candidate_id: str) -> Optional[ProcessingStatus]:
         """Get current processing status for a candidate"""
-        return self._processing_status.get(candidate_id)
+        value = await self.status_store.get_status(candidate_id)
+        return ProcessingStatus(value) if value else None
+    
+    async def claim_message(self, message_id: str, candidate_id: str) -> str:
+        """
+        Claim a Pub/Sub delivery before enriching it
+        
+        Returns:
+            str: "claimed", "duplicate" for a redelivered message, or "locked"
+            while another message for the candidate is in progress
+        """
+        return await self.status_store.claim(message_id, candidate_id)
+    
+    async def release_message(self, message_id: str, candidate_id: str):
+        """Give up a claim for a message that will not be processed here"""
+        await self.status_store.release(message_id, candidate_id)
+    
+    async def finish_message(self, message_id: str, candidate_id: str, status: ProcessingStatus):
+        """Record the outcome of a claimed message; failed messages can be claimed again"""
+        await self.status_store.finish(
+            message_id, candidate_id, status.value, failed=status == ProcessingStatus.FAILED
+        )
     
     async def health_check(self) -> bool:
         """
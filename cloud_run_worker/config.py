@@ -23,6 +23,12 @@ class Config:
         self.pubsub_topic = os.getenv("PUBSUB_TOPIC", "candidate-process-requests")
         self.pubsub_subscription = os.getenv("PUBSUB_SUBSCRIPTION", "candidate-worker-sub")
         self.dead_letter_topic = os.getenv("DEAD_LETTER_TOPIC", "candidate-process-dlq")
+        self.dead_letter_publish_timeout = float(os.getenv("DEAD_LETTER_PUBLISH_TIMEOUT", "30"))
+        self.dead_letter_batch_max_messages = int(os.getenv("DEAD_LETTER_BATCH_MAX_MESSAGES", "100"))
+        self.dead_letter_batch_max_latency = float(os.getenv("DEAD_LETTER_BATCH_MAX_LATENCY", "0.05"))  # seconds
+        self.dead_letter_max_pending = int(os.getenv("DEAD_LETTER_MAX_PENDING", "1000"))
+        # Failed DLQ publishes land here and are replayed on startup
+        self.dead_letter_spill_path = os.getenv("DEAD_LETTER_SPILL_PATH", "/tmp/headhunter-dlq-spill.jsonl")
         
         # Together AI configuration (align with Stage 1 model env)
         self.together_ai_model = os.getenv("TOGETHER_MODEL_STAGE1", os.getenv("TOGETHER_AI_MODEL", "Qwen/Qwen2.5-32B-Instruct"))
@@ -30,15 +36,47 @@ class Config:
         self.together_ai_timeout = int(os.getenv("TOGETHER_AI_TIMEOUT", "20"))  # Reduced from 60s - typical response 3-12s
         self.together_ai_max_retries = int(os.getenv("TOGETHER_AI_MAX_RETRIES", "1"))  # Reduced from 3 - LLM failures rarely transient
         
+        # Stream completions and validate JSON as it arrives; the regular request is the fallback
+        self.together_ai_streaming = os.getenv("TOGETHER_AI_STREAMING", "true").lower() == "true"
+        
+        # Adaptive (AIMD) concurrency window for Together AI calls
+        self.together_ai_initial_concurrency = int(os.getenv("TOGETHER_AI_INITIAL_CONCURRENCY", "4"))
+        self.together_ai_max_concurrency = int(os.getenv("TOGETHER_AI_MAX_CONCURRENCY", "64"))
+        
+        # Together AI response cache: Redis when LLM_CACHE_REDIS_URL is set, else a local SQLite file
+        self.llm_cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+        self.llm_cache_path = os.getenv("LLM_CACHE_PATH", "/tmp/headhunter-llm-cache.sqlite3")
+        self.llm_cache_redis_url = os.getenv("LLM_CACHE_REDIS_URL")
+        self.llm_cache_ttl = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        
         # Firestore configuration
         self.firestore_collection = os.getenv("FIRESTORE_COLLECTION", "candidates")
         self.firestore_timeout = int(os.getenv("FIRESTORE_TIMEOUT", "30"))
+        self.firestore_batching_enabled = os.getenv("FIRESTORE_BATCHING_ENABLED", "true").lower() == "true"
+        self.firestore_batch_size = int(os.getenv("FIRESTORE_BATCH_SIZE", "50"))
+        self.firestore_batch_window_ms = float(os.getenv("FIRESTORE_BATCH_WINDOW_MS", "5"))
         
         # Processing configuration
         self.max_concurrent_processes = int(os.getenv("MAX_CONCURRENT_PROCESSES", "10"))
         self.processing_timeout = int(os.getenv("PROCESSING_TIMEOUT", "300"))  # 5 minutes
         self.retry_max_attempts = int(os.getenv("RETRY_MAX_ATTEMPTS", "1"))  # Reduced from 3 - single retry sufficient
         self.retry_base_delay = float(os.getenv("RETRY_BASE_DELAY", "1.0"))
+
+        # Webhook work queue: max_concurrent_processes workers drain up to queue_max_depth waiting messages
+        self.queue_max_depth = int(os.getenv("QUEUE_MAX_DEPTH", "100"))
+        self.queue_drain_timeout = float(os.getenv("QUEUE_DRAIN_TIMEOUT", "8"))
+
+        # Pull-subscription consumer (backfills run as a Cloud Run job via pull_consumer.py)
+        self.pull_max_messages = int(os.getenv("PULL_MAX_MESSAGES", str(self.max_concurrent_processes)))
+        self.pull_max_bytes = int(os.getenv("PULL_MAX_BYTES", str(100 * 1024 * 1024)))
+        self.pull_max_lease_duration = int(os.getenv("PULL_MAX_LEASE_DURATION", "3600"))
+        self.pull_idle_timeout = float(os.getenv("PULL_IDLE_TIMEOUT", "60"))  # 0 runs until stopped
+        
+        # Processing status / idempotency store (Redis shares claims across instances)
+        self.status_redis_url = os.getenv("STATUS_REDIS_URL")
+        self.status_ttl = int(os.getenv("STATUS_TTL", str(7 * 24 * 3600)))
+        self.idempotency_ttl = int(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))
+        self.status_max_entries = int(os.getenv("STATUS_MAX_ENTRIES", "10000"))
         
         # Region and providers per PRD
         self.region = os.getenv("REGION", "us-central1")
@@ -81,9 +119,30 @@ class Config:
         if self.max_concurrent_processes <= 0:
             errors.append("MAX_CONCURRENT_PROCESSES must be positive")
         
+        if not 1 <= self.together_ai_initial_concurrency <= self.together_ai_max_concurrency:
+            errors.append("TOGETHER_AI_INITIAL_CONCURRENCY must be between 1 and TOGETHER_AI_MAX_CONCURRENCY")
+        
         if self.processing_timeout <= 0:
             errors.append("PROCESSING_TIMEOUT must be positive")
 
+        if self.queue_max_depth <= 0:
+            errors.append("QUEUE_MAX_DEPTH must be positive")
+
+        if self.pull_max_messages <= 0 or self.pull_max_bytes <= 0:
+            errors.append("PULL_MAX_MESSAGES and PULL_MAX_BYTES must be positive")
+
+        if self.idempotency_ttl <= 0:
+            errors.append("IDEMPOTENCY_TTL must be positive")
+
+        if self.dead_letter_max_pending <= 0:
+            errors.append("DEAD_LETTER_MAX_PENDING must be positive")
+
+        if self.firestore_batch_size <= 0:
+            errors.append("FIRESTORE_BATCH_SIZE must be positive")
+
+        if self.firestore_batch_window_ms < 0:
+            errors.append("FIRESTORE_BATCH_WINDOW_MS must not be negative")
+
         # Region enforcement (US region only)
         if self.region != "us-central1":
             errors.append("REGION must be 'us-central1'")
@@ -110,8 +169,12 @@ class Config:
             "together_ai_base_url": self.together_ai_base_url,
             "together_ai_timeout": self.together_ai_timeout,
             "firestore_collection": self.firestore_collection,
+            "firestore_batching_enabled": self.firestore_batching_enabled,
+            "firestore_batch_size": self.firestore_batch_size,
+            "firestore_batch_window_ms": self.firestore_batch_window_ms,
             "max_concurrent_processes": self.max_concurrent_processes,
             "processing_timeout": self.processing_timeout,
+            "queue_max_depth": self.queue_max_depth,
             "log_level": self.log_level,
             "metrics_enabled": self.metrics_enabled,
             "region": self.region,
@@ -0,0 +1,145 @@
+"""
+Non-blocking dead-letter publishing with a local spill file for the Cloud Run worker
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterPublisher:
+    """
+    Publishes dead-letter messages without waiting on the Pub/Sub round trip.
+
+    ``publish`` hands the message to the (batching) Pub/Sub publisher and
+    returns immediately; the publish future is bridged into asyncio and
+    awaited in a background task. Messages whose publish fails or times out,
+    or that arrive while ``max_pending`` publishes are already outstanding,
+    are appended to ``spill_path`` as JSON lines. ``replay_spill`` re-publishes
+    that file, typically on the next startup. Delivery is at-least-once: a
+    publish that times out locally may still land, so the DLQ can see a
+    duplicate after replay.
+    """
+
+    def __init__(
+        self,
+        publisher: Any,
+        topic_path: str,
+        spill_path: str,
+        publish_timeout: float = 30.0,
+        max_pending: int = 1000,
+    ):
+        self.publisher = publisher
+        self.topic_path = topic_path
+        self.spill_path = spill_path
+        self.publish_timeout = publish_timeout
+        self.max_pending = max_pending
+
+        self._pending: Set[asyncio.Task] = set()
+        self._spill_lock = threading.Lock()
+        self.published = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def publish(self, data: bytes, attributes: Optional[Dict[str, str]] = None) -> None:
+        """Queue ``data`` for the dead-letter topic; never waits for the broker"""
+        attributes = attributes or {}
+        if len(self._pending) >= self.max_pending:
+            self._spill(data, attributes, "too many pending publishes")
+            return
+
+        try:
+            future = self.publisher.publish(self.topic_path, data, **attributes)
+        except Exception as e:
+            self._spill(data, attributes, e)
+            return
+
+        task = asyncio.create_task(self._await_publish(future, data, attributes))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _await_publish(self, future: Any, data: bytes, attributes: Dict[str, str]):
+        try:
+            message_id = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.publish_timeout)
+            self.published += 1
+            logger.info(
+                f"Sent message to dead letter queue: {message_id}, "
+                f"candidate: {attributes.get('candidate_id', 'unknown')}"
+            )
+        except (Exception, asyncio.CancelledError) as e:
+            # Cancelled by flush() at shutdown: keep the message for the next run
+            self._spill(data, attributes, str(e) or type(e).__name__)
+
+    def _spill(self, data: bytes, attributes: Dict[str, str], reason: Any):
+        record = {"data": base64.b64encode(data).decode("ascii"), "attributes": attributes}
+        try:
+            with self._spill_lock:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            self.spilled += 1
+            logger.warning(
+                f"Dead letter publish failed ({reason}); spilled candidate "
+                f"{attributes.get('candidate_id', 'unknown')} to {self.spill_path}"
+            )
+        except OSError as e:
+            logger.error(f"Failed to spill dead letter message: {e}")
+
+    async def replay_spill(self) -> int:
+        """Re-publish messages spilled by a previous run; returns how many were queued"""
+        if not os.path.exists(self.spill_path):
+            return 0
+
+        # Move the file aside so anything that fails again is spilled to a fresh file
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            os.replace(self.spill_path, replay_path)
+
+        count = 0
+        with open(replay_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    data = base64.b64decode(record["data"])
+                except (ValueError, KeyError) as e:
+                    logger.error(f"Skipping corrupt dead letter spill record: {e}")
+                    continue
+                await self.publish(data, record.get("attributes") or {})
+                count += 1
+
+        os.remove(replay_path)
+        self.replayed += count
+        if count:
+            logger.info(f"Replaying {count} spilled dead letter messages")
+        return count
+
+    async def flush(self, timeout: Optional[float] = None):
+        """Wait for outstanding publishes; anything still pending after ``timeout`` is spilled"""
+        if not self._pending:
+            return
+        _, not_done = await asyncio.wait(set(self._pending), timeout=timeout)
+        if not_done:
+            logger.warning(f"Spilling {len(not_done)} dead letter publishes still pending after flush")
+            for task in not_done:
+                task.cancel()
+            await asyncio.gather(*not_done, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "published": self.published,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+        }
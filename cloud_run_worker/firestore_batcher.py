@@ -0,0 +1,166 @@
+"""
+Micro-batching for Firestore reads and writes issued by concurrent workers
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Firestore caps a WriteBatch at 500 operations
+FIRESTORE_MAX_BATCH_WRITES = 500
+
+PendingItem = Tuple[str, Any, asyncio.Future]
+
+
+class _Coalescer:
+    """Collects submissions and flushes them after ``window`` seconds or ``max_items`` items"""
+
+    def __init__(self, flush: Callable[[List[PendingItem]], Awaitable[None]], max_items: int, window: float):
+        self.flush = flush
+        self.max_items = max_items
+        self.window = window
+        self._pending: List[PendingItem] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key: str, value: Any = None) -> Any:
+        future = asyncio.get_event_loop().create_future()
+        self._pending.append((key, value, future))
+        if len(self._pending) >= self.max_items:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    def _flush_now(self):
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        items, self._pending = self._pending, []
+        if not items:
+            return
+        self.batches += 1
+        self.items += len(items)
+        task = asyncio.create_task(self._run(items))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._flush_now()
+
+    async def _run(self, items: List[PendingItem]):
+        try:
+            await self.flush(items)
+        except Exception as e:
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self):
+        self._flush_now()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+
+class FirestoreBatcher:
+    """
+    Coalesces concurrent document reads and updates for one collection.
+
+    Reads issued within ``window_ms`` of each other (or until ``max_batch``
+    are waiting) are fetched with a single ``db.get_all``; updates are
+    committed through one ``WriteBatch``. Every caller gets its own result:
+    the document dict (or None) for reads, and True/False for updates.
+    Because a WriteBatch is atomic, a failed commit is retried document by
+    document so one bad update does not fail its neighbours.
+    """
+
+    def __init__(self, db: Any, collection_name: str, max_batch: int = 50, window_ms: float = 5.0):
+        self.db = db
+        self.collection_name = collection_name
+        max_batch = max(1, min(max_batch, FIRESTORE_MAX_BATCH_WRITES))
+        window = max(0.0, window_ms) / 1000.0
+        self._reads = _Coalescer(self._flush_reads, max_batch, window)
+        self._writes = _Coalescer(self._flush_writes, max_batch, window)
+
+    def _document(self, doc_id: str):
+        return self.db.collection(self.collection_name).document(doc_id)
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Read a document through the next batched ``get_all``"""
+        return await self._reads.submit(doc_id)
+
+    async def update(self, doc_id: str, data: Dict[str, Any]) -> bool:
+        """Apply ``doc_ref.update(data)`` through the next batched commit"""
+        return await self._writes.submit(doc_id, data)
+
+    async def close(self):
+        """Flush anything still pending"""
+        await self._reads.close()
+        await self._writes.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "read_batches": self._reads.batches,
+            "reads": self._reads.items,
+            "write_batches": self._writes.batches,
+            "writes": self._writes.items,
+            "avg_read_batch": self._reads.items / self._reads.batches if self._reads.batches else 0.0,
+            "avg_write_batch": self._writes.items / self._writes.batches if self._writes.batches else 0.0,
+        }
+
+    async def _flush_reads(self, items: List[PendingItem]):
+        doc_ids = list(dict.fromkeys(doc_id for doc_id, _, _ in items))
+
+        def _get_all() -> Dict[str, Optional[Dict[str, Any]]]:
+            found = {doc_id: None for doc_id in doc_ids}
+            for snapshot in self.db.get_all([self._document(doc_id) for doc_id in doc_ids]):
+                if snapshot.exists:
+                    found[snapshot.id] = snapshot.to_dict()
+            return found
+
+        documents = await asyncio.get_event_loop().run_in_executor(None, _get_all)
+        logger.debug(f"Batched read of {len(doc_ids)} documents for {len(items)} requests")
+        for doc_id, _, future in items:
+            if not future.done():
+                data = documents.get(doc_id)
+                # Waiters on the same document get independent copies
+                future.set_result(dict(data) if data is not None else None)
+
+    async def _flush_writes(self, items: List[PendingItem]):
+        # Updates to the same document within a window are merged in submission order
+        merged: Dict[str, Dict[str, Any]] = {}
+        for doc_id, data, _ in items:
+            merged.setdefault(doc_id, {}).update(data)
+
+        def _commit() -> Dict[str, Optional[Exception]]:
+            batch = self.db.batch()
+            for doc_id, data in merged.items():
+                batch.update(self._document(doc_id), data)
+            try:
+                batch.commit()
+                return {doc_id: None for doc_id in merged}
+            except Exception as e:
+                logger.warning(f"Batched commit of {len(merged)} updates failed ({e}); retrying individually")
+
+            errors: Dict[str, Optional[Exception]] = {}
+            for doc_id, data in merged.items():
+                try:
+                    self._document(doc_id).update(data)
+                    errors[doc_id] = None
+                except Exception as item_error:
+                    errors[doc_id] = item_error
+            return errors
+
+        errors = await asyncio.get_event_loop().run_in_executor(None, _commit)
+        for doc_id, _, future in items:
+            if future.done():
+                continue
+            error = errors.get(doc_id)
+            if error is not None:
+                logger.error(f"Failed to update document {doc_id}: {error}")
+            future.set_result(error is None)
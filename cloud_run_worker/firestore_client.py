@@ -5,16 +5,23 @@ Firestore client for candidate data operations
 import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-
-from google.cloud import firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 
 from .config import Config
+from .firestore_batcher import FirestoreBatcher
+
+if TYPE_CHECKING:
+    from google.cloud import firestore
 
 logger = logging.getLogger(__name__)
 
 
+def _field_filter(field_path: str, op_string: str, value: Any):
+    # google.cloud.firestore is imported on first use, off the cold-start path
+    from google.cloud.firestore_v1.base_query import FieldFilter
+    return FieldFilter(field_path, op_string, value)
+
+
 class FirestoreClient:
     """Client for Firestore database operations"""
     
@@ -24,19 +31,39 @@ class FirestoreClient:
         self.collection_name = config.firestore_collection
         self.timeout = config.firestore_timeout
         
-        self.db: Optional[firestore.Client] = None
+        self.db: Optional["firestore.Client"] = None
+        self.batcher: Optional[FirestoreBatcher] = None
         
     async def initialize(self):
         """Initialize Firestore client"""
         try:
-            self.db = firestore.Client(project=self.project_id)
+            # Importing and building the client costs most of a second; keep it off the event loop
+            self.db = await asyncio.get_event_loop().run_in_executor(None, self._create_client)
+            if self.config.firestore_batching_enabled:
+                # Concurrent get/update calls are coalesced into get_all / WriteBatch round trips
+                self.batcher = FirestoreBatcher(
+                    self.db,
+                    self.collection_name,
+                    max_batch=self.config.firestore_batch_size,
+                    window_ms=self.config.firestore_batch_window_ms,
+                )
             logger.info(f"Firestore client initialized for project: {self.project_id}")
         except Exception as e:
             logger.error(f"Failed to initialize Firestore client: {e}")
             raise
     
+    def _create_client(self) -> "firestore.Client":
+        from google.cloud import firestore
+        return firestore.Client(project=self.project_id)
+    
+    @property
+    def ready(self) -> bool:
+        return self.db is not None
+    
     async def shutdown(self):
         """Cleanup Firestore client"""
+        if self.batcher:
+            await self.batcher.close()
         if self.db:
             self.db.close()
             logger.info("Firestore client shutdown complete")
@@ -55,17 +82,20 @@ class FirestoreClient:
             if not self.db:
                 raise Exception("Firestore client not initialized")
             
-            # Get document reference
-            doc_ref = self.db.collection(self.collection_name).document(candidate_id)
-            
-            # Execute get operation in thread pool to avoid blocking
-            doc = await asyncio.get_event_loop().run_in_executor(
-                None, 
-                doc_ref.get
-            )
+            if self.batcher:
+                data = await self.batcher.get(candidate_id)
+            else:
+                # Get document reference
+                doc_ref = self.db.collection(self.collection_name).document(candidate_id)
+                
+                # Execute get operation in thread pool to avoid blocking
+                doc = await asyncio.get_event_loop().run_in_executor(
+                    None, 
+                    doc_ref.get
+                )
+                data = doc.to_dict() if doc.exists else None
             
-            if doc.exists:
-                data = doc.to_dict()
+            if data is not None:
                 logger.debug(f"Retrieved candidate: {candidate_id}")
                 return data
             else:
@@ -94,6 +124,12 @@ class FirestoreClient:
             # Add update timestamp
             update_data["updated_at"] = datetime.now()
             
+            if self.batcher:
+                success = await self.batcher.update(candidate_id, update_data)
+                if success:
+                    logger.debug(f"Updated candidate: {candidate_id}")
+                return success
+            
             # Get document reference
             doc_ref = self.db.collection(self.collection_name).document(candidate_id)
             
@@ -165,7 +201,7 @@ class FirestoreClient:
             # Build query
             collection_ref = self.db.collection(self.collection_name)
             query = collection_ref.where(
-                filter=FieldFilter("org_id", "==", org_id)
+                filter=_field_filter("org_id", "==", org_id)
             ).limit(limit)
             
             # Execute query in thread pool
@@ -206,7 +242,7 @@ class FirestoreClient:
             # Build query
             collection_ref = self.db.collection(self.collection_name)
             query = collection_ref.where(
-                filter=FieldFilter("status", "==", status)
+                filter=_field_filter("status", "==", status)
             ).limit(limit)
             
             # Execute query in thread pool
@@ -354,7 +390,7 @@ class FirestoreClient:
             status_counts = {}
             for status in ["pending_enrichment", "enriched", "failed", "processing"]:
                 query = collection_ref.where(
-                    filter=FieldFilter("status", "==", status)
+                    filter=_field_filter("status", "==", status)
                 )
                 
                 # Count documents
@@ -0,0 +1,110 @@
+"""
+Fixed-memory latency histograms for the Cloud Run worker
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram of durations in seconds.
+
+    Bucket ``i`` covers ``(min_value * growth**(i-1), min_value * growth**i]``,
+    so memory is fixed by the value range and every quantile is reported
+    within ``growth - 1`` relative error (5% by default). Values below
+    ``min_value`` land in bucket 0 and values above ``max_value`` in the last
+    bucket; the exact min/max are tracked separately. ``record`` is O(1) and
+    ``quantile`` walks the bucket array without copying any samples.
+    """
+
+    def __init__(self, min_value: float = 1e-4, max_value: float = 3600.0, growth: float = 1.05):
+        if min_value <= 0 or max_value <= min_value or growth <= 1.0:
+            raise ValueError("LatencyHistogram needs 0 < min_value < max_value and growth > 1")
+        self.min_value = min_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self._num_buckets = int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 1
+        self._counts: List[int] = [0] * self._num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = int(math.ceil(math.log(value / self.min_value) / self._log_growth))
+        return min(index, self._num_buckets - 1)
+
+    def _upper_bound(self, index: int) -> float:
+        return self.min_value * self.growth ** index
+
+    def record(self, value: float):
+        """Add one sample"""
+        value = max(0.0, float(value))
+        self._counts[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile ``q`` (0..1); 0.0 when empty"""
+        return self.quantiles([q])[q]
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, float]:
+        """Several quantiles in one pass over the buckets"""
+        qs = sorted(qs)
+        result = {q: 0.0 for q in qs}
+        if not self.count:
+            return result
+
+        # The extremes are tracked exactly
+        for q in qs:
+            if q <= 0.0:
+                result[q] = self.min
+            elif q >= 1.0:
+                result[q] = self.max
+        ranks = [(q, int(math.ceil(q * self.count))) for q in qs if 0.0 < q < 1.0]
+        cumulative = 0
+        pending = 0
+        for index, bucket_count in enumerate(self._counts):
+            if not bucket_count:
+                continue
+            cumulative += bucket_count
+            while pending < len(ranks) and ranks[pending][1] <= cumulative:
+                # Bucket upper bound, clamped to what was actually observed
+                value = min(self._upper_bound(index), self.max)
+                result[ranks[pending][0]] = max(value, self.min)
+                pending += 1
+            if pending == len(ranks):
+                break
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        """Summary used by the JSON metrics endpoints"""
+        quantiles = self.quantiles([0.5, 0.95, 0.99])
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.mean,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+            "p50": quantiles[0.5],
+            "p95": quantiles[0.95],
+            "p99": quantiles[0.99],
+        }
+
+    def reset(self):
+        self._counts = [0] * self._num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
@@ -0,0 +1,233 @@
+"""
+Content-addressed cache and in-flight coalescing for Together AI completions
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Optional Redis backend shared by all worker instances
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+
+def prompt_cache_key(model: str, system_prompt_version: str, user_prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """SHA-256 over everything that determines the completion"""
+    digest = hashlib.sha256()
+    for part in (model, system_prompt_version, json.dumps(params or {}, sort_keys=True), user_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ResponseCacheBackend:
+    """Stores JSON-serialisable completion results by key"""
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteResponseCache(ResponseCacheBackend):
+    """Local SQLite file; survives restarts of the same instance"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl_seconds: int = 7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), time.time() + self.ttl_seconds),
+            )
+            self._conn.commit()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.get_event_loop().run_in_executor(None, self._get, key)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await asyncio.get_event_loop().run_in_executor(None, self._set, key, value)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisResponseCache(ResponseCacheBackend):
+    """Redis backend shared across instances"""
+
+    name = "redis"
+
+    def __init__(self, client: Any, ttl_seconds: int = 7 * 24 * 3600, prefix: str = "llm:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await self.client.get(self.prefix + key)
+        return json.loads(value) if value else None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value, default=str), ex=self.ttl_seconds)
+
+
+class CompletionCache:
+    """
+    Cache lookups plus coalescing of identical in-flight prompts.
+
+    ``get_or_compute(key, compute)`` returns ``(value, source)``. ``source``
+    is "cache" for a stored result and "coalesced" when the call joined an
+    identical request already in flight. Otherwise it is "computed" and the
+    result was stored. ``compute`` must return a dict with a ``usage`` entry
+    so tokens saved can be counted. Backend errors are logged and treated as
+    misses; the API call always goes ahead.
+    """
+
+    def __init__(self, backend: Optional[ResponseCacheBackend] = None):
+        self.backend = backend
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.tokens_saved = 0
+        self.backend_errors = 0
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]):
+        while key in self._inflight:
+            inflight = self._inflight[key]
+            try:
+                value = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled: take over (or join whoever did) instead of failing
+                if inflight.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+            self.coalesced += 1
+            self.tokens_saved += _total_tokens(value)
+            return value, "coalesced"
+
+        # Register before the first await so concurrent callers coalesce onto us
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[key] = future
+        try:
+            cached = await self._backend_get(key)
+            if cached is not None:
+                self.hits += 1
+                self.tokens_saved += _total_tokens(cached)
+                future.set_result(cached)
+                return cached, "cache"
+
+            self.misses += 1
+            value = await compute()
+            future.set_result(value)
+            await self._backend_set(key, value)
+            return value, "computed"
+        except asyncio.CancelledError:
+            # The cancellation is ours alone; waiters see a cancelled future and retry
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Waiters re-raise it; mark retrieved so an unwatched future does not warn
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _backend_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.backend:
+            return None
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"LLM response cache read failed: {e}")
+            return None
+
+    async def _backend_set(self, key: str, value: Dict[str, Any]):
+        if not self.backend:
+            return
+        try:
+            await self.backend.set(key, value)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"LLM response cache write failed: {e}")
+
+    async def close(self):
+        if self.backend:
+            await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+            "backend_errors": self.backend_errors,
+        }
+
+
+def _total_tokens(value: Dict[str, Any]) -> int:
+    usage = value.get("usage") or {}
+    try:
+        return int(usage.get("total_tokens") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def create_completion_cache(config: Any) -> CompletionCache:
+    """Redis when LLM_CACHE_REDIS_URL is set, else a local SQLite file; no backend when disabled"""
+    if not config.llm_cache_enabled:
+        return CompletionCache(None)
+    try:
+        if config.llm_cache_redis_url and REDIS_AVAILABLE:
+            backend: ResponseCacheBackend = RedisResponseCache(
+                aioredis.from_url(config.llm_cache_redis_url), ttl_seconds=config.llm_cache_ttl
+            )
+        else:
+            backend = SQLiteResponseCache(config.llm_cache_path, ttl_seconds=config.llm_cache_ttl)
+    except Exception as e:
+        logger.warning(f"LLM response cache unavailable, only coalescing in-flight prompts: {e}")
+        backend = None
+    return CompletionCache(backend)
@@ -4,21 +4,44 @@ FastAPI service that processes candidate enrichment requests via Pub/Sub
 """
 
 import asyncio
+import importlib
 import json
 import logging
 import os
 from datetime import datetime
 from typing import Dict, Any, Optional
 
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-import uvicorn
+try:
+    from .startup_profile import LazyInitializer, StartupProfile
+except ImportError:
+    # Started from inside cloud_run_worker/ (uvicorn main:app)
+    from startup_profile import LazyInitializer, StartupProfile
+
+# Created first so the imports below are part of the cold-start profile
+startup_profile = StartupProfile()
+
+with startup_profile.phase("import:fastapi"):
+    from fastapi import FastAPI, Request, HTTPException
+    from fastapi.responses import JSONResponse, PlainTextResponse
+
 
-from config import Config
-from pubsub_handler import PubSubHandler
-from candidate_processor import CandidateProcessor
-from models import PubSubMessage, ProcessingResult
-from metrics import MetricsCollector
+def _import_worker_module(name: str):
+    """Import a sibling module, timed for the startup profile"""
+    with startup_profile.phase(f"import:{name}"):
+        return importlib.import_module(f"{__package__}.{name}" if __package__ else name)
+
+
+# google-cloud clients are imported when they are first initialized, not here
+Config = _import_worker_module("config").Config
+PubSubHandler = _import_worker_module("pubsub_handler").PubSubHandler
+CandidateProcessor = _import_worker_module("candidate_processor").CandidateProcessor
+_models = _import_worker_module("models")
+PubSubMessage, ProcessingResult, ProcessingStatus = _models.PubSubMessage, _models.ProcessingResult, _models.ProcessingStatus
+MetricsCollector = _import_worker_module("metrics").MetricsCollector
+_work_queue = _import_worker_module("work_queue")
+PriorityWorkQueue, WorkQueueFull = _work_queue.PriorityWorkQueue, _work_queue.WorkQueueFull
+_status_store = _import_worker_module("status_store")
+CLAIMED, DUPLICATE, LOCKED = _status_store.CLAIMED, _status_store.DUPLICATE, _status_store.LOCKED
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -32,19 +55,63 @@ app = FastAPI(
 )
 
 # Initialize components - conditional for testing
+config_error: Optional[str] = None
 try:
     config = Config()
     pubsub_handler = PubSubHandler(config)
     candidate_processor = CandidateProcessor(config)
     metrics = MetricsCollector(config)
+    candidate_processor.together_ai_client.metrics = metrics
+    metrics.register_gauge(
+        "together_ai_concurrency_limit",
+        "Current adaptive concurrency window for Together AI calls",
+        lambda: candidate_processor.together_ai_client.limiter.limit,
+    )
+    metrics.register_gauge(
+        "together_ai_in_flight",
+        "Together AI requests currently in flight",
+        lambda: candidate_processor.together_ai_client.limiter.in_flight,
+    )
 except ValueError as e:
     # Allow imports during testing when env vars may not be set
     logger.warning(f"Configuration warning: {e}")
+    config_error = str(e)
     config = None
     pubsub_handler = None
     candidate_processor = None
     metrics = None
 
+# Webhook worker pool, started in startup_event
+work_queue: Optional[PriorityWorkQueue] = None
+
+# Retry-After for deliveries whose candidate is locked by another message
+LOCKED_RETRY_AFTER_SECONDS = 10
+# Retry-After for deliveries that arrive while the clients cannot be initialized
+UNAVAILABLE_RETRY_AFTER_SECONDS = 30
+
+
+async def _initialize_clients():
+    """Bring up the Together AI, Firestore and Pub/Sub clients concurrently"""
+    if candidate_processor is None or pubsub_handler is None:
+        raise RuntimeError(f"Worker configuration failed to load: {config_error}")
+    with startup_profile.phase("init:total"):
+        await asyncio.gather(
+            candidate_processor.initialize(startup_profile),
+            _initialize_pubsub(),
+        )
+    startup_profile.mark("ready")
+    logger.info(f"Worker clients ready: {startup_profile.snapshot()}")
+
+
+async def _initialize_pubsub():
+    with startup_profile.phase("init:pubsub"):
+        await pubsub_handler.initialize()
+
+
+# Clients are warmed up in the background at startup and awaited on first use
+clients = LazyInitializer(_initialize_clients, name="worker clients")
+startup_profile.mark("imported")
+
 
 @app.get("/health")
 async def health_check():
@@ -77,6 +144,27 @@ async def health_check():
         )
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: green only once every required client is initialized"""
+    components = {
+        "together_ai": bool(candidate_processor and candidate_processor.together_ai_client.session is not None),
+        "firestore": bool(candidate_processor and candidate_processor.firestore_client.ready),
+        "pubsub": bool(pubsub_handler and pubsub_handler.ready),
+    }
+    ready = clients.ready and all(components.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "warming_up",
+            "components": components,
+            "error": clients.last_error,
+            "startup": startup_profile.snapshot(),
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
+
 @app.get("/metrics")
 async def get_metrics():
     """Return processing metrics for monitoring"""
@@ -86,28 +174,96 @@ async def get_metrics():
         "error_count": metrics.get_error_count(),
         "success_rate": metrics.get_success_rate(),
         "active_processors": metrics.get_active_processors(),
+        "latency": metrics.processing_times.snapshot(),
+        "llm_cache": metrics.get_llm_cache_stats(),
+        "together_ai_limiter": candidate_processor.together_ai_client.limiter.stats(),
+        "stage_latencies": {stage: hist.snapshot() for stage, hist in metrics.stage_latencies.items()},
+        "queue": work_queue.stats() if work_queue else None,
+        "idempotency": candidate_processor.status_store.stats() if candidate_processor else None,
+        "dead_letter": pubsub_handler.dead_letter.stats() if pubsub_handler and pubsub_handler.dead_letter else None,
+        "firestore_batching": candidate_processor.firestore_client.batcher.stats()
+        if candidate_processor and candidate_processor.firestore_client.batcher else None,
+        "startup": startup_profile.snapshot(),
         "timestamp": datetime.now().isoformat()
     }
 
 
+@app.get("/metrics/prometheus")
+async def get_prometheus_metrics():
+    """Expose worker metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/pubsub/webhook")
-async def pubsub_webhook(request: Request, background_tasks: BackgroundTasks):
+async def pubsub_webhook(request: Request):
     """
     Pub/Sub webhook endpoint for processing candidate messages
     Cloud Run will receive Pub/Sub messages here
+    
+    Messages are claimed, then queued for the worker pool. A redelivered
+    message is acked as a duplicate. A message for a candidate that is still
+    being processed, or that does not fit in the queue, is answered with 429
+    (503 while shutting down) so Pub/Sub redelivers it later.
     """
     try:
         # Parse incoming Pub/Sub message
         message_data = await request.json()
-        logger.info(f"Received Pub/Sub message: {message_data.get('message', {}).get('messageId')}")
+        message_id = message_data.get("message", {}).get("messageId")
+        logger.info(f"Received Pub/Sub message: {message_id}")
         
-        # Process message in background to avoid timeout
-        background_tasks.add_task(process_candidate_message, message_data)
+        # Claiming needs Firestore; until the clients are up, Pub/Sub keeps the message
+        if not clients.ready and clients.last_error:
+            clients.start()
+            return _unavailable_response(message_id, clients.last_error)
+        try:
+            await clients.ensure()
+        except Exception as e:
+            return _unavailable_response(message_id, clients.last_error or str(e))
+        
+        # Claim before queueing so a locked candidate can still be handed back to Pub/Sub;
+        # unparseable messages are queued unclaimed and reported as failed by the worker
+        try:
+            parsed_message = pubsub_handler.parse_message(message_data)
+        except Exception:
+            parsed_message = None
+        if parsed_message is not None:
+            outcome = await candidate_processor.claim_message(parsed_message.message_id, parsed_message.candidate_id)
+            if outcome != CLAIMED:
+                # Duplicates are acked; a locked candidate is pushed back for redelivery
+                locked = outcome == LOCKED
+                return JSONResponse(
+                    status_code=429 if locked else 200,
+                    headers={"Retry-After": str(LOCKED_RETRY_AFTER_SECONDS)} if locked else None,
+                    content={
+                        "status": outcome,
+                        "message_id": message_id,
+                        "timestamp": datetime.now().isoformat()
+                    }
+                )
+        
+        # Queue for the worker pool; backpressure is returned to Pub/Sub
+        try:
+            work_queue.submit(message_data, priority=pubsub_handler.extract_priority(message_data))
+        except WorkQueueFull as e:
+            logger.warning(f"Rejecting message {message_id}: {e}")
+            if parsed_message is not None:
+                await candidate_processor.release_message(parsed_message.message_id, parsed_message.candidate_id)
+            return JSONResponse(
+                status_code=429 if work_queue.running else 503,
+                headers={"Retry-After": str(e.retry_after)},
+                content={
+                    "status": "rejected",
+                    "message_id": message_id,
+                    "error": str(e),
+                    "timestamp": datetime.now().isoformat()
+                }
+            )
         
         # Return immediate response to Pub/Sub
         return {
             "status": "accepted",
-            "message_id": message_data.get("message", {}).get("messageId"),
+            "message_id": message_id,
+            "queue_depth": work_queue.depth,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -125,42 +281,102 @@ async def pubsub_webhook(request: Request, background_tasks: BackgroundTasks):
         )
 
 
-async def process_candidate_message(message_data: Dict[str, Any]) -> ProcessingResult:
+def _unavailable_response(message_id: Optional[str], error: str) -> JSONResponse:
+    """503 asking Pub/Sub to redeliver once the clients can be initialized"""
+    logger.warning(f"Rejecting message {message_id}: worker clients unavailable ({error})")
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(UNAVAILABLE_RETRY_AFTER_SECONDS)},
+        content={
+            "status": "unavailable",
+            "message_id": message_id,
+            "error": error,
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
+
+async def process_candidate_message(message_data: Dict[str, Any], claimed: bool = False) -> ProcessingResult:
     """
     Main processing function for candidate enrichment
     This is where the actual work happens
+    
+    ``claimed`` is set for messages the webhook already claimed before queueing.
+    Otherwise the message is claimed here; a "duplicate" or "locked" result
+    means it was not processed. If the clients cannot be initialized the claim
+    is released and the result is "unavailable", so the message can be redelivered.
     """
     start_time = datetime.now()
     candidate_id = None
+    claimed_message_id = None
+    stage_times: Dict[str, float] = {}
+    
+    try:
+        # Waits out a cold start
+        await clients.ensure()
+    except Exception as e:
+        logger.error(f"Worker clients unavailable: {e}")
+        metrics.increment_error_count()
+        if claimed:
+            try:
+                parsed_message = pubsub_handler.parse_message(message_data)
+                await candidate_processor.release_message(parsed_message.message_id, parsed_message.candidate_id)
+            except Exception as release_error:
+                logger.warning(f"Could not release claim, it expires with its TTL: {release_error}")
+        return ProcessingResult(
+            candidate_id=candidate_id,
+            status="unavailable",
+            error=str(e),
+            timestamp=datetime.now().isoformat()
+        )
     
     try:
         # Parse Pub/Sub message
         parsed_message = pubsub_handler.parse_message(message_data)
+        
+        # Redeliveries and locked candidates short-circuit here, before any Together AI call
+        if not claimed:
+            outcome = await candidate_processor.claim_message(parsed_message.message_id, parsed_message.candidate_id)
+            if outcome != CLAIMED:
+                return ProcessingResult(
+                    candidate_id=parsed_message.candidate_id,
+                    status=outcome,
+                    timestamp=datetime.now().isoformat()
+                )
+        claimed_message_id = parsed_message.message_id
         candidate_id = parsed_message.candidate_id
+        await candidate_processor.update_processing_status(candidate_id, ProcessingStatus.IN_PROGRESS)
         
         logger.info(f"Processing candidate: {candidate_id}")
         metrics.increment_messages_processed()
         metrics.set_active_processor(candidate_id, True)
         
         # Fetch candidate data
-        candidate_data = await candidate_processor.fetch_candidate_data(candidate_id)
+        with metrics.time_stage("firestore_read", stage_times):
+            candidate_data = await candidate_processor.fetch_candidate_data(candidate_id)
         if not candidate_data:
             raise ValueError(f"Candidate {candidate_id} not found")
         
         # Process with Together AI
-        enriched_data = await candidate_processor.process_with_together_ai(candidate_data)
+        with metrics.time_stage("together_ai", stage_times):
+            enriched_data = await candidate_processor.process_with_together_ai(candidate_data)
         
         # Store results
-        success = await candidate_processor.store_processing_result(candidate_id, enriched_data)
+        with metrics.time_stage("firestore_write", stage_times):
+            success = await candidate_processor.store_processing_result(candidate_id, enriched_data)
         
         if not success:
             raise Exception("Failed to store processing results")
         
+        await candidate_processor.finish_message(claimed_message_id, candidate_id, ProcessingStatus.COMPLETED)
+        
         # Calculate processing time
         processing_time = (datetime.now() - start_time).total_seconds()
         metrics.record_processing_time(processing_time)
+        startup_profile.mark("first_message")
         
-        logger.info(f"Successfully processed candidate {candidate_id} in {processing_time:.2f}s")
+        stage_summary = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in stage_times.items())
+        logger.info(f"Successfully processed candidate {candidate_id} in {processing_time:.2f}s ({stage_summary})")
         
         return ProcessingResult(
             candidate_id=candidate_id,
@@ -174,6 +390,9 @@ async def process_candidate_message(message_data: Dict[str, Any]) -> ProcessingR
         logger.error(error_msg)
         metrics.increment_error_count()
         
+        if claimed_message_id:
+            await candidate_processor.finish_message(claimed_message_id, candidate_id, ProcessingStatus.FAILED)
+        
         # Send to dead letter queue for manual review
         if candidate_id:
             await pubsub_handler.send_to_dead_letter_queue(message_data, error_msg)
@@ -206,7 +425,10 @@ async def process_batch(request: Request):
         logger.info(f"Starting batch processing for {len(candidate_ids)} candidates")
         
         # Process candidates concurrently (with concurrency limit)
-        semaphore = asyncio.Semaphore(5)  # Limit to 5 concurrent processes
+        # Bounds the pipeline; Together AI concurrency follows the client's adaptive limiter
+        semaphore = asyncio.Semaphore(config.max_concurrent_processes)
+        # Unique per request so a manual re-run is not treated as a redelivery
+        batch_run_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
         
         async def process_with_semaphore(candidate_id):
             async with semaphore:
@@ -216,7 +438,7 @@ async def process_batch(request: Request):
                             "candidate_id": candidate_id,
                             "action": "enrich_profile"
                         }),
-                        "messageId": f"batch_{candidate_id}",
+                        "messageId": f"batch_{batch_run_id}_{candidate_id}",
                         "publishTime": datetime.now().isoformat()
                     }
                 }
@@ -256,7 +478,7 @@ async def process_batch(request: Request):
 async def get_processing_status(candidate_id: str):
     """Get processing status for a specific candidate"""
     try:
-        status = candidate_processor.get_processing_status(candidate_id)
+        status = await candidate_processor.get_processing_status(candidate_id)
         return {
             "candidate_id": candidate_id,
             "status": status.value if status else "unknown",
@@ -270,17 +492,31 @@ async def get_processing_status(candidate_id: str):
         )
 
 
+async def _process_queued_message(message_data: Dict[str, Any]) -> ProcessingResult:
+    # The webhook claimed parseable messages before queueing them
+    return await process_candidate_message(message_data, claimed=True)
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize components on startup"""
     logger.info("Starting Headhunter Candidate Processing Worker")
     logger.info(f"Configuration: Project={config.project_id}, Topic={config.pubsub_topic}")
     
-    # Initialize connections
-    await candidate_processor.initialize()
-    await pubsub_handler.initialize()
+    # Warm clients in the background so the port opens immediately; /ready gates traffic
+    clients.start()
     
-    logger.info("Worker initialized successfully")
+    # Start the webhook worker pool
+    global work_queue
+    work_queue = PriorityWorkQueue(
+        _process_queued_message,
+        workers=config.max_concurrent_processes,
+        max_depth=config.queue_max_depth,
+    )
+    await work_queue.start()
+    
+    startup_profile.mark("started")
+    logger.info("Worker started; clients warming up")
 
 
 @app.on_event("shutdown")
@@ -288,7 +524,9 @@ async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down Candidate Processing Worker")
     
-    # Graceful shutdown
+    # Graceful shutdown: let queued messages finish before closing clients
+    if work_queue:
+        await work_queue.stop(drain_timeout=config.queue_drain_timeout)
     await candidate_processor.shutdown()
     await pubsub_handler.shutdown()
     
@@ -315,6 +553,8 @@ async def general_exception_handler(request: Request, exc: Exception):
 
 
 if __name__ == "__main__":
+    import uvicorn
+    
     # For local development
     uvicorn.run(
         "main:app",
@@ -5,15 +5,24 @@ Metrics collection and monitoring for Cloud Run worker
 import asyncio
 import logging
 import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 from collections import defaultdict, deque
 
 from .config import Config
+from .latency_histogram import LatencyHistogram
 from .models import ProcessingMetrics, HealthCheckResult
 
 logger = logging.getLogger(__name__)
 
+PROMETHEUS_PREFIX = "headhunter_worker"
+PROMETHEUS_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
 
 class MetricsCollector:
     """Collects and manages processing metrics"""
@@ -26,11 +35,21 @@ class MetricsCollector:
         self.messages_processed = 0
         self.success_count = 0
         self.error_count = 0
-        self.processing_times: deque = deque(maxlen=1000)  # Keep last 1000 processing times
+        # End-to-end and per-stage latencies (firestore_read, together_ai, firestore_write) in fixed memory
+        self.processing_times = LatencyHistogram()
+        self.stage_latencies: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
         
-        # Rate limiting metrics
+        # Rate limiting metrics: request counts for the last 60 epoch minutes
         self.requests_per_minute: deque = deque(maxlen=60)  # Track requests per minute
-        self.last_minute_bucket = datetime.now().minute
+        self.last_minute_bucket = int(time.time() // 60)
+        
+        # Together AI completions by source (computed / cache / coalesced) and token accounting
+        self.llm_completions: Dict[str, int] = defaultdict(int)
+        self.llm_tokens_used = 0
+        self.llm_tokens_saved = 0
+        
+        # Gauges read at exposition time, e.g. the Together AI concurrency window
+        self.gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
         
         # Error tracking
         self.error_types: Dict[str, int] = defaultdict(int)
@@ -61,11 +80,7 @@ class MetricsCollector:
         }
         
         # Update rate limiting metrics
-        current_minute = datetime.now().minute
-        if current_minute != self.last_minute_bucket:
-            self.requests_per_minute.append(0)
-            self.last_minute_bucket = current_minute
-        
+        self._advance_minute_buckets()
         if self.requests_per_minute:
             self.requests_per_minute[-1] += 1
         else:
@@ -83,7 +98,7 @@ class MetricsCollector:
         
         self.messages_processed += 1
         self.success_count += 1
-        self.processing_times.append(processing_time)
+        self.processing_times.record(processing_time)
         
         logger.debug(f"Completed request: {request_id}, time: {processing_time:.2f}s")
     
@@ -123,11 +138,64 @@ class MetricsCollector:
         self.peak_memory_usage = max(self.peak_memory_usage, memory_mb)
         self.peak_cpu_usage = max(self.peak_cpu_usage, cpu_percent)
     
+    def _advance_minute_buckets(self):
+        """Roll the per-minute request buckets forward, adding zeros for idle minutes"""
+        current_minute = int(time.time() // 60)
+        elapsed = current_minute - self.last_minute_bucket
+        if elapsed > 0:
+            for _ in range(min(elapsed, self.requests_per_minute.maxlen)):
+                self.requests_per_minute.append(0)
+            self.last_minute_bucket = current_minute
+    
+    def register_gauge(self, name: str, help_text: str, getter: Callable[[], float]):
+        """Expose ``getter()`` as a Prometheus gauge named ``<prefix>_<name>``"""
+        self.gauges[name] = (help_text, getter)
+    
+    def record_llm_completion(self, source: str, usage: Dict[str, Any]):
+        """Record one enrichment completion; ``source`` is computed, cache or coalesced"""
+        self.llm_completions[source] += 1
+        tokens = int(usage.get("total_tokens") or 0)
+        if source == "computed":
+            self.llm_tokens_used += tokens
+        else:
+            self.llm_tokens_saved += tokens
+    
+    def get_llm_cache_stats(self) -> Dict[str, Any]:
+        """Hit rate and token savings of the Together AI response cache"""
+        total = sum(self.llm_completions.values())
+        reused = total - self.llm_completions.get("computed", 0)
+        return {
+            "completions": dict(self.llm_completions),
+            "hit_rate": reused / total if total else 0.0,
+            "tokens_used": self.llm_tokens_used,
+            "tokens_saved": self.llm_tokens_saved,
+        }
+    
+    def record_stage_time(self, stage: str, seconds: float):
+        """Record how long one processing stage took"""
+        self.stage_latencies[stage].record(seconds)
+    
+    @contextmanager
+    def time_stage(self, stage: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+        """
+        Time a block as ``stage``; also stores the duration in ``timings`` if given
+        
+        Usable around awaits: ``with metrics.time_stage("together_ai", timings): await ...``
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.record_stage_time(stage, elapsed)
+            if timings is not None:
+                timings[stage] = elapsed
+    
     def get_current_metrics(self) -> ProcessingMetrics:
         """Get current processing metrics"""
         return ProcessingMetrics(
             messages_processed=self.messages_processed,
-            processing_times=list(self.processing_times),
+            processing_time_percentiles=self.processing_times.snapshot(),
             error_count=self.error_count,
             success_count=self.success_count,
             active_processors={req_id: proc["status"] for req_id, proc in self.active_processors.items()},
@@ -139,9 +207,7 @@ class MetricsCollector:
         uptime = (datetime.now() - self.start_time).total_seconds()
         
         # Calculate processing statistics
-        avg_processing_time = sum(self.processing_times) / len(self.processing_times) if self.processing_times else 0
-        p95_processing_time = sorted(self.processing_times)[int(0.95 * len(self.processing_times))] if self.processing_times else 0
-        p99_processing_time = sorted(self.processing_times)[int(0.99 * len(self.processing_times))] if self.processing_times else 0
+        processing = self.processing_times.snapshot()
         
         # Calculate error rate
         error_rate = (self.error_count / self.messages_processed) if self.messages_processed > 0 else 0
@@ -150,6 +216,7 @@ class MetricsCollector:
         throughput = self.messages_processed / (uptime / 60) if uptime > 0 else 0  # messages per minute
         
         # Recent request rate
+        self._advance_minute_buckets()
         recent_requests = sum(self.requests_per_minute) if self.requests_per_minute else 0
         
         return {
@@ -161,9 +228,12 @@ class MetricsCollector:
             "active_requests": len(self.active_processors),
             
             # Performance metrics
-            "avg_processing_time_seconds": avg_processing_time,
-            "p95_processing_time_seconds": p95_processing_time,
-            "p99_processing_time_seconds": p99_processing_time,
+            "avg_processing_time_seconds": processing["mean"],
+            "p50_processing_time_seconds": processing["p50"],
+            "p95_processing_time_seconds": processing["p95"],
+            "p99_processing_time_seconds": processing["p99"],
+            "stage_latencies": {stage: hist.snapshot() for stage, hist in self.stage_latencies.items()},
+            "llm_cache": self.get_llm_cache_stats(),
             "throughput_per_minute": throughput,
             "recent_requests_per_minute": recent_requests,
             
@@ -200,9 +270,8 @@ class MetricsCollector:
                 return False
         
         # Check response times
-        if self.processing_times:
-            avg_time = sum(self.processing_times) / len(self.processing_times)
-            if avg_time > self.response_time_threshold:
+        if self.processing_times.count:
+            if self.processing_times.mean > self.response_time_threshold:
                 return False
         
         # Check health checks
@@ -233,8 +302,8 @@ class MetricsCollector:
                 })
         
         # High response time alert
-        if self.processing_times:
-            avg_time = sum(self.processing_times) / len(self.processing_times)
+        if self.processing_times.count:
+            avg_time = self.processing_times.mean
             if avg_time > self.response_time_threshold:
                 alerts.append({
                     "type": "high_response_time",
@@ -272,7 +341,11 @@ class MetricsCollector:
         self.messages_processed = 0
         self.success_count = 0
         self.error_count = 0
-        self.processing_times.clear()
+        self.processing_times.reset()
+        self.stage_latencies.clear()
+        self.llm_completions.clear()
+        self.llm_tokens_used = 0
+        self.llm_tokens_saved = 0
         self.requests_per_minute.clear()
         self.error_types.clear()
         self.recent_errors.clear()
@@ -290,9 +363,7 @@ class MetricsCollector:
     
     def get_average_processing_time(self) -> float:
         """Get average processing time"""
-        if not self.processing_times:
-            return 0.0
-        return sum(self.processing_times) / len(self.processing_times)
+        return self.processing_times.mean
     
     def get_error_count(self) -> int:
         """Get total error count"""
@@ -330,7 +401,63 @@ class MetricsCollector:
     
     def record_processing_time(self, processing_time: float):
         """Record processing time"""
-        self.processing_times.append(processing_time)
+        self.processing_times.record(processing_time)
+    
+    def render_prometheus(self) -> str:
+        """Render counters, gauges and latency summaries in the Prometheus text format (0.0.4)"""
+        lines: List[str] = []
+        
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]):
+            full_name = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for suffix, labels, value in samples:
+                label_str = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{full_name}{suffix}{{{label_str}}} {value}" if label_str else f"{full_name}{suffix} {value}")
+        
+        def summary_samples(hist: LatencyHistogram, labels: Dict[str, str]) -> List[tuple]:
+            quantiles = hist.quantiles(PROMETHEUS_QUANTILES)
+            samples = [("", {**labels, "quantile": str(q)}, quantiles[q]) for q in PROMETHEUS_QUANTILES]
+            samples.append(("_sum", labels, hist.total))
+            samples.append(("_count", labels, hist.count))
+            return samples
+        
+        metric("messages_processed_total", "counter", "Messages taken off the queue", [("", {}, self.messages_processed)])
+        metric("messages_succeeded_total", "counter", "Messages processed successfully", [("", {}, self.success_count)])
+        metric("errors_total", "counter", "Processing errors", [("", {}, self.error_count)])
+        metric(
+            "errors_by_type_total", "counter", "Processing errors by type",
+            [("", {"error_type": error_type}, count) for error_type, count in self.error_types.items()],
+        )
+        metric(
+            "llm_completions_total", "counter", "Together AI enrichments by source (computed, cache, coalesced)",
+            [("", {"source": source}, count) for source, count in sorted(self.llm_completions.items())],
+        )
+        metric("llm_tokens_used_total", "counter", "Tokens paid for Together AI completions", [("", {}, self.llm_tokens_used)])
+        metric(
+            "llm_tokens_saved_total", "counter", "Tokens avoided through cache hits and coalescing",
+            [("", {}, self.llm_tokens_saved)],
+        )
+        metric("active_processors", "gauge", "Messages currently being processed", [("", {}, len(self.active_processors))])
+        metric(
+            "uptime_seconds", "gauge", "Seconds since the collector started",
+            [("", {}, (datetime.now() - self.start_time).total_seconds())],
+        )
+        for name, (help_text, getter) in sorted(self.gauges.items()):
+            try:
+                metric(name, "gauge", help_text, [("", {}, getter())])
+            except Exception as e:
+                logger.warning(f"Gauge {name} failed: {e}")
+        metric(
+            "processing_seconds", "summary", "End-to-end message processing time",
+            summary_samples(self.processing_times, {}),
+        )
+        stage_samples: List[tuple] = []
+        for stage, hist in sorted(self.stage_latencies.items()):
+            stage_samples.extend(summary_samples(hist, {"stage": stage}))
+        metric("stage_seconds", "summary", "Time spent per processing stage", stage_samples)
+        
+        return "\n".join(lines) + "\n"
     
     async def start_monitoring(self):
         """Start background monitoring tasks"""
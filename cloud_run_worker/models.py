@@ -93,7 +93,7 @@ class TogetherAIResponse(BaseModel):
 class ProcessingMetrics(BaseModel):
     """Processing metrics data"""
     messages_processed: int = 0
-    processing_times: List[float] = []
+    processing_time_percentiles: Dict[str, float] = {}
     error_count: int = 0
     success_count: int = 0
     active_processors: Dict[str, bool] = {}
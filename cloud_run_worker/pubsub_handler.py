@@ -2,17 +2,16 @@
 Pub/Sub message handler for Cloud Run worker
 """
 
+import asyncio
 import base64
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
-from google.cloud import pubsub_v1
-from google.cloud.pubsub_v1 import PublisherClient
-
-from config import Config
-from models import PubSubMessage, DeadLetterMessage
+from .config import Config
+from .dead_letter import DeadLetterPublisher
+from .models import PubSubMessage, DeadLetterMessage
 
 logger = logging.getLogger(__name__)
 
@@ -27,24 +26,58 @@ class PubSubHandler:
         
         # Initialize publisher for dead letter queue
         self.dead_letter_publisher = None
+        self.dead_letter: Optional[DeadLetterPublisher] = None
+        self._replay_task = None
         
     async def initialize(self):
         """Initialize Pub/Sub connections"""
         try:
-            self.dead_letter_publisher = PublisherClient()
+            # Importing and building the client is slow; keep it off the event loop
+            self.dead_letter_publisher = await asyncio.get_event_loop().run_in_executor(
+                None, self._create_publisher
+            )
             self.dead_letter_topic_path = self.dead_letter_publisher.topic_path(
                 self.project_id, 
                 self.dead_letter_topic
             )
+            self.dead_letter = DeadLetterPublisher(
+                self.dead_letter_publisher,
+                self.dead_letter_topic_path,
+                spill_path=self.config.dead_letter_spill_path,
+                publish_timeout=self.config.dead_letter_publish_timeout,
+                max_pending=self.config.dead_letter_max_pending,
+            )
+            # Re-publish anything a previous instance could not deliver
+            self._replay_task = asyncio.create_task(self.dead_letter.replay_spill())
             logger.info(f"Initialized Pub/Sub handler for project: {self.project_id}")
         except Exception as e:
             logger.error(f"Failed to initialize Pub/Sub handler: {e}")
             raise
     
+    def _create_publisher(self):
+        # google.cloud.pubsub_v1 is imported on first use, off the cold-start path
+        from google.cloud import pubsub_v1
+        
+        # Failures are published in the background; the client batches them per topic
+        batch_settings = pubsub_v1.types.BatchSettings(
+            max_messages=self.config.dead_letter_batch_max_messages,
+            max_latency=self.config.dead_letter_batch_max_latency,
+        )
+        return pubsub_v1.PublisherClient(batch_settings=batch_settings)
+    
+    @property
+    def ready(self) -> bool:
+        return self.dead_letter is not None
+    
     async def shutdown(self):
         """Cleanup Pub/Sub connections"""
+        if self.dead_letter:
+            if self._replay_task:
+                await asyncio.gather(self._replay_task, return_exceptions=True)
+            # Unacknowledged publishes are spilled and replayed by the next instance
+            await self.dead_letter.flush(timeout=self.config.dead_letter_publish_timeout)
         if self.dead_letter_publisher:
-            self.dead_letter_publisher.close()
+            self.dead_letter_publisher.stop()
             logger.info("Pub/Sub handler shutdown complete")
     
     def parse_message(self, message_data: Dict[str, Any]) -> PubSubMessage:
@@ -110,17 +143,20 @@ class PubSubHandler:
             logger.error(f"Failed to parse Pub/Sub message: {e}")
             raise ValueError(f"Message parsing failed: {e}")
     
-    def send_to_dead_letter_queue(self, original_message: Dict[str, Any], error: str, retry_count: int = 0):
+    async def send_to_dead_letter_queue(self, original_message: Dict[str, Any], error: str, retry_count: int = 0):
         """
         Send failed message to dead letter queue
         
+        Returns as soon as the message is handed to the batching publisher;
+        publish failures are spilled to disk and replayed on startup.
+        
         Args:
             original_message: Original Pub/Sub message
             error: Error description
             retry_count: Number of retry attempts made
         """
         try:
-            if not self.dead_letter_publisher:
+            if not self.dead_letter:
                 logger.error("Dead letter publisher not initialized")
                 return
             
@@ -149,20 +185,16 @@ class PubSubHandler:
             # Publish to dead letter queue
             message_data = json.dumps(dead_letter_msg.dict(), default=str).encode('utf-8')
             
-            future = self.dead_letter_publisher.publish(
-                self.dead_letter_topic_path,
+            await self.dead_letter.publish(
                 message_data,
-                candidate_id=candidate_id or "unknown",
-                error_type="processing_failed",
-                retry_count=str(retry_count),
-                failed_at=datetime.now().isoformat()
+                {
+                    "candidate_id": candidate_id or "unknown",
+                    "error_type": "processing_failed",
+                    "retry_count": str(retry_count),
+                    "failed_at": datetime.now().isoformat(),
+                },
             )
             
-            # Wait for publish to complete
-            message_id = future.result(timeout=30)
-            
-            logger.info(f"Sent message to dead letter queue: {message_id}, candidate: {candidate_id}")
-            
         except Exception as e:
             logger.error(f"Failed to send message to dead letter queue: {e}")
     
@@ -230,4 +262,25 @@ class PubSubHandler:
         except Exception:
             pass
         
-        return "unknown"
\ No newline at end of file
+        return "unknown"
+    
+    def extract_priority(self, message_data: Dict[str, Any]) -> str:
+        """
+        Extract message priority without full parsing
+        
+        Args:
+            message_data: Raw message data
+            
+        Returns:
+            str: Priority from the payload or attributes, 'normal' by default
+        """
+        try:
+            message = message_data.get("message", {})
+            attributes = message.get("attributes") or {}
+            if "data" in message:
+                decoded = base64.b64decode(message["data"]).decode('utf-8')
+                payload = json.loads(decoded)
+                return payload.get("priority") or attributes.get("priority") or "normal"
+            return attributes.get("priority") or "normal"
+        except Exception:
+            return "normal"
@@ -0,0 +1,266 @@
+"""
+Pull-subscription consumer for the Cloud Run worker
+
+Backfills run this module as a Cloud Run job (``python pull_consumer.py``)
+instead of having Pub/Sub push one HTTP request per message. Each message goes
+through the same ``process_candidate_message`` path as the webhook, so
+idempotency claims, Firestore micro-batching, the Together AI limiter and
+dead-lettering all apply. The client library honours ``PUBSUB_EMULATOR_HOST``
+for local runs against the emulator.
+"""
+
+import asyncio
+import base64
+import logging
+import signal
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from google.cloud.pubsub_v1.types import FlowControl
+
+logger = logging.getLogger(__name__)
+
+# Result statuses that mean the message is done with; anything else (e.g. "locked", "unavailable") is redelivered
+_SETTLED_STATUSES = {"completed", "duplicate", "failed"}
+
+
+def message_to_envelope(message: Any, subscription_path: str = "") -> Dict[str, Any]:
+    """Wrap a pulled message in the push-delivery envelope ``PubSubHandler.parse_message`` expects"""
+    envelope = {
+        "data": base64.b64encode(message.data).decode("ascii"),
+        "attributes": dict(message.attributes or {}),
+        "messageId": message.message_id,
+    }
+    publish_time = getattr(message, "publish_time", None)
+    if publish_time:
+        envelope["publishTime"] = publish_time.isoformat()
+    return {"message": envelope, "subscription": subscription_path}
+
+
+class PullConsumer:
+    """
+    Streaming-pull consumer that keeps ``max_messages`` candidates in flight.
+
+    Flow control caps outstanding messages (and bytes), so the moment one
+    message is acked the library delivers the next and the worker holds its
+    concurrency without push-delivery overhead. While a handler runs, the
+    library keeps extending the message lease (at least
+    ``min_lease_extension`` seconds at a time, up to ``max_lease_duration``)
+    and sends acks to the server in batches.
+
+    The library's callback thread only hands each message to the event loop.
+    Settled results (completed, duplicate, or failed and dead-lettered) are
+    acked. Handler exceptions, and messages for a candidate another message
+    holds locked, are nacked for redelivery. With
+    ``idle_timeout`` the consumer stops once nothing has arrived for that
+    long and nothing is in flight, which ends a backfill job. ``stop()``
+    first nacks new deliveries and drains in-flight work, then closes the
+    stream, so no ack is lost.
+    """
+
+    def __init__(
+        self,
+        subscriber: Any,
+        subscription_path: str,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        max_messages: int = 10,
+        max_bytes: int = 100 * 1024 * 1024,
+        max_lease_duration: int = 3600,
+        min_lease_extension: int = 60,
+        idle_timeout: Optional[float] = None,
+        drain_timeout: float = 30.0,
+    ):
+        if max_messages <= 0:
+            raise ValueError("max_messages must be positive")
+        self.subscriber = subscriber
+        self.subscription_path = subscription_path
+        self.handler = handler
+        self.flow_control = FlowControl(
+            max_messages=max_messages,
+            max_bytes=max_bytes,
+            max_lease_duration=max_lease_duration,
+            min_duration_per_lease_extension=min_lease_extension,
+        )
+        self.idle_timeout = idle_timeout
+        self.drain_timeout = drain_timeout
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._streaming_future: Any = None
+        self._stream_error: Optional[BaseException] = None
+        self._tasks: Set[asyncio.Future] = set()
+        self._lock = threading.Lock()
+        self._last_activity = time.monotonic()
+
+        self.received = 0
+        self.acked = 0
+        self.nacked = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.outcomes: Dict[str, int] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        """Consume until ``stop()``, idle timeout or a stream error; returns final stats"""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._last_activity = time.monotonic()
+        self._streaming_future = self.subscriber.subscribe(
+            self.subscription_path, callback=self._on_message, flow_control=self.flow_control
+        )
+        self._streaming_future.add_done_callback(self._on_stream_done)
+        logger.info(
+            f"Pulling from {self.subscription_path} with up to "
+            f"{self.flow_control.max_messages} messages in flight"
+        )
+
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    if self._idle():
+                        logger.info(f"No messages for {self.idle_timeout}s; stopping pull consumer")
+                        self.stop()
+        finally:
+            await self._shutdown()
+
+        if self._stream_error is not None:
+            raise self._stream_error
+        return self.stats()
+
+    def stop(self):
+        """Stop taking messages; safe to call from signal handlers and other threads"""
+        self._stopping = True
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    def _idle(self) -> bool:
+        if not self.idle_timeout:
+            return False
+        with self._lock:
+            busy = self.in_flight > 0
+        return not busy and time.monotonic() - self._last_activity >= self.idle_timeout
+
+    def _on_message(self, message: Any):
+        # Runs on the library's callback thread: hand off and return immediately
+        if self._stopping:
+            message.nack()
+            return
+        with self._lock:
+            self.received += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self._last_activity = time.monotonic()
+        future = asyncio.run_coroutine_threadsafe(self._handle(message), self._loop)
+        self._loop.call_soon_threadsafe(self._track, future)
+
+    def _track(self, future: Any):
+        task = asyncio.wrap_future(future)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, message: Any):
+        try:
+            result = await self.handler(message_to_envelope(message, self.subscription_path))
+            status = getattr(result, "status", None) or "unknown"
+            self._count(status)
+            if status in _SETTLED_STATUSES:
+                message.ack()
+                self.acked += 1
+            else:
+                message.nack()
+                self.nacked += 1
+        except Exception as e:
+            logger.error(f"Pull handler failed for message {message.message_id}: {e}")
+            self._count("error")
+            message.nack()
+            self.nacked += 1
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._last_activity = time.monotonic()
+
+    def _count(self, status: str):
+        self.outcomes[status] = self.outcomes.get(status, 0) + 1
+
+    def _on_stream_done(self, future: Any):
+        # Runs on a library thread when the stream ends, cleanly or not
+        if not self._stopping:
+            try:
+                future.result()
+            except BaseException as e:
+                logger.error(f"Streaming pull ended with error: {e}")
+                self._stream_error = e
+        self.stop()
+
+    async def _shutdown(self):
+        self._stopping = True
+        if self._tasks:
+            done, pending = await asyncio.wait(set(self._tasks), timeout=self.drain_timeout)
+            if pending:
+                logger.warning(f"{len(pending)} pulled messages still running after drain; they will be redelivered")
+        if self._streaming_future is not None and not self._streaming_future.done():
+            # Closing the stream flushes batched acks and nacks buffered messages
+            await self._loop.run_in_executor(None, self._close_stream)
+        logger.info(f"Pull consumer stopped: {self.stats()}")
+
+    def _close_stream(self):
+        self._streaming_future.cancel()
+        try:
+            self._streaming_future.result(timeout=self.drain_timeout)
+        except BaseException:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscription": self.subscription_path,
+            "max_messages": self.flow_control.max_messages,
+            "received": self.received,
+            "acked": self.acked,
+            "nacked": self.nacked,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "outcomes": dict(self.outcomes),
+        }
+
+
+async def run_from_environment() -> Dict[str, Any]:
+    """Entry point for the Cloud Run job: wire the worker components to a pull subscription"""
+    from google.cloud import pubsub_v1
+
+    if __package__:
+        from . import main as worker
+    else:
+        import main as worker
+
+    config = worker.config
+    await worker.clients.ensure()
+
+    subscriber = pubsub_v1.SubscriberClient()
+    consumer = PullConsumer(
+        subscriber,
+        subscriber.subscription_path(config.project_id, config.pubsub_subscription),
+        worker.process_candidate_message,
+        max_messages=config.pull_max_messages,
+        max_bytes=config.pull_max_bytes,
+        max_lease_duration=config.pull_max_lease_duration,
+        idle_timeout=config.pull_idle_timeout or None,
+        drain_timeout=config.queue_drain_timeout,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, consumer.stop)
+
+    try:
+        return await consumer.run()
+    finally:
+        await worker.candidate_processor.shutdown()
+        await worker.pubsub_handler.shutdown()
+        subscriber.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_from_environment())
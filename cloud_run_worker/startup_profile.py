@@ -0,0 +1,92 @@
+"""
+Cold-start profiling and lazy client initialization for the Cloud Run worker
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    """
+    Wall-clock breakdown of one worker start.
+
+    ``phase(name)`` times a block, sync or spanning awaits, e.g.
+    "import:pubsub_handler" or "init:firestore". ``mark(name)`` records
+    seconds since the profile was created, for milestones like "ready" and
+    "first_message". Only the first mark under a given name is kept. Create
+    the profile as early as possible in the entry module so imports count.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.started_at = clock()
+        self.phases: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.phases[name] = self._clock() - start
+
+    def mark(self, name: str) -> float:
+        if name not in self.marks:
+            self.marks[name] = self._clock() - self.started_at
+        return self.marks[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "marks": {name: round(seconds, 4) for name, seconds in self.marks.items()},
+        }
+
+
+class LazyInitializer:
+    """
+    Runs an async initializer once, on first use or when warmed up early.
+
+    Concurrent ``ensure()`` callers share one run. A failed run is forgotten,
+    so the next caller retries instead of every request failing until a
+    restart. ``ready`` is True only after a run has succeeded.
+    """
+
+    def __init__(self, initializer: Callable[[], Awaitable[Any]], name: str = "clients"):
+        self.initializer = initializer
+        self.name = name
+        self._task: Optional[asyncio.Future] = None
+        self.ready = False
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        """Begin initializing in the background without waiting for it"""
+        if self._task is None and not self.ready:
+            self._task = asyncio.ensure_future(self._run())
+            self._task.add_done_callback(self._on_done)
+
+    async def ensure(self):
+        if not self.ready:
+            self.start()
+            await asyncio.shield(self._task)
+
+    def _on_done(self, task: asyncio.Future):
+        # Retrieving the exception also keeps an unawaited warm-up from warning
+        if task.cancelled() or task.exception() is not None:
+            if self._task is task:
+                self._task = None
+
+    async def _run(self):
+        try:
+            await self.initializer()
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            logger.error(f"Initializing {self.name} failed: {self.last_error}")
+            raise
+        self.ready = True
+        self.last_error = None
@@ -0,0 +1,212 @@
+"""
+Processing status and idempotency store for the Cloud Run worker
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional Redis backend shared by all worker instances
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+
+class StatusBackend:
+    """Key/value operations the status store needs; every key carries a TTL"""
+
+    name = "base"
+
+    async def set_if_absent(self, key: str, value: str, ttl_seconds: int) -> bool:
+        """Atomically set ``key`` unless it already exists; True if this call set it"""
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryStatusBackend(StatusBackend):
+    """
+    Per-instance backend with TTLs and LRU eviction beyond ``max_entries``.
+
+    Used when no Redis URL is configured and as the local fake in tests. It
+    only deduplicates deliveries that land on the same instance.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.evictions = 0
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: str, value: str, ttl_seconds: int):
+        self._entries[key] = (value, time.monotonic() + ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # No awaits between check and set, so these are atomic on the event loop
+    async def set_if_absent(self, key: str, value: str, ttl_seconds: int) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._put(key, value, ttl_seconds)
+        return True
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._put(key, value, ttl_seconds)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisStatusBackend(StatusBackend):
+    """Redis backend; claims use ``SET key value NX EX ttl``"""
+
+    name = "redis"
+
+    def __init__(self, client: Any, prefix: str = "worker:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def set_if_absent(self, key: str, value: str, ttl_seconds: int) -> bool:
+        return bool(await self.client.set(self.prefix + key, value, nx=True, ex=ttl_seconds))
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        await self.client.set(self.prefix + key, value, ex=ttl_seconds)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+# Outcomes of ProcessingStatusStore.claim
+CLAIMED = "claimed"
+DUPLICATE = "duplicate"
+LOCKED = "locked"
+
+
+class ProcessingStatusStore:
+    """
+    Candidate status plus idempotency claims for Pub/Sub deliveries.
+
+    ``claim`` must return CLAIMED before a message is enriched. It atomically
+    records the message_id (for ``idempotency_ttl``) and takes a per-candidate
+    lock (for ``lock_ttl``). A redelivered message is a DUPLICATE and can be
+    acked. A new message for a candidate another instance is already
+    enriching is LOCKED: its message_id is not recorded, so the caller should
+    hand it back to Pub/Sub for redelivery. Both are rejected before any
+    Together AI call. ``finish`` records the final status and drops the lock;
+    a failed message also drops its claim so it can be retried. ``release``
+    undoes a claim that was never processed.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StatusBackend] = None,
+        status_ttl: int = 7 * 24 * 3600,
+        idempotency_ttl: int = 24 * 3600,
+        lock_ttl: int = 300,
+    ):
+        self.backend = backend or InMemoryStatusBackend()
+        self.status_ttl = status_ttl
+        self.idempotency_ttl = idempotency_ttl
+        self.lock_ttl = lock_ttl
+        self.claims = 0
+        self.duplicate_messages = 0
+        self.candidate_conflicts = 0
+
+    async def claim(self, message_id: str, candidate_id: str) -> str:
+        """CLAIMED if this delivery should be processed, DUPLICATE for a redelivery, LOCKED to retry later"""
+        if not await self.backend.set_if_absent(f"msg:{message_id}", candidate_id, self.idempotency_ttl):
+            self.duplicate_messages += 1
+            logger.info(f"Skipping duplicate delivery of message {message_id} (candidate {candidate_id})")
+            return DUPLICATE
+
+        if not await self.backend.set_if_absent(f"lock:{candidate_id}", message_id, self.lock_ttl):
+            # Not processed, so not a duplicate: forget the message so its redelivery can claim it
+            await self.backend.delete(f"msg:{message_id}")
+            self.candidate_conflicts += 1
+            logger.info(f"Deferring message {message_id}: candidate {candidate_id} is already being processed")
+            return LOCKED
+
+        self.claims += 1
+        return CLAIMED
+
+    async def release(self, message_id: str, candidate_id: str):
+        """Drop a claim without recording a status, e.g. when the message could not be queued"""
+        await self.backend.delete(f"lock:{candidate_id}")
+        await self.backend.delete(f"msg:{message_id}")
+
+    async def finish(self, message_id: str, candidate_id: str, status: str, failed: bool = False):
+        """Record the outcome of a claimed message and release the candidate lock"""
+        await self.set_status(candidate_id, status)
+        await self.backend.delete(f"lock:{candidate_id}")
+        if failed:
+            await self.backend.delete(f"msg:{message_id}")
+
+    async def set_status(self, candidate_id: str, status: str):
+        await self.backend.set(f"status:{candidate_id}", status, self.status_ttl)
+
+    async def get_status(self, candidate_id: str) -> Optional[str]:
+        return await self.backend.get(f"status:{candidate_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name,
+            "claims": self.claims,
+            "duplicate_messages": self.duplicate_messages,
+            "candidate_conflicts": self.candidate_conflicts,
+        }
+
+
+def create_status_store(config: Any) -> ProcessingStatusStore:
+    """Build the store from worker config: Redis when STATUS_REDIS_URL is set, else in-memory"""
+    backend: StatusBackend
+    if config.status_redis_url and REDIS_AVAILABLE:
+        backend = RedisStatusBackend(aioredis.from_url(config.status_redis_url))
+    else:
+        if config.status_redis_url:
+            logger.warning("STATUS_REDIS_URL is set but redis is not installed; using in-memory status store")
+        backend = InMemoryStatusBackend(max_entries=config.status_max_entries)
+    return ProcessingStatusStore(
+        backend,
+        status_ttl=config.status_ttl,
+        idempotency_ttl=config.idempotency_ttl,
+        lock_ttl=config.processing_timeout,
+    )
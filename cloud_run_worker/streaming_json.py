@@ -0,0 +1,157 @@
+"""
+Incremental validation of streamed JSON completions
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class StreamValidationError(Exception):
+    """The streamed output is malformed or off-schema; stop generating"""
+
+
+_VALUE_STARTS = {
+    "object": "{",
+    "array": "[",
+    "number": "-0123456789",
+    "string": '"',
+}
+
+
+class IncrementalJSONValidator:
+    """
+    Checks a JSON object as it streams in, chunk by chunk.
+
+    Tracks string/escape state and bracket nesting without building the
+    document, so each ``feed`` costs O(len(chunk)). It raises
+    ``StreamValidationError`` as soon as:
+    - the output does not start with ``{`` (a leading markdown fence is allowed)
+    - brackets are mismatched
+    - a top-level key is not in ``schema`` (when ``allow_extra_keys`` is False)
+    - a top-level value starts with the wrong type
+    - the object closes without every required key
+    - the text grows past ``max_chars``
+
+    ``complete`` turns True once the top-level object has closed validly.
+    Text after it only sets ``trailing_content``, and callers can stop reading
+    there. ``text`` holds everything consumed so far.
+    """
+
+    def __init__(
+        self,
+        schema: Dict[str, str],
+        required: Optional[Iterable[str]] = None,
+        allow_extra_keys: bool = False,
+        max_chars: int = 64_000,
+    ):
+        self.schema = schema
+        self.required: Set[str] = set(schema if required is None else required)
+        self.allow_extra_keys = allow_extra_keys
+        self.max_chars = max_chars
+
+        self._parts: List[str] = []
+        self._length = 0
+        self._started = False
+        self._prefix = ""
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._key_chars: Optional[List[str]] = None  # collecting a top-level key
+        self._expect_key = False
+        self._pending_key: Optional[str] = None  # key whose value has not started yet
+        self.seen_keys: Set[str] = set()
+        self.complete = False
+        self.trailing_content = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+        self._length += len(chunk)
+        if self._length > self.max_chars:
+            raise StreamValidationError(f"Output exceeded {self.max_chars} characters")
+        for ch in chunk:
+            self._consume(ch)
+        self._parts.append(chunk)
+
+    def _consume(self, ch: str):
+        if self.complete:
+            # A closing fence is fine; anything else is chatter the caller can stop reading
+            if not ch.isspace() and ch != "`":
+                self.trailing_content = True
+            return
+
+        if not self._started:
+            self._consume_prefix(ch)
+            return
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._key_chars is not None:
+                    self._on_key("".join(self._key_chars))
+                    self._key_chars = None
+                return
+            if self._key_chars is not None:
+                self._key_chars.append(ch)
+            return
+
+        if ch.isspace():
+            return
+
+        top_level = len(self._stack) == 1
+        if top_level and self._pending_key is not None and ch != ":":
+            self._check_value_start(self._pending_key, ch)
+            self._pending_key = None
+
+        if ch == '"':
+            self._in_string = True
+            if top_level and self._expect_key:
+                self._key_chars = []
+                self._expect_key = False
+        elif ch in "{[":
+            self._stack.append(ch)
+        elif ch in "}]":
+            opener = "{" if ch == "}" else "["
+            if not self._stack or self._stack[-1] != opener:
+                raise StreamValidationError(f"Mismatched '{ch}'")
+            self._stack.pop()
+            if not self._stack:
+                self._on_close()
+        elif ch == "," and top_level:
+            self._expect_key = True
+
+    def _consume_prefix(self, ch: str):
+        if ch == "{":
+            self._started = True
+            self._stack.append("{")
+            self._expect_key = True
+            return
+        self._prefix += ch
+        stripped = self._prefix.strip()
+        # Tolerate a leading ```json fence, nothing else
+        if stripped and not "```json".startswith(stripped):
+            raise StreamValidationError("Output does not start with a JSON object")
+
+    def _on_key(self, key: str):
+        if key not in self.schema and not self.allow_extra_keys:
+            raise StreamValidationError(f"Unexpected field: {key}")
+        self.seen_keys.add(key)
+        self._pending_key = key
+
+    def _check_value_start(self, key: str, ch: str):
+        expected = self.schema.get(key)
+        if expected and ch not in _VALUE_STARTS[expected]:
+            raise StreamValidationError(f"Field {key} should be a {expected}")
+
+    def _on_close(self):
+        missing = self.required - self.seen_keys
+        if missing:
+            raise StreamValidationError(f"Missing required field in response: {sorted(missing)[0]}")
+        self.complete = True
@@ -4,16 +4,48 @@ Together AI client for candidate enrichment
 
 import asyncio
 import aiohttp
+import copy
 import json
 import logging
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+from .adaptive_limiter import AdaptiveConcurrencyLimiter
 from .config import Config
+from .llm_cache import CompletionCache, create_completion_cache, prompt_cache_key
 from .models import TogetherAIRequest, TogetherAIResponse
+from .streaming_json import IncrementalJSONValidator, StreamValidationError
 
 logger = logging.getLogger(__name__)
 
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After in seconds; HTTP-date values are ignored in favour of jittered backoff"""
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TogetherAIOverloadError(Exception):
+    """Together AI answered 429 or 5xx: back off and retry, do not switch request mode"""
+    
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+# Top-level shape of an enrichment; overall_score is range-checked (not type-checked) in _parse_response
+ENRICHMENT_SCHEMA = {
+    "resume_analysis": "object",
+    "recruiter_insights": "object",
+    "overall_score": None,
+}
+
+# Part of the response cache key: bump when _get_system_prompt or the prompt template changes
+SYSTEM_PROMPT_VERSION = "enrichment-v1"
+
 
 class TogetherAIClient:
     """Client for Together AI API integration"""
@@ -25,12 +57,26 @@ class TogetherAIClient:
         self.model = config.together_ai_model
         self.timeout = config.together_ai_timeout
         self.max_retries = config.together_ai_max_retries
+        self.streaming = config.together_ai_streaming
         
         self.session: Optional[aiohttp.ClientSession] = None
         
+        # Shared by every Together AI call site in the worker; the window tracks provider capacity
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=config.together_ai_initial_concurrency,
+            min_limit=1,
+            max_limit=config.together_ai_max_concurrency,
+        )
+        
+        # Identical prompts are served from cache or share one in-flight call
+        self.completion_cache: CompletionCache = create_completion_cache(config)
+        # Optional MetricsCollector for cache hit / tokens-saved counters, set by main
+        self.metrics = None
+        
     async def initialize(self):
         """Initialize HTTP session"""
-        connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
+        # The limiter decides concurrency; the pool only needs room for its largest window
+        connector = aiohttp.TCPConnector(limit=self.limiter.max_limit, ttl_dns_cache=300)
         timeout = aiohttp.ClientTimeout(
             total=self.timeout,      # Overall timeout (20s default)
             connect=5,               # Connection timeout (5s)
@@ -51,6 +97,7 @@ class TogetherAIClient:
     
     async def shutdown(self):
         """Cleanup HTTP session"""
+        await self.completion_cache.close()
         if self.session:
             await self.session.close()
             logger.info("Together AI client shutdown complete")
@@ -90,18 +137,44 @@ class TogetherAIClient:
                 stream=False
             )
             
-            # Make API call with retry logic
-            response = await self._make_api_call(request_data)
+            async def _complete() -> Dict[str, Any]:
+                response = None
+                if self.streaming:
+                    try:
+                        response = await self._make_streaming_call_with_retries(request_data)
+                    except (StreamValidationError, TogetherAIOverloadError, asyncio.TimeoutError):
+                        # A regular request would hit the same bad output or the same overload
+                        raise
+                    except Exception as e:
+                        logger.warning(f"Streaming call failed, falling back to a regular request: {e}")
+                
+                if response is None:
+                    # Make API call with retry logic
+                    response = await self._make_api_call(request_data)
+                
+                # Parse and validate response; only valid results are cached
+                return {"enriched": self._parse_response(response), "usage": response.usage}
+            
+            cache_key = prompt_cache_key(
+                self.model,
+                SYSTEM_PROMPT_VERSION,
+                prompt,
+                {"max_tokens": request_data.max_tokens, "temperature": request_data.temperature, "top_p": request_data.top_p},
+            )
+            result, source = await self.completion_cache.get_or_compute(cache_key, _complete)
+            if self.metrics:
+                self.metrics.record_llm_completion(source, result.get("usage") or {})
             
-            # Parse and validate response
-            enriched_data = self._parse_response(response)
+            # Cached results are shared between callers, so hand out a copy
+            enriched_data = copy.deepcopy(result["enriched"])
             
             # Add processing metadata
             processing_time = (datetime.now() - start_time).total_seconds()
             enriched_data["processing_time"] = processing_time
-            enriched_data["token_usage"] = response.usage
+            enriched_data["token_usage"] = result["usage"] if source == "computed" else {}
+            enriched_data["cache_status"] = source
             
-            logger.info(f"Successfully enriched candidate in {processing_time:.2f}s")
+            logger.info(f"Successfully enriched candidate in {processing_time:.2f}s ({source})")
             return enriched_data
             
         except Exception as e:
@@ -195,7 +268,7 @@ Guidelines:
 """
     
     async def _make_api_call(self, request_data: TogetherAIRequest) -> TogetherAIResponse:
-        """Make API call to Together AI with retry logic"""
+        """Make API call to Together AI with retry logic, gated by the adaptive limiter"""
         
         if not self.session:
             raise Exception("Session not initialized")
@@ -203,52 +276,154 @@ Guidelines:
         url = f"{self.base_url}/chat/completions"
         
         for attempt in range(self.max_retries + 1):
+            retry_after: Optional[float] = None
             try:
-                async with self.session.post(url, json=request_data.dict()) as response:
-                    
-                    # Handle rate limiting
-                    if response.status == 429:
-                        retry_after = int(response.headers.get("Retry-After", 1))
-                        if attempt < self.max_retries:
-                            logger.warning(f"Rate limited, retrying in {retry_after}s")
-                            await asyncio.sleep(retry_after)
-                            continue
-                        else:
-                            raise Exception("Rate limit exceeded, max retries reached")
-                    
-                    # Handle other HTTP errors
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise Exception(f"HTTP {response.status}: {error_text}")
-                    
-                    # Parse successful response
-                    response_data = await response.json()
-                    
-                    return TogetherAIResponse(
-                        choices=response_data.get("choices", []),
-                        usage=response_data.get("usage", {}),
-                        model=response_data.get("model", self.model),
-                        created=response_data.get("created", 0)
-                    )
+                async with self.limiter.slot() as slot:
+                    try:
+                        async with self.session.post(url, json=request_data.dict()) as response:
+                            
+                            # Rate limiting and server errors shrink the concurrency window
+                            if response.status == 429:
+                                slot.overload()
+                                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                                raise Exception("Rate limit exceeded")
+                            
+                            if response.status >= 500:
+                                slot.overload()
+                            
+                            # Handle other HTTP errors
+                            if response.status != 200:
+                                error_text = await response.text()
+                                raise Exception(f"HTTP {response.status}: {error_text}")
+                            
+                            # Parse successful response
+                            response_data = await response.json()
+                            slot.success()
+                            
+                            return TogetherAIResponse(
+                                choices=response_data.get("choices", []),
+                                usage=response_data.get("usage", {}),
+                                model=response_data.get("model", self.model),
+                                created=response_data.get("created", 0)
+                            )
+                    except asyncio.TimeoutError:
+                        slot.overload()
+                        raise
                     
             except asyncio.TimeoutError:
                 if attempt < self.max_retries:
-                    delay = 2 ** attempt  # Exponential backoff
-                    logger.warning(f"Timeout on attempt {attempt + 1}, retrying in {delay}s")
+                    delay = self.limiter.backoff(attempt)
+                    logger.warning(f"Timeout on attempt {attempt + 1}, retrying in {delay:.2f}s")
                     await asyncio.sleep(delay)
                 else:
                     raise Exception("Request timeout, max retries reached")
             
             except Exception as e:
                 if attempt < self.max_retries:
-                    delay = 2 ** attempt
-                    logger.warning(f"Request failed on attempt {attempt + 1}, retrying in {delay}s: {e}")
+                    delay = self.limiter.backoff(attempt, retry_after)
+                    logger.warning(f"Request failed on attempt {attempt + 1}, retrying in {delay:.2f}s: {e}")
                     await asyncio.sleep(delay)
+                elif retry_after is not None:
+                    raise Exception("Rate limit exceeded, max retries reached")
                 else:
                     raise
         
         raise Exception("Max retries exceeded")
     
+    async def _make_streaming_call_with_retries(self, request_data: TogetherAIRequest) -> TogetherAIResponse:
+        """Streaming call retried on overload and timeouts with the same backoff as _make_api_call"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._make_streaming_call(request_data)
+            except (TogetherAIOverloadError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.limiter.backoff(attempt, getattr(e, "retry_after", None))
+                logger.warning(f"Streaming request overloaded on attempt {attempt + 1}, retrying in {delay:.2f}s: {e!r}")
+                await asyncio.sleep(delay)
+        raise Exception("Max retries exceeded")
+    
+    async def _make_streaming_call(self, request_data: TogetherAIRequest) -> TogetherAIResponse:
+        """
+        Stream the completion and validate the JSON as it arrives
+        
+        Raises StreamValidationError as soon as the output is malformed or
+        off-schema; leaving the response context closes the connection, which
+        stops the generation. 429 and 5xx raise TogetherAIOverloadError (with
+        Retry-After) so the caller backs off. Other errors mean streaming
+        itself failed and the caller should fall back to _make_api_call.
+        """
+        if not self.session:
+            raise Exception("Session not initialized")
+        
+        url = f"{self.base_url}/chat/completions"
+        payload = {**request_data.dict(), "stream": True}
+        validator = IncrementalJSONValidator(ENRICHMENT_SCHEMA)
+        usage: Dict[str, Any] = {}
+        model = self.model
+        first_byte_at: Optional[float] = None
+        
+        async with self.limiter.slot() as slot:
+            started = time.perf_counter()
+            try:
+                async with self.session.post(url, json=payload) as response:
+                    if response.status == 429 or response.status >= 500:
+                        slot.overload()
+                        raise TogetherAIOverloadError(
+                            response.status,
+                            await response.text(),
+                            retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+                        )
+                    if response.status != 200:
+                        raise Exception(f"HTTP {response.status}: {await response.text()}")
+                    
+                    async for raw_line in response.content:
+                        line = raw_line.decode("utf-8").strip()
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        
+                        event = json.loads(data)
+                        usage = event.get("usage") or usage
+                        model = event.get("model", model)
+                        choices = event.get("choices") or [{}]
+                        delta = (choices[0].get("delta") or {}).get("content") or ""
+                        if delta and first_byte_at is None:
+                            first_byte_at = time.perf_counter()
+                            self._record_stage("together_ai_time_to_first_byte", first_byte_at - started)
+                        
+                        was_complete = validator.complete
+                        try:
+                            validator.feed(delta)
+                        except StreamValidationError as e:
+                            logger.warning(f"Aborting malformed Together AI stream after {len(validator.text)} chars: {e}")
+                            raise
+                        if validator.complete and not was_complete:
+                            self._record_stage("together_ai_time_to_valid_json", time.perf_counter() - started)
+                        if validator.trailing_content:
+                            break
+                    
+                    slot.success()
+            except asyncio.TimeoutError:
+                slot.overload()
+                raise
+        
+        if not validator.complete:
+            raise StreamValidationError("Stream ended before the JSON object was complete")
+        
+        return TogetherAIResponse(
+            choices=[{"message": {"role": "assistant", "content": validator.text}}],
+            usage=usage,
+            model=model,
+            created=0
+        )
+    
+    def _record_stage(self, stage: str, seconds: float):
+        if self.metrics:
+            self.metrics.record_stage_time(stage, seconds)
+    
     def _parse_response(self, response: TogetherAIResponse) -> Dict[str, Any]:
         """Parse and validate Together AI response"""
         
@@ -0,0 +1,184 @@
+"""
+Bounded in-process work queue with priority lanes for the Cloud Run worker
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_LANES = ("high", "normal", "low")
+DEFAULT_LANE_WEIGHTS = {"high": 4, "normal": 2, "low": 1}
+
+
+class WorkQueueFull(Exception):
+    """Raised when the queue cannot accept more work (full or shutting down)"""
+
+    def __init__(self, message: str, retry_after: int = 10):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class WorkItem:
+    """A queued unit of work"""
+    payload: Any
+    lane: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class PriorityWorkQueue:
+    """
+    Bounded queue drained by a fixed pool of worker tasks.
+
+    Items are placed in a lane ("high", "normal", "low") and lanes are served
+    by weighted round robin, so high priority work goes first without starving
+    the other lanes. ``submit`` never blocks: when ``max_depth`` items are
+    waiting it raises WorkQueueFull so the caller can push back (e.g. reply
+    429 and let Pub/Sub redeliver).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int,
+        max_depth: int,
+        lane_weights: Optional[Dict[str, int]] = None,
+        wait_samples: int = 1000,
+    ):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        if max_depth <= 0:
+            raise ValueError("max_depth must be positive")
+
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+        weights = lane_weights or DEFAULT_LANE_WEIGHTS
+
+        self._lanes: Dict[str, Deque[WorkItem]] = {lane: deque() for lane in PRIORITY_LANES}
+        # Weighted round robin schedule, e.g. high x4, normal x2, low x1
+        self._schedule: List[str] = [lane for lane in PRIORITY_LANES for _ in range(max(1, weights.get(lane, 1)))]
+        self._cursor = 0
+        self._available: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = False
+
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._wait_times: Deque[float] = deque(maxlen=wait_samples)
+
+    @staticmethod
+    def lane_for(priority: Optional[str]) -> str:
+        """Map a message priority onto a lane; unknown values go to "normal"."""
+        priority = (priority or "normal").lower()
+        if priority in ("urgent", "critical"):
+            return "high"
+        return priority if priority in PRIORITY_LANES else "normal"
+
+    @property
+    def depth(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    @property
+    def running(self) -> bool:
+        return self._accepting
+
+    async def start(self):
+        """Start the worker pool"""
+        if self._tasks:
+            return
+        self._available = asyncio.Semaphore(0)
+        self._accepting = True
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Work queue started with {self.workers} workers, max depth {self.max_depth}")
+
+    def submit(self, payload: Any, priority: Optional[str] = None) -> WorkItem:
+        """Enqueue work without blocking; raises WorkQueueFull under backpressure"""
+        if not self._accepting:
+            self.rejected += 1
+            raise WorkQueueFull("Worker is not accepting work", retry_after=30)
+        if self.depth >= self.max_depth:
+            self.rejected += 1
+            raise WorkQueueFull(f"Work queue is full ({self.max_depth} items waiting)")
+
+        item = WorkItem(payload=payload, lane=self.lane_for(priority))
+        self._lanes[item.lane].append(item)
+        self.submitted += 1
+        self._available.release()
+        return item
+
+    async def stop(self, drain_timeout: float = 0.0):
+        """Stop accepting work, give queued items ``drain_timeout`` seconds, then cancel workers"""
+        self._accepting = False
+        if not self._tasks:
+            return
+
+        deadline = time.monotonic() + drain_timeout
+        while (self.depth or self.in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        dropped = self.depth
+        if dropped:
+            logger.warning(f"Work queue stopped with {dropped} unprocessed items; Pub/Sub will not redeliver them")
+        for lane in self._lanes.values():
+            lane.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _next_item(self) -> WorkItem:
+        for offset in range(len(self._schedule)):
+            lane = self._schedule[(self._cursor + offset) % len(self._schedule)]
+            if self._lanes[lane]:
+                self._cursor = (self._cursor + offset + 1) % len(self._schedule)
+                return self._lanes[lane].popleft()
+        raise RuntimeError("Work queue semaphore out of sync with lanes")
+
+    async def _worker(self, worker_id: int):
+        while True:
+            await self._available.acquire()
+            item = self._next_item()
+            self._wait_times.append(time.monotonic() - item.enqueued_at)
+            self.in_flight += 1
+            try:
+                await self.handler(item.payload)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Work queue worker {worker_id} handler error: {e}")
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait time and in-flight counts for /metrics"""
+        waits = sorted(self._wait_times)
+        now = time.monotonic()
+        oldest = min((lane[0].enqueued_at for lane in self._lanes.values() if lane), default=None)
+        return {
+            "depth": self.depth,
+            "depth_by_lane": {lane: len(items) for lane, items in self._lanes.items()},
+            "max_depth": self.max_depth,
+            "utilization": self.depth / self.max_depth,
+            "in_flight": self.in_flight,
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "accepting": self._accepting,
+            "wait_seconds_avg": sum(waits) / len(waits) if waits else 0.0,
+            "wait_seconds_p95": waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            "wait_seconds_max": waits[-1] if waits else 0.0,
+            "oldest_wait_seconds": now - oldest if oldest is not None else 0.0,
+        }
@@ -1,7 +1,7 @@
 """
 Aggregate scraped job postings into ECO aliases and occupations.
 
-Reads JSONL files from a directory or GCS prefix and produces aggregated alias
+Reads JSONL batches (plain, .gz or .zst) from a directory or GCS prefix and produces aggregated alias
 stats with confidence scores, plus optional SQL upserts.
 """
 import json
@@ -18,14 +18,15 @@ except Exception:  # pragma: no cover
         return (s or "").lower()
 
 from scripts.alias_confidence_scorer import AliasConfidenceScorer
+from scripts.eco_jsonl import decode_jsonl_bytes, is_jsonl_batch, open_jsonl
 
 
 def _iter_local_jsonl(path: str) -> Iterable[Dict]:
     if os.path.isdir(path):
         for root, _, files in os.walk(path):
             for fn in files:
-                if fn.endswith(".jsonl"):
-                    with open(os.path.join(root, fn), encoding="utf-8") as f:
+                if is_jsonl_batch(fn):
+                    with open_jsonl(os.path.join(root, fn)) as f:
                         for line in f:
                             line = line.strip()
                             if not line:
@@ -35,7 +36,7 @@ def _iter_local_jsonl(path: str) -> Iterable[Dict]:
                             except Exception:
                                 continue
     else:
-        with open(path, encoding="utf-8") as f:
+        with open_jsonl(path) as f:
             for line in f:
                 line = line.strip()
                 if not line:
@@ -58,9 +59,11 @@ def _iter_gcs_jsonl(uri: str) -> Iterable[Dict]:  # gs://bucket/prefix
     client = storage.Client(project=os.environ.get("GOOGLE_CLOUD_PROJECT"))
     bucket = client.bucket(bucket_name)
     for blob in client.list_blobs(bucket, prefix=prefix):
-        if not blob.name.endswith(".jsonl"):
+        if not is_jsonl_batch(blob.name):
             continue
-        for line in blob.download_as_text(encoding="utf-8").splitlines():
+        # Raw bytes: gzip-encoded batches are decompressed here, not by the client
+        text = decode_jsonl_bytes(blob.name, blob.download_as_bytes(raw_download=True))
+        for line in text.splitlines():
             line = line.strip()
             if not line:
                 continue
@@ -0,0 +1,186 @@
+"""
+Benchmark ECO occupation search: in-memory OccupationIndex vs the Postgres query.
+
+Reports p50/p99 latency per lookup for:
+- memory: cloud_run_eco_service.occupation_index.OccupationIndex.search
+- postgres: the trigram query used by run_search_query (skipped without a DSN)
+
+With ECO_PG_DSN / DATABASE_URL the catalog and query titles come from the
+database; otherwise (or with ECO_INDEX_BENCH_SYNTHETIC=1) a synthetic catalog
+is generated.
+
+Environment:
+- ECO_PG_DSN or DATABASE_URL: Postgres connection string
+- ECO_INDEX_BENCH_QUERIES: number of lookups (default 500)
+- ECO_INDEX_BENCH_LIMIT: results per lookup (default 10)
+- ECO_INDEX_BENCH_OCCUPATIONS: synthetic catalog size (default 5000)
+- ECO_INDEX_BENCH_REPORT: also write the JSON report to this path (default: stdout only)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    from cloud_run_eco_service.occupation_index import OccupationIndex, load_occupation_index  # type: ignore
+except Exception:
+    import sys
+
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", "cloud_run_eco_service"))
+    from occupation_index import OccupationIndex, load_occupation_index  # type: ignore
+
+
+REPORT = os.getenv("ECO_INDEX_BENCH_REPORT")
+
+# Same statement as cloud_run_eco_service.main.run_search_query (pg_trgm branch)
+TRGM_SEARCH_SQL = """
+    WITH params AS (
+        SELECT $3::text AS q
+    )
+    SELECT o.eco_id, o.display_name, o.normalized_title, o.description, o.evidence_count,
+           o.locale, o.country, a.alias, a.normalized_alias, a.confidence,
+           GREATEST(
+               CASE WHEN o.normalized_title = params.q THEN 1.0 ELSE 0 END,
+               COALESCE(similarity(o.normalized_title, params.q), 0),
+               COALESCE(similarity(COALESCE(a.normalized_alias, ''), params.q), 0)
+           ) AS score
+    FROM params
+    JOIN eco_occupation o ON o.locale = $1 AND o.country = $2
+    LEFT JOIN eco_alias a ON a.eco_id = o.eco_id
+    WHERE (o.normalized_title ILIKE params.q || '%')
+       OR (a.normalized_alias ILIKE params.q || '%')
+       OR (COALESCE(similarity(o.normalized_title, params.q), 0) > 0.2)
+    ORDER BY score DESC, o.evidence_count DESC
+    LIMIT $4
+"""
+
+_ROLES = ["desenvolvedor", "engenheiro", "analista", "gerente", "coordenador", "cientista", "arquiteto", "tecnico"]
+_AREAS = ["backend", "frontend", "dados", "software", "vendas", "financeiro", "infraestrutura", "produto", "qualidade"]
+_LEVELS = ["junior", "pleno", "senior", "especialista", "lider"]
+
+
+def synthetic_catalog(count: int, seed: int = 5) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    rng = random.Random(seed)
+    occupations, aliases = [], []
+    for i in range(count):
+        title = f"{rng.choice(_ROLES)} {rng.choice(_AREAS)} {rng.choice(_LEVELS)} {i}"
+        eco_id = f"ECO.SYN.{i}"
+        occupations.append({
+            "eco_id": eco_id,
+            "display_name": title.title(),
+            "normalized_title": title,
+            "description": None,
+            "evidence_count": rng.randint(0, 500),
+            "locale": "pt-BR",
+            "country": "BR",
+        })
+        for _ in range(rng.randint(0, 3)):
+            alias = f"{rng.choice(_ROLES)} de {rng.choice(_AREAS)}"
+            aliases.append({"eco_id": eco_id, "alias": alias.title(), "normalized_alias": alias, "confidence": 0.75})
+    return occupations, aliases
+
+
+def _queries(titles: List[str], count: int, seed: int = 9) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        words = rng.choice(titles).split()
+        queries.append(" ".join(words[: rng.randint(1, len(words))]))
+    return queries
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+async def _measure(label: str, search: Callable[[str], Awaitable[Any]], queries: List[str]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    for query in queries:
+        t0 = time.perf_counter()
+        await search(query)
+        latencies.append(time.perf_counter() - t0)
+    ordered = sorted(latencies)
+    return {
+        "mode": label,
+        "p50_ms": round(1000 * _percentile(ordered, 0.50), 3),
+        "p99_ms": round(1000 * _percentile(ordered, 0.99), 3),
+        "avg_ms": round(1000 * sum(latencies) / len(latencies), 3),
+    }
+
+
+async def run() -> Dict[str, Any]:
+    query_count = int(os.getenv("ECO_INDEX_BENCH_QUERIES", "500"))
+    limit = int(os.getenv("ECO_INDEX_BENCH_LIMIT", "10"))
+    dsn = os.getenv("ECO_PG_DSN") or os.getenv("DATABASE_URL")
+
+    conn: Optional[Any] = None
+    if dsn and os.getenv("ECO_INDEX_BENCH_SYNTHETIC") != "1":
+        try:
+            import asyncpg  # type: ignore
+
+            conn = await asyncpg.connect(dsn)
+        except Exception as exc:
+            print(f"Postgres unavailable ({exc}); using a synthetic catalog")
+            conn = None
+
+    try:
+        t0 = time.perf_counter()
+        if conn is not None:
+            index = await load_occupation_index(conn, supports_trgm=True)
+            titles = [row["normalized_title"] for row in await conn.fetch(
+                "SELECT normalized_title FROM eco_occupation WHERE locale = 'pt-BR' AND country = 'BR'"
+            )]
+        else:
+            occupations, aliases = synthetic_catalog(int(os.getenv("ECO_INDEX_BENCH_OCCUPATIONS", "5000")))
+            index = OccupationIndex(occupations, aliases)
+            titles = [row["normalized_title"] for row in occupations]
+        build_sec = time.perf_counter() - t0
+        if not titles:
+            raise RuntimeError("No pt-BR occupations found")
+        queries = _queries(titles, query_count)
+
+        async def _memory(query: str) -> Any:
+            return index.search(query, "pt-BR", "BR", limit)
+
+        runs = [await _measure("memory", _memory, queries)]
+
+        if conn is not None:
+            async def _postgres(query: str) -> Any:
+                return await conn.fetch(TRGM_SEARCH_SQL, "pt-BR", "BR", query, limit)
+
+            runs.append(await _measure("postgres", _postgres, queries))
+
+        report = {
+            "catalog": {
+                "occupations": index.occupation_count,
+                "aliases": index.alias_count,
+                "synthetic": conn is None,
+            },
+            "queries": len(queries),
+            "limit": limit,
+            "index_build_sec": round(build_sec, 3),
+            "runs": runs,
+            "generated_at": int(time.time()),
+        }
+    finally:
+        if conn is not None:
+            await conn.close()
+
+    if REPORT:
+        os.makedirs(os.path.dirname(REPORT) or ".", exist_ok=True)
+        with open(REPORT, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main() -> None:
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
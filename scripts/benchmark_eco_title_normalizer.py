@@ -0,0 +1,107 @@
+"""
+Micro-benchmark for PT-BR title normalization: the legacy per-call regex path vs the current engine.
+
+Reports titles/second for:
+- legacy: the pre-engine normalize_title (regex punctuation pass, per-character
+  unicodedata.category fold), frozen in tests/legacy_eco_title_normalizer.py
+- uncached: the current pipeline without memoization
+- cached: normalize_title as called per item/alias (bounded LRU)
+- batch: normalize_many in-process, and with ECO_NORMALIZER_BENCH_WORKERS processes
+
+Before timing, every title in the corpus (plus a Unicode edge-case set) is
+checked for byte-identical output against the legacy function. The synthetic
+corpus repeats titles like scraped data does (ECO_NORMALIZER_BENCH_UNIQUE
+distinct titles in ECO_NORMALIZER_BENCH_ROWS rows).
+
+Environment:
+- ECO_NORMALIZER_BENCH_ROWS: titles per run (default 200000)
+- ECO_NORMALIZER_BENCH_UNIQUE: distinct titles (default 20000)
+- ECO_NORMALIZER_BENCH_WORKERS: process pool size for the batch run (default 4)
+- ECO_NORMALIZER_BENCH_REPORT: JSON report path
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+try:
+    from scripts import eco_title_normalizer as engine  # type: ignore
+except Exception:
+    import sys
+
+    sys.path.append(os.path.dirname(__file__))
+    import eco_title_normalizer as engine  # type: ignore
+
+from tests.legacy_eco_title_normalizer import EDGE_CASES, legacy_normalize_title, synthetic_titles
+
+REPORT = os.getenv("ECO_NORMALIZER_BENCH_REPORT", "scripts/eco_title_normalizer_benchmark.json")
+
+
+def verify_identical(titles: Iterable[str]) -> List[Dict[str, str]]:
+    mismatches = []
+    for title in list(dict.fromkeys(titles)) + EDGE_CASES:
+        expected, actual = legacy_normalize_title(title), engine.normalize_title(title)
+        if expected.encode("utf-8") != actual.encode("utf-8"):
+            mismatches.append({"input": title, "legacy": expected, "engine": actual})
+    return mismatches
+
+
+def _rate(fn: Callable[[], Any], rows: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 4), "titles_per_sec": round(rows / elapsed) if elapsed else None}
+
+
+def run() -> Dict[str, Any]:
+    rows = int(os.getenv("ECO_NORMALIZER_BENCH_ROWS", "200000"))
+    unique = int(os.getenv("ECO_NORMALIZER_BENCH_UNIQUE", "20000"))
+    workers = int(os.getenv("ECO_NORMALIZER_BENCH_WORKERS", "4"))
+    titles = synthetic_titles(rows, unique)
+
+    mismatches = verify_identical(titles)
+    engine.normalize_title.cache_clear()
+
+    results = {
+        "legacy": _rate(lambda: [legacy_normalize_title(t) for t in titles], rows),
+        "uncached": _rate(lambda: [engine._normalize(t) for t in titles], rows),
+        "cached": _rate(lambda: [engine.normalize_title(t) for t in titles], rows),
+        "batch": _rate(lambda: engine.normalize_many(titles), rows),
+    }
+    # Force the pool even below PARALLEL_MIN_TITLES so its overhead is visible
+    threshold = engine.PARALLEL_MIN_TITLES
+    engine.PARALLEL_MIN_TITLES = 0
+    try:
+        results[f"batch_{workers}_procs"] = _rate(lambda: engine.normalize_many(titles, workers=workers), rows)
+    finally:
+        engine.PARALLEL_MIN_TITLES = threshold
+    cache = engine.normalize_title.cache_info()
+
+    legacy_rate = results["legacy"]["titles_per_sec"] or 1
+    report = {
+        "rows": rows,
+        "unique_titles": unique,
+        "identical_output": not mismatches,
+        "mismatches": mismatches[:20],
+        "results": results,
+        "speedup_vs_legacy": {
+            name: round((r["titles_per_sec"] or 0) / legacy_rate, 2) for name, r in results.items() if name != "legacy"
+        },
+        "cache": {"hits": cache.hits, "misses": cache.misses, "maxsize": cache.maxsize, "size": cache.currsize},
+        "generated_at": int(time.time()),
+    }
+    os.makedirs(os.path.dirname(REPORT) or ".", exist_ok=True)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def main() -> None:
+    print(json.dumps(run(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark the pipelined embedding batch executor against the serial batch loop.
+
+Two scenarios are measured:
+- deterministic: DeterministicEmbeddingProvider in-process (CPU bound)
+- mock_http: TogetherAIEmbeddingProvider against a local aiohttp server that
+  simulates per-request latency and periodically answers 429 + Retry-After
+
+The serial baseline reproduces the previous EmbeddingService behaviour:
+fixed sub-batches of 10 awaited one after another.
+
+Environment:
+- EMBED_BENCH_TEXTS: number of texts (default 2000)
+- EMBED_BENCH_LATENCY_MS: mock server latency per request (default 80)
+- EMBED_BENCH_THROTTLE_EVERY: mock server returns 429 every N requests (default 25, 0 disables)
+- EMBED_BENCH_IN_FLIGHT: executor concurrency (default 8)
+- EMBED_BENCH_REPORT: JSON report path
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+try:
+    from scripts.embedding_service import (  # type: ignore
+        DeterministicEmbeddingProvider,
+        EmbeddingProvider,
+        PipelinedBatchExecutor,
+        TogetherAIEmbeddingProvider,
+    )
+except Exception:
+    from embedding_service import (  # type: ignore
+        DeterministicEmbeddingProvider,
+        EmbeddingProvider,
+        PipelinedBatchExecutor,
+        TogetherAIEmbeddingProvider,
+    )
+
+
+REPORT = os.getenv("EMBED_BENCH_REPORT", "scripts/embedding_batch_benchmark.json")
+SERIAL_BATCH_SIZE = 10
+
+
+def _texts(count: int) -> List[str]:
+    return [
+        f"Candidate {i}: senior engineer with {i % 15} years in Python, Go and distributed systems. " * (1 + i % 4)
+        for i in range(count)
+    ]
+
+
+async def _serial(provider: EmbeddingProvider, texts: List[str]) -> List[List[float]]:
+    results: List[List[float]] = []
+    for i in range(0, len(texts), SERIAL_BATCH_SIZE):
+        results.extend(await provider.generate_embeddings_batch(texts[i:i + SERIAL_BATCH_SIZE]))
+    return results
+
+
+async def _timed(label: str, factory: Any, count: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    await factory()
+    elapsed = time.perf_counter() - t0
+    return {"mode": label, "elapsed_sec": round(elapsed, 3), "texts_per_sec": round(count / elapsed, 1)}
+
+
+def _mock_app(latency_ms: float) -> web.Application:
+    embedder = DeterministicEmbeddingProvider()
+    state = {"requests": 0, "throttled": 0, "throttle_every": 0}
+
+    async def embeddings(request: web.Request) -> web.Response:
+        state["requests"] += 1
+        throttle_every = state["throttle_every"]
+        if throttle_every and state["requests"] % throttle_every == 0:
+            state["throttled"] += 1
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "0.2"})
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+        vectors = await embedder.generate_embeddings_batch(body["input"])
+        return web.json_response(
+            {"data": [{"index": i, "embedding": v} for i, v in enumerate(vectors)], "model": body["model"]}
+        )
+
+    app = web.Application()
+    app.router.add_post("/v1/embeddings", embeddings)
+    app["state"] = state
+    return app
+
+
+async def bench_deterministic(texts: List[str], in_flight: int) -> List[Dict[str, Any]]:
+    provider = DeterministicEmbeddingProvider()
+    executor = PipelinedBatchExecutor(provider, max_in_flight=in_flight)
+    return [
+        await _timed("serial", lambda: _serial(provider, texts), len(texts)),
+        await _timed("pipelined", lambda: executor.run(texts), len(texts)),
+    ]
+
+
+async def bench_mock_http(texts: List[str], in_flight: int, latency_ms: float, throttle_every: int) -> Dict[str, Any]:
+    app = _mock_app(latency_ms)
+    state = app["state"]
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+    provider = TogetherAIEmbeddingProvider(api_key="benchmark", base_url=f"http://127.0.0.1:{port}", live=True)
+    try:
+        # The serial loop has no retry handling, so it runs with throttling disabled
+        serial = await _timed("serial", lambda: _serial(provider, texts), len(texts))
+        state.update(requests=0, throttle_every=throttle_every)
+        executor = PipelinedBatchExecutor(
+            provider, max_in_flight=in_flight, tokens_per_second=float(os.getenv("EMBED_BENCH_TPS", "200000"))
+        )
+        pipelined = await _timed("pipelined", lambda: executor.run(texts), len(texts))
+        pipelined.update(executor.stats)
+        return {"runs": [serial, pipelined], "server": dict(state)}
+    finally:
+        await provider.close()
+        await runner.cleanup()
+
+
+async def run() -> Dict[str, Any]:
+    count = int(os.getenv("EMBED_BENCH_TEXTS", "2000"))
+    latency_ms = float(os.getenv("EMBED_BENCH_LATENCY_MS", "80"))
+    throttle_every = int(os.getenv("EMBED_BENCH_THROTTLE_EVERY", "25"))
+    in_flight = int(os.getenv("EMBED_BENCH_IN_FLIGHT", "8"))
+    texts = _texts(count)
+
+    report = {
+        "texts": count,
+        "in_flight": in_flight,
+        "deterministic": await bench_deterministic(texts, in_flight),
+        "mock_http": await bench_mock_http(texts, in_flight, latency_ms, throttle_every),
+        "generated_at": int(time.time()),
+    }
+    os.makedirs(os.path.dirname(REPORT), exist_ok=True)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main() -> None:
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Benchmark the worker's Firestore micro-batching against per-document round trips.
+
+Runs ``concurrency`` coroutines that each read a candidate and write an
+enrichment result, the same access pattern as CandidateProcessor, through:
+- direct: one executor call per doc_ref.get / doc_ref.update (old hot path)
+- batched: cloud_run_worker.firestore_batcher.FirestoreBatcher
+
+The target is an in-memory Firestore fake that sleeps ``rpc_ms`` per RPC so
+the number of round trips dominates, as it does against the real service.
+Point FIRESTORE_EMULATOR_HOST at an emulator and set
+FIRESTORE_BATCH_BENCH_EMULATOR=1 to run against google.cloud.firestore instead.
+
+Environment:
+- FIRESTORE_BATCH_BENCH_DOCS: documents processed per mode (default 2000)
+- FIRESTORE_BATCH_BENCH_CONCURRENCY: concurrent workers (default 50)
+- FIRESTORE_BATCH_BENCH_RPC_MS: simulated latency per RPC (default 8)
+- FIRESTORE_BATCH_BENCH_THREADS: default executor threads (default 6, a 2 vCPU instance)
+- FIRESTORE_BATCH_BENCH_REPORT: JSON report path
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+try:
+    from cloud_run_worker.firestore_batcher import FirestoreBatcher  # type: ignore
+except Exception:
+    import sys
+
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    from cloud_run_worker.firestore_batcher import FirestoreBatcher  # type: ignore
+
+
+REPORT = os.getenv("FIRESTORE_BATCH_BENCH_REPORT", "scripts/firestore_batcher_benchmark.json")
+COLLECTION = "candidates"
+
+
+class _Snapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]]):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+class InMemoryFirestore:
+    """Thread-safe Firestore stand-in with a fixed latency per RPC"""
+
+    def __init__(self, rpc_ms: float = 0.0):
+        self.rpc_seconds = rpc_ms / 1000.0
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.rpcs = 0
+        self._lock = threading.Lock()
+
+    def _rpc(self):
+        with self._lock:
+            self.rpcs += 1
+        if self.rpc_seconds:
+            time.sleep(self.rpc_seconds)
+
+    def collection(self, _name: str) -> "InMemoryFirestore":
+        return self
+
+    def document(self, doc_id: str) -> "_DocumentRef":
+        return _DocumentRef(self, doc_id)
+
+    def get_all(self, refs: List["_DocumentRef"]):
+        self._rpc()
+        return [_Snapshot(ref.id, self.docs.get(ref.id)) for ref in refs]
+
+    def batch(self) -> "_WriteBatch":
+        return _WriteBatch(self)
+
+    def apply_update(self, doc_id: str, data: Dict[str, Any]):
+        if doc_id not in self.docs:
+            raise KeyError(f"No document to update: {doc_id}")
+        self.docs[doc_id].update(data)
+
+
+class _DocumentRef:
+    def __init__(self, db: InMemoryFirestore, doc_id: str):
+        self._db = db
+        self.id = doc_id
+
+    def get(self) -> _Snapshot:
+        self._db._rpc()
+        return _Snapshot(self.id, self._db.docs.get(self.id))
+
+    def update(self, data: Dict[str, Any]):
+        self._db._rpc()
+        with self._db._lock:
+            self._db.apply_update(self.id, data)
+
+
+class _WriteBatch:
+    def __init__(self, db: InMemoryFirestore):
+        self._db = db
+        self._ops: List[Any] = []
+
+    def update(self, ref: _DocumentRef, data: Dict[str, Any]):
+        self._ops.append((ref.id, data))
+
+    def commit(self):
+        self._db._rpc()
+        with self._db._lock:
+            # Atomic like Firestore: validate every op before applying any
+            missing = [doc_id for doc_id, _ in self._ops if doc_id not in self._db.docs]
+            if missing:
+                raise KeyError(f"No document to update: {missing[0]}")
+            for doc_id, data in self._ops:
+                self._db.apply_update(doc_id, data)
+
+
+async def _run_mode(mode: str, db: Any, doc_ids: List[str], concurrency: int) -> Dict[str, Any]:
+    loop = asyncio.get_event_loop()
+    batcher = FirestoreBatcher(db, COLLECTION) if mode == "batched" else None
+    queue: asyncio.Queue = asyncio.Queue()
+    for doc_id in doc_ids:
+        queue.put_nowait(doc_id)
+    rpcs_before = getattr(db, "rpcs", 0)
+
+    async def _worker():
+        while not queue.empty():
+            doc_id = queue.get_nowait()
+            update = {"status": "enriched", "overall_score": 0.5}
+            if batcher:
+                await batcher.get(doc_id)
+                await batcher.update(doc_id, update)
+            else:
+                ref = db.collection(COLLECTION).document(doc_id)
+                await loop.run_in_executor(None, ref.get)
+                await loop.run_in_executor(None, ref.update, update)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    result = {
+        "mode": mode,
+        "docs": len(doc_ids),
+        "elapsed_sec": round(elapsed, 3),
+        "docs_per_sec": round(len(doc_ids) / elapsed, 1),
+        "rpcs": getattr(db, "rpcs", 0) - rpcs_before if hasattr(db, "rpcs") else None,
+    }
+    if batcher:
+        await batcher.close()
+        result["batching"] = batcher.stats()
+    return result
+
+
+async def run() -> Dict[str, Any]:
+    docs = int(os.getenv("FIRESTORE_BATCH_BENCH_DOCS", "2000"))
+    concurrency = int(os.getenv("FIRESTORE_BATCH_BENCH_CONCURRENCY", "50"))
+    rpc_ms = float(os.getenv("FIRESTORE_BATCH_BENCH_RPC_MS", "8"))
+    use_emulator = os.getenv("FIRESTORE_BATCH_BENCH_EMULATOR") == "1"
+
+    if use_emulator:
+        from google.cloud import firestore  # type: ignore
+
+        db: Any = firestore.Client(project=os.getenv("GOOGLE_CLOUD_PROJECT", "headhunter-local"))
+    else:
+        db = InMemoryFirestore(rpc_ms=rpc_ms)
+
+    doc_ids = [f"bench_candidate_{i}" for i in range(docs)]
+    seed_docs = {doc_id: {"name": f"Candidate {i}", "status": "pending"} for i, doc_id in enumerate(doc_ids)}
+    if use_emulator:
+        for start in range(0, len(doc_ids), 500):
+            seed = db.batch()
+            for doc_id in doc_ids[start:start + 500]:
+                seed.set(db.collection(COLLECTION).document(doc_id), seed_docs[doc_id])
+            seed.commit()
+    else:
+        db.docs.update(seed_docs)
+
+    # Cloud Run's default executor has min(32, cpus + 4) threads; 2 vCPUs -> 6
+    threads = int(os.getenv("FIRESTORE_BATCH_BENCH_THREADS", "6"))
+    asyncio.get_event_loop().set_default_executor(ThreadPoolExecutor(max_workers=threads))
+    runs = [
+        await _run_mode("direct", db, doc_ids, concurrency),
+        await _run_mode("batched", db, doc_ids, concurrency),
+    ]
+
+    report = {
+        "backend": "emulator" if use_emulator else "in_memory",
+        "simulated_rpc_ms": None if use_emulator else rpc_ms,
+        "concurrency": concurrency,
+        "executor_threads": threads,
+        "runs": runs,
+        "speedup": round(runs[0]["elapsed_sec"] / runs[1]["elapsed_sec"], 2) if runs[1]["elapsed_sec"] else None,
+        "generated_at": int(time.time()),
+    }
+
+    os.makedirs(os.path.dirname(REPORT), exist_ok=True)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main() -> None:
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
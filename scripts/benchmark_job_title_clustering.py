@@ -0,0 +1,162 @@
+"""
+Benchmark JobTitleClusteringEngine backends: exact vs scalable, on synthetic job-title embeddings.
+
+For each method (dbscan, kmeans) and backend it reports wall time next to
+cluster quality:
+- exact: brute-force cosine DBSCAN, full KMeans(n_init=10) per k, full silhouettes
+- scalable: L2-normalized vectors, DBSCAN on a kNN graph (hnswlib when installed),
+  MiniBatchKMeans with sampled silhouettes, categories clustered in
+  ECO_CLUSTER_BENCH_WORKERS processes
+- scalable_ball_tree: scalable with exact ball-tree DBSCAN
+
+Quality is the engine's own metrics (cluster count, noise, silhouette,
+Davies-Bouldin), plus a cosine silhouette on one shared sample so the backends
+are scored alike, and the adjusted Rand index against the exact labels.
+Embeddings are noisy blobs around per-role centers, split into categories
+by title keyword, like the Brazilian job dataset.
+
+Environment:
+- ECO_CLUSTER_BENCH_TITLES: number of titles (default 6000)
+- ECO_CLUSTER_BENCH_DIM: embedding dimension (default 384)
+- ECO_CLUSTER_BENCH_ROLES: distinct roles (blob centers, default 60)
+- ECO_CLUSTER_BENCH_WORKERS: processes for the scalable backend (default: CPUs, at most 4)
+- ECO_CLUSTER_BENCH_METHODS: comma-separated methods (default dbscan,kmeans)
+- ECO_CLUSTER_BENCH_REPORT: JSON report path
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score, silhouette_score
+
+from scripts.job_title_clustering_engine import ClusteringConfig, JobTitleClusteringEngine
+
+REPORT = os.getenv("ECO_CLUSTER_BENCH_REPORT", "scripts/job_title_clustering_benchmark.json")
+
+_CATEGORIES = ["desenvolvedor", "engenheiro", "analista", "gerente"]
+_AREAS = ["backend", "frontend", "dados", "vendas", "financeiro", "infraestrutura", "produto", "qualidade"]
+
+
+class SyntheticVectorSource:
+    def __init__(self, titles: int, dim: int, roles: int, seed: int = 7):
+        rng = np.random.default_rng(seed)
+        centers = rng.normal(size=(roles, dim)).astype("float32")
+        role_of = rng.integers(0, roles, size=titles)
+        self.embeddings = centers[role_of] + rng.normal(scale=0.35, size=(titles, dim)).astype("float32")
+        self.ids = [f"title-{i}" for i in range(titles)]
+        self.metadata = []
+        for i, role in enumerate(role_of):
+            title = f"{_CATEGORIES[role % len(_CATEGORIES)]} {_AREAS[(role // len(_CATEGORIES)) % len(_AREAS)]} {role}"
+            self.metadata.append({"normalized_title": title, "text": title, "frequency": 1})
+
+    def list_embeddings(self, chunk_type: str) -> List[Dict[str, Any]]:
+        return []
+
+    def list_embedding_matrix(self, chunk_type: str) -> Any:
+        return SimpleNamespace(ids=self.ids, embeddings=self.embeddings, metadata=self.metadata)
+
+
+class _BenchmarkEngine(JobTitleClusteringEngine):
+    def _persist_cluster_assignments(self, clusters, metrics) -> None:
+        return None
+
+
+def _labels(payload: Dict[str, Any], ids: List[str]) -> np.ndarray:
+    by_id = {}
+    for cluster in payload["clusters"].values():
+        for title in cluster["titles"]:
+            by_id[title["chunk_id"]] = cluster["cluster_id"]
+    return np.array([by_id.get(chunk_id, -1) for chunk_id in ids])
+
+
+def _run_mode(source: SyntheticVectorSource, method: str, backend: str, workers: int,
+              neighbor_index: str = "knn_graph") -> Dict[str, Any]:
+    config = ClusteringConfig(
+        method=method,
+        eps=0.35,
+        min_samples=5,
+        k_range=(10, 20),
+        category_overrides={name: {"keywords": [name]} for name in _CATEGORIES},
+        backend=backend,
+        neighbor_index=neighbor_index,
+        workers=workers if backend == "scalable" else 1,
+    )
+    engine = _BenchmarkEngine(config, vector_source=source)
+    started = time.perf_counter()
+    payload = engine.run()
+    elapsed = time.perf_counter() - started
+    metrics = payload["metrics"]
+    return {
+        "wall_time_sec": round(elapsed, 3),
+        "cluster_count": metrics["cluster_count"],
+        "noise_count": metrics["noise_count"],
+        "silhouette_score": metrics["silhouette_score"],
+        "davies_bouldin_index": metrics["davies_bouldin_index"],
+        "category_wall_time_sec": {
+            name: breakdown.get("wall_time_sec") for name, breakdown in metrics["category_breakdown"].items()
+        },
+        "_labels": _labels(payload, source.ids),
+    }
+
+
+def _shared_silhouette(embeddings: np.ndarray, labels: np.ndarray, sample: np.ndarray) -> Optional[float]:
+    subset = labels[sample]
+    mask = subset >= 0
+    if np.unique(subset[mask]).size < 2:
+        return None
+    return round(float(silhouette_score(embeddings[sample][mask], subset[mask], metric="cosine")), 4)
+
+
+def run() -> Dict[str, Any]:
+    titles = int(os.getenv("ECO_CLUSTER_BENCH_TITLES", "6000"))
+    dim = int(os.getenv("ECO_CLUSTER_BENCH_DIM", "384"))
+    roles = int(os.getenv("ECO_CLUSTER_BENCH_ROLES", "60"))
+    workers = int(os.getenv("ECO_CLUSTER_BENCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    methods = [m for m in os.getenv("ECO_CLUSTER_BENCH_METHODS", "dbscan,kmeans").split(",") if m]
+    source = SyntheticVectorSource(titles, dim, roles)
+    sample = np.random.default_rng(3).choice(titles, size=min(titles, 3000), replace=False)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for method in methods:
+        modes = {
+            "exact": _run_mode(source, method, "exact", workers),
+            "scalable": _run_mode(source, method, "scalable", workers),
+        }
+        if method == "dbscan":
+            modes["scalable_ball_tree"] = _run_mode(source, method, "scalable", workers, neighbor_index="ball_tree")
+        exact_labels = modes["exact"]["_labels"]
+        for mode in modes.values():
+            labels = mode.pop("_labels")
+            mode["shared_sample_silhouette"] = _shared_silhouette(source.embeddings, labels, sample)
+            mode["adjusted_rand_vs_exact"] = round(float(adjusted_rand_score(exact_labels, labels)), 4)
+        exact_time = modes["exact"]["wall_time_sec"] or 1e-9
+        for mode in modes.values():
+            mode["speedup_vs_exact"] = round(exact_time / max(mode["wall_time_sec"], 1e-9), 2)
+        results[method] = modes
+
+    report = {
+        "titles": titles,
+        "dim": dim,
+        "roles": roles,
+        "workers": workers,
+        "results": results,
+        "generated_at": int(time.time()),
+    }
+    os.makedirs(os.path.dirname(REPORT) or ".", exist_ok=True)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main() -> None:
+    print(json.dumps(run(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark pgvector ingest paths: per-row upsert function vs. binary COPY bulk mode.
+
+Writes synthetic embeddings under a dedicated chunk type, measures rows/sec for
+``PgVectorStore.batch_store_embeddings`` (one ``upsert_candidate_embedding``
+call per row) and ``PgVectorStore.bulk_store_embeddings`` (COPY + merge), then
+removes the synthetic rows.
+
+Environment:
+- PGVECTOR_* connection variables (see scripts/pgvector_store.py)
+- INGEST_BENCH_ROWS: rows per run (default 5000)
+- INGEST_BENCH_BATCH: batch size for both paths (default 1000)
+- PGVECTOR_INGEST_REPORT: JSON report path
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict
+
+import numpy as np
+
+try:
+    from scripts.pgvector_store import (  # type: ignore
+        EMBEDDING_DIMENSION,
+        EmbeddingRecord,
+        PgVectorStore,
+        create_pgvector_store,
+    )
+except Exception:
+    from pgvector_store import (  # type: ignore
+        EMBEDDING_DIMENSION,
+        EmbeddingRecord,
+        PgVectorStore,
+        create_pgvector_store,
+    )
+
+
+REPORT = os.getenv("PGVECTOR_INGEST_REPORT", "scripts/pgvector_ingest_benchmark.json")
+BENCH_CHUNK_TYPE = "ingest_benchmark"
+BENCH_MODEL_VERSION = "ingest-benchmark"
+
+
+async def _cleanup(store: PgVectorStore) -> None:
+    async with store.get_connection() as conn:
+        await conn.execute(
+            """
+            DELETE FROM embedding_metadata WHERE candidate_id IN (
+                SELECT candidate_id FROM candidate_embeddings WHERE chunk_type = $1
+            )
+            """,
+            BENCH_CHUNK_TYPE,
+        )
+        await conn.execute("DELETE FROM candidate_embeddings WHERE chunk_type = $1", BENCH_CHUNK_TYPE)
+
+
+async def bench_per_row(store: PgVectorStore, ids: list[str], matrix: np.ndarray, batch: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    records = [
+        EmbeddingRecord(
+            candidate_id=cid,
+            embedding=row.tolist(),
+            model_version=BENCH_MODEL_VERSION,
+            chunk_type=BENCH_CHUNK_TYPE,
+        )
+        for cid, row in zip(ids, matrix)
+    ]
+    await store.batch_store_embeddings(records, batch_size=batch)
+    elapsed = time.perf_counter() - t0
+    return {"rows": len(ids), "elapsed_sec": round(elapsed, 3), "rows_per_sec": round(len(ids) / elapsed, 1)}
+
+
+async def bench_bulk(store: PgVectorStore, ids: list[str], matrix: np.ndarray, batch: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    result = await store.bulk_store_embeddings(
+        ids,
+        matrix,
+        model_version=BENCH_MODEL_VERSION,
+        chunk_type=BENCH_CHUNK_TYPE,
+        batch_size=batch,
+    )
+    elapsed = time.perf_counter() - t0
+    return {
+        "rows": result.rows_written,
+        "batches": result.batches,
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": round(result.rows_written / elapsed, 1),
+    }
+
+
+async def run() -> Dict[str, Any]:
+    rows = int(os.getenv("INGEST_BENCH_ROWS", "5000"))
+    batch = int(os.getenv("INGEST_BENCH_BATCH", "1000"))
+    rng = np.random.default_rng(42)
+    matrix = rng.standard_normal((rows, EMBEDDING_DIMENSION), dtype=np.float32)
+    ids = [f"ingest_bench_{i}" for i in range(rows)]
+
+    store = await create_pgvector_store(pool_size=2)
+    try:
+        await _cleanup(store)
+        per_row = await bench_per_row(store, ids, matrix, batch)
+        # Second pass exercises the ON CONFLICT update path, as re-embedding does
+        bulk_update = await bench_bulk(store, ids, matrix, batch)
+        await _cleanup(store)
+        bulk_insert = await bench_bulk(store, ids, matrix, batch)
+    finally:
+        await _cleanup(store)
+        await store.close()
+
+    report = {
+        "rows": rows,
+        "batch_size": batch,
+        "per_row_function": per_row,
+        "bulk_copy_update": bulk_update,
+        "bulk_copy_insert": bulk_insert,
+        "speedup": round(bulk_update["rows_per_sec"] / max(per_row["rows_per_sec"], 1e-9), 2),
+        "generated_at": int(time.time()),
+    }
+    os.makedirs(os.path.dirname(REPORT), exist_ok=True)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main() -> None:
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
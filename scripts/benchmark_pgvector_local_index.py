@@ -0,0 +1,173 @@
+"""
+Benchmark the in-process LocalAnnIndex against the pgvector similarity_search path.
+
+For each query the exact top-k (flat local scan) is the ground truth; recall@k
+and latency are reported for:
+- pgvector: SQL similarity_search() through PgVectorStore
+- local_flat: LocalAnnIndex brute-force backend
+- local_ivf: LocalAnnIndex IVF backend for a few nprobe values
+
+Without a reachable database (or with LOCAL_INDEX_BENCH_SYNTHETIC=1) a
+synthetic clustered dataset is used and the pgvector run is skipped.
+
+Environment:
+- PGVECTOR_* connection variables (see scripts/pgvector_store.py)
+- LOCAL_INDEX_BENCH_CHUNK_TYPE: chunk type to load (default full_profile)
+- LOCAL_INDEX_BENCH_QUERIES: number of queries (default 200)
+- LOCAL_INDEX_BENCH_K: results per query (default 10)
+- LOCAL_INDEX_BENCH_ROWS: synthetic dataset size (default 30000)
+- LOCAL_INDEX_BENCH_REPORT: JSON report path
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from scripts.pgvector_local_index import LocalAnnIndex, recall_at_k  # type: ignore
+    from scripts.pgvector_store import EMBEDDING_DIMENSION, EmbeddingMatrix, PgVectorStore, create_pgvector_store  # type: ignore
+except Exception:
+    from pgvector_local_index import LocalAnnIndex, recall_at_k  # type: ignore
+    from pgvector_store import EMBEDDING_DIMENSION, EmbeddingMatrix, PgVectorStore, create_pgvector_store  # type: ignore
+
+
+REPORT = os.getenv("LOCAL_INDEX_BENCH_REPORT", "scripts/pgvector_local_index_benchmark.json")
+
+
+def synthetic_matrix(rows: int, clusters: int = 200, seed: int = 7) -> EmbeddingMatrix:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, EMBEDDING_DIMENSION)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((rows, EMBEDDING_DIMENSION)).astype(np.float32)
+    return EmbeddingMatrix(
+        ids=np.array([f"synthetic_{i}" for i in range(rows)], dtype=object),
+        embeddings=vectors,
+        model_versions=["synthetic"] * rows,
+        metadata=[{} for _ in range(rows)],
+        chunk_types=["full_profile"] * rows,
+    )
+
+
+class _MatrixSource:
+    """Stands in for PgVectorStore when benchmarking without a database."""
+
+    def __init__(self, matrix: EmbeddingMatrix):
+        self.matrix = matrix
+
+    async def fetch_embedding_matrix(self, **_: Any) -> EmbeddingMatrix:
+        return self.matrix
+
+
+def _queries(matrix: EmbeddingMatrix, count: int, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = matrix.embeddings[rng.choice(len(matrix), size=min(count, len(matrix)), replace=False)]
+    noise = 0.3 * rng.standard_normal(picks.shape).astype(np.float32) * picks.std()
+    return picks + noise
+
+
+async def _measure(
+    label: str,
+    search: Callable[[np.ndarray], Awaitable[List[str]]],
+    queries: np.ndarray,
+    truth: Optional[List[List[str]]],
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    found: List[List[str]] = []
+    for query in queries:
+        t0 = time.perf_counter()
+        found.append(await search(query))
+        latencies.append(time.perf_counter() - t0)
+    ordered = sorted(latencies)
+    return {
+        "mode": label,
+        "avg_ms": round(1000 * sum(latencies) / len(latencies), 3),
+        "p95_ms": round(1000 * ordered[int(0.95 * (len(ordered) - 1))], 3),
+        "recall_at_k": round(recall_at_k(truth, found), 4) if truth is not None else 1.0,
+        "_found": found,
+    }
+
+
+async def run() -> Dict[str, Any]:
+    chunk_type = os.getenv("LOCAL_INDEX_BENCH_CHUNK_TYPE", "full_profile")
+    k = int(os.getenv("LOCAL_INDEX_BENCH_K", "10"))
+    query_count = int(os.getenv("LOCAL_INDEX_BENCH_QUERIES", "200"))
+
+    store: Optional[PgVectorStore] = None
+    if os.getenv("LOCAL_INDEX_BENCH_SYNTHETIC") != "1":
+        try:
+            store = await create_pgvector_store(pool_size=4)
+        except Exception as exc:
+            print(f"pgvector unavailable ({exc}); using a synthetic dataset")
+            store = None
+
+    try:
+        source: Any = store
+        if store is None:
+            source = _MatrixSource(synthetic_matrix(int(os.getenv("LOCAL_INDEX_BENCH_ROWS", "30000"))))
+            chunk_type = "full_profile"
+
+        t0 = time.perf_counter()
+        flat = await LocalAnnIndex(chunk_type=chunk_type, backend="flat").load(source)
+        flat_load = time.perf_counter() - t0
+        if len(flat) == 0:
+            raise RuntimeError(f"No embeddings found for chunk_type={chunk_type}")
+        matrix = await source.fetch_embedding_matrix(chunk_type=chunk_type)
+        queries = _queries(matrix, query_count)
+
+        async def _local(index: LocalAnnIndex) -> Callable[[np.ndarray], Awaitable[List[str]]]:
+            async def _search(query: np.ndarray) -> List[str]:
+                return [r.candidate_id for r in index.search(query, -1.0, k, None, chunk_type)]
+            return _search
+
+        exact = await _measure("local_flat", await _local(flat), queries, None)
+        truth = exact["_found"]
+        runs = [exact]
+
+        for nprobe in (8, 16, 32):
+            t0 = time.perf_counter()
+            ivf = await LocalAnnIndex(chunk_type=chunk_type, backend="ivf", nprobe=nprobe).load(source)
+            build = time.perf_counter() - t0
+            result = await _measure(f"local_ivf_nprobe_{nprobe}", await _local(ivf), queries, truth)
+            result["build_sec"] = round(build, 3)
+            runs.append(result)
+
+        if store is not None:
+            async def _pgvector(query: np.ndarray) -> List[str]:
+                hits = await store.similarity_search(query, -1.0, k, None, chunk_type)
+                return [hit.candidate_id for hit in hits]
+
+            runs.append(await _measure("pgvector", _pgvector, queries, truth))
+
+        for entry in runs:
+            entry.pop("_found", None)
+
+        report = {
+            "dataset": {"rows": len(flat), "chunk_type": chunk_type, "synthetic": store is None},
+            "queries": len(queries),
+            "k": k,
+            "flat_load_sec": round(flat_load, 3),
+            "runs": runs,
+            "generated_at": int(time.time()),
+        }
+    finally:
+        if store is not None:
+            await store.close()
+
+    os.makedirs(os.path.dirname(REPORT), exist_ok=True)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main() -> None:
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
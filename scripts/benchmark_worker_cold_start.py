@@ -0,0 +1,222 @@
+"""
+Benchmark the Cloud Run worker's cold start: process spawn to first processed message.
+
+Each run spawns a fresh interpreter that imports cloud_run_worker.main, runs
+the FastAPI startup hook and processes one Pub/Sub message. It reports the
+worker's StartupProfile (per-module import and per-client init times) and
+the wall-clock time from spawn to the completed message. Modes:
+- lazy: the current path. Startup returns at once, clients warm concurrently
+  in the background and the first message waits for them.
+- sequential: Together AI, Firestore and Pub/Sub initialized one after
+  another before the first message (the old startup_event).
+
+A separate ``python -X importtime`` run lists the slowest imports.
+
+Together AI is a local mock server that answers after ``llm_ms``. Firestore
+is the in-memory fake from benchmark_firestore_batcher, but google.cloud.firestore
+is still imported so its cost stays in the measurement. The Pub/Sub publisher
+is built against PUBSUB_EMULATOR_HOST (default localhost:8681), so no
+credentials are needed and nothing is published on the happy path.
+
+Environment:
+- COLD_START_BENCH_RUNS: runs per mode (default 5)
+- COLD_START_BENCH_LLM_MS: mock Together AI latency (default 50)
+- COLD_START_BENCH_REPORT: JSON report path
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+REPORT = os.getenv("COLD_START_BENCH_REPORT", "scripts/worker_cold_start_benchmark.json")
+CANDIDATE_ID = "cold_start_candidate"
+
+ENRICHMENT = {
+    "resume_analysis": {"technical_skills": ["Python"], "career_trajectory": {"current_level": "senior"}},
+    "recruiter_insights": {"strengths": ["ownership"]},
+    "overall_score": 0.8,
+}
+
+
+def _start_mock_together(llm_ms: float) -> int:
+    """Serve /v1/chat/completions from a background thread; returns the port"""
+    from aiohttp import web
+
+    ready = threading.Event()
+    port: Dict[str, int] = {}
+
+    async def completions(_request):
+        await asyncio.sleep(llm_ms / 1000.0)
+        return web.json_response({
+            "choices": [{"message": {"content": json.dumps(ENRICHMENT)}}],
+            "usage": {"total_tokens": 100},
+        })
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", completions)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port["value"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait(timeout=10)
+    return port["value"]
+
+
+def _child(mode: str) -> None:
+    """Runs in the spawned interpreter; prints one JSON line"""
+    spawned_at = float(os.environ["COLD_START_BENCH_SPAWNED_AT"])
+    child_started = time.time()
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, SCRIPTS)
+
+    import cloud_run_worker.main as worker
+    from cloud_run_worker.firestore_client import FirestoreClient
+    from benchmark_firestore_batcher import InMemoryFirestore  # type: ignore
+
+    def _create_client(self):
+        from google.cloud import firestore  # noqa: F401  keep the real import cost
+
+        db = InMemoryFirestore()
+        db.docs[CANDIDATE_ID] = {"name": "Ana", "resume_text": "Senior Python engineer", "org_id": "org"}
+        return db
+
+    FirestoreClient._create_client = _create_client
+
+    message = {
+        "message": {
+            "data": base64.b64encode(json.dumps({"candidate_id": CANDIDATE_ID}).encode()).decode(),
+            "messageId": f"cold-start-{mode}-{os.getpid()}",
+        }
+    }
+
+    async def run() -> Dict[str, Any]:
+        if mode == "sequential":
+            with worker.startup_profile.phase("init:total"):
+                await worker.candidate_processor.together_ai_client.initialize()
+                await worker.candidate_processor.firestore_client.initialize()
+                await worker.pubsub_handler.initialize()
+            worker.clients.ready = True
+            worker.startup_profile.mark("ready")
+        await worker.startup_event()
+        result = await worker.process_candidate_message(message)
+        return {"status": result.status, "error": result.error}
+
+    outcome = asyncio.run(run())
+    done = time.time()
+    print(json.dumps({
+        "mode": mode,
+        "outcome": outcome,
+        "interpreter_start_sec": round(child_started - spawned_at, 4),
+        "spawn_to_first_message_sec": round(done - spawned_at, 4),
+        "profile": worker.startup_profile.snapshot(),
+    }))
+    # Skip client shutdown; the next run is a fresh process anyway
+    os._exit(0)
+
+
+def _run_child(mode: str, env: Dict[str, str]) -> Dict[str, Any]:
+    env = dict(env, COLD_START_BENCH_SPAWNED_AT=repr(time.time()))
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", mode], env=env, capture_output=True, text=True, timeout=120
+    )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"Cold start run failed ({mode}): {proc.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def _slowest_imports(env: Dict[str, str], top: int = 15) -> List[Dict[str, Any]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import cloud_run_worker.main"],
+        env=env, cwd=ROOT, capture_output=True, text=True, timeout=120,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        # Only top-level packages and the worker's own modules
+        if "." not in name or name.startswith("cloud_run_worker"):
+            rows.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:top]
+
+
+def _summarise(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def median(values):
+        return round(statistics.median(values), 4) if values else None
+
+    phases = sorted({name for run in runs for name in run["profile"]["phases"]})
+    return {
+        "runs": len(runs),
+        "failed": sum(1 for run in runs if run["outcome"]["status"] != "completed"),
+        "spawn_to_first_message_sec": median([run["spawn_to_first_message_sec"] for run in runs]),
+        "interpreter_start_sec": median([run["interpreter_start_sec"] for run in runs]),
+        "marks_sec": {
+            mark: median([run["profile"]["marks"][mark] for run in runs if mark in run["profile"]["marks"]])
+            for mark in ("imported", "started", "ready", "first_message")
+        },
+        "phases_sec": {
+            phase: median([run["profile"]["phases"][phase] for run in runs if phase in run["profile"]["phases"]])
+            for phase in phases
+        },
+    }
+
+
+def run() -> Dict[str, Any]:
+    runs_per_mode = int(os.getenv("COLD_START_BENCH_RUNS", "5"))
+    llm_ms = float(os.getenv("COLD_START_BENCH_LLM_MS", "50"))
+    port = _start_mock_together(llm_ms)
+
+    env = dict(os.environ)
+    env.setdefault("TOGETHER_API_KEY", "bench-key")
+    env.setdefault("GOOGLE_CLOUD_PROJECT", "headhunter-local")
+    env.setdefault("PUBSUB_EMULATOR_HOST", "localhost:8681")
+    env.update({
+        "TOGETHER_AI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+        "TOGETHER_AI_STREAMING": "false",
+        "LLM_CACHE_ENABLED": "false",
+        "DEAD_LETTER_SPILL_PATH": os.path.join("/tmp", f"cold-start-bench-dlq-{os.getpid()}.jsonl"),
+    })
+
+    modes = {}
+    for mode in ("sequential", "lazy"):
+        modes[mode] = _summarise([_run_child(mode, env) for _ in range(runs_per_mode)])
+
+    report = {
+        "mock_llm_ms": llm_ms,
+        "modes": modes,
+        "slowest_imports": _slowest_imports(env),
+        "generated_at": int(time.time()),
+    }
+    os.makedirs(os.path.dirname(REPORT) or ".", exist_ok=True)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main() -> None:
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        _child(sys.argv[2])
+        return
+    print(json.dumps(run(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
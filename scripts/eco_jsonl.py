@@ -0,0 +1,48 @@
+"""
+Read ECO JSONL batches, plain or compressed.
+
+The scraper uploads batches as ``.jsonl``, ``.jsonl.gz`` or ``.jsonl.zst``
+(ECO_UPLOAD_COMPRESSION); readers pick the codec from the file name.
+"""
+import gzip
+import io
+from typing import IO
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def is_jsonl_batch(name: str) -> bool:
+    return name.endswith(JSONL_SUFFIXES)
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise RuntimeError("zstandard not installed; cannot read .jsonl.zst batches")
+
+
+def open_jsonl(path: str) -> IO[str]:
+    """Open a local batch for reading text lines, decompressing by extension."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        _require_zstandard()
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def decode_jsonl_bytes(name: str, data: bytes) -> str:
+    """Decode a downloaded batch; gzip is detected by magic bytes since GCS may already have transcoded it."""
+    if name.endswith(".gz") and data[:2] == _GZIP_MAGIC:
+        data = gzip.decompress(data)
+    elif name.endswith(".zst"):
+        _require_zstandard()
+        data = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+    return data.decode("utf-8")
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _hash_pair(key: str) -> Tuple[int, int]:
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    # Kirsch-Mitzenmacher double hashing; an odd step visits distinct bits
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over a bytearray."""
+
+    def __init__(self, capacity: int, error_rate: float, num_bits: int = 0, num_hashes: int = 0, count: int = 0,
+                 bits: Optional[bytearray] = None):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = num_bits or max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = num_hashes or max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = count
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, hashes: Tuple[int, int]) -> Iterable[int]:
+        h1, h2 = hashes
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def contains(self, hashes: Tuple[int, int]) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(hashes))
+
+    def add(self, hashes: Tuple[int, int]):
+        bits = self.bits
+        for p in self._positions(hashes):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def header(self) -> Dict[str, float]:
+        return {"capacity": self.capacity, "error_rate": self.error_rate, "num_bits": self.num_bits,
+                "num_hashes": self.num_hashes, "count": self.count}
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that adds a larger, tighter slice whenever the current one is full,
+    so the false positive rate stays under ``error_rate`` however many keys arrive.
+    """
+
+    def __init__(self, initial_capacity: int = 100_000, error_rate: float = 0.001, growth: int = 2,
+                 tightening: float = 0.5):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.slices: List[BloomFilter] = []
+
+    def __len__(self) -> int:
+        return sum(s.count for s in self.slices)
+
+    def __contains__(self, key: str) -> bool:
+        hashes = _hash_pair(key)
+        return any(s.contains(hashes) for s in self.slices)
+
+    def add(self, key: str):
+        hashes = _hash_pair(key)
+        if any(s.contains(hashes) for s in self.slices):
+            return
+        if not self.slices or self.slices[-1].count >= self.slices[-1].capacity:
+            n = len(self.slices)
+            # Geometric error budget: the slices' rates sum to at most error_rate
+            self.slices.append(BloomFilter(
+                self.initial_capacity * self.growth ** n,
+                self.error_rate * (1 - self.tightening) * self.tightening ** n,
+            ))
+        self.slices[-1].add(hashes)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(s.bits) for s in self.slices)
+
+    def save(self, path: str, saved_at: float):
+        header = {"version": 1, "saved_at": saved_at, "initial_capacity": self.initial_capacity,
+                  "error_rate": self.error_rate, "growth": self.growth, "tightening": self.tightening,
+                  "slices": [s.header() for s in self.slices]}
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for s in self.slices:
+                f.write(s.bits)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["ScalableBloomFilter", float]:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            bloom = cls(header["initial_capacity"], header["error_rate"], header["growth"], header["tightening"])
+            for h in header["slices"]:
+                bits = bytearray(f.read((int(h["num_bits"]) + 7) // 8))
+                bloom.slices.append(BloomFilter(int(h["capacity"]), h["error_rate"], int(h["num_bits"]),
+                                                int(h["num_hashes"]), int(h["count"]), bits))
+        return bloom, float(header["saved_at"])
+
+
+class DedupStore:
+    """
+    Persistent, memory-bounded "seen before?" store shared by spiders and crawl runs.
+
+    Keys live in SQLite (``namespace``, ``key``, ``last_seen``) and expire after
+    ``ttl_days`` without being seen. A scalable Bloom filter per namespace,
+    snapshotted next to the database, answers most lookups for new keys without
+    touching disk. A Bloom hit is confirmed against SQLite, and an insert that
+    finds an existing row (written by another crawler since the snapshot) is
+    treated as a duplicate, so answers stay exact. Writes are committed every
+    ``commit_every`` operations and on ``close``.
+
+    Pipelines ``reserve`` keys for items that are still in flight and
+    ``record`` them once their batch is stored; a crash or failed upload
+    leaves nothing marked as seen.
+    """
+
+    def __init__(self, path: str, ttl_days: float = 30.0, bloom_capacity: int = 100_000,
+                 error_rate: float = 0.001, commit_every: int = 500, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        self.commit_every = commit_every
+        self.clock = clock
+        self._blooms: Dict[str, ScalableBloomFilter] = {}
+        self._pending = 0
+        # Keys claimed by in-flight items, per namespace and per owning item
+        self._claimed: Dict[str, Set[str]] = {}
+        self._claims: Dict[str, List[Tuple[str, str]]] = {}
+        self.stats: Dict[str, int] = {"bloom_negative": 0, "disk_lookups": 0, "expired": 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+            "last_seen REAL NOT NULL, PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS seen_last_seen ON seen (last_seen)")
+        self._conn.commit()
+        self.expire()
+
+    def _snapshot_path(self, namespace: str) -> str:
+        return f"{self.path}.{namespace}.bloom"
+
+    def _bloom(self, namespace: str) -> ScalableBloomFilter:
+        bloom = self._blooms.get(namespace)
+        if bloom is None:
+            bloom = self._load_bloom(namespace)
+            self._blooms[namespace] = bloom
+        return bloom
+
+    def _load_bloom(self, namespace: str) -> ScalableBloomFilter:
+        cutoff = self.clock() - self.ttl_seconds
+        total = self._conn.execute("SELECT COUNT(*) FROM seen WHERE namespace = ?", (namespace,)).fetchone()[0]
+        snapshot = self._snapshot_path(namespace)
+        if os.path.exists(snapshot):
+            try:
+                bloom, saved_at = ScalableBloomFilter.load(snapshot)
+                # Expired keys linger in the filter as false positives; rebuild once they dominate
+                if len(bloom) <= 2 * total + self.bloom_capacity:
+                    # Catch up on keys other crawlers stored after the snapshot
+                    for (key,) in self._conn.execute(
+                        "SELECT key FROM seen WHERE namespace = ? AND last_seen >= ?", (namespace, saved_at - 60)
+                    ):
+                        bloom.add(key)
+                    return bloom
+            except (OSError, ValueError, KeyError):
+                pass
+        bloom = ScalableBloomFilter(max(self.bloom_capacity, total), self.error_rate)
+        for (key,) in self._conn.execute(
+            "SELECT key FROM seen WHERE namespace = ? AND last_seen >= ?", (namespace, cutoff)
+        ):
+            bloom.add(key)
+        return bloom
+
+    def _is_fresh(self, namespace: str, key: str, cutoff: float) -> bool:
+        self.stats["disk_lookups"] += 1
+        row = self._conn.execute(
+            "SELECT last_seen FROM seen WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return row is not None and row[0] >= cutoff
+
+    def seen(self, namespace: str, key: str) -> bool:
+        """Read-only check: was ``key`` seen within the TTL?"""
+        if key not in self._bloom(namespace):
+            self.stats["bloom_negative"] += 1
+            return False
+        return self._is_fresh(namespace, key, self.clock() - self.ttl_seconds)
+
+    def reserve(self, namespace: str, key: str, owner: str) -> bool:
+        """Claim ``key`` for the item ``owner`` without storing it; True if seen within the TTL or already claimed."""
+        claimed = self._claimed.setdefault(namespace, set())
+        if key in claimed or self.seen(namespace, key):
+            return True
+        claimed.add(key)
+        self._claims.setdefault(owner, []).append((namespace, key))
+        return False
+
+    def record(self, owners: Iterable[Optional[str]]) -> int:
+        """Store the keys claimed by ``owners`` as seen now and commit; returns how many were written."""
+        now = self.clock()
+        written = 0
+        for owner in owners:
+            for namespace, key in self._claims.pop(owner, ()):
+                self._conn.execute(
+                    "INSERT INTO seen (namespace, key, last_seen) VALUES (?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET last_seen = excluded.last_seen",
+                    (namespace, key, now),
+                )
+                self._bloom(namespace).add(key)
+                self._claimed[namespace].discard(key)
+                written += 1
+        self.flush()
+        return written
+
+    def check_and_add(self, namespace: str, key: str) -> bool:
+        """Record ``key`` as seen now; returns True if it had been seen within the TTL."""
+        now = self.clock()
+        cutoff = now - self.ttl_seconds
+        bloom = self._bloom(namespace)
+        if key in bloom:
+            known = self._is_fresh(namespace, key, cutoff)
+            self._conn.execute(
+                "INSERT INTO seen (namespace, key, last_seen) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET last_seen = excluded.last_seen",
+                (namespace, key, now),
+            )
+        else:
+            self.stats["bloom_negative"] += 1
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO seen (namespace, key, last_seen) VALUES (?, ?, ?)", (namespace, key, now)
+            ).rowcount
+            known = False
+            if not inserted:
+                known = self._is_fresh(namespace, key, cutoff)
+                self._conn.execute(
+                    "UPDATE seen SET last_seen = ? WHERE namespace = ? AND key = ?", (now, namespace, key)
+                )
+            bloom.add(key)
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+        return known
+
+    def expire(self) -> int:
+        deleted = self._conn.execute(
+            "DELETE FROM seen WHERE last_seen < ?", (self.clock() - self.ttl_seconds,)
+        ).rowcount
+        self._conn.commit()
+        self.stats["expired"] += deleted
+        return deleted
+
+    def flush(self):
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        now = self.clock()
+        for namespace, bloom in self._blooms.items():
+            bloom.save(self._snapshot_path(namespace), saved_at=now)
+        self._conn.close()
+
+    def describe(self) -> Dict[str, object]:
+        return {
+            **self.stats,
+            "bloom_bytes": sum(b.size_bytes for b in self._blooms.values()),
+            "bloom_keys": {ns: len(b) for ns, b in self._blooms.items()},
+        }
+
+
+_shared: Dict[str, Tuple[DedupStore, int]] = {}
+
+
+def acquire_store(path: str, **kwargs) -> DedupStore:
+    """Open (or reuse) the store at ``path``; pipelines and middlewares of one process share it."""
+    key = os.path.abspath(path)
+    store, refs = _shared.get(key, (None, 0))
+    if store is None:
+        store = DedupStore(path, **kwargs)
+    _shared[key] = (store, refs + 1)
+    return store
+
+
+def release_store(store: DedupStore):
+    key = os.path.abspath(store.path)
+    _, refs = _shared.get(key, (store, 1))
+    if refs <= 1:
+        _shared.pop(key, None)
+        store.close()
+    else:
+        _shared[key] = (store, refs - 1)
+
+
+def store_from_settings(settings) -> Optional[DedupStore]:
+    """Shared store configured by ECO_DEDUP_DB / ECO_DEDUP_TTL_DAYS; None when ECO_DEDUP_DB is empty."""
+    path = settings.get("ECO_DEDUP_DB")
+    if not path:
+        return None
+    return acquire_store(
+        path,
+        ttl_days=settings.getfloat("ECO_DEDUP_TTL_DAYS", 30.0),
+        bloom_capacity=settings.getint("ECO_DEDUP_BLOOM_CAPACITY", 100_000),
+    )
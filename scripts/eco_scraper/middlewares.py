@@ -1,6 +1,11 @@
 import random
 from typing import List, Optional
 
+from scrapy import signals  # type: ignore
+from scrapy.exceptions import IgnoreRequest  # type: ignore
+
+from .dedup_store import DedupStore, release_store, store_from_settings
+
 
 class RandomUserAgentMiddleware:
     """Rotate User-Agent per request using settings.USER_AGENTS list."""
@@ -100,3 +105,74 @@ class RequestLoggerMiddleware:
     def process_response(self, request, response, spider):  # noqa: D401
         spider.logger.debug("Response %s: %s", response.status, response.url)
         return response
+
+
+class KnownUrlSkipMiddleware:
+    """Skip requests for posting URLs already in the shared dedup store (before fetching them)."""
+
+    def __init__(self, store: Optional[DedupStore]):
+        self.store = store
+
+    @classmethod
+    def from_crawler(cls, crawler):  # noqa: D401
+        mw = cls(store_from_settings(crawler.settings))
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_closed(self, spider):  # noqa: D401
+        if self.store is not None:
+            release_store(self.store)
+            self.store = None
+
+    def process_request(self, request, spider):  # noqa: D401
+        # Listing pages are never stored as posting URLs, so only known postings are skipped
+        if self.store is None or request.meta.get("dont_dedup"):
+            return None
+        if self.store.seen("url", request.url):
+            try:
+                spider.crawler.stats.inc_value("eco/dedup_skipped_requests")
+            except Exception:
+                pass
+            raise IgnoreRequest(f"Known posting URL: {request.url}")
+        return None
+
+
+class KnownPageStopMiddleware:
+    """
+    Stop following pagination once a listing page holds only postings from earlier crawls.
+
+    Listings are requested newest first, so the pages after a fully known page
+    are older still and would only be downloaded to be dropped by DedupPipeline.
+    """
+
+    def __init__(self, store: Optional[DedupStore], enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+
+    @classmethod
+    def from_crawler(cls, crawler):  # noqa: D401
+        mw = cls(store_from_settings(crawler.settings), crawler.settings.getbool("ECO_DEDUP_STOP_ON_KNOWN_PAGE", True))
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_closed(self, spider):  # noqa: D401
+        if self.store is not None:
+            release_store(self.store)
+            self.store = None
+
+    def process_spider_output(self, response, result, spider):  # noqa: D401
+        if self.store is None or not self.enabled:
+            yield from result
+            return
+        outputs = list(result)
+        urls = [o.get("source_url") for o in outputs if isinstance(o, dict) and o.get("source_url")]
+        all_known = bool(urls) and all(self.store.seen("url", url) for url in urls)
+        for output in outputs:
+            if all_known and hasattr(output, "url") and not isinstance(output, dict):
+                try:
+                    spider.crawler.stats.inc_value("eco/dedup_pagination_stopped")
+                except Exception:
+                    pass
+                spider.logger.info("Every posting on %s is known; not following %s", response.url, output.url)
+                continue
+            yield output
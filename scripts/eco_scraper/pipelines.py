@@ -1,11 +1,13 @@
 import json
 import os
-import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Set
 
 from scrapy.exceptions import DropItem  # type: ignore
 
+from .dedup_store import DedupStore, release_store, store_from_settings
+from .uploads import BatchUploader, GcsBackend, LocalDirectoryBackend
+
 
 class TitleNormalizationPipeline:
     def open_spider(self, spider):  # noqa: D401
@@ -48,20 +50,55 @@ class JsonlWriterPipeline:
 
 
 class DedupPipeline:
-    """Deduplicate items by source_url (or full JSON) within a crawl run."""
+    """
+    Deduplicate items by source_url (or full JSON).
+
+    With ECO_DEDUP_DB set, keys persist across runs and spiders in a shared
+    DedupStore, so postings from earlier crawls are dropped too. Keys are only
+    reserved here, under the item's source_url; CloudStoragePipeline records
+    them once the item's batch is stored. Otherwise dedup is per crawl run,
+    in memory.
+    """
+
+    namespace = "url"
+    stat_key = "eco/duplicates"
+    drop_message = "Duplicate item detected"
 
-    def __init__(self) -> None:
+    def __init__(self, store: Optional[DedupStore] = None) -> None:
+        self.store = store
         self._seen: Set[str] = set()
 
-    def process_item(self, item: Dict[str, Any], spider):  # noqa: D401
-        key = item.get("source_url") or json.dumps(item, sort_keys=True)
+    @classmethod
+    def from_crawler(cls, crawler):  # noqa: D401
+        return cls(store_from_settings(crawler.settings))
+
+    def close_spider(self, spider):  # noqa: D401
+        if self.store is not None:
+            release_store(self.store)
+            self.store = None
+
+    def item_key(self, item: Dict[str, Any]) -> str:
+        return item.get("source_url") or json.dumps(item, sort_keys=True)
+
+    def _is_duplicate(self, key: str, item: Dict[str, Any]) -> bool:
+        if self.store is not None:
+            owner = item.get("source_url")
+            if owner is None:
+                # Nothing to tie the key to a stored batch
+                return self.store.check_and_add(self.namespace, key)
+            return self.store.reserve(self.namespace, key, owner)
         if key in self._seen:
+            return True
+        self._seen.add(key)
+        return False
+
+    def process_item(self, item: Dict[str, Any], spider):  # noqa: D401
+        if self._is_duplicate(self.item_key(item), item):
             try:
-                spider.crawler.stats.inc_value("eco/duplicates")
+                spider.crawler.stats.inc_value(self.stat_key)
             except Exception:
                 pass
-            raise DropItem("Duplicate item detected")
-        self._seen.add(key)
+            raise DropItem(self.drop_message)
         return item
 
 
@@ -117,100 +154,131 @@ class ValidationPipeline:
         return item
 
 
-class AliasDedupPipeline:
+class AliasDedupPipeline(DedupPipeline):
     """Deduplicate by (normalized_title, company)."""
 
-    def __init__(self) -> None:
-        self._pairs: Set[str] = set()
+    namespace = "alias"
+    stat_key = "eco/alias_dupes"
+    drop_message = "Duplicate normalized/company pair"
 
-    def process_item(self, item: Dict[str, Any], spider):  # noqa: D401
-        norm = item.get("normalized_title")
-        comp = item.get("company") or ""
-        key = f"{norm}||{comp}"
-        if key in self._pairs:
-            try:
-                spider.crawler.stats.inc_value("eco/alias_dupes")
-            except Exception:
-                pass
-            raise DropItem("Duplicate normalized/company pair")
-        self._pairs.add(key)
-        return item
+    def item_key(self, item: Dict[str, Any]) -> str:
+        return f"{item.get('normalized_title')}||{item.get('company') or ''}"
 
 
 class CloudStoragePipeline:
     """
-    Batch writer that rotates local JSONL files and uploads them to a fixed
-    GCS path: gs://headhunter-ai-0088-eco-raw/job_postings/YYYYMMDD/{spider}/{batch_N}.jsonl
+    Batch writer that rotates compressed JSONL files and uploads them to a fixed
+    GCS path: gs://headhunter-ai-0088-eco-raw/job_postings/YYYYMMDD/{spider}/{batch_N}.jsonl.gz
+
+    Writing, compressing and uploading run on a small thread pool, so the reactor
+    keeps crawling during uploads. When ``max_in_flight`` uploads are pending,
+    process_item returns a Deferred and Scrapy holds further items until one
+    finishes. Set ECO_FAKE_GCS_DIR to upload into a local directory instead.
+    Dedup keys reserved for a batch's items are recorded in the DedupStore only
+    after that batch is uploaded.
     """
 
-    def __init__(self, batch_size: int = 1000, max_batch_bytes: int = 5_000_000):
+    bucket_name = "headhunter-ai-0088-eco-raw"
+
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        max_batch_bytes: int = 5_000_000,
+        max_in_flight: int = 2,
+        max_retries: int = 3,
+        retry_base_delay: float = 2.0,
+        compression: str = "gzip",
+        fake_gcs_dir: Optional[str] = None,
+        store: Optional[DedupStore] = None,
+    ):
         self.batch_size = batch_size
         self.max_batch_bytes = max_batch_bytes
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.compression = compression
+        self.fake_gcs_dir = fake_gcs_dir
+        self.store = store
         self._buffer: List[str] = []
+        self._buffer_owners: List[Optional[str]] = []
         self._buffer_bytes = 0
         self._batch_index = 0
         self._out_dir: Optional[str] = None
+        self.uploader: Optional[BatchUploader] = None
 
     @classmethod
     def from_crawler(cls, crawler):  # noqa: D401
         return cls(
             batch_size=int(crawler.settings.getint("ECO_BATCH_SIZE", 1000)),
             max_batch_bytes=int(crawler.settings.getint("ECO_MAX_BATCH_BYTES", 5_000_000)),
+            max_in_flight=int(crawler.settings.getint("ECO_UPLOAD_MAX_IN_FLIGHT", 2)),
+            max_retries=int(crawler.settings.getint("ECO_MAX_RETRIES", 3)),
+            retry_base_delay=float(crawler.settings.getfloat("ECO_RETRY_BASE_DELAY", 2.0)),
+            compression=crawler.settings.get("ECO_UPLOAD_COMPRESSION", "gzip"),
+            fake_gcs_dir=crawler.settings.get("ECO_FAKE_GCS_DIR") or None,
+            store=store_from_settings(crawler.settings),
         )
 
+    def _make_backend(self, spider):
+        if self.fake_gcs_dir:
+            return LocalDirectoryBackend(self.fake_gcs_dir, self.bucket_name)
+        try:
+            import google.cloud.storage  # type: ignore  # noqa: F401
+        except Exception:
+            spider.logger.warning("Cloud upload skipped (google-cloud-storage not installed)")
+            return None
+        return GcsBackend(self.bucket_name, project=os.environ.get("GOOGLE_CLOUD_PROJECT"))
+
     def open_spider(self, spider):  # noqa: D401
         date = datetime.utcnow().strftime("%Y%m%d")
         self._out_dir = os.environ.get("ECO_OUTPUT_DIR", f"eco_raw/{date}/{spider.name}")
         os.makedirs(self._out_dir, exist_ok=True)
         self._buffer.clear()
+        self._buffer_owners.clear()
         self._buffer_bytes = 0
         self._batch_index = 0
+        stats = getattr(getattr(spider, "crawler", None), "stats", None)
+        if self.uploader is None:
+            # One backend (and storage client) for the whole crawl
+            self.uploader = BatchUploader(
+                self._make_backend(spider),
+                max_in_flight=self.max_in_flight,
+                max_retries=self.max_retries,
+                retry_base_delay=self.retry_base_delay,
+                compression=self.compression,
+                logger=spider.logger,
+                stats=stats,
+            )
 
     def _flush_batch(self, spider):
         if not self._buffer or not self._out_dir:
-            return
+            return None
         file_path = os.path.join(self._out_dir, f"batch_{self._batch_index}.jsonl")
-        with open(file_path, "w", encoding="utf-8") as f:
-            for line in self._buffer:
-                f.write(line + "\n")
-
-        self._buffer.clear()
+        blob_path = f"job_postings/{os.path.basename(os.path.dirname(self._out_dir))}/{spider.name}/{os.path.basename(file_path)}"
+        lines, owners = self._buffer, self._buffer_owners
+        self._buffer, self._buffer_owners = [], []
         self._buffer_bytes = 0
         self._batch_index += 1
+        on_uploaded = (lambda: self.store.record(owners)) if self.store is not None else None
+        return self.uploader.submit(lines, file_path, blob_path, on_uploaded=on_uploaded)
 
-        # Upload to fixed bucket name per plan
-        try:
-            from google.cloud import storage  # type: ignore
-        except Exception:
-            spider.logger.warning("Cloud upload skipped (google-cloud-storage not installed)")
-            return
-
-        bucket_name = "headhunter-ai-0088-eco-raw"
-        client = storage.Client(project=os.environ.get("GOOGLE_CLOUD_PROJECT"))
-        bucket = client.bucket(bucket_name)
-        blob_path = f"job_postings/{os.path.basename(os.path.dirname(self._out_dir))}/{spider.name}/{os.path.basename(file_path)}"
-        blob = bucket.blob(blob_path)
-
-        # Retry upload
-        for attempt in range(3):
-            try:
-                blob.upload_from_filename(file_path, content_type="application/x-ndjson")
-                try:
-                    spider.crawler.stats.inc_value("eco/cloud_batches_uploaded")
-                except Exception:
-                    pass
-                break
-            except Exception as e:
-                spider.logger.warning("Upload failed (%s), attempt %s/3", e, attempt + 1)
-                time.sleep(2 * (attempt + 1))
+    def _release_store(self, result):
+        if self.store is not None:
+            release_store(self.store)
+            self.store = None
+        return result
 
     def close_spider(self, spider):  # noqa: D401
         self._flush_batch(spider)
+        return self.uploader.drain().addBoth(self._release_store)
 
     def process_item(self, item: Dict[str, Any], spider):  # noqa: D401
         line = json.dumps(item, ensure_ascii=False)
         self._buffer.append(line)
+        self._buffer_owners.append(item.get("source_url"))
         self._buffer_bytes += len(line) + 1
         if len(self._buffer) >= self.batch_size or self._buffer_bytes >= self.max_batch_bytes:
-            self._flush_batch(spider)
+            backpressure = self._flush_batch(spider)
+            if backpressure is not None:
+                return backpressure.addCallback(lambda _: item)
         return item
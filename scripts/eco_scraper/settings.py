@@ -24,6 +24,7 @@ USER_AGENTS = [
 ]
 
 DOWNLOADER_MIDDLEWARES = {
+    "scripts.eco_scraper.middlewares.KnownUrlSkipMiddleware": 390,
     "scripts.eco_scraper.middlewares.RandomUserAgentMiddleware": 400,
     "scripts.eco_scraper.middlewares.RateLimitMiddleware": 410,
     # Custom backoff middleware removed to avoid blocking sleeps; rely on RetryMiddleware + AutoThrottle
@@ -32,6 +33,10 @@ DOWNLOADER_MIDDLEWARES = {
     "scripts.eco_scraper.middlewares.RequestLoggerMiddleware": 900,
 }
 
+SPIDER_MIDDLEWARES = {
+    "scripts.eco_scraper.middlewares.KnownPageStopMiddleware": 950,
+}
+
 LOG_LEVEL = "INFO"
 
 ECO_ENABLE_SIMPLE_JSONL = int(os.getenv("ECO_ENABLE_SIMPLE_JSONL", "0"))
@@ -49,7 +54,18 @@ ITEM_PIPELINES = {
 # ECO batch and retry settings
 ECO_BATCH_SIZE = 1000
 ECO_MAX_BATCH_BYTES = 5_000_000
+# Batch uploads run off the reactor; at this many pending uploads items wait (backpressure)
+ECO_UPLOAD_MAX_IN_FLIGHT = 2
+ECO_UPLOAD_COMPRESSION = os.getenv("ECO_UPLOAD_COMPRESSION", "gzip")  # gzip | zstd | none
+# Upload into a local directory laid out like the bucket instead of GCS (offline runs, tests)
+ECO_FAKE_GCS_DIR = os.getenv("ECO_FAKE_GCS_DIR", "")
 ECO_MAX_RETRIES = 3
 ECO_RETRY_BASE_DELAY = 2.0
 ECO_CAPTCHA_COOLDOWN = 30.0
 ECO_MIN_REQUEST_INTERVAL = 0.0
+
+# Persistent dedup shared by spiders and runs (SQLite + Bloom snapshot); empty disables it
+ECO_DEDUP_DB = os.getenv("ECO_DEDUP_DB", "eco_raw/eco_dedup.sqlite3")
+ECO_DEDUP_TTL_DAYS = float(os.getenv("ECO_DEDUP_TTL_DAYS", "30"))
+ECO_DEDUP_BLOOM_CAPACITY = 100_000
+ECO_DEDUP_STOP_ON_KNOWN_PAGE = True
@@ -0,0 +1,216 @@
+import gzip
+import os
+import shutil
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from twisted.internet import defer, threads  # type: ignore
+from twisted.internet.task import deferLater  # type: ignore
+from twisted.python.threadpool import ThreadPool  # type: ignore
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    zstandard = None
+
+NDJSON = "application/x-ndjson"
+
+
+def write_batch(lines: List[str], file_path: str, compression: str = "gzip") -> Tuple[str, Dict[str, Optional[str]]]:
+    """Write JSONL lines to ``file_path`` (plus extension) and return (path, blob metadata)."""
+    if compression == "zstd" and zstandard is None:
+        compression = "gzip"
+    if compression == "gzip":
+        path = file_path + ".gz"
+        # GCS serves gzip-encoded NDJSON decompressed to clients that do not accept gzip
+        meta = {"content_type": NDJSON, "content_encoding": "gzip"}
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            for line in lines:
+                f.write(line + "\n")
+    elif compression == "zstd":
+        path = file_path + ".zst"
+        meta = {"content_type": "application/zstd", "content_encoding": None}
+        with open(path, "wb") as raw:
+            with zstandard.ZstdCompressor(level=3).stream_writer(raw) as f:
+                for line in lines:
+                    f.write((line + "\n").encode("utf-8"))
+    else:
+        path = file_path
+        meta = {"content_type": NDJSON, "content_encoding": None}
+        with open(path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+    return path, meta
+
+
+class GcsBackend:
+    """Uploads to a GCS bucket through one lazily created, thread-safe storage client."""
+
+    def __init__(self, bucket_name: str, project: Optional[str] = None):
+        self.bucket_name = bucket_name
+        self.project = project
+        self._bucket = None
+
+    def _get_bucket(self):
+        if self._bucket is None:
+            from google.cloud import storage  # type: ignore
+
+            self._bucket = storage.Client(project=self.project).bucket(self.bucket_name)
+        return self._bucket
+
+    def upload(self, file_path: str, blob_path: str, content_type: str, content_encoding: Optional[str] = None):
+        blob = self._get_bucket().blob(blob_path)
+        if content_encoding:
+            blob.content_encoding = content_encoding
+        blob.upload_from_filename(file_path, content_type=content_type)
+
+    def describe(self, blob_path: str) -> str:
+        return f"gs://{self.bucket_name}/{blob_path}"
+
+
+class LocalDirectoryBackend:
+    """Fake GCS: copies objects to ``root/bucket/blob_path`` so crawls can run offline."""
+
+    def __init__(self, root: str, bucket_name: str = "eco-raw"):
+        self.root = root
+        self.bucket_name = bucket_name
+
+    def upload(self, file_path: str, blob_path: str, content_type: str, content_encoding: Optional[str] = None):
+        dest = os.path.join(self.root, self.bucket_name, blob_path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = dest + ".part"
+        shutil.copyfile(file_path, tmp)
+        os.replace(tmp, dest)
+
+    def describe(self, blob_path: str) -> str:
+        return os.path.join(self.root, self.bucket_name, blob_path)
+
+
+class BatchUploader:
+    """
+    Writes and uploads batches off the reactor thread with at most ``max_in_flight`` at once.
+
+    With ``backend=None`` batches are only written (compressed) to disk.
+
+    ``submit`` returns None while there is room. At the cap it returns a
+    Deferred that fires once an upload finishes. A pipeline hands that Deferred
+    back to Scrapy, which stops feeding items (and, through the scraper slot,
+    downloading) until it fires. Failed uploads are retried after a reactor
+    delay, never a sleep. ``drain`` waits for everything in flight.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        max_in_flight: int = 2,
+        max_retries: int = 3,
+        retry_base_delay: float = 2.0,
+        compression: str = "gzip",
+        run_in_thread: Optional[Callable[..., defer.Deferred]] = None,
+        clock: Any = None,
+        logger: Any = None,
+        stats: Any = None,
+    ):
+        self.backend = backend
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.compression = compression
+        # Imported here so loading this module never installs a reactor ahead of Scrapy's choice
+        from twisted.internet import reactor  # type: ignore
+
+        self.clock = clock or reactor
+        self.logger = logger
+        self.stats = stats
+        self._pool: Optional[ThreadPool] = None
+        if run_in_thread is None:
+            # Own pool so uploads never starve the reactor's pool (DNS lookups run there)
+            self._pool = ThreadPool(minthreads=0, maxthreads=self.max_in_flight, name="eco-uploads")
+            self._pool.start()
+            run_in_thread = lambda f, *a: threads.deferToThreadPool(reactor, self._pool, f, *a)  # noqa: E731
+        self._run_in_thread = run_in_thread
+        self._in_flight: List[defer.Deferred] = []
+        self._waiters: List[defer.Deferred] = []
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def submit(self, lines: List[str], file_path: str, blob_path: str,
+               on_uploaded: Optional[Callable[[], Any]] = None) -> Optional[defer.Deferred]:
+        """Queue a batch; ``on_uploaded`` runs on the reactor thread once it is stored."""
+        d = self._run_in_thread(write_batch, lines, file_path, self.compression)
+        # Blob names carry the compression extension of the written file
+        d.addCallback(lambda written: self._upload(written, blob_path + written[0][len(file_path):], 0, on_uploaded))
+        d.addErrback(self._on_failure, blob_path)
+        self._in_flight.append(d)
+        d.addBoth(self._on_done, d)
+        if self.in_flight < self.max_in_flight:
+            return None
+        self._inc("eco/upload_backpressure_waits")
+        waiter: defer.Deferred = defer.Deferred()
+        self._waiters.append(waiter)
+        return waiter
+
+    def _upload(self, written: Tuple[str, Dict[str, Optional[str]]], blob_path: str, attempt: int,
+                on_uploaded: Optional[Callable[[], Any]] = None):
+        path, meta = written
+        if self.backend is None:
+            # Uploads disabled: the compressed batch file is the output
+            if on_uploaded is not None:
+                on_uploaded()
+            return None
+        d = self._run_in_thread(self.backend.upload, path, blob_path, meta["content_type"], meta["content_encoding"])
+
+        def retry(failure):
+            if attempt + 1 >= self.max_retries:
+                return failure
+            delay = self.retry_base_delay * (2 ** attempt)
+            self._log("warning", "Upload of %s failed (%s), retry %s/%s in %.1fs",
+                      blob_path, failure.getErrorMessage(), attempt + 1, self.max_retries - 1, delay)
+            return deferLater(self.clock, delay, lambda: None).addCallback(
+                lambda _: self._upload(written, blob_path, attempt + 1, on_uploaded)
+            )
+
+        d.addCallbacks(lambda _: self._on_uploaded(path, blob_path, on_uploaded), retry)
+        return d
+
+    def _on_uploaded(self, path: str, blob_path: str, on_uploaded: Optional[Callable[[], Any]] = None):
+        self._inc("eco/cloud_batches_uploaded")
+        self._inc("eco/cloud_bytes_uploaded", os.path.getsize(path))
+        self._log("info", "Uploaded %s", self.backend.describe(blob_path))
+        if on_uploaded is not None:
+            on_uploaded()
+
+    def _on_failure(self, failure, blob_path: str):
+        # The local batch file stays on disk for a manual re-upload
+        self._inc("eco/cloud_batches_failed")
+        self._log("error", "Giving up on upload of %s: %s", blob_path, failure.getErrorMessage())
+
+    def _on_done(self, result, d: defer.Deferred):
+        self._in_flight.remove(d)
+        if self._waiters and self.in_flight < self.max_in_flight:
+            self._waiters.pop(0).callback(None)
+        return result
+
+    def drain(self) -> defer.Deferred:
+        """Fire once every in-flight upload has finished, then release the thread pool"""
+        d = defer.DeferredList(list(self._in_flight), consumeErrors=True)
+
+        def stop(_):
+            if self._pool is not None:
+                self._pool.stop()
+                self._pool = None
+
+        d.addBoth(stop)
+        return d
+
+    def _inc(self, key: str, count: int = 1):
+        try:
+            if self.stats is not None:
+                self.stats.inc_value(key, count)
+        except Exception:
+            pass
+
+    def _log(self, level: str, msg: str, *args):
+        if self.logger is not None:
+            getattr(self.logger, level)(msg, *args)
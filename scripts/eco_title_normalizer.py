@@ -1,10 +1,21 @@
-"""Brazilian Portuguese title normalization utilities."""
+"""Brazilian Portuguese title normalization utilities.
+
+``normalize_title`` is memoized (bounded LRU, ECO_NORMALIZER_CACHE_SIZE
+entries) because scraped items, aliases and clustering metadata repeat the
+same titles many times. Punctuation and diacritic folding use precompiled
+``str.translate`` tables in place of regex passes and per-character
+``unicodedata`` lookups. ``normalize_many`` normalizes each distinct title
+once and can fan large batches out to a process pool.
+"""
 
 from __future__ import annotations
 
+import os
 import re
 import unicodedata
-from typing import Iterable, List
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
 
 _ABBREVIATIONS = {
     "sr": "sênior",
@@ -18,39 +29,102 @@ _ABBREVIATIONS = {
 }
 
 _GENDER_SUFFIX_PATTERN = re.compile(r"\((a|o|as|os)\)", re.IGNORECASE)
-_PUNCTUATION_PATTERN = re.compile(r"[\.,;:!@#?$%&*+=<>\"'`~^ºª\[\]{}()\/_|\\-]+")
-_WHITESPACE_PATTERN = re.compile(r"\s+")
+_PUNCTUATION = ".,;:!@#?$%&*+=<>\"'`~^ºª[]{}()/_|\\-"
+
+# Below U+0300 there are no combining marks, so folding character by character
+# equals NFD of the whole string minus its marks (no canonical reordering applies)
+_DIRECT_FOLD_LIMIT = "\u0300"
+
+
+def _fold_char(ch: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", ch) if unicodedata.category(c) != "Mn")
+
+
+# str.translate indexes lists faster than it hashes into dicts; code points past
+# the end raise IndexError (a LookupError) and are left unchanged.
+# Each punctuation character becomes a space; runs collapse with the whitespace split.
+_PUNCTUATION_TABLE = [" " if chr(cp) in _PUNCTUATION else chr(cp) for cp in range(0x300)]
+_DIRECT_FOLD_TABLE = [_fold_char(chr(cp)) for cp in range(0x300)]
+
+
+class _CombiningMarkTable(dict):
+    """str.translate table deleting nonspacing marks (category Mn), filled per code point on first use."""
+
+    def __missing__(self, codepoint: int) -> Optional[int]:
+        value = None if unicodedata.category(chr(codepoint)) == "Mn" else codepoint
+        self[codepoint] = value
+        return value
+
+
+_COMBINING_MARK_TABLE = _CombiningMarkTable()
+
+CACHE_SIZE = int(os.getenv("ECO_NORMALIZER_CACHE_SIZE", "65536"))
+# normalize_many runs in-process below this many distinct titles
+PARALLEL_MIN_TITLES = 50_000
 
 
 def _strip_gender_suffixes(text: str) -> str:
+    if "(" not in text:
+        return text
     return _GENDER_SUFFIX_PATTERN.sub("", text)
 
 
 def _remove_punctuation(text: str) -> str:
-    return _PUNCTUATION_PATTERN.sub(" ", text)
+    return text.translate(_PUNCTUATION_TABLE)
 
 
-def _fold_diacritics(text: str) -> str:
-    normalized = unicodedata.normalize("NFD", text)
-    return "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
+def fold_diacritics(text: str) -> str:
+    """Remove accents: NFD decomposition without nonspacing marks ("Soluções" -> "Solucoes")."""
+    if not text or text.isascii():
+        return text or ""
+    if max(text) < _DIRECT_FOLD_LIMIT:
+        return text.translate(_DIRECT_FOLD_TABLE)
+    return unicodedata.normalize("NFD", text).translate(_COMBINING_MARK_TABLE)
 
 
 def _expand_abbreviations(tokens: Iterable[str]) -> List[str]:
     return [_ABBREVIATIONS.get(token, token) for token in tokens]
 
 
-def normalize_title(text: str) -> str:
+def _normalize(text: str) -> str:
     if not text:
         return ""
-    cleaned = text.strip()
-    cleaned = _strip_gender_suffixes(cleaned)
-    cleaned = cleaned.lower()
-    cleaned = _remove_punctuation(cleaned)
-    cleaned = _WHITESPACE_PATTERN.sub(" ", cleaned).strip()
-    tokens = cleaned.split(" ") if cleaned else []
-    expanded = " ".join(_expand_abbreviations(token for token in tokens if token))
-    folded = _fold_diacritics(expanded).lower()
-    return _WHITESPACE_PATTERN.sub(" ", folded).strip()
+    cleaned = _strip_gender_suffixes(text.strip()).lower()
+    tokens = _remove_punctuation(cleaned).split()
+    expanded = " ".join(_expand_abbreviations(tokens))
+    return " ".join(fold_diacritics(expanded).lower().split())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_title(text: str) -> str:
+    return _normalize(text)
+
+
+def _normalize_chunk(texts: Sequence[str]) -> List[str]:
+    # Batches are already deduplicated; bypassing the cache keeps one-off titles from evicting hot ones
+    return [_normalize(text) for text in texts]
+
+
+def normalize_many(texts: Iterable[str], workers: Optional[int] = None, chunksize: int = 10_000) -> List[str]:
+    """
+    Normalize a batch, in input order.
+
+    Each distinct title is normalized once. With ``workers`` > 1 and at least
+    PARALLEL_MIN_TITLES distinct titles, chunks run in a process pool
+    (``workers=0`` means one per CPU); smaller batches are cheaper in-process.
+    """
+    texts = list(texts)
+    unique = list(dict.fromkeys(texts))
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers and workers > 1 and len(unique) >= PARALLEL_MIN_TITLES:
+        chunks = [unique[i:i + chunksize] for i in range(0, len(unique), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            normalized = [title for chunk in pool.map(_normalize_chunk, chunks) for title in chunk]
+    else:
+        normalized = _normalize_chunk(unique)
+    lookup: Dict[str, str] = dict(zip(unique, normalized))
+    return [lookup[text] for text in texts]
 
 
 class EcoTitleNormalizer:
@@ -59,12 +133,17 @@ class EcoTitleNormalizer:
     def normalize(self, text: str) -> str:
         return normalize_title(text)
 
+    def normalize_many(self, texts: Iterable[str], workers: Optional[int] = None) -> List[str]:
+        return normalize_many(texts, workers=workers)
+
 
 def normalize_title_ptbr(text: str) -> str:
     return normalize_title(text)
 
 __all__ = [
     "EcoTitleNormalizer",
+    "fold_diacritics",
+    "normalize_many",
     "normalize_title",
     "normalize_title_ptbr",
 ]
@@ -6,8 +6,11 @@ Generate embeddings for the 10,992 candidates enriched on 2025-10-27.
 
 Filters candidates by processing_metadata.timestamp to only embed those
 enriched today, avoiding re-processing the 17,969 already embedded in Phase 2.
+Candidates whose profile text hash is unchanged in the embedding skip index
+are skipped as well; pass --dry-run to only print the savings report.
 """
 
+import argparse
 import asyncio
 import aiohttp
 import json
@@ -19,6 +22,13 @@ from datetime import datetime, timezone
 from google.cloud import firestore
 from google.auth import default as get_default_credentials
 
+try:
+    from scripts.embedding_skip_index import format_skip_report, open_skip_index, plan_reembedding
+except Exception:
+    from embedding_skip_index import format_skip_report, open_skip_index, plan_reembedding
+
+MODEL_VERSION = "enriched-v1"
+
 def get_auth_token() -> str:
     """Get Google Cloud identity token for authenticating to Cloud Run services"""
     try:
@@ -71,7 +81,8 @@ def build_searchable_profile(candidate: Dict[str, Any]) -> str:
     primary_expertise = get_array('primary_expertise')
 
     # Combine all skills
-    all_skills = list(set(explicit_skills + inferred_high + primary_expertise))
+    # Ordered de-duplication keeps the text (and its skip-index hash) stable across runs
+    all_skills = list(dict.fromkeys(explicit_skills + inferred_high + primary_expertise))
     if all_skills:
         parts.append(f"Technical Skills: {', '.join(all_skills[:15])}")
 
@@ -171,7 +182,7 @@ async def embed_batch(session: aiohttp.ClientSession, batch: List[Tuple[str, Dic
                 "text": searchable_profile,
                 "metadata": {
                     "source": "phase1_new_enrichment",
-                    "modelVersion": "enriched-v1",
+                    "modelVersion": MODEL_VERSION,
                     "promptVersion": "structured-profile-v1",
                     "enriched_at": enriched_at_str
                 }
@@ -198,6 +209,11 @@ async def embed_batch(session: aiohttp.ClientSession, batch: List[Tuple[str, Dic
 
 async def main():
     """Main embedding function"""
+    parser = argparse.ArgumentParser(description="Embed newly enriched candidates")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be embedded and exit")
+    parser.add_argument("--full", action="store_true", help="Ignore the skip index")
+    args = parser.parse_args()
+
     tenant_id = os.getenv("TENANT_ID", "tenant-alpha")
     embed_url = os.getenv("EMBED_SERVICE_URL", "https://hh-embed-svc-production-akcoqbr7sa-uc.a.run.app")
     project_id = os.getenv("GOOGLE_CLOUD_PROJECT", "headhunter-ai-0088")
@@ -264,6 +280,30 @@ async def main():
     if not candidates:
         print("❌ No new candidates to embed")
         return
+
+    skip_index = None if args.full else await open_skip_index(MODEL_VERSION, read_only=args.dry_run)
+    profiles = {cid: build_searchable_profile(data) for cid, data in candidates}
+    if skip_index is not None:
+        plan = await skip_index.plan(profiles)
+    else:
+        plan = plan_reembedding(profiles, {}, MODEL_VERSION)
+    report = plan.report()
+    print(f"🧮 Skip index: {format_skip_report(report)}\n")
+
+    if args.dry_run:
+        print(json.dumps(report, indent=2))
+        if skip_index is not None:
+            await skip_index.close()
+        return
+
+    # Unchanged profiles are dropped; empty ones stay so they are reported as failures
+    unchanged = set(plan.unchanged)
+    candidates = [(cid, data) for cid, data in candidates if cid not in unchanged]
+    if not candidates:
+        print("✅ All candidate profiles unchanged since the last run")
+        if skip_index is not None:
+            await skip_index.close()
+        return
     
     # Process in batches
     batch_size = 10
@@ -278,35 +318,42 @@ async def main():
     print(f"   Batch size: {batch_size}")
     print(f"   Target: {embed_url}\n")
     
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, total, batch_size):
-            batch = candidates[i:i+batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (total + batch_size - 1) // batch_size
-            
-            results = await embed_batch(session, batch, embed_url, tenant_id, api_key_env)
-            
-            # Process results
-            for candidate_id, success, error in results:
-                if success:
-                    success_count += 1
-                    print(f"  ✓ {candidate_id}")
-                else:
-                    failed_count += 1
-                    failed_ids.append((candidate_id, error))
-                    print(f"  ✗ {candidate_id}: {error}")
-            
-            # Progress update
-            elapsed = (datetime.now() - start_time).total_seconds()
-            rate = (success_count + failed_count) / elapsed if elapsed > 0 else 0
-            remaining = total - (success_count + failed_count)
-            eta_seconds = remaining / rate if rate > 0 else 0
-            
-            print(f"\n📊 Batch {batch_num}/{total_batches} Complete")
-            print(f"   Progress: {success_count + failed_count}/{total} ({(success_count + failed_count)/total*100:.1f}%)")
-            print(f"   Success: {success_count} | Failed: {failed_count}")
-            print(f"   Rate: {rate:.1f} candidates/sec")
-            print(f"   ETA: {eta_seconds/60:.1f} minutes\n")
+    try:
+        async with aiohttp.ClientSession() as session:
+            for i in range(0, total, batch_size):
+                batch = candidates[i:i+batch_size]
+                batch_num = (i // batch_size) + 1
+                total_batches = (total + batch_size - 1) // batch_size
+
+                results = await embed_batch(session, batch, embed_url, tenant_id, api_key_env)
+
+                # Process results
+                for candidate_id, success, error in results:
+                    if success:
+                        success_count += 1
+                        print(f"  ✓ {candidate_id}")
+                    else:
+                        failed_count += 1
+                        failed_ids.append((candidate_id, error))
+                        print(f"  ✗ {candidate_id}: {error}")
+
+                if skip_index is not None:
+                    await skip_index.record(plan.hashes_for(cid for cid, success, _ in results if success))
+
+                # Progress update
+                elapsed = (datetime.now() - start_time).total_seconds()
+                rate = (success_count + failed_count) / elapsed if elapsed > 0 else 0
+                remaining = total - (success_count + failed_count)
+                eta_seconds = remaining / rate if rate > 0 else 0
+
+                print(f"\n📊 Batch {batch_num}/{total_batches} Complete")
+                print(f"   Progress: {success_count + failed_count}/{total} ({(success_count + failed_count)/total*100:.1f}%)")
+                print(f"   Success: {success_count} | Failed: {failed_count}")
+                print(f"   Rate: {rate:.1f} candidates/sec")
+                print(f"   ETA: {eta_seconds/60:.1f} minutes\n")
+    finally:
+        if skip_index is not None:
+            await skip_index.close()
     
     # Final summary
     elapsed = (datetime.now() - start_time).total_seconds()
@@ -317,6 +364,7 @@ async def main():
     print(f"Total candidates: {total}")
     print(f"Successfully embedded: {success_count} ({success_count/total*100:.1f}%)")
     print(f"Failed: {failed_count}")
+    print(f"Unchanged (skipped): {report['unchanged']} (~${report['dollars_saved']:.4f} saved)")
     print(f"Duration: {elapsed/60:.1f} minutes")
     print(f"Average rate: {(success_count + failed_count)/elapsed:.1f} candidates/sec")
     
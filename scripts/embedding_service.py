@@ -10,14 +10,25 @@ import asyncio
 import hashlib
 import json
 import logging
+import os
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Dict, List, Optional, Any, Sequence, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 
 import math
 
+import numpy as np
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
 # Optional Google Cloud imports
 try:
     from google.cloud import firestore
@@ -37,6 +48,14 @@ except ImportError:
         @staticmethod
         def init(*args, **kwargs): pass
 
+# Optional Redis backend for the shared cache tier
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
 
 @dataclass
 class EmbeddingResult:
@@ -195,12 +214,31 @@ class VertexAIEmbeddingProvider(EmbeddingProvider):
             return await fallback.generate_embeddings_batch(texts)
 
 
+class ProviderRateLimitError(Exception):
+    """Raised by providers when the upstream API throttles (HTTP 429/503)"""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class TogetherAIEmbeddingProvider(EmbeddingProvider):
-    """TogetherAI embedding provider (stub implementation)"""
+    """TogetherAI embedding provider
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key
-        # For now, use deterministic fallback for development
+    Deterministic stub embeddings by default. With ``live=True`` (or
+    TOGETHER_EMBEDDINGS_LIVE=1) and an API key, sends one request per batch to
+    the OpenAI-compatible embeddings endpoint instead.
+    """
+    
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeout_seconds: float = 60.0, live: Optional[bool] = None):
+        self.api_key = api_key or os.getenv("TOGETHER_API_KEY")
+        if live is None:
+            live = os.getenv("TOGETHER_EMBEDDINGS_LIVE", "").lower() in ("1", "true", "yes")
+        self.live = live
+        self.base_url = (base_url or os.getenv("TOGETHER_API_BASE_URL", "https://api.together.xyz")).rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        self._session = None
         self._fallback = DeterministicEmbeddingProvider()
     
     @property
@@ -216,15 +254,44 @@ class TogetherAIEmbeddingProvider(EmbeddingProvider):
         return 768
     
     async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for single text (stub)"""
-        # For development, use deterministic fallback with provider suffix
-        modified_text = f"{text}|together_ai"
-        return await self._fallback.generate_embedding(modified_text)
+        """Generate embedding for single text"""
+        embeddings = await self.generate_embeddings_batch([text])
+        return embeddings[0]
     
     async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for batch of texts (stub)"""
-        modified_texts = [f"{text}|together_ai" for text in texts]
-        return await self._fallback.generate_embeddings_batch(modified_texts)
+        """Generate embeddings for batch of texts in a single API call"""
+        if not (self.live and self.api_key and AIOHTTP_AVAILABLE):
+            # Stub unless live calls were opted into: deterministic fallback with provider suffix
+            modified_texts = [f"{text}|together_ai" for text in texts]
+            return await self._fallback.generate_embeddings_batch(modified_texts)
+        
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+        
+        async with self._session.post(
+            f"{self.base_url}/v1/embeddings",
+            json={"model": self.model, "input": list(texts)}
+        ) as response:
+            if response.status in (429, 503):
+                retry_after = response.headers.get("Retry-After")
+                raise ProviderRateLimitError(
+                    f"TogetherAI throttled request ({response.status})",
+                    retry_after=float(retry_after) if retry_after else None
+                )
+            response.raise_for_status()
+            payload = await response.json()
+        
+        data = sorted(payload["data"], key=lambda item: item.get("index", 0))
+        if len(data) != len(texts):
+            raise ValueError(f"Expected {len(texts)} embeddings, got {len(data)}")
+        return [item["embedding"] for item in data]
+    
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
 
 
 class DeterministicEmbeddingProvider(EmbeddingProvider):
@@ -243,7 +310,7 @@ class DeterministicEmbeddingProvider(EmbeddingProvider):
         return 768
     
     async def generate_embedding(self, text: str) -> List[float]:
-        """Generate deterministic embedding based on text hash"""
+        """Generate deterministic embedding based on text hash (reference implementation)"""
         # Create deterministic hash-based embedding
         text_hash = hashlib.sha256(text.encode()).hexdigest()
         
@@ -267,25 +334,406 @@ class DeterministicEmbeddingProvider(EmbeddingProvider):
         return vector
     
     async def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for batch of texts"""
-        embeddings = []
-        for text in texts:
-            embedding = await self.generate_embedding(text)
-            embeddings.append(embedding)
-        return embeddings
+        """Generate embeddings for batch of texts
+        
+        Vectorised equivalent of generate_embedding: dimension i takes digest
+        byte i % 32, mapped to [-1, 1], then each row is L2-normalised.
+        """
+        if not texts:
+            return []
+        digests = np.frombuffer(
+            b"".join(hashlib.sha256(text.encode()).digest() for text in texts),
+            dtype=np.uint8
+        ).reshape(len(texts), 32)
+        values = digests / 127.5 - 1.0
+        vectors = np.tile(values, (1, -(-self.dimensions // 32)))[:, :self.dimensions]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors.tolist()
+
+
+class AdaptiveTokenBucket:
+    """Token-bucket limiter whose refill rate adapts to upstream throttling
+    
+    The rate is halved on every 429/503 (and the bucket pauses for Retry-After)
+    and recovers additively after successful calls, up to ``max_rate``.
+    """
+    
+    def __init__(self, tokens_per_second: float, burst: Optional[float] = None,
+                 min_rate: Optional[float] = None, recovery_fraction: float = 0.05):
+        self.max_rate = tokens_per_second
+        self.rate = tokens_per_second
+        self.min_rate = min_rate if min_rate is not None else tokens_per_second / 32
+        self.capacity = burst if burst is not None else tokens_per_second
+        self.recovery_step = tokens_per_second * recovery_fraction
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, tokens: float) -> None:
+        """Wait until ``tokens`` may be spent (requests above capacity wait for a full bucket)"""
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+    
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.recovery_step)
+    
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for request packing"""
+    return len(text) // 4 + 1
+
+
+def pack_batches(texts: Sequence[str], max_tokens: int, max_items: int) -> List[List[int]]:
+    """Group consecutive text indices into requests bounded by tokens and items"""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class PipelinedBatchExecutor:
+    """Keeps several provider batch calls in flight and streams results in input order"""
+    
+    def __init__(self,
+                 provider: EmbeddingProvider,
+                 max_in_flight: int = 4,
+                 max_tokens_per_request: int = 8000,
+                 max_items_per_request: int = 96,
+                 tokens_per_second: Optional[float] = None,
+                 max_retries: int = 5,
+                 base_backoff_seconds: float = 1.0):
+        self.provider = provider
+        self.max_in_flight = max_in_flight
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_items_per_request = max_items_per_request
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.limiter = AdaptiveTokenBucket(tokens_per_second) if tokens_per_second else None
+        self.stats = {"requests": 0, "throttled": 0, "retries": 0}
+    
+    async def stream(self, texts: Sequence[str]) -> AsyncIterator[Tuple[List[int], List[List[float]]]]:
+        """Yield ``(indices, embeddings)`` per packed request, in input order"""
+        batches = iter(pack_batches(texts, self.max_tokens_per_request, self.max_items_per_request))
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        pending: Deque[Tuple[List[int], asyncio.Task]] = deque()
+        
+        def _fill() -> None:
+            # Look ahead beyond the in-flight window so a slow head batch does not idle the pipeline
+            while len(pending) < self.max_in_flight * 2:
+                indices = next(batches, None)
+                if indices is None:
+                    return
+                batch_texts = [texts[i] for i in indices]
+                pending.append((indices, asyncio.ensure_future(self._call(batch_texts, semaphore))))
+        
+        _fill()
+        try:
+            while pending:
+                indices, task = pending.popleft()
+                embeddings = await task
+                _fill()
+                yield indices, embeddings
+        finally:
+            for _, task in pending:
+                task.cancel()
+    
+    async def run(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed all texts and return vectors in input order"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        async for indices, embeddings in self.stream(texts):
+            for index, embedding in zip(indices, embeddings):
+                results[index] = embedding
+        return results  # type: ignore[return-value]
+    
+    async def _call(self, texts: List[str], semaphore: asyncio.Semaphore) -> List[List[float]]:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                if self.limiter:
+                    await self.limiter.acquire(tokens)
+                self.stats["requests"] += 1
+                try:
+                    embeddings = await self.provider.generate_embeddings_batch(texts)
+                except ProviderRateLimitError as e:
+                    self.stats["throttled"] += 1
+                    if attempt == self.max_retries:
+                        raise
+                    self.stats["retries"] += 1
+                    if self.limiter:
+                        self.limiter.on_throttle(e.retry_after)
+                    await asyncio.sleep(e.retry_after or self.base_backoff_seconds * (2 ** attempt))
+                    continue
+                if self.limiter:
+                    self.limiter.on_success()
+                return embeddings
+        raise RuntimeError("unreachable")
+
+
+class LocalEmbeddingLRU:
+    """Size-bounded in-process LRU of float32 embeddings with TTL and byte accounting"""
+    
+    def __init__(self, max_entries: int = 50_000, max_bytes: int = 256 * 1024 * 1024,
+                 ttl_seconds: float = 24 * 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.current_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached vector and mark it most recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        vector, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return vector
+    
+    def put(self, key: str, vector: Any) -> None:
+        """Insert or refresh a vector, evicting least recently used entries"""
+        array = np.asarray(vector, dtype=np.float32)
+        if array.nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (array, time.monotonic() + self.ttl_seconds)
+        self.current_bytes += array.nbytes
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def clear_expired(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        return len(expired)
+    
+    def _remove(self, key: str) -> None:
+        vector, _ = self._entries.pop(key)
+        self.current_bytes -= vector.nbytes
+
+
+class EmbeddingCacheBackend(ABC):
+    """Shared second-tier cache; every call is a single round trip"""
+    
+    name = "backend"
+    # Keys per round trip; larger lookups are split into chunks of this size
+    max_batch_keys = 1000
+    
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Fetch all present, unexpired keys"""
+        pass
+    
+    @abstractmethod
+    async def set_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Store entries keyed by cache key"""
+        pass
+    
+    async def clear_expired(self) -> int:
+        """Remove expired entries where the backend does not expire them itself"""
+        return 0
+
+
+class FirestoreCacheBackend(EmbeddingCacheBackend):
+    """Firestore tier using get_all for lookups and WriteBatch for writes"""
+    
+    name = "firestore"
+    # Firestore limits a WriteBatch to 500 operations
+    WRITE_BATCH_LIMIT = 500
+    
+    def __init__(self, db: Any, collection_name: str = "embedding_cache", ttl: timedelta = timedelta(hours=24)):
+        self.db = db
+        self.collection = db.collection(collection_name)
+        self.ttl = ttl
+    
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        refs = [self.collection.document(key) for key in keys]
+        docs = await asyncio.get_event_loop().run_in_executor(
+            None, lambda: list(self.db.get_all(refs))
+        )
+        now = datetime.now(timezone.utc)
+        found: Dict[str, np.ndarray] = {}
+        for doc in docs:
+            if not doc.exists:
+                continue
+            data = doc.to_dict()
+            if self._is_expired(data, now):
+                continue
+            embedding = data.get("embedding")
+            if embedding:
+                found[doc.id] = np.asarray(embedding, dtype=np.float32)
+        return found
+    
+    async def set_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        def _commit() -> None:
+            items = list(entries.items())
+            for i in range(0, len(items), self.WRITE_BATCH_LIMIT):
+                batch = self.db.batch()
+                for key, data in items[i:i + self.WRITE_BATCH_LIMIT]:
+                    batch.set(self.collection.document(key), data)
+                batch.commit()
+        
+        await asyncio.get_event_loop().run_in_executor(None, _commit)
+    
+    async def clear_expired(self) -> int:
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        query = self.collection.where("created_at", "<", cutoff)
+        
+        def _delete() -> int:
+            deleted = 0
+            batch = self.db.batch()
+            for doc in query.stream():
+                batch.delete(doc.reference)
+                deleted += 1
+                if deleted % self.WRITE_BATCH_LIMIT == 0:
+                    batch.commit()
+                    batch = self.db.batch()
+            batch.commit()
+            return deleted
+        
+        return await asyncio.get_event_loop().run_in_executor(None, _delete)
+    
+    def _is_expired(self, data: Dict[str, Any], now: datetime) -> bool:
+        created_at = data.get("created_at")
+        if created_at is None:
+            return False
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return now - created_at >= self.ttl
+
+
+class RedisCacheBackend(EmbeddingCacheBackend):
+    """Redis tier using MGET for lookups and a pipelined SETEX for writes"""
+    
+    name = "redis"
+    
+    def __init__(self, client: Any, ttl: timedelta = timedelta(hours=24), prefix: str = "emb:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+    
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        values = await self.client.mget([self.prefix + key for key in keys])
+        return {
+            key: np.frombuffer(value, dtype=np.float32)
+            for key, value in zip(keys, values)
+            if value
+        }
+    
+    async def set_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        ttl_seconds = int(self.ttl.total_seconds())
+        pipe = self.client.pipeline(transaction=False)
+        for key, data in entries.items():
+            payload = np.asarray(data["embedding"], dtype=np.float32).tobytes()
+            pipe.setex(self.prefix + key, ttl_seconds, payload)
+        await pipe.execute()
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss and round-trip counters for the tiered cache"""
+    local_hits: int = 0
+    backend_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    backend_errors: int = 0
+    backend_round_trips: int = 0
+    backend_latency_ms_total: float = 0.0
+    backend_latency_ms_max: float = 0.0
+    
+    def record_round_trip(self, latency_ms: float) -> None:
+        self.backend_round_trips += 1
+        self.backend_latency_ms_total += latency_ms
+        self.backend_latency_ms_max = max(self.backend_latency_ms_max, latency_ms)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.backend_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "backend_hits": self.backend_hits,
+            "misses": self.misses,
+            "hit_rate": (self.local_hits + self.backend_hits) / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "backend_errors": self.backend_errors,
+            "backend_round_trips": self.backend_round_trips,
+            "backend_latency_ms_avg": (
+                self.backend_latency_ms_total / self.backend_round_trips if self.backend_round_trips else 0.0
+            ),
+            "backend_latency_ms_max": self.backend_latency_ms_max,
+        }
 
 
 class EmbeddingCache:
-    """Firestore-based embedding cache"""
+    """Two-tier embedding cache: in-process LRU backed by a shared Redis/Firestore tier"""
     
-    def __init__(self, collection_name: str = "embedding_cache"):
-        if not GOOGLE_CLOUD_AVAILABLE:
-            self.db = None
-            self.collection = None
-            self._local_cache = {}  # Fallback to in-memory cache
+    def __init__(self,
+                 collection_name: str = "embedding_cache",
+                 backend: Optional[EmbeddingCacheBackend] = None,
+                 max_entries: int = 50_000,
+                 max_bytes: int = 256 * 1024 * 1024,
+                 ttl: timedelta = timedelta(hours=24)):
+        self.ttl = ttl
+        self.local = LocalEmbeddingLRU(max_entries, max_bytes, ttl.total_seconds())
+        self.stats = CacheStats()
+        self.db = None
+        self.collection = None
+        
+        if backend is not None:
+            self.backend = backend
+        elif os.getenv("EMBEDDING_CACHE_REDIS_URL") and REDIS_AVAILABLE:
+            self.backend = RedisCacheBackend(
+                aioredis.from_url(os.environ["EMBEDDING_CACHE_REDIS_URL"]), ttl=ttl
+            )
+        elif GOOGLE_CLOUD_AVAILABLE:
+            self.backend = FirestoreCacheBackend(firestore.Client(), collection_name, ttl=ttl)
         else:
-            self.db = firestore.Client()
-            self.collection = self.db.collection(collection_name)
+            self.backend = None  # In-process tier only
+        
+        if isinstance(self.backend, FirestoreCacheBackend):
+            self.db = self.backend.db
+            self.collection = self.backend.collection
     
     def _get_cache_key(self, text: str, provider: str, model: str) -> str:
         """Generate cache key for text, provider, and model"""
@@ -294,91 +742,102 @@ class EmbeddingCache:
     
     async def get(self, text: str, provider: str, model: str) -> Optional[List[float]]:
         """Get cached embedding"""
+        return (await self.get_many([text], provider, model))[0]
+    
+    async def get_many(self, texts: Sequence[str], provider: str, model: str) -> List[Optional[List[float]]]:
+        """Look up many texts with at most one shared-tier round trip"""
+        keys = [self._get_cache_key(text, provider, model) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: List[str] = []
+        for key in keys:
+            if key in found:
+                continue
+            vector = self.local.get(key)
+            if vector is not None:
+                found[key] = vector
+                self.stats.local_hits += 1
+            elif key not in missing:
+                missing.append(key)
+        
+        if missing and self.backend is not None:
+            chunk = self.backend.max_batch_keys
+            for i in range(0, len(missing), chunk):
+                remote = await self._backend_get(missing[i:i + chunk])
+                for key, vector in remote.items():
+                    self.local.put(key, vector)
+                    found[key] = vector
+                self.stats.backend_hits += len(remote)
+                self.stats.misses += len(missing[i:i + chunk]) - len(remote)
+        else:
+            self.stats.misses += len(missing)
+        
+        return [found[key].tolist() if key in found else None for key in keys]
+    
+    async def _backend_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        started = time.perf_counter()
         try:
-            cache_key = self._get_cache_key(text, provider, model)
-            
-            if not GOOGLE_CLOUD_AVAILABLE:
-                # Use local cache fallback
-                cached_data = self._local_cache.get(cache_key)
-                if cached_data:
-                    # Check expiration (24 hours)
-                    if datetime.now() - cached_data["created_at"] < timedelta(hours=24):
-                        return cached_data["embedding"]
-                return None
-            
-            doc_ref = self.collection.document(cache_key)
-            doc = await asyncio.get_event_loop().run_in_executor(None, doc_ref.get)
-            
-            if doc.exists:
-                data = doc.to_dict()
-                # Check expiration (24 hours)
-                created_at = data.get("created_at")
-                if created_at and datetime.now() - created_at < timedelta(hours=24):
-                    return data.get("embedding")
-            
-            return None
-            
+            return await self.backend.get_many(keys)
         except Exception as e:
             logging.warning(f"Cache get failed: {e}")
-            return None
+            self.stats.backend_errors += 1
+            return {}
+        finally:
+            self.stats.record_round_trip((time.perf_counter() - started) * 1000)
     
     async def set(self, text: str, provider: str, model: str, embedding: List[float]) -> None:
         """Cache embedding"""
-        try:
+        await self.set_many([text], provider, model, [embedding])
+    
+    async def set_many(self, texts: Sequence[str], provider: str, model: str,
+                       embeddings: Sequence[List[float]]) -> None:
+        """Write many embeddings to both tiers with one shared-tier round trip"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        created_at = datetime.now(timezone.utc)
+        for text, embedding in zip(texts, embeddings):
             cache_key = self._get_cache_key(text, provider, model)
-            
-            data = {
+            self.local.put(cache_key, embedding)
+            entries[cache_key] = {
                 "text": text,
                 "provider": provider,
                 "model": model,
-                "embedding": embedding,
-                "created_at": datetime.now(),
+                "embedding": list(embedding),
+                "created_at": created_at,
                 "dimensions": len(embedding)
             }
-            
-            if not GOOGLE_CLOUD_AVAILABLE:
-                # Use local cache fallback
-                self._local_cache[cache_key] = data
-                return
-            
-            doc_ref = self.collection.document(cache_key)
-            await asyncio.get_event_loop().run_in_executor(None, doc_ref.set, data)
-            
+        self.stats.writes += len(entries)
+        
+        if not entries or self.backend is None:
+            return
+        started = time.perf_counter()
+        try:
+            await self.backend.set_many(entries)
         except Exception as e:
             logging.warning(f"Cache set failed: {e}")
+            self.stats.backend_errors += 1
+        self.stats.record_round_trip((time.perf_counter() - started) * 1000)
     
     async def clear_expired(self) -> int:
         """Clear expired cache entries"""
         try:
-            cutoff = datetime.now() - timedelta(hours=24)
-            
-            if not GOOGLE_CLOUD_AVAILABLE:
-                # Clean local cache
-                expired_keys = []
-                for key, data in self._local_cache.items():
-                    if data["created_at"] < cutoff:
-                        expired_keys.append(key)
-                
-                for key in expired_keys:
-                    del self._local_cache[key]
-                
-                return len(expired_keys)
-            
-            # Query expired documents
-            query = self.collection.where("created_at", "<", cutoff)
-            docs = await asyncio.get_event_loop().run_in_executor(None, query.stream)
-            
-            # Delete expired documents
-            deleted_count = 0
-            for doc in docs:
-                await asyncio.get_event_loop().run_in_executor(None, doc.reference.delete)
-                deleted_count += 1
-            
-            return deleted_count
-            
+            cleared = self.local.clear_expired()
+            if self.backend is not None:
+                cleared += await self.backend.clear_expired()
+            return cleared
         except Exception as e:
             logging.error(f"Cache cleanup failed: {e}")
             return 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters and occupancy for both tiers"""
+        return {
+            "enabled": True,
+            "backend": self.backend.name if self.backend is not None else None,
+            "local_entries": len(self.local),
+            "local_bytes": self.local.current_bytes,
+            "local_max_bytes": self.local.max_bytes,
+            "local_evictions": self.local.evictions,
+            **self.stats.to_dict()
+        }
 
 
 class EmbeddingService:
@@ -387,10 +846,17 @@ class EmbeddingService:
     def __init__(self, 
                  provider: str = "vertex_ai",
                  project_id: str = "headhunter-ai-0088",
-                 enable_cache: bool = True):
+                 enable_cache: bool = True,
+                 max_in_flight: int = 4,
+                 max_tokens_per_request: int = 8000,
+                 tokens_per_second: Optional[float] = None):
         self.provider_name = provider
         self.project_id = project_id
         self.enable_cache = enable_cache
+        self.max_in_flight = max_in_flight
+        self.max_tokens_per_request = max_tokens_per_request
+        self.tokens_per_second = tokens_per_second
+        self._executors: Dict[int, PipelinedBatchExecutor] = {}
         
         # Initialize provider
         self.provider = self._create_provider(provider)
@@ -458,73 +924,95 @@ class EmbeddingService:
             self.logger.error(f"Embedding generation failed for text length {len(text)}: {e}")
             raise
     
-    async def generate_embeddings_batch(self, 
-                                      texts: List[str],
-                                      batch_size: int = 10) -> BatchEmbeddingResult:
-        """Generate embeddings for batch of texts"""
-        start_time = time.time()
-        results = []
-        cache_hits = 0
+    def _get_executor(self, batch_size: int) -> PipelinedBatchExecutor:
+        """Executor per request size; shared so its rate limiter state persists across calls"""
+        executor = self._executors.get(batch_size)
+        if executor is None:
+            executor = PipelinedBatchExecutor(
+                self.provider,
+                max_in_flight=self.max_in_flight,
+                max_tokens_per_request=self.max_tokens_per_request,
+                max_items_per_request=batch_size,
+                tokens_per_second=self.tokens_per_second
+            )
+            self._executors[batch_size] = executor
+        return executor
+    
+    async def iter_embeddings_batch(self,
+                                    texts: List[str],
+                                    batch_size: int = 10) -> AsyncIterator[List[EmbeddingResult]]:
+        """Stream embedding results in input order as provider batches complete
         
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i + batch_size]
-            batch_results = []
-            
-            # Check cache for each text in batch
-            uncached_texts = []
-            uncached_indices = []
-            
-            if self.cache:
-                for j, text in enumerate(batch_texts):
-                    cached_embedding = await self.cache.get(text, self.provider.name, self.provider.model)
-                    if cached_embedding:
-                        result = EmbeddingResult(
-                            text=text,
-                            vector=cached_embedding,
-                            provider=self.provider.name,
-                            model=self.provider.model,
-                            timestamp=datetime.now(),
-                            cache_hit=True,
-                            processing_time_ms=0
-                        )
-                        batch_results.append((j, result))
-                        cache_hits += 1
-                    else:
-                        uncached_texts.append(text)
-                        uncached_indices.append(j)
-            else:
-                uncached_texts = batch_texts
-                uncached_indices = list(range(len(batch_texts)))
-            
-            # Generate embeddings for uncached texts
-            if uncached_texts:
-                embeddings = await self.provider.generate_embeddings_batch(uncached_texts)
-                
-                for k, embedding in enumerate(embeddings):
-                    text = uncached_texts[k]
-                    original_index = uncached_indices[k]
-                    
-                    result = EmbeddingResult(
+        Cache hits are resolved up front; uncached texts are packed into
+        requests and several are kept in flight, so callers can persist each
+        chunk while later requests are still running.
+        """
+        slots: List[Optional[EmbeddingResult]] = [None] * len(texts)
+        emitted = 0
+        
+        def _drain() -> List[EmbeddingResult]:
+            nonlocal emitted
+            chunk: List[EmbeddingResult] = []
+            while emitted < len(slots) and slots[emitted] is not None:
+                chunk.append(slots[emitted])
+                emitted += 1
+            return chunk
+        
+        # Resolve the whole input against the cache up front so unchanged texts
+        # cost a handful of shared-tier round trips rather than one per text
+        if self.cache:
+            cached_embeddings = await self.cache.get_many(texts, self.provider.name, self.provider.model)
+            for index, (text, cached_embedding) in enumerate(zip(texts, cached_embeddings)):
+                if cached_embedding:
+                    slots[index] = EmbeddingResult(
                         text=text,
-                        vector=embedding,
+                        vector=cached_embedding,
                         provider=self.provider.name,
                         model=self.provider.model,
                         timestamp=datetime.now(),
-                        cache_hit=False,
-                        processing_time_ms=0  # Will be calculated at batch level
+                        cache_hit=True,
+                        processing_time_ms=0
                     )
-                    
-                    batch_results.append((original_index, result))
-                    
-                    # Cache the result
-                    if self.cache:
-                        await self.cache.set(text, self.provider.name, self.provider.model, embedding)
+        
+        chunk = _drain()
+        if chunk:
+            yield chunk
+        
+        uncached_indices = [index for index, slot in enumerate(slots) if slot is None]
+        uncached_texts = [texts[index] for index in uncached_indices]
+        
+        async for positions, embeddings in self._get_executor(batch_size).stream(uncached_texts):
+            batch_texts = [uncached_texts[position] for position in positions]
+            for position, text, embedding in zip(positions, batch_texts, embeddings):
+                slots[uncached_indices[position]] = EmbeddingResult(
+                    text=text,
+                    vector=embedding,
+                    provider=self.provider.name,
+                    model=self.provider.model,
+                    timestamp=datetime.now(),
+                    cache_hit=False,
+                    processing_time_ms=0  # Will be calculated at batch level
+                )
+            
+            # Cache the results
+            if self.cache:
+                await self.cache.set_many(batch_texts, self.provider.name, self.provider.model, embeddings)
             
-            # Sort by original index and add to results
-            batch_results.sort(key=lambda x: x[0])
-            results.extend([result for _, result in batch_results])
+            chunk = _drain()
+            if chunk:
+                yield chunk
+    
+    async def generate_embeddings_batch(self, 
+                                      texts: List[str],
+                                      batch_size: int = 10) -> BatchEmbeddingResult:
+        """Generate embeddings for batch of texts"""
+        start_time = time.time()
+        results: List[EmbeddingResult] = []
+        
+        async for chunk in self.iter_embeddings_batch(texts, batch_size=batch_size):
+            results.extend(chunk)
         
+        cache_hits = sum(1 for result in results if result.cache_hit)
         total_processing_time = int((time.time() - start_time) * 1000)
         success_count = len(results)
         failed_count = len(texts) - success_count
@@ -544,36 +1032,12 @@ class EmbeddingService:
         """Get embedding service statistics"""
         try:
             # Get cache stats
-            cache_stats = {"enabled": False}
-            if self.cache:
-                if not GOOGLE_CLOUD_AVAILABLE:
-                    # Use local cache stats
-                    cache_stats = {
-                        "enabled": True,
-                        "total_entries": len(self.cache._local_cache),
-                        "provider_counts": {}
-                    }
-                    
-                    # Count by provider
-                    for data in self.cache._local_cache.values():
-                        provider = data.get("provider", "unknown")
-                        cache_stats["provider_counts"][provider] = cache_stats["provider_counts"].get(provider, 0) + 1
-                else:
-                    # Count total cached embeddings
-                    docs = await asyncio.get_event_loop().run_in_executor(
-                        None, lambda: list(self.cache.collection.stream())
-                    )
-                    cache_stats = {
-                        "enabled": True,
-                        "total_entries": len(docs),
-                        "provider_counts": {}
-                    }
-                    
-                    # Count by provider
-                    for doc in docs:
-                        data = doc.to_dict()
-                        provider = data.get("provider", "unknown")
-                        cache_stats["provider_counts"][provider] = cache_stats["provider_counts"].get(provider, 0) + 1
+            cache_stats = self.cache.get_stats() if self.cache else {"enabled": False}
+            
+            executor_stats = {"requests": 0, "throttled": 0, "retries": 0}
+            for executor in self._executors.values():
+                for key, value in executor.stats.items():
+                    executor_stats[key] += value
             
             return {
                 "provider": {
@@ -582,6 +1046,11 @@ class EmbeddingService:
                     "dimensions": self.provider.dimensions
                 },
                 "cache": cache_stats,
+                "batching": {
+                    "max_in_flight": self.max_in_flight,
+                    "max_tokens_per_request": self.max_tokens_per_request,
+                    **executor_stats
+                },
                 "project_id": self.project_id,
                 "timestamp": datetime.now().isoformat()
             }
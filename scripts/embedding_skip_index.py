@@ -0,0 +1,337 @@
+"""
+Content-hash skip index for incremental re-embedding.
+
+The index keeps one row per (candidate_id, model_version) with the SHA-256
+of the normalized text that was last embedded. Pipelines build their
+searchable text, look the hashes up in bulk and only call the embedding
+provider for candidates whose text changed, turning nightly refreshes into
+incremental passes.
+
+Two thin clients share the same table:
+- EmbeddingSkipIndex: asyncpg pool, for the aiohttp based re-embed scripts
+- SyncEmbeddingSkipIndex: any DB-API connection (psycopg2), for
+  sourcing_embeddings.py
+
+Environment:
+- PGVECTOR_CONNECTION_STRING / PGVECTOR_* : database used by the async client
+- EMBEDDING_COST_PER_1K_TOKENS: price used for dry-run savings (default 0.00002)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+try:
+    import asyncpg  # type: ignore
+    ASYNCPG_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional in the psycopg2 only scripts
+    asyncpg = None  # type: ignore
+    ASYNCPG_AVAILABLE = False
+
+try:
+    from scripts.embedding_service import estimate_tokens  # type: ignore
+except Exception:
+    from embedding_service import estimate_tokens  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+SKIP_INDEX_TABLE = "embedding_text_hashes"
+LOOKUP_CHUNK_SIZE = 10_000
+DEFAULT_COST_PER_1K_TOKENS = 0.00002
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+CREATE_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {SKIP_INDEX_TABLE} (
+    candidate_id TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    text_hash CHAR(64) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (candidate_id, model_version)
+)
+"""
+
+_LOOKUP_SQL = f"""
+SELECT candidate_id, text_hash
+FROM {SKIP_INDEX_TABLE}
+WHERE model_version = {{model}} AND candidate_id = ANY({{ids}})
+"""
+
+_RECORD_SQL = f"""
+INSERT INTO {SKIP_INDEX_TABLE} (candidate_id, model_version, text_hash, updated_at)
+SELECT ids.candidate_id, {{model}}, ids.text_hash, NOW()
+FROM unnest({{ids}}, {{hashes}}) AS ids(candidate_id, text_hash)
+ON CONFLICT (candidate_id, model_version) DO UPDATE
+SET text_hash = EXCLUDED.text_hash,
+    updated_at = EXCLUDED.updated_at
+WHERE {SKIP_INDEX_TABLE}.text_hash IS DISTINCT FROM EXCLUDED.text_hash
+"""
+
+ASYNC_LOOKUP_SQL = _LOOKUP_SQL.format(model="$1", ids="$2::text[]")
+ASYNC_RECORD_SQL = _RECORD_SQL.format(model="$1", ids="$2::text[]", hashes="$3::text[]")
+SYNC_LOOKUP_SQL = _LOOKUP_SQL.format(model="%s", ids="%s::text[]")
+SYNC_RECORD_SQL = _RECORD_SQL.format(model="%s", ids="%s::text[]", hashes="%s::text[]")
+TABLE_EXISTS_SQL = "SELECT to_regclass(%s) IS NOT NULL"
+ASYNC_TABLE_EXISTS_SQL = "SELECT to_regclass($1) IS NOT NULL"
+
+
+def normalize_embedding_text(text: Optional[str]) -> str:
+    """Normalize text so cosmetic differences do not force a re-embed."""
+    if not text:
+        return ""
+    normalized = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def embedding_text_hash(text: Optional[str]) -> str:
+    """SHA-256 hex digest of the normalized embedding text."""
+    return hashlib.sha256(normalize_embedding_text(text).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SkipPlan:
+    """Outcome of comparing freshly built texts against the skip index."""
+
+    model_version: str
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    empty: List[str] = field(default_factory=list)
+    hashes: Dict[str, str] = field(default_factory=dict)
+    tokens_to_embed: int = 0
+    tokens_saved: int = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.changed) + len(self.unchanged) + len(self.empty)
+
+    def report(self, cost_per_1k_tokens: Optional[float] = None) -> Dict[str, Any]:
+        """Summarize provider calls and spend avoided by skipping unchanged texts."""
+        if cost_per_1k_tokens is None:
+            cost_per_1k_tokens = float(
+                os.getenv("EMBEDDING_COST_PER_1K_TOKENS", str(DEFAULT_COST_PER_1K_TOKENS))
+            )
+        return {
+            "model_version": self.model_version,
+            "candidates": self.total,
+            "to_embed": len(self.changed),
+            "unchanged": len(self.unchanged),
+            "empty": len(self.empty),
+            "calls_saved": len(self.unchanged),
+            "tokens_to_embed": self.tokens_to_embed,
+            "tokens_saved": self.tokens_saved,
+            "cost_per_1k_tokens": cost_per_1k_tokens,
+            "dollars_to_spend": round(self.tokens_to_embed / 1000 * cost_per_1k_tokens, 6),
+            "dollars_saved": round(self.tokens_saved / 1000 * cost_per_1k_tokens, 6),
+        }
+
+    def hashes_for(self, candidate_ids: Iterable[Any]) -> Dict[str, str]:
+        """Hashes to record for candidates that were embedded successfully."""
+        return {str(cid): self.hashes[str(cid)] for cid in candidate_ids if str(cid) in self.hashes}
+
+
+def plan_reembedding(
+    texts: Mapping[Any, Optional[str]],
+    existing: Mapping[str, str],
+    model_version: str,
+) -> SkipPlan:
+    """Split candidates into changed, unchanged and empty by text hash.
+
+    Args:
+        texts: candidate_id -> embedding text built by the pipeline
+        existing: candidate_id -> text_hash already stored in the index
+        model_version: model version the hashes belong to
+    """
+    plan = SkipPlan(model_version=model_version)
+    for candidate_id, text in texts.items():
+        key = str(candidate_id)
+        normalized = normalize_embedding_text(text)
+        if not normalized:
+            plan.empty.append(key)
+            continue
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        tokens = estimate_tokens(normalized)
+        if existing.get(key) == digest:
+            plan.unchanged.append(key)
+            plan.tokens_saved += tokens
+        else:
+            plan.changed.append(key)
+            plan.hashes[key] = digest
+            plan.tokens_to_embed += tokens
+    return plan
+
+
+def _chunks(values: Sequence[str], size: int) -> Iterable[Sequence[str]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _build_connection_dsn() -> str:
+    connection_string = os.getenv("PGVECTOR_CONNECTION_STRING")
+    if connection_string:
+        return connection_string
+    host = os.getenv("PGVECTOR_HOST", "localhost")
+    port = os.getenv("PGVECTOR_PORT", "5432")
+    database = os.getenv("PGVECTOR_DATABASE", "headhunter")
+    user = os.getenv("PGVECTOR_USER", "postgres")
+    password = os.getenv("PGVECTOR_PASSWORD", "")
+    return f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+
+class EmbeddingSkipIndex:
+    """Async (asyncpg) client for the content-hash skip index.
+
+    With ``read_only`` (dry runs) connecting issues no DDL; a missing table
+    reads as an empty index.
+    """
+
+    def __init__(self, model_version: str, connection_string: Optional[str] = None, pool: Any = None,
+                 read_only: bool = False):
+        self.model_version = model_version
+        self.connection_string = connection_string
+        self.pool = pool
+        self._owns_pool = pool is None
+        self.read_only = read_only
+        self.table_exists = True
+
+    async def connect(self) -> "EmbeddingSkipIndex":
+        if self.pool is None:
+            if not ASYNCPG_AVAILABLE:
+                raise RuntimeError("asyncpg is required for EmbeddingSkipIndex")
+            self.pool = await asyncpg.create_pool(
+                self.connection_string or _build_connection_dsn(),
+                min_size=1,
+                max_size=2,
+                command_timeout=60,
+            )
+        async with self.pool.acquire() as conn:
+            if self.read_only:
+                self.table_exists = bool(await conn.fetchval(ASYNC_TABLE_EXISTS_SQL, SKIP_INDEX_TABLE))
+            else:
+                await conn.execute(CREATE_TABLE_SQL)
+        return self
+
+    async def close(self) -> None:
+        if self.pool is not None and self._owns_pool:
+            await self.pool.close()
+        self.pool = None
+
+    async def __aenter__(self) -> "EmbeddingSkipIndex":
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def lookup(self, candidate_ids: Iterable[Any]) -> Dict[str, str]:
+        """Fetch stored hashes for ``candidate_ids`` in a few round trips."""
+        if not self.table_exists:
+            return {}
+        ids = list(dict.fromkeys(str(cid) for cid in candidate_ids))
+        found: Dict[str, str] = {}
+        async with self.pool.acquire() as conn:
+            for chunk in _chunks(ids, LOOKUP_CHUNK_SIZE):
+                rows = await conn.fetch(ASYNC_LOOKUP_SQL, self.model_version, list(chunk))
+                found.update((row["candidate_id"], row["text_hash"]) for row in rows)
+        return found
+
+    async def plan(self, texts: Mapping[Any, Optional[str]]) -> SkipPlan:
+        existing = await self.lookup(texts.keys())
+        return plan_reembedding(texts, existing, self.model_version)
+
+    async def record(self, hashes: Mapping[str, str]) -> int:
+        """Store hashes for candidates whose embeddings were written."""
+        if self.read_only:
+            raise RuntimeError("skip index was opened read-only")
+        if not hashes:
+            return 0
+        ids = list(hashes.keys())
+        async with self.pool.acquire() as conn:
+            for chunk in _chunks(ids, LOOKUP_CHUNK_SIZE):
+                await conn.execute(
+                    ASYNC_RECORD_SQL, self.model_version, list(chunk), [hashes[cid] for cid in chunk]
+                )
+        return len(ids)
+
+
+async def open_skip_index(
+    model_version: str, connection_string: Optional[str] = None, read_only: bool = False
+) -> Optional[EmbeddingSkipIndex]:
+    """Connect to the skip index, or return None so callers fall back to a full pass.
+
+    Dry runs pass ``read_only`` so no table is created.
+    """
+    try:
+        return await EmbeddingSkipIndex(model_version, connection_string, read_only=read_only).connect()
+    except Exception as exc:
+        logger.warning("Embedding skip index unavailable, running a full pass: %s", exc)
+        return None
+
+
+class SyncEmbeddingSkipIndex:
+    """DB-API (psycopg2) client for the content-hash skip index."""
+
+    def __init__(self, conn: Any, model_version: str):
+        self.conn = conn
+        self.model_version = model_version
+
+    def ensure_schema(self) -> None:
+        with self.conn.cursor() as cur:
+            cur.execute(CREATE_TABLE_SQL)
+        self.conn.commit()
+
+    def table_exists(self) -> bool:
+        """Whether the index table exists, checked without DDL (for dry runs)."""
+        with self.conn.cursor() as cur:
+            cur.execute(TABLE_EXISTS_SQL, (SKIP_INDEX_TABLE,))
+            row = cur.fetchone()
+        return bool(row and row[0])
+
+    def lookup(self, candidate_ids: Iterable[Any]) -> Dict[str, str]:
+        ids = list(dict.fromkeys(str(cid) for cid in candidate_ids))
+        found: Dict[str, str] = {}
+        with self.conn.cursor() as cur:
+            for chunk in _chunks(ids, LOOKUP_CHUNK_SIZE):
+                cur.execute(SYNC_LOOKUP_SQL, (self.model_version, list(chunk)))
+                found.update((str(cid), digest) for cid, digest in cur.fetchall())
+        return found
+
+    def plan(self, texts: Mapping[Any, Optional[str]]) -> SkipPlan:
+        return plan_reembedding(texts, self.lookup(texts.keys()), self.model_version)
+
+    def record(self, hashes: Mapping[str, str]) -> int:
+        """Store hashes and commit."""
+        if not hashes:
+            return 0
+        ids = list(hashes.keys())
+        with self.conn.cursor() as cur:
+            for chunk in _chunks(ids, LOOKUP_CHUNK_SIZE):
+                cur.execute(SYNC_RECORD_SQL, (self.model_version, list(chunk), [hashes[cid] for cid in chunk]))
+        self.conn.commit()
+        return len(ids)
+
+
+def format_skip_report(report: Mapping[str, Any]) -> str:
+    """One-line human readable version of SkipPlan.report()."""
+    return (
+        f"{report['to_embed']}/{report['candidates']} to embed, "
+        f"{report['unchanged']} unchanged ({report['calls_saved']} calls, "
+        f"~{report['tokens_saved']} tokens, ${report['dollars_saved']:.4f} saved), "
+        f"{report['empty']} without text"
+    )
+
+
+__all__ = [
+    "EmbeddingSkipIndex",
+    "SkipPlan",
+    "SyncEmbeddingSkipIndex",
+    "embedding_text_hash",
+    "format_skip_report",
+    "normalize_embedding_text",
+    "open_skip_index",
+    "plan_reembedding",
+]
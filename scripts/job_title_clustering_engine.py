@@ -5,16 +5,20 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import os
 import re
-import unicodedata
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Protocol, Sequence, Tuple
 
 import importlib
 import numpy as np
-from sklearn.cluster import DBSCAN, KMeans
+from scipy.sparse import csr_matrix
+from sklearn.cluster import DBSCAN, KMeans, MiniBatchKMeans
 from sklearn.metrics import davies_bouldin_score, silhouette_score
+from sklearn.neighbors import NearestNeighbors, sort_graph_by_row_values
 
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -29,6 +33,8 @@ except ModuleNotFoundError:  # pragma: no cover - optional during certain tests
 
 _DEFAULT_DBSCAN_EPS = 0.4
 _DEFAULT_DBSCAN_MIN_SAMPLES = 5
+_DEFAULT_SILHOUETTE_SAMPLE_SIZE = 5000
+_GRAPH_DISTANCE_OFFSET = 1.0
 
 
 @dataclass
@@ -42,6 +48,180 @@ class ClusteringConfig:
     visualization_dir: Optional[Path] = None
     category_overrides: Mapping[str, Dict[str, Any]] = field(default_factory=dict)
     default_category: str = "default"
+    # "exact": brute-force cosine DBSCAN / full KMeans. "scalable": L2-normalized
+    # vectors, Euclidean neighbor search, MiniBatchKMeans and sampled silhouettes.
+    backend: str = "exact"
+    # Scalable DBSCAN neighbor search: "knn_graph" (approximate, bounded memory; hnswlib
+    # when installed) or "ball_tree" (exact, but only fast on low-dimensional vectors)
+    neighbor_index: str = "knn_graph"
+    knn_neighbors: int = 32
+    minibatch_size: int = 4096
+    silhouette_sample_size: int = _DEFAULT_SILHOUETTE_SAMPLE_SIZE
+    # Processes for per-category clustering in the scalable backend (0 = one per CPU)
+    workers: int = 1
+    # Centroids, medoids and per-category parameters from the last full run; enables run_incremental
+    model_path: Optional[Path] = None
+    # Cosine distance to the nearest centroid a new title may have; None = that cluster's radius
+    incremental_max_distance: Optional[float] = None
+    # run_incremental falls back to a full rebuild once the model is older than this (0 = never)
+    rebuild_after_days: float = 7.0
+    # Share of queued outliers (vs assigned titles) at which a rebuild is recommended
+    rebuild_outlier_fraction: float = 0.05
+
+
+@dataclass
+class ClusterModel:
+    """Per-cluster centroids, radii and medoids from a full run, for assigning new titles without reclustering.
+
+    Centroids are kept as sums of unit vectors so incremental members can be
+    folded in; each cluster's radius is the 95th percentile cosine distance of
+    its members to the centroid (at least eps for DBSCAN categories).
+    """
+
+    built_at: float
+    method: str
+    chunk_type: str
+    quality_score: Optional[float]
+    categories: Dict[str, Dict[str, Any]]
+    cluster_ids: np.ndarray
+    cluster_categories: List[str]
+    centroid_sums: np.ndarray
+    counts: np.ndarray
+    radii: np.ndarray
+    medoids: List[Dict[str, Any]]
+    assignments: Dict[str, int]
+    pending: List[str] = field(default_factory=list)
+
+    @classmethod
+    def build(
+        cls,
+        unit_embeddings: np.ndarray,
+        labels: np.ndarray,
+        metadata: Sequence[Mapping[str, Any]],
+        categories: Sequence[str],
+        category_configs: Mapping[str, Mapping[str, Any]],
+        config: ClusteringConfig,
+        quality_score: Optional[float],
+    ) -> "ClusterModel":
+        cluster_ids = np.array(sorted(int(label) for label in np.unique(labels) if label >= 0), dtype=np.int64)
+        dim = unit_embeddings.shape[1]
+        sums = np.zeros((len(cluster_ids), dim), dtype=np.float32)
+        counts = np.zeros(len(cluster_ids), dtype=np.int64)
+        radii = np.zeros(len(cluster_ids), dtype=np.float32)
+        cluster_categories: List[str] = []
+        medoids: List[Dict[str, Any]] = []
+        for row, cluster_id in enumerate(cluster_ids):
+            members = np.flatnonzero(labels == cluster_id)
+            vectors = unit_embeddings[members]
+            sums[row] = vectors.sum(axis=0)
+            counts[row] = len(members)
+            distances = 1.0 - vectors @ _l2_normalize(sums[row:row + 1])[0]
+            category = categories[members[0]]
+            params = category_configs.get(category, {})
+            floor = float(params.get("eps") or 0.0) if params.get("method") == "dbscan" else 0.0
+            radii[row] = max(float(np.quantile(distances, 0.95)), floor)
+            cluster_categories.append(category)
+            medoid = metadata[members[int(np.argmin(distances))]]
+            medoids.append({"chunk_id": medoid.get("chunk_id"), "text": medoid.get("text")})
+        assignments = {
+            str(info.get("chunk_id")): int(label) for info, label in zip(metadata, labels) if info.get("chunk_id") is not None
+        }
+        return cls(
+            built_at=time.time(),
+            method=config.method,
+            chunk_type=config.chunk_type,
+            quality_score=quality_score,
+            categories={name: _json_safe(params) for name, params in category_configs.items()},
+            cluster_ids=cluster_ids,
+            cluster_categories=cluster_categories,
+            centroid_sums=sums,
+            counts=counts,
+            radii=radii,
+            medoids=medoids,
+            assignments=assignments,
+        )
+
+    def known_ids(self) -> set:
+        return set(self.assignments) | set(self.pending)
+
+    def assign(
+        self, unit_vectors: np.ndarray, categories: Sequence[str], max_distance: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest cluster of the same category per vector; -1 where it is beyond the cluster's radius."""
+        assigned = np.full(len(unit_vectors), -1, dtype=np.int64)
+        best_distances = np.full(len(unit_vectors), np.inf, dtype=np.float32)
+        rows_by_category: Dict[str, List[int]] = {}
+        for row, category in enumerate(self.cluster_categories):
+            rows_by_category.setdefault(category, []).append(row)
+        wanted: Dict[str, List[int]] = {}
+        for index, category in enumerate(categories):
+            wanted.setdefault(category, []).append(index)
+        for category, indices in wanted.items():
+            rows = np.array(rows_by_category.get(category, []), dtype=np.int64)
+            if not rows.size:
+                continue
+            centroids = _l2_normalize(self.centroid_sums[rows])
+            distances = 1.0 - unit_vectors[indices] @ centroids.T
+            nearest = np.argmin(distances, axis=1)
+            for index, local_row, distance in zip(indices, nearest, distances[np.arange(len(indices)), nearest]):
+                row = int(rows[local_row])
+                best_distances[index] = distance
+                limit = max_distance if max_distance is not None else float(self.radii[row])
+                if distance <= limit:
+                    assigned[index] = int(self.cluster_ids[row])
+                    self.centroid_sums[row] += unit_vectors[index]
+                    self.counts[row] += 1
+        return assigned, best_distances
+
+    def medoid_for(self, cluster_id: int) -> Tuple[str, Dict[str, Any]]:
+        row = int(np.searchsorted(self.cluster_ids, cluster_id))
+        return self.cluster_categories[row], self.medoids[row]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "version": 1,
+            "built_at": self.built_at,
+            "method": self.method,
+            "chunk_type": self.chunk_type,
+            "quality_score": self.quality_score,
+            "categories": self.categories,
+            "cluster_categories": self.cluster_categories,
+            "medoids": self.medoids,
+            "assignments": self.assignments,
+            "pending": self.pending,
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        with tmp.open("wb") as handle:
+            np.savez(
+                handle,
+                cluster_ids=self.cluster_ids,
+                centroid_sums=self.centroid_sums,
+                counts=self.counts,
+                radii=self.radii,
+                state=np.array(json.dumps(state, ensure_ascii=False)),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ClusterModel":
+        with np.load(path, allow_pickle=False) as data:
+            state = json.loads(str(data["state"]))
+            return cls(
+                built_at=float(state["built_at"]),
+                method=state["method"],
+                chunk_type=state["chunk_type"],
+                quality_score=state.get("quality_score"),
+                categories=state["categories"],
+                cluster_ids=data["cluster_ids"],
+                cluster_categories=list(state["cluster_categories"]),
+                centroid_sums=data["centroid_sums"].astype(np.float32),
+                counts=data["counts"],
+                radii=data["radii"],
+                medoids=list(state["medoids"]),
+                assignments={str(key): int(value) for key, value in state["assignments"].items()},
+                pending=list(state.get("pending", [])),
+            )
 
 
 class VectorSource(Protocol):
@@ -72,6 +252,11 @@ class PgVectorVectorSource:
             raise AttributeError("Configured store does not expose list_embeddings")
         return self._store.list_embeddings(chunk_type=chunk_type)
 
+    def list_embedding_matrix(self, chunk_type: str) -> Optional[Any]:
+        if not hasattr(self._store, "list_embedding_matrix"):
+            return None
+        return self._store.list_embedding_matrix(chunk_type=chunk_type)
+
 
 class JobTitleClusteringEngine:
     """Clusters job title embeddings using pgvector store data."""
@@ -82,6 +267,7 @@ class JobTitleClusteringEngine:
         self.config = config
         self.vector_source = vector_source or PgVectorVectorSource()
         self.normalizer = self._load_normalizer()
+        self._fold_diacritics = getattr(importlib.import_module("scripts.eco_title_normalizer"), "fold_diacritics", None)
         self._category_patterns = {
             name: [re.compile(pattern, re.IGNORECASE) for pattern in options.get("patterns", [])]
             for name, options in self.config.category_overrides.items()
@@ -101,10 +287,13 @@ class JobTitleClusteringEngine:
         return None
 
     def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
         embeddings, metadata = self._load_embeddings()
         logger.info("Loaded %d embeddings for clustering", len(embeddings))
         if embeddings.size == 0:
             raise RuntimeError("No embeddings available for clustering")
+        if self._scalable:
+            embeddings = _l2_normalize(embeddings)
         categories = self._categorize_metadata(metadata)
         category_groups = self._group_indices_by_category(categories)
         global_labels = np.full(len(metadata), -1, dtype=int)
@@ -112,20 +301,15 @@ class JobTitleClusteringEngine:
         summary_entries: List[Mapping[str, Any]] = []
         category_metrics: Dict[str, Any] = {}
         cluster_counter = 0
-        for category, indices in category_groups.items():
-            subset_embeddings = embeddings[indices]
-            if subset_embeddings.size == 0:
-                continue
+        jobs = [
+            (category, indices, self._derive_category_config(category))
+            for category, indices in category_groups.items()
+            if embeddings[indices].size
+        ]
+        results = self._cluster_categories([(embeddings[indices], config) for _, indices, config in jobs])
+        category_configs = {category: config for category, _, config in jobs}
+        for (category, indices, category_config), (labels, metrics) in zip(jobs, results):
             subset_metadata = [metadata[i] for i in indices]
-            category_config = self._derive_category_config(category)
-            labels, model = self._run_category_clustering(subset_embeddings, category_config)
-            metrics = self._calculate_metrics(
-                subset_embeddings,
-                labels,
-                model,
-                method=category_config["method"],
-                parameters=category_config,
-            )
             category_metrics[category] = metrics
             label_mapping: Dict[int, int] = {}
             for label in np.unique(labels):
@@ -157,6 +341,20 @@ class JobTitleClusteringEngine:
             },
         )
         metrics["category_breakdown"] = category_metrics
+        metrics["backend"] = self.config.backend
+        metrics["wall_time_sec"] = round(time.perf_counter() - started, 4)
+        if self.config.model_path:
+            model = ClusterModel.build(
+                embeddings if self._scalable else _l2_normalize(embeddings),
+                global_labels,
+                metadata,
+                categories,
+                category_configs,
+                self.config,
+                metrics.get("silhouette_score"),
+            )
+            model.save(self.config.model_path)
+            logger.info("Saved cluster model (%d clusters) to %s", len(model.cluster_ids), self.config.model_path)
         summary = {
             "method": self.config.method,
             "metrics": metrics,
@@ -170,15 +368,141 @@ class JobTitleClusteringEngine:
             self._generate_visualizations(embeddings, global_labels, summary_entries)
         return summary
 
+    @property
+    def _scalable(self) -> bool:
+        return self.config.backend == "scalable"
+
+    def run_incremental(self) -> Dict[str, Any]:
+        """Assign titles added since the last full run to existing clusters; full rebuild when there is no usable model.
+
+        Titles beyond every cluster's radius are queued in the model for the next
+        full rebuild. Only the new assignments are upserted.
+        """
+        started = time.perf_counter()
+        model = self._load_cluster_model()
+        if model is None:
+            payload = self.run()
+            payload["mode"] = "full"
+            return payload
+        embeddings, metadata = self._load_embeddings()
+        known = model.known_ids()
+        new_indices = [index for index, info in enumerate(metadata) if str(info.get("chunk_id")) not in known]
+        logger.info("Incremental clustering: %d of %d titles are new", len(new_indices), len(metadata))
+        entries: List[Dict[str, Any]] = []
+        outliers: List[str] = []
+        if new_indices:
+            new_metadata = [metadata[index] for index in new_indices]
+            assigned, distances = model.assign(
+                _l2_normalize(embeddings[new_indices]),
+                self._categorize_metadata(new_metadata),
+                self.config.incremental_max_distance,
+            )
+            for info, cluster_id, distance in zip(new_metadata, assigned, distances):
+                chunk_id = str(info.get("chunk_id"))
+                if cluster_id < 0:
+                    outliers.append(chunk_id)
+                    continue
+                model.assignments[chunk_id] = int(cluster_id)
+                entry = self._incremental_entry(model, info, int(cluster_id), float(distance))
+                if entry:
+                    entries.append(entry)
+            model.pending.extend(outliers)
+            self._upsert_cluster_entries(entries)
+            model.save(self.config.model_path)
+        assigned_total = sum(1 for cluster_id in model.assignments.values() if cluster_id >= 0)
+        rebuild_recommended = len(model.pending) > self.config.rebuild_outlier_fraction * max(assigned_total, 1)
+        if rebuild_recommended:
+            logger.warning("%d titles are queued for the next full rebuild", len(model.pending))
+        return {
+            "mode": "incremental",
+            "method": model.method,
+            "new_titles": len(new_indices),
+            "assigned": len(new_indices) - len(outliers),
+            "outliers": len(outliers),
+            "upserted": len(entries),
+            "pending_rebuild": len(model.pending),
+            "rebuild_recommended": rebuild_recommended,
+            "model_built_at": model.built_at,
+            "wall_time_sec": round(time.perf_counter() - started, 4),
+        }
+
+    def _load_cluster_model(self) -> Optional[ClusterModel]:
+        path = self.config.model_path
+        if not path or not Path(path).exists():
+            logger.info("No cluster model at %s; running a full rebuild", path)
+            return None
+        try:
+            model = ClusterModel.load(Path(path))
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Unreadable cluster model %s (%s); running a full rebuild", path, exc)
+            return None
+        if (model.method, model.chunk_type) != (self.config.method, self.config.chunk_type):
+            logger.info("Cluster model was built for %s/%s; running a full rebuild", model.method, model.chunk_type)
+            return None
+        age_days = (time.time() - model.built_at) / 86400
+        if self.config.rebuild_after_days and age_days > self.config.rebuild_after_days:
+            logger.info("Cluster model is %.1f days old; running the scheduled full rebuild", age_days)
+            return None
+        return model
+
+    def _incremental_entry(
+        self, model: ClusterModel, info: Mapping[str, Any], cluster_id: int, distance: float
+    ) -> Optional[Dict[str, Any]]:
+        metadata = info.get("metadata") or {}
+        normalized = metadata.get("normalized_title")
+        if not normalized:
+            return None
+        category, medoid = model.medoid_for(cluster_id)
+        return {
+            "normalized_title": normalized,
+            "cluster_id": cluster_id,
+            "method": model.method,
+            "quality_score": model.quality_score,
+            "metadata": {
+                "category": category,
+                "representative": medoid,
+                "cluster_key": f"{category}:{cluster_id}",
+                "assignment": "incremental",
+                "centroid_distance": round(distance, 4),
+            },
+        }
+
+    def _cluster_categories(
+        self, jobs: Sequence[Tuple[np.ndarray, Mapping[str, Any]]]
+    ) -> List[Tuple[np.ndarray, Dict[str, Any]]]:
+        workers = self.config.workers or (os.cpu_count() or 1)
+        if not self._scalable or workers <= 1 or len(jobs) <= 1:
+            return [self._cluster_category(subset, config) for subset, config in jobs]
+        logger.info("Clustering %d categories across %d processes", len(jobs), workers)
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = [pool.submit(_cluster_category_in_worker, self.config, subset, config) for subset, config in jobs]
+            return [future.result() for future in futures]
+
+    def _cluster_category(self, embeddings: np.ndarray, config: Mapping[str, Any]) -> Tuple[np.ndarray, Dict[str, Any]]:
+        started = time.perf_counter()
+        labels, model = self._run_category_clustering(embeddings, config)
+        clustered = time.perf_counter()
+        metrics = self._calculate_metrics(embeddings, labels, model, method=config["method"], parameters=config)
+        metrics["backend"] = self.config.backend
+        metrics["wall_time_sec"] = round(clustered - started, 4)
+        metrics["metrics_time_sec"] = round(time.perf_counter() - clustered, 4)
+        return np.asarray(labels), metrics
+
     def _load_embeddings(self) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        load_matrix = getattr(self.vector_source, "list_embedding_matrix", None)
+        matrix = load_matrix(chunk_type=self.config.chunk_type) if load_matrix else None
+        if matrix is not None:
+            return self._load_embeddings_from_matrix(matrix)
         records = self.vector_source.list_embeddings(chunk_type=self.config.chunk_type)
         vectors = []
         metadata: List[Dict[str, Any]] = []
         for record in records:
-            vector = record.get("embedding") or record.get("vector")
+            vector = record.get("embedding")
+            if vector is None:
+                vector = record.get("vector")
             if vector is None:
                 continue
-            vectors.append(np.array(vector, dtype="float32"))
+            vectors.append(vector)
             metadata.append(
                 {
                     "chunk_id": record.get("chunk_id") or record.get("id"),
@@ -186,20 +510,42 @@ class JobTitleClusteringEngine:
                     "metadata": record.get("metadata", {}),
                 }
             )
-        return np.vstack(vectors), metadata
+        return np.asarray(vectors, dtype="float32"), metadata
+
+    @staticmethod
+    def _load_embeddings_from_matrix(matrix: Any) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        metadata: List[Dict[str, Any]] = []
+        for index, chunk_id in enumerate(matrix.ids):
+            meta = matrix.metadata[index] if index < len(matrix.metadata) else {}
+            metadata.append(
+                {
+                    "chunk_id": chunk_id,
+                    "text": meta.get("text") or meta.get("canonical_title"),
+                    "metadata": meta,
+                }
+            )
+        return np.asarray(matrix.embeddings, dtype="float32"), metadata
 
     def _categorize_metadata(self, metadata: Sequence[Mapping[str, Any]]) -> List[str]:
-        categories: List[str] = []
-        for info in metadata:
-            categories.append(self._detect_category(info))
-        return categories
+        # Titles repeat across chunks; normalize and match each distinct one once
+        bases = [self._category_source_text(info) for info in metadata]
+        unique = list(dict.fromkeys(bases))
+        by_base = {base: self._match_category(text) for base, text in zip(unique, self._normalize_texts(unique))}
+        return [by_base[base] for base in bases]
 
     def _detect_category(self, info: Mapping[str, Any]) -> str:
+        return self._match_category(self._normalize_text(self._category_source_text(info)))
+
+    @staticmethod
+    def _category_source_text(info: Mapping[str, Any]) -> str:
         meta = info.get("metadata") or {}
-        base = str(meta.get("normalized_title") or info.get("text") or "")
-        normalized_text = self._normalize_text(base).lower()
-        folded_text = self._strip_diacritics(normalized_text).lower()
-        search_values = {normalized_text, folded_text}
+        return str(meta.get("normalized_title") or info.get("text") or "")
+
+    def _match_category(self, normalized: str) -> str:
+        normalized_text = normalized.lower()
+        search_values = {normalized_text}
+        if self._fold_diacritics is not None:
+            search_values.add(self._fold_diacritics(normalized_text).lower())
         for category, patterns in self._category_patterns.items():
             if any(pattern.search(value) for value in search_values for pattern in patterns):
                 return category
@@ -218,12 +564,10 @@ class JobTitleClusteringEngine:
                 return str(self.normalizer.normalize_title(text))
         return text.lower()
 
-    @staticmethod
-    def _strip_diacritics(text: str) -> str:
-        if not text:
-            return ""
-        normalized = unicodedata.normalize("NFD", text)
-        return "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
+    def _normalize_texts(self, texts: Sequence[str]) -> List[str]:
+        if self.normalizer is not None and hasattr(self.normalizer, "normalize_many"):
+            return [str(text) for text in self.normalizer.normalize_many(texts)]
+        return [self._normalize_text(text) for text in texts]
 
     @staticmethod
     def _group_indices_by_category(categories: Sequence[str]) -> Dict[str, List[int]]:
@@ -257,31 +601,87 @@ class JobTitleClusteringEngine:
     def _run_dbscan(self, embeddings: np.ndarray, eps: Optional[float] = None, min_samples: Optional[int] = None) -> Tuple[np.ndarray, DBSCAN]:
         eps_value = eps if eps is not None else self.config.eps
         min_samples_value = min_samples if min_samples is not None else self.config.min_samples
+        if self._scalable:
+            return self._run_scalable_dbscan(embeddings, eps_value, min_samples_value)
         logger.info("Running DBSCAN with eps=%.3f, min_samples=%d", eps_value, min_samples_value)
         model = DBSCAN(eps=eps_value, min_samples=min_samples_value, metric="cosine")
         labels = model.fit_predict(embeddings)
         return labels, model
 
+    def _run_scalable_dbscan(self, embeddings: np.ndarray, eps: float, min_samples: int) -> Tuple[np.ndarray, DBSCAN]:
+        # For unit vectors ||u - v||^2 = 2 * cosine distance, so the same neighborhoods
+        # come out of a Euclidean radius search, which tree indexes can answer
+        radius = float(np.sqrt(2.0 * eps))
+        if self.config.neighbor_index == "knn_graph":
+            logger.info("Running DBSCAN on a %d-NN graph with eps=%.3f, min_samples=%d", self.config.knn_neighbors, eps, min_samples)
+            graph = self._knn_radius_graph(embeddings, radius, min_samples)
+            model = DBSCAN(eps=radius + _GRAPH_DISTANCE_OFFSET, min_samples=min_samples, metric="precomputed")
+            labels = model.fit_predict(graph)
+            return labels, model
+        logger.info("Running ball-tree DBSCAN with eps=%.3f, min_samples=%d", eps, min_samples)
+        model = DBSCAN(eps=radius, min_samples=min_samples, metric="euclidean", algorithm="ball_tree")
+        labels = model.fit_predict(embeddings)
+        return labels, model
+
+    def _knn_radius_graph(self, embeddings: np.ndarray, radius: float, min_samples: int) -> csr_matrix:
+        # Approximate radius graph: each point's k nearest neighbors within ``radius``.
+        # Core points are still found exactly (k >= min_samples); only links between
+        # two points that are both outside each other's k-NN are lost.
+        count = len(embeddings)
+        k = min(count, max(min_samples, self.config.knn_neighbors))
+        try:
+            import hnswlib
+
+            index = hnswlib.Index(space="l2", dim=embeddings.shape[1])
+            index.init_index(max_elements=count, ef_construction=200, M=16, random_seed=42)
+            index.add_items(embeddings, np.arange(count))
+            index.set_ef(max(2 * k, 64))
+            neighbors, squared = index.knn_query(embeddings, k=k)
+            distances = np.sqrt(np.maximum(squared, 0.0))
+        except ImportError:
+            # Chunked brute force: still O(n^2) time but BLAS-bound, and memory stays O(n * k)
+            logger.info("hnswlib not available, building the kNN graph by brute force")
+            finder = NearestNeighbors(n_neighbors=k, algorithm="brute").fit(embeddings)
+            distances, neighbors = finder.kneighbors(embeddings)
+        keep = distances <= radius
+        rows = np.broadcast_to(np.arange(count)[:, None], keep.shape)[keep]
+        # Stored distances are offset so zero distances (each point to itself, duplicate
+        # titles) survive the sparse max below; DBSCAN's eps carries the same offset
+        graph = csr_matrix((distances[keep] + _GRAPH_DISTANCE_OFFSET, (rows, neighbors[keep])), shape=(count, count))
+        graph = graph.maximum(graph.T).tocsr()
+        return sort_graph_by_row_values(graph, warn_when_not_sorted=False)
+
     def _run_kmeans(self, embeddings: np.ndarray, k: Optional[int] = None, k_range: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, KMeans]:
         if k is None:
             optimal_k = self._find_optimal_k(embeddings, k_range or self.config.k_range)
         else:
             optimal_k = k
-        logger.info("Running KMeans with k=%d", optimal_k)
-        model = KMeans(n_clusters=optimal_k, random_state=42, n_init=10)
+        logger.info("Running %s with k=%d", "MiniBatchKMeans" if self._scalable else "KMeans", optimal_k)
+        model = self._kmeans_model(optimal_k)
         labels = model.fit_predict(embeddings)
         return labels, model
 
+    def _kmeans_model(self, k: int) -> Any:
+        if self._scalable:
+            return MiniBatchKMeans(n_clusters=k, random_state=42, batch_size=self.config.minibatch_size, n_init=3)
+        return KMeans(n_clusters=k, random_state=42, n_init=10)
+
+    def _silhouette_options(self, count: int) -> Dict[str, Any]:
+        # Full silhouettes are O(n^2) in time and memory; the scalable backend samples
+        if self._scalable and count > self.config.silhouette_sample_size:
+            return {"sample_size": self.config.silhouette_sample_size, "random_state": 42}
+        return {}
+
     def _find_optimal_k(self, embeddings: np.ndarray, k_range: Tuple[int, int]) -> int:
         inertias = []
         silhouettes = []
         start, end = k_range
         for k in range(start, end + 1):
-            model = KMeans(n_clusters=k, random_state=42, n_init=10)
+            model = self._kmeans_model(k)
             labels = model.fit_predict(embeddings)
             inertias.append(model.inertia_)
             try:
-                silhouettes.append(silhouette_score(embeddings, labels, metric="cosine"))
+                silhouettes.append(silhouette_score(embeddings, labels, metric="cosine", **self._silhouette_options(len(embeddings))))
             except ValueError:
                 silhouettes.append(-1)
         optimal_by_silhouette = (silhouettes.index(max(silhouettes)) + start) if silhouettes else start
@@ -327,7 +727,11 @@ class JobTitleClusteringEngine:
         }
         if mask.any() and cluster_count > 1:
             try:
-                metrics["silhouette_score"] = float(silhouette_score(embeddings[mask], labels[mask], metric="cosine"))
+                metrics["silhouette_score"] = float(
+                    silhouette_score(
+                        embeddings[mask], labels[mask], metric="cosine", **self._silhouette_options(int(mask.sum()))
+                    )
+                )
             except ValueError:
                 metrics["silhouette_score"] = None
             try:
@@ -454,7 +858,10 @@ class JobTitleClusteringEngine:
                         },
                     }
                 )
-        if not entries:
+        self._upsert_cluster_entries(entries)
+
+    def _upsert_cluster_entries(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries or clustering_dao is None or not hasattr(clustering_dao, "bulk_upsert_title_clusters"):
             return
         try:
             self._run_async(lambda: clustering_dao.bulk_upsert_title_clusters(entries))
@@ -508,6 +915,28 @@ class JobTitleClusteringEngine:
         logger.info("Saved cluster summary to %s", summary_path)
 
 
+def _json_safe(params: Mapping[str, Any]) -> Dict[str, Any]:
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in params.items()}
+
+
+def _l2_normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return (embeddings / np.where(norms == 0, 1.0, norms)).astype("float32", copy=False)
+
+
+class _NoVectorSource:
+    def list_embeddings(self, chunk_type: str) -> List[Dict[str, Any]]:
+        return []
+
+
+def _cluster_category_in_worker(
+    config: ClusteringConfig, embeddings: np.ndarray, category_config: Mapping[str, Any]
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    # Process-pool entry point; clustering a category needs no vector source
+    engine = JobTitleClusteringEngine(config, vector_source=_NoVectorSource())
+    return engine._cluster_category(embeddings, category_config)
+
+
 def _parse_args(argv: Optional[Sequence[str]] = None) -> Any:
     import argparse
 
@@ -520,6 +949,13 @@ def _parse_args(argv: Optional[Sequence[str]] = None) -> Any:
     parser.add_argument("--k-end", type=int, default=30)
     parser.add_argument("--output", type=str)
     parser.add_argument("--viz-dir", type=str)
+    parser.add_argument("--backend", choices=["exact", "scalable"], default="exact")
+    parser.add_argument("--neighbor-index", choices=["knn_graph", "ball_tree"], default="knn_graph")
+    parser.add_argument("--silhouette-sample-size", type=int, default=_DEFAULT_SILHOUETTE_SAMPLE_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="Processes for per-category clustering (scalable backend)")
+    parser.add_argument("--model-path", type=str, help="Cluster model written by full runs and read by --incremental")
+    parser.add_argument("--incremental", action="store_true", help="Assign new titles to existing clusters instead of reclustering")
+    parser.add_argument("--rebuild-after-days", type=float, default=7.0)
     return parser.parse_args(argv)
 
 
@@ -533,9 +969,21 @@ def main(argv: Optional[Sequence[str]] = None) -> None:
         k_range=(args.k_start, args.k_end),
         output_path=Path(args.output) if args.output else None,
         visualization_dir=Path(args.viz_dir) if args.viz_dir else None,
+        backend=args.backend,
+        neighbor_index=args.neighbor_index,
+        silhouette_sample_size=args.silhouette_sample_size,
+        workers=args.workers,
+        model_path=Path(args.model_path) if args.model_path else None,
+        rebuild_after_days=args.rebuild_after_days,
     )
     engine = JobTitleClusteringEngine(config)
-    engine.run()
+    if args.incremental:
+        if not config.model_path:
+            raise SystemExit("--incremental needs --model-path")
+        result = engine.run_incremental()
+        logger.info("Incremental clustering: %s", json.dumps(result))
+    else:
+        engine.run()
 
 
 if __name__ == "__main__":
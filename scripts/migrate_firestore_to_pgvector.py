@@ -347,7 +347,7 @@ class FirestoreToPgVectorMigrator:
         # Store batch in pgvector
         if embedding_records:
             try:
-                await self.pgvector_store.batch_store_embeddings(embedding_records)
+                await self.pgvector_store.batch_store_embeddings(embedding_records, use_copy=True)
                 stats['successfully_migrated'] += len(embedding_records)
                 
             except Exception as e:
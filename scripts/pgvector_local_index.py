@@ -0,0 +1,414 @@
+"""
+In-process vector index used as a PgVectorStore search accelerator.
+
+The index is loaded from ``PgVectorStore.fetch_embedding_matrix`` into one
+L2-normalized float32 matrix and answers cosine similarity queries with the
+same threshold / model_version / chunk_type semantics as the SQL
+``similarity_search()`` function. Two backends are available, both pure
+NumPy:
+
+- flat: exact brute-force scan, a single GEMV; a few milliseconds for ~30k
+  x 768 vectors
+- ivf: spherical k-means coarse quantizer with ``nprobe`` inverted lists
+  scanned per query, for larger sets
+
+Refreshes are incremental: only rows whose ``updated_at`` is at or after the
+last seen watermark (minus a safety margin, for transactions that commit
+late) are fetched and applied in place. Deletes leave no ``updated_at``
+trace, so every ``reconcile_seconds`` a refresh also lists the stored keys
+(no vectors) and drops rows that are gone; once dropped rows outnumber live
+ones the index is reloaded in full to compact it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scripts.pgvector_store import EMBEDDING_DIMENSION, EmbeddingMatrix, SearchResult  # type: ignore
+except Exception:
+    from pgvector_store import EMBEDDING_DIMENSION, EmbeddingMatrix, SearchResult  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+FLAT_BACKEND_MAX_ROWS = 100_000
+_INITIAL_CAPACITY = 1024
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _grow(array: np.ndarray, capacity: int) -> np.ndarray:
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first."""
+    if k >= scores.shape[0]:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class _Vocabulary:
+    """Maps repeated strings (model versions, chunk types) to small int codes."""
+
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> int:
+        return self.codes.get(value, -1)
+
+
+class LocalAnnIndex:
+    """Cosine similarity index over ``candidate_embeddings`` held in memory.
+
+    Args:
+        chunk_type: chunk type to load (None loads every chunk type)
+        model_version: optional model version to load
+        backend: "flat", "ivf" or "auto" (flat up to FLAT_BACKEND_MAX_ROWS)
+        nlist: IVF list count (default ~sqrt(n))
+        nprobe: IVF lists scanned per query
+        max_staleness_seconds: PgVectorStore refreshes the index before a
+            search once it is older than this (None disables)
+        watermark_margin_seconds: incremental refreshes re-fetch rows updated
+            this long before the watermark
+        reconcile_seconds: a refresh drops deleted rows once the last key
+            reconciliation is older than this (None disables)
+    """
+
+    def __init__(
+        self,
+        chunk_type: Optional[str] = "full_profile",
+        model_version: Optional[str] = None,
+        backend: str = "auto",
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        max_staleness_seconds: Optional[float] = 300.0,
+        dimension: int = EMBEDDING_DIMENSION,
+        watermark_margin_seconds: float = 60.0,
+        reconcile_seconds: Optional[float] = 3600.0,
+    ):
+        if backend not in ("auto", "flat", "ivf"):
+            raise ValueError(f"Unknown local index backend: {backend}")
+        self.chunk_type = chunk_type
+        self.model_version = model_version
+        self.backend = backend
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.max_staleness_seconds = max_staleness_seconds
+        self.dimension = dimension
+        self.watermark_margin_seconds = watermark_margin_seconds
+        self.reconcile_seconds = reconcile_seconds
+
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self._alive = np.empty(0, dtype=bool)
+        self._model_codes = np.empty(0, dtype=np.int32)
+        self._chunk_codes = np.empty(0, dtype=np.int32)
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._rows: Dict[Tuple[str, str, str], int] = {}
+        self._size = 0
+        self._models = _Vocabulary()
+        self._chunks = _Vocabulary()
+
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists: Optional[List[np.ndarray]] = None
+        self._trained_size = 0
+
+        self.watermark: Optional[datetime] = None
+        self.loaded_at: Optional[float] = None
+        self.reconciled_at: Optional[float] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------------------------------ loading
+
+    def __len__(self) -> int:
+        return int(self._alive[:self._size].sum())
+
+    @property
+    def active_backend(self) -> str:
+        if self.backend != "auto":
+            return self.backend
+        return "flat" if self._size <= FLAT_BACKEND_MAX_ROWS else "ivf"
+
+    def covers(self, chunk_type: Optional[str], model_version: Optional[str]) -> bool:
+        """Whether a search with these filters can be answered from memory."""
+        if self.loaded_at is None:
+            return False
+        if self.chunk_type is not None and chunk_type != self.chunk_type:
+            return False
+        if self.model_version is not None and model_version != self.model_version:
+            return False
+        return True
+
+    def is_stale(self) -> bool:
+        if self.loaded_at is None:
+            return True
+        if self.max_staleness_seconds is None:
+            return False
+        return time.monotonic() - self.loaded_at > self.max_staleness_seconds
+
+    async def load(self, store: Any) -> "LocalAnnIndex":
+        """Full load from ``store.fetch_embedding_matrix``."""
+        matrix = await store.fetch_embedding_matrix(
+            chunk_type=self.chunk_type, model_version=self.model_version
+        )
+        self._reset()
+        self.add_matrix(matrix)
+        self.loaded_at = self.reconciled_at = time.monotonic()
+        return self
+
+    def _reconcile_due(self) -> bool:
+        if self.reconcile_seconds is None or self.reconciled_at is None:
+            return False
+        return time.monotonic() - self.reconciled_at > self.reconcile_seconds
+
+    async def refresh(self, store: Any) -> int:
+        """Apply rows updated since the watermark (and drop deleted rows when due); returns rows changed."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if self.watermark is None:
+                await self.load(store)
+                return len(self)
+            removed = 0
+            if self._reconcile_due():
+                removed = await self._reconcile(store)
+                if self._size - len(self) > len(self):
+                    # Dead slots still cost scan time; a full load compacts them away
+                    await self.load(store)
+                    return removed
+            matrix = await store.fetch_embedding_matrix(
+                chunk_type=self.chunk_type,
+                model_version=self.model_version,
+                updated_since=self.watermark - timedelta(seconds=self.watermark_margin_seconds),
+            )
+            applied = self.add_matrix(matrix)
+            self.loaded_at = time.monotonic()
+            if applied or removed:
+                logger.info(f"Local ANN index refreshed with {applied} rows, {removed} removed (size={len(self)})")
+            return applied + removed
+
+    async def _reconcile(self, store: Any) -> int:
+        """Drop rows whose key is no longer stored; returns rows removed."""
+        stored = await store.fetch_embedding_keys(chunk_type=self.chunk_type, model_version=self.model_version)
+        live = {(str(candidate_id), model_version, chunk_type) for candidate_id, model_version, chunk_type in stored}
+        gone = [key for key in self._rows if key not in live]
+        for key in gone:
+            self._alive[self._rows.pop(key)] = False
+        self.reconciled_at = time.monotonic()
+        return len(gone)
+
+    def add_matrix(self, matrix: EmbeddingMatrix) -> int:
+        """Insert or replace rows keyed by (candidate_id, model_version, chunk_type)."""
+        count = len(matrix)
+        if count == 0:
+            return 0
+        vectors = _normalize_rows(matrix.embeddings)
+        model_versions = matrix.model_versions or [self.model_version or ""] * count
+        chunk_types = matrix.chunk_types or [self.chunk_type or ""] * count
+        metadata = matrix.metadata or [{} for _ in range(count)]
+
+        rows = np.empty(count, dtype=np.int64)
+        for i in range(count):
+            key = (str(matrix.ids[i]), model_versions[i], chunk_types[i])
+            row = self._rows.get(key)
+            if row is None:
+                row = self._append_slot()
+                self._rows[key] = row
+                self._ids.append(key[0])
+                self._metadata.append(metadata[i])
+            else:
+                self._metadata[row] = metadata[i]
+            rows[i] = row
+            self._model_codes[row] = self._models.encode(key[1])
+            self._chunk_codes[row] = self._chunks.encode(key[2])
+        self._vectors[rows] = vectors
+        self._alive[rows] = True
+
+        stamps = [stamp for stamp in matrix.updated_at if stamp is not None]
+        if stamps:
+            latest = max(stamps)
+            if self.watermark is None or latest > self.watermark:
+                self.watermark = latest
+        self._index_rows(rows)
+        return count
+
+    def remove(self, candidate_id: str) -> int:
+        """Drop every row for ``candidate_id``; returns rows removed."""
+        keys = [key for key in self._rows if key[0] == candidate_id]
+        for key in keys:
+            row = self._rows.pop(key)
+            self._alive[row] = False
+        return len(keys)
+
+    def _reset(self) -> None:
+        refresh_lock = self._refresh_lock
+        self.__init__(  # type: ignore[misc]
+            chunk_type=self.chunk_type,
+            model_version=self.model_version,
+            backend=self.backend,
+            nlist=self.nlist,
+            nprobe=self.nprobe,
+            max_staleness_seconds=self.max_staleness_seconds,
+            dimension=self.dimension,
+            watermark_margin_seconds=self.watermark_margin_seconds,
+            reconcile_seconds=self.reconcile_seconds,
+        )
+        self._refresh_lock = refresh_lock
+
+    def _append_slot(self) -> int:
+        if self._size == self._vectors.shape[0]:
+            capacity = max(_INITIAL_CAPACITY, self._vectors.shape[0] * 2)
+            self._vectors = _grow(self._vectors, capacity)
+            self._alive = _grow(self._alive, capacity)
+            self._model_codes = _grow(self._model_codes, capacity)
+            self._chunk_codes = _grow(self._chunk_codes, capacity)
+            self._assignments = _grow(self._assignments, capacity)
+        row = self._size
+        self._size += 1
+        return row
+
+    # --------------------------------------------------------------------- IVF
+
+    def _index_rows(self, rows: np.ndarray) -> None:
+        if self.active_backend != "ivf":
+            return
+        if self._centroids is None or self._size > 2 * self._trained_size:
+            self._train()
+            return
+        self._assignments[rows] = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+        self._lists = None
+
+    def _train(self, iterations: int = 10, sample_size: int = 50_000, seed: int = 0) -> None:
+        vectors = self._vectors[:self._size]
+        nlist = self.nlist or max(1, int(np.sqrt(self._size)))
+        nlist = min(nlist, self._size)
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(self._size, size=min(sample_size, self._size), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            present, starts = np.unique(assign[order], return_index=True)
+            sums = centroids.copy()  # empty clusters keep their previous centroid
+            sums[present] = np.add.reduceat(sample[order], starts, axis=0)
+            centroids = _normalize_rows(sums)
+        self._centroids = centroids
+        self._assignments[:self._size] = np.argmax(vectors @ centroids.T, axis=1)
+        self._trained_size = self._size
+        self._lists = None
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            assignments = self._assignments[:self._size]
+            order = np.argsort(assignments, kind="stable")
+            bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+        return self._lists
+
+    # ------------------------------------------------------------------ search
+
+    def _filter_mask(self, rows: Any, model_version: Optional[str], chunk_type: Optional[str]) -> np.ndarray:
+        mask = self._alive[rows].copy()
+        if model_version is not None:
+            mask &= self._model_codes[rows] == self._models.lookup(model_version)
+        if chunk_type is not None:
+            mask &= self._chunk_codes[rows] == self._chunks.lookup(chunk_type)
+        return mask
+
+    def search_rows(
+        self,
+        query_embedding: Any,
+        similarity_threshold: float = 0.7,
+        max_results: int = 10,
+        model_version: Optional[str] = None,
+        chunk_type: Optional[str] = "full_profile",
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Row numbers and cosine similarities of the best matches, best first."""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if query.shape[0] != self.dimension:
+            raise ValueError(f"Query embedding must be {self.dimension}-dimensional, got {query.shape[0]}")
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if self.active_backend == "ivf" and self._centroids is not None:
+            probes = _top_k(self._centroids @ query, min(self.nprobe, len(self._centroids)))
+            lists = self._inverted_lists()
+            candidates = np.concatenate([lists[p] for p in probes])
+            candidates = candidates[self._filter_mask(candidates, model_version, chunk_type)]
+            scores = self._vectors[candidates] @ query
+        else:
+            # Scan the contiguous prefix in place; gathering rows first would copy the matrix
+            scores = self._vectors[:self._size] @ query
+            candidates = np.flatnonzero(self._filter_mask(slice(0, self._size), model_version, chunk_type))
+            scores = scores[candidates]
+
+        if candidates.size == 0 or max_results <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        keep = scores >= similarity_threshold
+        candidates, scores = candidates[keep], scores[keep]
+        best = _top_k(scores, max_results)
+        return candidates[best], scores[best]
+
+    def search(
+        self,
+        query_embedding: Any,
+        similarity_threshold: float = 0.7,
+        max_results: int = 10,
+        model_version: Optional[str] = None,
+        chunk_type: Optional[str] = "full_profile",
+    ) -> List[SearchResult]:
+        """Same contract as ``PgVectorStore.similarity_search``, answered in memory."""
+        rows, scores = self.search_rows(
+            query_embedding, similarity_threshold, max_results, model_version, chunk_type
+        )
+        return [
+            SearchResult(
+                candidate_id=self._ids[row],
+                similarity=float(score),
+                metadata=self._metadata[row],
+                model_version=self._models.values[self._model_codes[row]],
+                chunk_type=self._chunks.values[self._chunk_codes[row]],
+            )
+            for row, score in zip(rows, scores)
+        ]
+
+
+def recall_at_k(expected: Sequence[Sequence[str]], actual: Sequence[Sequence[str]]) -> float:
+    """Mean fraction of the expected top-k ids that were returned."""
+    total = 0.0
+    counted = 0
+    for truth, found in zip(expected, actual):
+        if not truth:
+            continue
+        total += len(set(truth) & set(found)) / len(truth)
+        counted += 1
+    return total / counted if counted else 1.0
+
+
+__all__ = ["LocalAnnIndex", "recall_at_k"]
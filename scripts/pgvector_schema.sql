@@ -39,6 +39,16 @@ CREATE TABLE embedding_metadata (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Content-hash skip index: last embedded text per candidate and model version
+-- (see scripts/embedding_skip_index.py)
+CREATE TABLE embedding_text_hashes (
+    candidate_id TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    text_hash CHAR(64) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (candidate_id, model_version)
+);
+
 -- Create indexes for performance optimization
 
 -- IVFFlat index for approximate nearest neighbor search (faster, less accurate)
@@ -11,8 +11,10 @@ import asyncpg
 import numpy as np
 import logging
 import json
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+import struct
+import time
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, asdict, field
 from datetime import datetime, timezone
 import os
 from contextlib import asynccontextmanager
@@ -22,29 +24,126 @@ from contextlib import asynccontextmanager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_DIMENSION = 768
+
+# pgvector binary wire format: uint16 dimension, uint16 unused, float32[] (big-endian)
+_VECTOR_HEADER = struct.Struct(">HH")
+_VECTOR_DTYPE = np.dtype(">f4")
+
+
+def encode_vector(value: Any) -> bytes:
+    """Encode a vector into the pgvector binary representation.
+
+    Accepts NumPy arrays, sequences of numbers, pgvector text literals and
+    payloads already produced by :func:`encode_vector_matrix`.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+    if isinstance(value, str):
+        value = json.loads(value)
+    vector = np.asarray(value, dtype=_VECTOR_DTYPE)
+    if vector.ndim != 1:
+        raise ValueError(f"Vector must be one-dimensional, got shape {vector.shape}")
+    return _VECTOR_HEADER.pack(vector.shape[0], 0) + vector.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Decode a pgvector binary payload into a native float32 array."""
+    dimension, _ = _VECTOR_HEADER.unpack_from(data)
+    vector = np.frombuffer(data, dtype=_VECTOR_DTYPE, count=dimension, offset=_VECTOR_HEADER.size)
+    return vector.astype(np.float32)
+
+
+def encode_vector_matrix(matrix: np.ndarray) -> List[bytes]:
+    """Encode every row of an ``(n, d)`` matrix in a single vectorised pass."""
+    rows, dimension = matrix.shape
+    header = _VECTOR_HEADER.pack(dimension, 0)
+    buffer = np.empty((rows, len(header) + dimension * _VECTOR_DTYPE.itemsize), dtype=np.uint8)
+    buffer[:, :len(header)] = np.frombuffer(header, dtype=np.uint8)
+    buffer[:, len(header):] = np.ascontiguousarray(matrix, dtype=_VECTOR_DTYPE).view(np.uint8)
+    return [row.tobytes() for row in buffer]
+
+
+def decode_vector_matrix(payloads: Sequence[bytes], dimension: int = EMBEDDING_DIMENSION) -> np.ndarray:
+    """Decode many pgvector payloads into one contiguous ``(n, dimension)`` float32 array.
+
+    The payloads are joined and reinterpreted through a structured dtype, so the
+    only per-row work is the join; the byte swap happens once for the whole matrix.
+    """
+    if not payloads:
+        return np.empty((0, dimension), dtype=np.float32)
+    row_dtype = np.dtype([
+        ('dimension', '>u2'),
+        ('unused', '>u2'),
+        ('values', _VECTOR_DTYPE, (dimension,))
+    ])
+    joined = b"".join(payloads)
+    if len(joined) != len(payloads) * row_dtype.itemsize:
+        raise ValueError(f"Vectors in result set are not all {dimension}-dimensional")
+    rows = np.frombuffer(joined, dtype=row_dtype)
+    if not (rows['dimension'] == dimension).all():
+        raise ValueError(f"Vectors in result set are not all {dimension}-dimensional")
+    return rows['values'].astype(np.float32)
+
+
+async def register_vector_codec(conn: asyncpg.Connection) -> None:
+    """Register the binary pgvector codec on a connection (pool ``init`` hook)."""
+    try:
+        await conn.set_type_codec(
+            'vector',
+            schema='public',
+            encoder=encode_vector,
+            decoder=decode_vector,
+            format='binary'
+        )
+    except ValueError:
+        # Extension not installed yet; initialize() recycles connections after creating it
+        logger.debug("pgvector type not available - skipping codec registration")
+
+
+def validate_embedding_matrix(embeddings: Any, expected_rows: int) -> np.ndarray:
+    """Coerce embeddings into a finite float32 ``(n, 768)`` matrix."""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[1] != EMBEDDING_DIMENSION:
+        raise ValueError(
+            f"Embeddings must have shape (n, {EMBEDDING_DIMENSION}), got {matrix.shape}"
+        )
+    if matrix.shape[0] != expected_rows:
+        raise ValueError(
+            f"Got {matrix.shape[0]} embeddings for {expected_rows} candidate ids"
+        )
+    if not np.isfinite(matrix).all():
+        raise ValueError("Embeddings must not contain NaN or infinite values")
+    return matrix
+
 
 @dataclass
 class EmbeddingRecord:
     """Data class for embedding records with validation."""
     candidate_id: str
-    embedding: List[float]
+    embedding: Union[List[float], np.ndarray]
     model_version: str = "vertex-ai-textembedding-gecko"
     chunk_type: str = "full_profile"
     metadata: Optional[Dict[str, Any]] = None
     
     def __post_init__(self):
         """Validate embedding dimensions and format."""
-        if not self.embedding:
+        if self.embedding is None or len(self.embedding) == 0:
             raise ValueError("Embedding cannot be empty")
         
-        if len(self.embedding) != 768:
+        if len(self.embedding) != EMBEDDING_DIMENSION:
             raise ValueError(f"Embedding must be 768-dimensional, got {len(self.embedding)}")
         
-        if not all(isinstance(x, (int, float)) for x in self.embedding):
+        vector = np.asarray(self.embedding)
+        if vector.ndim != 1 or vector.dtype.kind not in "biuf":
             raise ValueError("All embedding values must be numeric")
         
-        # Normalize to ensure proper vector format
-        self.embedding = [float(x) for x in self.embedding]
+        # Normalize to ensure proper vector format; arrays decoded by the
+        # pgvector codec are already float32 and are kept without copying
+        if isinstance(self.embedding, np.ndarray):
+            self.embedding = vector.astype(np.float32, copy=False)
+        else:
+            self.embedding = vector.astype(np.float64).tolist()
         
         if self.metadata is None:
             self.metadata = {}
@@ -64,6 +163,32 @@ class SearchResult:
     chunk_type: str
 
 
+@dataclass
+class EmbeddingMatrix:
+    """Column-oriented result of a bulk embedding fetch."""
+    ids: np.ndarray
+    embeddings: np.ndarray
+    model_versions: List[str] = field(default_factory=list)
+    metadata: List[Dict[str, Any]] = field(default_factory=list)
+    chunk_types: List[str] = field(default_factory=list)
+    updated_at: List[Optional[datetime]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+
+@dataclass
+class BulkIngestResult:
+    """Throughput summary for a COPY-based bulk ingest."""
+    rows_written: int
+    batches: int
+    elapsed_seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_written / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+
 class PgVectorStore:
     """
     Async PostgreSQL client with pgvector for candidate embeddings.
@@ -84,6 +209,7 @@ class PgVectorStore:
         self.pool_size = pool_size
         self.pool: Optional[asyncpg.Pool] = None
         self._initialized = False
+        self.local_index = None
     
     async def initialize(self):
         """Initialize database connection pool and ensure schema exists."""
@@ -93,6 +219,7 @@ class PgVectorStore:
                 min_size=1,
                 max_size=self.pool_size,
                 command_timeout=60,
+                init=register_vector_codec,
                 server_settings={
                     'application_name': 'headhunter-pgvector-client',
                     'search_path': 'public'
@@ -100,6 +227,7 @@ class PgVectorStore:
             )
             
             # Verify pgvector extension and schema
+            extension_created = False
             async with self.pool.acquire() as conn:
                 # Check pgvector extension
                 extensions = await conn.fetch(
@@ -108,6 +236,7 @@ class PgVectorStore:
                 if not extensions:
                     logger.warning("pgvector extension not found - attempting to create")
                     await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                    extension_created = True
                 
                 # Check required tables exist
                 tables = await conn.fetch("""
@@ -119,6 +248,10 @@ class PgVectorStore:
                 if len(tables) < 2:
                     logger.warning("Required tables not found - please run pgvector_schema.sql")
             
+            if extension_created:
+                # Connections opened before the extension existed lack the vector codec
+                await self.pool.expire_connections()
+            
             self._initialized = True
             logger.info(f"PgVectorStore initialized with pool size {self.pool_size}")
             
@@ -194,7 +327,8 @@ class PgVectorStore:
     async def batch_store_embeddings(
         self,
         embeddings: List[EmbeddingRecord],
-        batch_size: int = 100
+        batch_size: int = 100,
+        use_copy: bool = False
     ) -> List[str]:
         """
         Store multiple embeddings in batches for performance.
@@ -202,6 +336,8 @@ class PgVectorStore:
         Args:
             embeddings: List of EmbeddingRecord objects
             batch_size: Number of embeddings to process per batch
+            use_copy: Stream each batch through COPY and merge it with a single
+                upsert instead of calling upsert_candidate_embedding per row
             
         Returns:
             List of UUIDs for stored embeddings
@@ -221,28 +357,179 @@ class PgVectorStore:
                 for i in range(0, len(embeddings), batch_size):
                     batch = embeddings[i:i + batch_size]
                     
-                    # Use prepared statement for better performance
-                    batch_ids = await conn.fetch(
-                        """SELECT upsert_candidate_embedding($1, $2, $3, $4, $5) AS id""",
-                        *[(
-                            record.candidate_id,
-                            record.embedding,
-                            record.model_version,
-                            record.chunk_type,
-                            json.dumps(record.metadata) if record.metadata else None
-                        ) for record in batch]
-                    )
-                    
-                    result_ids.extend([str(row['id']) for row in batch_ids])
+                    if use_copy:
+                        merged = await self._copy_merge_batch(
+                            conn,
+                            [record.candidate_id for record in batch],
+                            np.asarray([record.embedding for record in batch], dtype=np.float32),
+                            [record.model_version for record in batch],
+                            [record.chunk_type for record in batch],
+                            [record.metadata for record in batch]
+                        )
+                        result_ids.extend(
+                            merged[(record.candidate_id, record.model_version, record.chunk_type)]
+                            for record in batch
+                        )
+                    else:
+                        # Use prepared statement for better performance
+                        batch_ids = await conn.fetch(
+                            """SELECT upsert_candidate_embedding($1, $2, $3, $4, $5) AS id""",
+                            *[(
+                                record.candidate_id,
+                                record.embedding,
+                                record.model_version,
+                                record.chunk_type,
+                                json.dumps(record.metadata) if record.metadata else None
+                            ) for record in batch]
+                        )
+                        
+                        result_ids.extend([str(row['id']) for row in batch_ids])
                     
                     logger.info(f"Batch stored {len(batch)} embeddings (batch {i//batch_size + 1})")
         
         logger.info(f"Successfully stored {len(result_ids)} embeddings in {len(embeddings)//batch_size + 1} batches")
         return result_ids
     
+    async def bulk_store_embeddings(
+        self,
+        candidate_ids: Sequence[str],
+        embeddings: np.ndarray,
+        model_version: str = "vertex-ai-textembedding-gecko",
+        chunk_type: str = "full_profile",
+        metadata: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+        batch_size: int = 2000
+    ) -> BulkIngestResult:
+        """
+        Bulk ingest a float32 embedding matrix using binary COPY.
+        
+        Each batch is copied into a temporary staging table and merged into
+        candidate_embeddings with one INSERT ... ON CONFLICT statement, so
+        re-embedding runs avoid a function call and round trip per row.
+        
+        Args:
+            candidate_ids: Candidate identifiers, one per matrix row
+            embeddings: ``(n, 768)`` array-like of embedding vectors
+            model_version: Embedding model version applied to every row
+            chunk_type: Chunk type applied to every row
+            metadata: Optional per-row metadata dictionaries
+            batch_size: Rows per COPY/merge transaction
+            
+        Returns:
+            BulkIngestResult with row counts and throughput
+        """
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return BulkIngestResult(rows_written=0, batches=0, elapsed_seconds=0.0)
+        
+        matrix = validate_embedding_matrix(embeddings, len(candidate_ids))
+        if metadata is not None and len(metadata) != len(candidate_ids):
+            raise ValueError(f"Got {len(metadata)} metadata entries for {len(candidate_ids)} candidate ids")
+        
+        started = time.perf_counter()
+        rows_written = 0
+        batches = 0
+        
+        async with self.get_connection() as conn:
+            for i in range(0, len(candidate_ids), batch_size):
+                batch_ids = candidate_ids[i:i + batch_size]
+                async with conn.transaction():
+                    merged = await self._copy_merge_batch(
+                        conn,
+                        batch_ids,
+                        matrix[i:i + batch_size],
+                        [model_version] * len(batch_ids),
+                        [chunk_type] * len(batch_ids),
+                        metadata[i:i + batch_size] if metadata is not None else [None] * len(batch_ids)
+                    )
+                rows_written += len(merged)
+                batches += 1
+                logger.debug(f"Bulk stored {len(merged)} embeddings (batch {batches})")
+        
+        result = BulkIngestResult(
+            rows_written=rows_written,
+            batches=batches,
+            elapsed_seconds=time.perf_counter() - started
+        )
+        logger.info(
+            f"Bulk stored {result.rows_written} embeddings in {result.batches} batches "
+            f"({result.rows_per_second:.0f} rows/sec)"
+        )
+        return result
+    
+    async def _copy_merge_batch(
+        self,
+        conn: asyncpg.Connection,
+        candidate_ids: Sequence[str],
+        matrix: np.ndarray,
+        model_versions: Sequence[str],
+        chunk_types: Sequence[str],
+        metadata: Sequence[Optional[Dict[str, Any]]]
+    ) -> Dict[Tuple[str, str, str], str]:
+        """COPY one batch into a staging table and merge it; must run inside a transaction."""
+        await conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS embedding_ingest_staging (
+                ord INTEGER,
+                candidate_id VARCHAR(255),
+                embedding vector(768),
+                model_version VARCHAR(50),
+                chunk_type VARCHAR(50),
+                metadata JSONB
+            ) ON COMMIT DROP
+        """)
+        
+        records = zip(
+            range(len(candidate_ids)),
+            candidate_ids,
+            encode_vector_matrix(matrix),
+            model_versions,
+            chunk_types,
+            (json.dumps(item) if item else None for item in metadata)
+        )
+        await conn.copy_records_to_table(
+            'embedding_ingest_staging',
+            records=records,
+            columns=['ord', 'candidate_id', 'embedding', 'model_version', 'chunk_type', 'metadata']
+        )
+        
+        # DISTINCT ON keeps the last occurrence so duplicate keys within a batch
+        # do not trip "ON CONFLICT DO UPDATE command cannot affect row a second time"
+        rows = await conn.fetch("""
+            INSERT INTO candidate_embeddings (
+                candidate_id, embedding, model_version, chunk_type, metadata
+            )
+            SELECT DISTINCT ON (candidate_id, model_version, chunk_type)
+                candidate_id, embedding, model_version, chunk_type, metadata
+            FROM embedding_ingest_staging
+            ORDER BY candidate_id, model_version, chunk_type, ord DESC
+            ON CONFLICT (candidate_id, model_version, chunk_type)
+            DO UPDATE SET
+                embedding = EXCLUDED.embedding,
+                metadata = EXCLUDED.metadata,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING id, candidate_id, model_version, chunk_type
+        """)
+        
+        await conn.execute("""
+            INSERT INTO embedding_metadata (candidate_id, processing_status)
+            SELECT DISTINCT candidate_id, 'completed'
+            FROM embedding_ingest_staging
+            ON CONFLICT (candidate_id)
+            DO UPDATE SET
+                processing_status = 'completed',
+                last_processed = CURRENT_TIMESTAMP,
+                error_message = NULL,
+                updated_at = CURRENT_TIMESTAMP
+        """)
+        await conn.execute("TRUNCATE embedding_ingest_staging")
+        
+        return {
+            (row['candidate_id'], row['model_version'], row['chunk_type']): str(row['id'])
+            for row in rows
+        }
+    
     async def similarity_search(
         self,
-        query_embedding: List[float],
+        query_embedding: Union[List[float], np.ndarray],
         similarity_threshold: float = 0.7,
         max_results: int = 10,
         model_version: Optional[str] = None,
@@ -264,6 +551,14 @@ class PgVectorStore:
         if len(query_embedding) != 768:
             raise ValueError(f"Query embedding must be 768-dimensional, got {len(query_embedding)}")
         
+        index = self.local_index
+        if index is not None and index.covers(chunk_type, model_version):
+            if index.is_stale():
+                await index.refresh(self)
+            return index.search(
+                query_embedding, similarity_threshold, max_results, model_version, chunk_type
+            )
+        
         async with self.get_connection() as conn:
             try:
                 # Use the database function for optimized search
@@ -294,6 +589,41 @@ class PgVectorStore:
                 logger.error(f"Similarity search failed: {e}")
                 raise
     
+    async def enable_local_index(
+        self,
+        chunk_type: Optional[str] = "full_profile",
+        model_version: Optional[str] = None,
+        **index_options: Any
+    ):
+        """
+        Load an in-process ANN index and answer matching similarity searches from it.
+        
+        Searches whose chunk_type/model_version fall outside the loaded slice
+        still go to the SQL similarity_search() function.
+        
+        Args:
+            chunk_type: Chunk type to keep in memory (None for all)
+            model_version: Optional model version to keep in memory
+            **index_options: Passed to LocalAnnIndex (backend, nprobe, max_staleness_seconds, ...)
+            
+        Returns:
+            The loaded LocalAnnIndex
+        """
+        try:
+            from scripts.pgvector_local_index import LocalAnnIndex
+        except ImportError:
+            from pgvector_local_index import LocalAnnIndex
+        
+        index = LocalAnnIndex(chunk_type=chunk_type, model_version=model_version, **index_options)
+        await index.load(self)
+        self.local_index = index
+        logger.info(f"Local ANN index loaded with {len(index)} vectors ({index.active_backend})")
+        return index
+    
+    def disable_local_index(self) -> None:
+        """Route every similarity search back to pgvector."""
+        self.local_index = None
+    
     async def get_candidate_embeddings(
         self,
         candidate_id: str,
@@ -336,6 +666,85 @@ class PgVectorStore:
                 for row in rows
             ]
     
+    async def fetch_embedding_matrix(
+        self,
+        chunk_type: Optional[str] = "full_profile",
+        model_version: Optional[str] = None,
+        include_metadata: bool = True,
+        updated_since: Optional[datetime] = None
+    ) -> EmbeddingMatrix:
+        """
+        Load every matching embedding as one contiguous float32 matrix.
+        
+        Vectors are fetched in their binary send format and decoded in a single
+        pass, avoiding a Python object per vector element on full-table loads.
+        
+        Args:
+            chunk_type: Filter by chunk type (None for all)
+            model_version: Optional filter by model version
+            include_metadata: Also return the JSONB metadata of each row
+            updated_since: Only rows with updated_at at or after this watermark
+            
+        Returns:
+            EmbeddingMatrix ordered by candidate_id
+        """
+        query = f"""
+            SELECT candidate_id, model_version, chunk_type, updated_at,
+                   vector_send(embedding) AS embedding_bytes
+                {', metadata' if include_metadata else ''}
+            FROM candidate_embeddings
+            WHERE embedding IS NOT NULL
+              AND ($1::text IS NULL OR chunk_type = $1)
+              AND ($2::text IS NULL OR model_version = $2)
+              AND ($3::timestamptz IS NULL OR updated_at >= $3)
+            ORDER BY candidate_id
+        """
+        
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(query, chunk_type, model_version, updated_since)
+        
+        embeddings = decode_vector_matrix([row['embedding_bytes'] for row in rows])
+        metadata: List[Dict[str, Any]] = []
+        if include_metadata:
+            for row in rows:
+                value = row['metadata']
+                if isinstance(value, str):
+                    value = json.loads(value)
+                metadata.append(dict(value or {}))
+        
+        logger.info(f"Fetched embedding matrix {embeddings.shape} for chunk_type={chunk_type}")
+        return EmbeddingMatrix(
+            ids=np.array([row['candidate_id'] for row in rows], dtype=object),
+            embeddings=embeddings,
+            model_versions=[row['model_version'] for row in rows],
+            metadata=metadata,
+            chunk_types=[row['chunk_type'] for row in rows],
+            updated_at=[row['updated_at'] for row in rows]
+        )
+    
+    async def fetch_embedding_keys(
+        self,
+        chunk_type: Optional[str] = "full_profile",
+        model_version: Optional[str] = None
+    ) -> List[Tuple[str, str, str]]:
+        """
+        List the (candidate_id, model_version, chunk_type) of every matching embedding, without vectors.
+        
+        Lets an incrementally refreshed LocalAnnIndex find rows deleted or
+        re-chunked since it loaded them.
+        """
+        query = """
+            SELECT candidate_id, model_version, chunk_type
+            FROM candidate_embeddings
+            WHERE embedding IS NOT NULL
+              AND ($1::text IS NULL OR chunk_type = $1)
+              AND ($2::text IS NULL OR model_version = $2)
+        """
+        
+        async with self.get_connection() as conn:
+            rows = await conn.fetch(query, chunk_type, model_version)
+        return [(row['candidate_id'], row['model_version'], row['chunk_type']) for row in rows]
+    
     async def delete_candidate_embeddings(self, candidate_id: str) -> int:
         """
         Delete all embeddings for a candidate.
@@ -362,6 +771,9 @@ class PgVectorStore:
                 # Parse deletion count from result
                 deleted_count = int(embedding_result.split()[-1]) if embedding_result.split() else 0
                 
+                if self.local_index is not None:
+                    self.local_index.remove(candidate_id)
+                
                 logger.info(f"Deleted {deleted_count} embeddings for candidate {candidate_id}")
                 return deleted_count
     
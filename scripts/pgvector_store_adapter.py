@@ -3,29 +3,44 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import json
 import logging
+import threading
 from typing import Any, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional
 
-from scripts.pgvector_store import EmbeddingRecord, create_pgvector_store
+from scripts.pgvector_store import EmbeddingMatrix, EmbeddingRecord, PgVectorStore, create_pgvector_store
 
 logger = logging.getLogger(__name__)
 
 
 class PgVectorStoreAdapter:
-    """Expose synchronous helper methods expected by legacy scripts."""
+    """Expose synchronous helper methods expected by legacy scripts.
+
+    The adapter owns one background event-loop thread and a single
+    PgVectorStore whose pool is created on first use and reused by every
+    call, so asyncpg's per-connection prepared statement cache stays warm
+    across calls instead of being rebuilt with a fresh pool each time.
+    """
 
     def __init__(self, connection_string: Optional[str] = None, pool_size: int = 10) -> None:
         self.connection_string = connection_string
         self.pool_size = pool_size
-
-    def upsert_chunks(self, payload: Iterable[Mapping[str, Any]]) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._store: Optional[PgVectorStore] = None
+        self._store_lock: Optional[asyncio.Lock] = None
+        self._thread_lock = threading.Lock()
+        self._atexit_registered = False
+
+    def upsert_chunks(self, payload: Iterable[Mapping[str, Any]], batch_size: int = 1000) -> None:
         """Synchronously persist embedding payloads via the async store."""
         payload_list = list(payload)
         if not payload_list:
             return
 
         def _coro() -> Awaitable[Any]:
-            return self._upsert_chunks_async(payload_list)
+            return self._upsert_chunks_async(payload_list, batch_size)
 
         self._run(_coro)
 
@@ -37,6 +52,14 @@ class PgVectorStoreAdapter:
 
         return self._run(_coro)
 
+    def list_embedding_matrix(self, chunk_type: str = "job_title") -> EmbeddingMatrix:
+        """Synchronously load embeddings as one contiguous ``(n, d)`` matrix."""
+
+        def _coro() -> Awaitable[EmbeddingMatrix]:
+            return self._list_embedding_matrix_async(chunk_type)
+
+        return self._run(_coro)
+
     def list_chunk_ids(self, chunk_type: str = "job_title") -> List[str]:
         """Synchronously fetch chunk identifiers for the requested type."""
 
@@ -45,99 +68,151 @@ class PgVectorStoreAdapter:
 
         return self._run(_coro)
 
-    def _run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
-        try:
-            return asyncio.run(factory())
-        except RuntimeError as exc:
-            if "event loop is running" not in str(exc):
-                raise
-            loop = asyncio.new_event_loop()
-            try:
-                return loop.run_until_complete(factory())
-            finally:
-                loop.close()
-
-    async def _upsert_chunks_async(self, payload: List[Mapping[str, Any]]) -> None:
-        store = await create_pgvector_store(self.connection_string, self.pool_size)
+    def close(self) -> None:
+        """Close the pooled store and stop the background loop."""
+        with self._thread_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+            if self._atexit_registered:
+                # Drops the hook's reference to this adapter; a restarted loop registers again
+                atexit.unregister(self.close)
+                self._atexit_registered = False
+        if loop is None or thread is None:
+            return
         try:
-            for entry in payload:
-                chunk_id = str(entry.get("chunk_id"))
-                embedding = entry.get("embedding")
-                if embedding is None:
-                    logger.warning("Skipping chunk %s with missing embedding", chunk_id)
-                    continue
-                vector = list(embedding)
-                record_metadata = dict(entry.get("metadata") or {})
-                text_value = entry.get("text")
-                if text_value:
-                    record_metadata.setdefault("text", text_value)
-                record_metadata.setdefault("chunk_id", chunk_id)
-                chunk_type = entry.get("chunk_type", "job_title")
-                model_version = entry.get("model_version", "vertex-ai-textembedding-gecko")
-                record = EmbeddingRecord(
+            asyncio.run_coroutine_threadsafe(self._close_store_async(), loop).result()
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    def __enter__(self) -> "PgVectorStoreAdapter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._serve_loop,
+                    args=(loop,),
+                    name="pgvector-adapter-loop",
+                    daemon=True,
+                )
+                thread.start()
+                self._loop = loop
+                self._thread = thread
+                if not self._atexit_registered:
+                    atexit.register(self.close)
+                    self._atexit_registered = True
+            return self._loop
+
+    @staticmethod
+    def _serve_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def _run(self, factory: Callable[[], Awaitable[Any]]) -> Any:
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("PgVectorStoreAdapter methods cannot be called from its own event loop")
+        return asyncio.run_coroutine_threadsafe(factory(), loop).result()
+
+    async def _get_store(self) -> PgVectorStore:
+        if self._store_lock is None:
+            self._store_lock = asyncio.Lock()
+        async with self._store_lock:
+            if self._store is None:
+                self._store = await create_pgvector_store(self.connection_string, self.pool_size)
+            return self._store
+
+    async def _close_store_async(self) -> None:
+        if self._store is not None:
+            await self._store.close()
+            self._store = None
+
+    async def _upsert_chunks_async(self, payload: List[Mapping[str, Any]], batch_size: int) -> None:
+        records: List[EmbeddingRecord] = []
+        for entry in payload:
+            chunk_id = str(entry.get("chunk_id"))
+            embedding = entry.get("embedding")
+            if embedding is None:
+                logger.warning("Skipping chunk %s with missing embedding", chunk_id)
+                continue
+            record_metadata = dict(entry.get("metadata") or {})
+            text_value = entry.get("text")
+            if text_value:
+                record_metadata.setdefault("text", text_value)
+            record_metadata.setdefault("chunk_id", chunk_id)
+            records.append(
+                EmbeddingRecord(
                     candidate_id=chunk_id,
-                    embedding=vector,
-                    model_version=model_version,
-                    chunk_type=chunk_type,
+                    embedding=embedding,
+                    model_version=entry.get("model_version", "vertex-ai-textembedding-gecko"),
+                    chunk_type=entry.get("chunk_type", "job_title"),
                     metadata=record_metadata,
                 )
-                await store.store_embedding(
-                    candidate_id=record.candidate_id,
-                    embedding=record.embedding,
-                    model_version=record.model_version,
-                    chunk_type=record.chunk_type,
-                    metadata=record.metadata,
-                )
-        finally:
-            await store.close()
+            )
+        if not records:
+            return
+        store = await self._get_store()
+        await store.batch_store_embeddings(records, batch_size=batch_size, use_copy=True)
 
     async def _list_embeddings_async(self, chunk_type: str) -> List[Dict[str, Any]]:
-        store = await create_pgvector_store(self.connection_string, self.pool_size)
-        try:
-            async with store.get_connection() as conn:
-                rows = await conn.fetch(
-                    """
-                    SELECT candidate_id, embedding, metadata, model_version, chunk_type
-                    FROM candidate_embeddings
-                    WHERE chunk_type = $1
-                    ORDER BY candidate_id
-                    """,
-                    chunk_type,
-                )
-            results: List[Dict[str, Any]] = []
-            for row in rows:
-                metadata = dict(row.get("metadata") or {})
-                text_value = metadata.get("text") or metadata.get("canonical_title")
-                results.append(
-                    {
-                        "chunk_id": row["candidate_id"],
-                        "chunk_type": row["chunk_type"],
-                        "text": text_value,
-                        "embedding": list(row["embedding"]),
-                        "metadata": metadata,
-                        "model_version": row["model_version"],
-                    }
-                )
-            return results
-        finally:
-            await store.close()
+        store = await self._get_store()
+        async with store.get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT candidate_id, embedding, metadata, model_version, chunk_type
+                FROM candidate_embeddings
+                WHERE chunk_type = $1
+                ORDER BY candidate_id
+                """,
+                chunk_type,
+            )
+        results: List[Dict[str, Any]] = []
+        for row in rows:
+            metadata = _coerce_metadata(row.get("metadata"))
+            text_value = metadata.get("text") or metadata.get("canonical_title")
+            results.append(
+                {
+                    "chunk_id": row["candidate_id"],
+                    "chunk_type": row["chunk_type"],
+                    "text": text_value,
+                    "embedding": row["embedding"],
+                    "metadata": metadata,
+                    "model_version": row["model_version"],
+                }
+            )
+        return results
+
+    async def _list_embedding_matrix_async(self, chunk_type: str) -> EmbeddingMatrix:
+        store = await self._get_store()
+        return await store.fetch_embedding_matrix(chunk_type=chunk_type)
 
     async def _list_chunk_ids_async(self, chunk_type: str) -> List[str]:
-        store = await create_pgvector_store(self.connection_string, self.pool_size)
-        try:
-            async with store.get_connection() as conn:
-                rows = await conn.fetch(
-                    """
-                    SELECT candidate_id
-                    FROM candidate_embeddings
-                    WHERE chunk_type = $1
-                    ORDER BY candidate_id
-                    """,
-                    chunk_type,
-                )
-            return [row["candidate_id"] for row in rows]
-        finally:
-            await store.close()
+        store = await self._get_store()
+        async with store.get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT candidate_id
+                FROM candidate_embeddings
+                WHERE chunk_type = $1
+                ORDER BY candidate_id
+                """,
+                chunk_type,
+            )
+        return [row["candidate_id"] for row in rows]
+
+
+def _coerce_metadata(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str):
+        value = json.loads(value)
+    return dict(value or {})
 
 
 def get_store(connection_string: Optional[str] = None, pool_size: int = 10) -> PgVectorStoreAdapter:
@@ -7,11 +7,15 @@ This script re-embeds all 17,969 enriched candidates using their intelligent_ana
 It processes candidates in parallel batches for performance.
 
 Usage:
-    python3 scripts/reembed_all_enriched.py
+    python3 scripts/reembed_all_enriched.py [--refresh] [--dry-run] [--full]
 
 Progress is saved incrementally, so the script can be interrupted and resumed.
+Candidates whose profile text hash is unchanged in the embedding skip index are
+not sent again; --refresh ignores the progress file so nightly runs only embed
+changed profiles, --full also ignores the skip index.
 """
 
+import argparse
 import json
 import subprocess
 import http.client
@@ -21,12 +25,18 @@ from typing import Dict, Any, List
 from datetime import datetime
 from pathlib import Path
 
+try:
+    from scripts.embedding_skip_index import format_skip_report, open_skip_index, plan_reembedding
+except Exception:
+    from embedding_skip_index import format_skip_report, open_skip_index, plan_reembedding
+
 # Configuration
 EMBED_SVC_URL = "https://hh-embed-svc-production-akcoqbr7sa-uc.a.run.app"
 TENANT_ID = "tenant-alpha"
 BATCH_SIZE = 20  # Process 20 candidates concurrently
 MAX_RETRIES = 3
 TIMEOUT = 30  # seconds per request
+MODEL_VERSION = "enriched-v1"  # skip index key for the default chunk written below
 
 # File paths
 INPUT_FILE = Path("data/enriched/enriched_candidates_full.json")
@@ -58,7 +68,8 @@ def build_searchable_profile(candidate: Dict[str, Any]) -> str:
     inferred_skills_list = inferred_skills_obj.get('highly_probable_skills', [])
     inferred_skill_names = [s.get('skill') for s in inferred_skills_list if s.get('skill')]
 
-    all_skills = list(set(explicit_skill_names + inferred_skill_names))
+    # Ordered de-duplication keeps the text (and its skip-index hash) stable across runs
+    all_skills = list(dict.fromkeys(explicit_skill_names + inferred_skill_names))
     if all_skills:
         parts.append(f"Technical Skills: {', '.join(all_skills[:30])}")
 
@@ -90,11 +101,13 @@ def build_searchable_profile(candidate: Dict[str, Any]) -> str:
 async def reembed_candidate(
     session: aiohttp.ClientSession,
     candidate: Dict[str, Any],
-    token: str
+    token: str,
+    searchable_text: str = None
 ) -> Dict[str, Any]:
     """Re-embed a single candidate"""
     candidate_id = str(candidate.get('candidate_id'))
-    searchable_text = build_searchable_profile(candidate)
+    if searchable_text is None:
+        searchable_text = build_searchable_profile(candidate)
 
     payload = {
         "entityId": candidate_id,
@@ -151,14 +164,27 @@ async def reembed_candidate(
 async def process_batch(
     session: aiohttp.ClientSession,
     batch: List[Dict[str, Any]],
-    token: str
+    token: str,
+    profiles: Dict[str, str] = None
 ) -> List[Dict[str, Any]]:
     """Process a batch of candidates concurrently"""
-    tasks = [reembed_candidate(session, candidate, token) for candidate in batch]
+    profiles = profiles or {}
+    tasks = [
+        reembed_candidate(session, candidate, token, profiles.get(str(candidate.get('candidate_id'))))
+        for candidate in batch
+    ]
     return await asyncio.gather(*tasks)
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-embed all enriched candidates")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the progress file (incremental nightly refresh)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be embedded and exit")
+    parser.add_argument("--full", action="store_true", help="Ignore the skip index")
+    return parser.parse_args()
+
 async def main():
     """Main processing function"""
+    args = parse_args()
     print(f"🚀 Re-embedding Enriched Candidates")
     print(f"{'='*60}\n")
 
@@ -171,7 +197,7 @@ async def main():
 
     # Load progress if exists
     processed_ids = set()
-    if PROGRESS_FILE.exists():
+    if PROGRESS_FILE.exists() and not args.refresh:
         with open(PROGRESS_FILE, 'r') as f:
             progress = json.load(f)
             processed_ids = set(progress.get('processed', []))
@@ -183,10 +209,30 @@ async def main():
         if str(c.get('candidate_id')) not in processed_ids
     ]
 
-    print(f"   Remaining to process: {len(candidates_to_process)}\n")
+    print(f"   Remaining to process: {len(candidates_to_process)}")
+
+    profiles = {str(c.get('candidate_id')): build_searchable_profile(c) for c in candidates_to_process}
+    skip_index = None if args.full else await open_skip_index(MODEL_VERSION, read_only=args.dry_run)
+    if skip_index is not None:
+        plan = await skip_index.plan(profiles)
+    else:
+        plan = plan_reembedding(profiles, {}, MODEL_VERSION)
+    report = plan.report()
+    print(f"   Skip index: {format_skip_report(report)}\n")
+
+    if args.dry_run:
+        print(json.dumps(report, indent=2))
+        if skip_index is not None:
+            await skip_index.close()
+        return
+
+    to_embed = set(plan.changed)
+    candidates_to_process = [c for c in candidates_to_process if str(c.get('candidate_id')) in to_embed]
 
     if not candidates_to_process:
         print("✅ All candidates already processed!")
+        if skip_index is not None:
+            await skip_index.close()
         return
 
     # Get auth token
@@ -207,7 +253,7 @@ async def main():
 
             print(f"🔄 Processing batch {batch_num}/{total_batches} ({len(batch)} candidates)...")
 
-            results = await process_batch(session, batch, token)
+            results = await process_batch(session, batch, token, profiles)
 
             # Count results
             batch_success = sum(1 for r in results if r['status'] == 'success')
@@ -224,6 +270,8 @@ async def main():
             # Update progress
             new_processed_ids = [r['candidate_id'] for r in results if r['status'] == 'success']
             processed_ids.update(new_processed_ids)
+            if skip_index is not None:
+                await skip_index.record(plan.hashes_for(new_processed_ids))
 
             with open(PROGRESS_FILE, 'w') as f:
                 json.dump({
@@ -247,6 +295,9 @@ async def main():
             # Small delay between batches
             await asyncio.sleep(0.5)
 
+    if skip_index is not None:
+        await skip_index.close()
+
     # Final summary
     elapsed = (datetime.now() - start_time).total_seconds()
     print(f"\n{'='*60}")
@@ -255,6 +306,7 @@ async def main():
     print(f"   Total processed: {successful + failed}")
     print(f"   Successful: {successful}")
     print(f"   Failed: {failed}")
+    print(f"   Unchanged (skipped): {report['unchanged']} (~${report['dollars_saved']:.4f} saved)")
     print(f"   Duration: {elapsed/60:.1f} minutes")
     print(f"   Average rate: {(successful + failed) / elapsed:.1f} candidates/second")
 
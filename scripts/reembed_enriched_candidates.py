@@ -5,10 +5,16 @@ Re-embed all enriched candidates with structured profile data.
 This script:
 1. Reads all enriched candidates from Firestore
 2. Builds searchable profiles from enriched fields (not raw resume text)
-3. Calls hh-embed-svc to update embeddings in pgvector
+3. Skips candidates whose profile text hash is unchanged since the last run
+4. Calls hh-embed-svc to update embeddings in pgvector
+
+Usage:
+    python3 scripts/reembed_enriched_candidates.py [--dry-run] [--full]
 """
 
+import argparse
 import asyncio
+import json
 import os
 import subprocess
 import sys
@@ -18,6 +24,13 @@ import aiohttp
 from google.cloud import firestore
 from google.auth import default as get_default_credentials
 
+try:
+    from scripts.embedding_skip_index import format_skip_report, open_skip_index, plan_reembedding
+except Exception:
+    from embedding_skip_index import format_skip_report, open_skip_index, plan_reembedding
+
+MODEL_VERSION = "enriched-v1"
+
 
 def get_auth_token() -> str:
     """Get Google Cloud identity token for authenticating to Cloud Run services"""
@@ -80,7 +93,8 @@ def build_searchable_profile(candidate: Dict[str, Any]) -> str:
     primary_expertise = get_array('primary_expertise')
 
     # Combine all skills
-    all_skills = list(set(explicit_skills + inferred_high + primary_expertise))
+    # Ordered de-duplication keeps the text (and its skip-index hash) stable across runs
+    all_skills = list(dict.fromkeys(explicit_skills + inferred_high + primary_expertise))
     if all_skills:
         parts.append(f"Technical Skills: {', '.join(all_skills[:15])}")
 
@@ -161,12 +175,11 @@ async def reembed_candidate(
     embed_url: str,
     tenant_id: str,
     candidate_id: str,
-    candidate_data: Dict[str, Any],
+    profile_text: str,
     api_key: str
 ) -> bool:
     """Re-embed a single candidate with enriched profile"""
     try:
-        profile_text = build_searchable_profile(candidate_data)
 
         if not profile_text or not profile_text.strip():
             print(f"SKIP {candidate_id}: No searchable profile could be built")
@@ -177,7 +190,7 @@ async def reembed_candidate(
             "text": profile_text,
             "metadata": {
                 "source": "phase2_structured_reembedding",
-                "modelVersion": "enriched-v1",
+                "modelVersion": MODEL_VERSION,
                 "promptVersion": "structured-profile-v1"
             }
         }
@@ -202,8 +215,16 @@ async def reembed_candidate(
         return False
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Re-embed enriched candidates")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be embedded and exit")
+    parser.add_argument("--full", action="store_true", help="Ignore the skip index and re-embed everyone")
+    return parser.parse_args()
+
+
 async def main():
     """Main migration function"""
+    args = parse_args()
     tenant_id = os.getenv("TENANT_ID", "tenant-alpha")
     embed_url = os.getenv("EMBED_SERVICE_URL", "https://hh-embed-svc-production-akcoqbr7sa-uc.a.run.app")
     project_id = os.getenv("GOOGLE_CLOUD_PROJECT", "headhunter-ai-0088")
@@ -236,29 +257,55 @@ async def main():
         print("No enriched candidates found. Nothing to do.")
         return
 
+    profiles = {cid: build_searchable_profile(data) for cid, data in candidates}
+    skip_index = None if args.full else await open_skip_index(MODEL_VERSION, read_only=args.dry_run)
+    if skip_index is not None:
+        plan = await skip_index.plan(profiles)
+    else:
+        plan = plan_reembedding(profiles, {}, MODEL_VERSION)
+    report = plan.report()
+    print(f"Skip index: {format_skip_report(report)}")
+
+    if args.dry_run:
+        print(json.dumps(report, indent=2))
+        if skip_index is not None:
+            await skip_index.close()
+        return
+
+    to_embed = set(plan.changed)
+    candidates = [(cid, data) for cid, data in candidates if cid in to_embed]
+
     # Re-embed in parallel batches
     batch_size = 10
     success_count = 0
     fail_count = 0
 
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(candidates), batch_size):
-            batch = candidates[i:i + batch_size]
-            print(f"\nProcessing batch {i // batch_size + 1}/{(len(candidates) + batch_size - 1) // batch_size}...")
-
-            tasks = [
-                reembed_candidate(session, embed_url, tenant_id, cid, data, api_key_env)
-                for cid, data in batch
-            ]
-            results = await asyncio.gather(*tasks)
-
-            success_count += sum(results)
-            fail_count += len(results) - sum(results)
+    try:
+        async with aiohttp.ClientSession() as session:
+            for i in range(0, len(candidates), batch_size):
+                batch = candidates[i:i + batch_size]
+                print(f"\nProcessing batch {i // batch_size + 1}/{(len(candidates) + batch_size - 1) // batch_size}...")
+
+                tasks = [
+                    reembed_candidate(session, embed_url, tenant_id, cid, profiles[cid], api_key_env)
+                    for cid, _ in batch
+                ]
+                results = await asyncio.gather(*tasks)
+
+                success_count += sum(results)
+                fail_count += len(results) - sum(results)
+
+                if skip_index is not None:
+                    await skip_index.record(plan.hashes_for(cid for (cid, _), ok in zip(batch, results) if ok))
+    finally:
+        if skip_index is not None:
+            await skip_index.close()
 
     print(f"\n{'='*60}")
     print(f"Re-embedding complete!")
     print(f"Success: {success_count}")
     print(f"Failed: {fail_count}")
+    print(f"Unchanged (skipped): {report['unchanged']}")
     print(f"Total: {len(candidates)}")
     print(f"{'='*60}")
 
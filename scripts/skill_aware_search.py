@@ -4,11 +4,14 @@ Skill-Aware Search Ranking Algorithm for Headhunter AI
 Combines vector similarity with skill probability assessment for intelligent candidate ranking
 """
 
-from typing import Dict, List, Any
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from collections import OrderedDict
 import logging
 import json
 
+import numpy as np
+
 from skill_assessment_service import SkillAssessmentService
 from schemas import IntelligentAnalysis
 
@@ -46,10 +49,57 @@ class SearchResult:
     query_analysis: Dict[str, Any]
     search_metadata: Dict[str, Any]
 
+@dataclass
+class CandidateSkillFeatures:
+    """Query-independent skill features cached per candidate analysis"""
+    valid: bool
+    numeric: bool = True
+    skill_codes: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    confidences: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    years_experience: float = 0.0
+    experience_ok: bool = True
+    confidence_analysis: Optional[Dict[str, Any]] = None
+
+
+# Experience level -> (min_years, max_years), shared by scalar and batch scoring
+EXPERIENCE_RANGES = {
+    'entry': (0, 3),
+    'mid': (3, 7),
+    'senior': (7, 12),
+    'executive': (12, 50)
+}
+
+
+def _analysis_fingerprint(analysis: Dict[str, Any]) -> Optional[Tuple]:
+    """Hashable projection of the analysis sections the scorer reads"""
+    parts: List[Any] = []
+    for section in ("explicit_skills", "inferred_skills"):
+        value = analysis.get(section)
+        if isinstance(value, dict):
+            for key in sorted(value):
+                items = value[key]
+                if isinstance(items, list):
+                    parts.append((section, key, tuple(
+                        (item.get("skill"), item.get("confidence")) if isinstance(item, dict) else repr(item)
+                        for item in items
+                    )))
+                else:
+                    parts.append((section, key, repr(items)))
+        else:
+            parts.append((section, repr(value)))
+    parts.append(repr(analysis.get("career_trajectory_analysis")))
+    fingerprint = tuple(parts)
+    try:
+        hash(fingerprint)
+    except TypeError:
+        return None
+    return fingerprint
+
+
 class SkillAwareSearchRanker:
     """Advanced search ranking with skill probability assessment"""
     
-    def __init__(self):
+    def __init__(self, batch_scoring: bool = True, feature_cache_size: int = 50_000):
         self.skill_service = SkillAssessmentService()
         self.weight_config = {
             "skill_match": 0.4,      # 40% - Primary importance
@@ -57,6 +107,12 @@ class SkillAwareSearchRanker:
             "vector_similarity": 0.2, # 20% - Semantic similarity
             "experience_level": 0.15  # 15% - Experience matching
         }
+        self.batch_scoring = batch_scoring
+        self.feature_cache_size = feature_cache_size
+        self._feature_cache: "OrderedDict[Tuple, CandidateSkillFeatures]" = OrderedDict()
+        self._skill_vocab: Dict[str, int] = {}
+        self._skill_names: List[str] = []
+        self._related_cache: Dict[str, np.ndarray] = {}
         
     def parse_search_query(self, query_text: str) -> SearchQuery:
         """Parse natural language search query into structured format"""
@@ -224,15 +280,7 @@ class SkillAwareSearchRanker:
         years_exp = getattr(analysis.career_trajectory_analysis, 'years_experience', 0)
         current_level = getattr(analysis.career_trajectory_analysis, 'current_level', '').lower()
         
-        # Map experience levels to year ranges
-        experience_mapping = {
-            'entry': (0, 3),
-            'mid': (3, 7),
-            'senior': (7, 12),
-            'executive': (12, 50)
-        }
-        
-        target_range = experience_mapping.get(search_query.experience_level, (0, 50))
+        target_range = EXPERIENCE_RANGES.get(search_query.experience_level, (0, 50))
         
         # Calculate score based on experience match
         if target_range[0] <= years_exp <= target_range[1]:
@@ -307,21 +355,40 @@ class SkillAwareSearchRanker:
     
     def rank_candidates(self, candidates: List[Dict[str, Any]], 
                        search_query: SearchQuery,
-                       vector_similarities: List[float] = None) -> SearchResult:
-        """Rank candidates based on skill-aware scoring"""
+                       vector_similarities: List[float] = None,
+                       top_k: Optional[int] = None) -> SearchResult:
+        """Rank candidates based on skill-aware scoring
+        
+        With batch_scoring enabled the scores are identical to score_candidate
+        but computed as array operations over cached per-candidate features.
+        top_k limits the returned candidates (selected with argpartition);
+        search_metadata still covers every scored candidate.
+        """
         
         if vector_similarities is None:
             vector_similarities = [0.0] * len(candidates)
+        vector_sims = [
+            vector_similarities[i] if i < len(vector_similarities) else 0.0
+            for i in range(len(candidates))
+        ]
         
-        # Score all candidates
-        candidate_scores = []
-        for i, candidate in enumerate(candidates):
-            vector_sim = vector_similarities[i] if i < len(vector_similarities) else 0.0
-            score = self.score_candidate(candidate, search_query, vector_sim)
-            candidate_scores.append(score)
-        
-        # Sort by overall score
-        candidate_scores.sort(key=lambda x: x.overall_score, reverse=True)
+        if self.batch_scoring:
+            candidate_scores, average_scores, score_distribution = self._rank_batch(
+                candidates, search_query, vector_sims, top_k
+            )
+        else:
+            # Score all candidates
+            candidate_scores = []
+            for candidate, vector_sim in zip(candidates, vector_sims):
+                score = self.score_candidate(candidate, search_query, vector_sim)
+                candidate_scores.append(score)
+            
+            # Sort by overall score
+            candidate_scores.sort(key=lambda x: x.overall_score, reverse=True)
+            average_scores = self._calculate_average_scores(candidate_scores)
+            score_distribution = self._analyze_score_distribution(candidate_scores)
+            if top_k is not None:
+                candidate_scores = candidate_scores[:max(top_k, 0)]
         
         # Generate query analysis
         query_analysis = {
@@ -338,9 +405,9 @@ class SkillAwareSearchRanker:
         # Generate search metadata
         search_metadata = {
             "total_candidates": len(candidates),
-            "candidates_scored": len(candidate_scores),
-            "average_scores": self._calculate_average_scores(candidate_scores),
-            "score_distribution": self._analyze_score_distribution(candidate_scores)
+            "candidates_scored": len(candidates),
+            "average_scores": average_scores,
+            "score_distribution": score_distribution
         }
         
         return SearchResult(
@@ -349,6 +416,264 @@ class SkillAwareSearchRanker:
             search_metadata=search_metadata
         )
     
+    def get_candidate_features(self, candidate_data: Dict[str, Any]) -> CandidateSkillFeatures:
+        """Return cached skill features, parsing the analysis only when it changed"""
+        candidate_id = candidate_data.get('candidate_id', 'unknown')
+        analysis = candidate_data.get('recruiter_analysis', {})
+        
+        key = None
+        if isinstance(analysis, dict):
+            fingerprint = _analysis_fingerprint(analysis)
+            if fingerprint is not None:
+                key = (candidate_id, fingerprint)
+                cached = self._feature_cache.get(key)
+                if cached is not None:
+                    self._feature_cache.move_to_end(key)
+                    return cached
+        
+        features = self._build_candidate_features(candidate_id, analysis)
+        if key is not None:
+            self._feature_cache[key] = features
+            if len(self._feature_cache) > self.feature_cache_size:
+                self._feature_cache.popitem(last=False)
+        return features
+    
+    def _build_candidate_features(self, candidate_id: str, analysis: Any) -> CandidateSkillFeatures:
+        """Mirror of the parsing done by score_candidate, reduced to arrays"""
+        if isinstance(analysis, dict):
+            try:
+                analysis_obj = IntelligentAnalysis.model_validate(analysis)
+            except Exception as e:
+                logger.warning(f"Failed to parse analysis for {candidate_id}: {e}")
+                return CandidateSkillFeatures(valid=False)
+        else:
+            analysis_obj = analysis
+        
+        skill_profile = self.skill_service.create_skill_search_profile(analysis_obj)
+        skill_scores = skill_profile.get("skill_confidence_scores", {})
+        values = list(skill_scores.values())
+        numeric = all(isinstance(v, (int, float)) for v in values)
+        
+        try:
+            trajectory = analysis_obj.career_trajectory_analysis
+            years_exp = getattr(trajectory, 'years_experience', 0)
+            getattr(trajectory, 'current_level', '').lower()
+            experience_ok = isinstance(years_exp, (int, float))
+        except Exception:
+            years_exp, experience_ok = 0, False
+        
+        return CandidateSkillFeatures(
+            valid=True,
+            numeric=numeric,
+            skill_codes=np.array([self._skill_code(skill) for skill in skill_scores], dtype=np.int64),
+            confidences=np.array(values if numeric else [], dtype=np.float64),
+            years_experience=float(years_exp) if experience_ok else 0.0,
+            experience_ok=experience_ok,
+            confidence_analysis=self._analyze_confidence_distribution(skill_profile) if numeric else None
+        )
+    
+    def _skill_code(self, skill: str) -> int:
+        code = self._skill_vocab.get(skill)
+        if code is None:
+            code = len(self._skill_names)
+            self._skill_vocab[skill] = code
+            self._skill_names.append(skill)
+        return code
+    
+    def _related_mask(self, normalized_skill: str) -> np.ndarray:
+        """Boolean mask over the skill vocabulary of skills related to normalized_skill"""
+        mask = self._related_cache.get(normalized_skill, np.empty(0, dtype=bool))
+        if mask.shape[0] < len(self._skill_names):
+            extra = [
+                self.skill_service._skills_related(normalized_skill, candidate_skill)
+                for candidate_skill in self._skill_names[mask.shape[0]:]
+            ]
+            mask = np.concatenate([mask, np.array(extra, dtype=bool)])
+            self._related_cache[normalized_skill] = mask
+        return mask
+    
+    def _rank_batch(self, candidates: List[Dict[str, Any]],
+                    search_query: SearchQuery,
+                    vector_sims: List[Any],
+                    top_k: Optional[int]) -> Tuple[List[CandidateScore], Dict[str, float], Dict[str, int]]:
+        """Vectorized equivalent of scoring every candidate and sorting
+        
+        Returns the ranked CandidateScores plus the average scores and score
+        distribution over all candidates, computed from the score arrays.
+        """
+        n = len(candidates)
+        if n == 0:
+            return [], {}, {}
+        features = [self.get_candidate_features(candidate) for candidate in candidates]
+        required = search_query.required_skills or []
+        
+        # Candidates whose data would make the scalar scorer raise keep that exact behaviour
+        fallback: Dict[int, CandidateScore] = {}
+        for i, feat in enumerate(features):
+            if feat.valid and (not feat.numeric or (search_query.experience_level and not feat.experience_ok)):
+                fallback[i] = self.score_candidate(candidates[i], search_query, vector_sims[i])
+        
+        lengths = np.array([f.skill_codes.shape[0] if f.numeric else 0 for f in features], dtype=np.int64)
+        codes = np.concatenate([f.skill_codes if f.numeric else f.skill_codes[:0] for f in features])
+        confs = np.concatenate([f.confidences for f in features])
+        rows = np.repeat(np.arange(n), lengths)
+        vsim = np.array(vector_sims, dtype=np.float64)
+        
+        # Per normalized required skill: direct confidence, first related and best related confidence
+        per_skill: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+        for skill in required:
+            normalized = self.skill_service.normalize_skill(skill)
+            if normalized in per_skill:
+                continue
+            direct = np.full(n, np.nan)
+            code = self._skill_vocab.get(normalized)
+            if code is not None:
+                hit = codes == code
+                direct[rows[hit]] = confs[hit]
+            related = self._related_mask(normalized)[codes]
+            related_rows, related_confs = rows[related], confs[related] * 0.7
+            first_related = np.zeros(n)
+            has_related = np.zeros(n, dtype=bool)
+            if related_rows.size:
+                first_rows, first_idx = np.unique(related_rows, return_index=True)
+                first_related[first_rows] = related_confs[first_idx]
+                has_related[first_rows] = True
+            best_related = np.zeros(n)
+            np.maximum.at(best_related, related_rows, related_confs)
+            per_skill[normalized] = (direct, first_related, has_related, best_related)
+        
+        # Skill match (accumulated in query order, like calculate_skill_match_score)
+        if required:
+            total = np.zeros(n)
+            for skill in required:
+                direct, first_related, has_related, _ = per_skill[self.skill_service.normalize_skill(skill)]
+                present = ~np.isnan(direct)
+                total += np.where(present, direct, np.where(has_related, first_related, 0.0))
+            skill_match = (total / (100.0 * len(required))) * 100
+        else:
+            skill_match = np.full(n, 80.0)
+        
+        # Confidence
+        if required:
+            total = np.zeros(n)
+            count = np.zeros(n, dtype=np.int64)
+            for skill in required:
+                direct = per_skill[self.skill_service.normalize_skill(skill)][0]
+                present = ~np.isnan(direct)
+                value = np.where(direct >= search_query.minimum_confidence, direct, direct * 0.5)
+                total += np.where(present, value, 0.0)
+                count += present
+            confidence = np.where(count > 0, total / np.maximum(count, 1), 30.0)
+        else:
+            # Sum each candidate's confidences in profile order, column by column
+            width = int(lengths.max()) if n else 0
+            padded = np.zeros((n, width))
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            padded[rows, np.arange(codes.shape[0]) - np.repeat(offsets, lengths)] = confs
+            total = np.zeros(n)
+            for column in range(width):
+                total += padded[:, column]
+            confidence = np.where(lengths > 0, total / np.maximum(lengths, 1), 50.0)
+        
+        # Experience
+        if search_query.experience_level:
+            low, high = EXPERIENCE_RANGES.get(search_query.experience_level, (0, 50))
+            years = np.array([f.years_experience for f in features])
+            experience = np.where(
+                (years >= low) & (years <= high), 100.0,
+                np.where(years < low,
+                         np.maximum(50.0, 100.0 - ((low - years) * 10)),
+                         np.maximum(70.0, 100.0 - ((years - high) * 5)))
+            )
+        else:
+            experience = np.full(n, 75.0)
+        
+        valid = np.array([f.valid for f in features])
+        overall = np.where(
+            valid,
+            skill_match * self.weight_config["skill_match"] +
+            confidence * self.weight_config["confidence"] +
+            vsim * self.weight_config["vector_similarity"] +
+            experience * self.weight_config["experience_level"],
+            vsim * 0.6
+        )
+        # Component values as reported in CandidateScore (zeros for unparseable analyses)
+        reported = {
+            "skill_match_score": np.where(valid, skill_match, 0.0),
+            "confidence_score": np.where(valid, confidence, 0.0),
+            "experience_match_score": np.where(valid, experience, 0.0),
+        }
+        for i, score in fallback.items():
+            overall[i] = score.overall_score
+            for name, values in reported.items():
+                values[i] = getattr(score, name)
+        
+        breakdown_values = {
+            normalized: np.where(np.isnan(direct), best_related, np.minimum(100.0, direct * 1.1))
+            for normalized, (direct, _, _, best_related) in per_skill.items()
+        }
+        normalized_required = [(skill, self.skill_service.normalize_skill(skill)) for skill in required]
+        
+        def _build(i: int) -> CandidateScore:
+            if i in fallback:
+                return fallback[i]
+            candidate_id = candidates[i].get('candidate_id', 'unknown')
+            if not features[i].valid:
+                return self._create_default_score(candidate_id, vector_sims[i])
+            skill_breakdown = {
+                skill: float(breakdown_values[normalized][i]) for skill, normalized in normalized_required
+            }
+            experience_score = float(experience[i])
+            return CandidateScore(
+                candidate_id=candidate_id,
+                overall_score=float(overall[i]),
+                skill_match_score=float(skill_match[i]),
+                confidence_score=float(confidence[i]),
+                vector_similarity_score=vector_sims[i],
+                experience_match_score=experience_score,
+                skill_breakdown=skill_breakdown,
+                ranking_factors={
+                    "skill_match_details": skill_breakdown,
+                    "confidence_analysis": dict(features[i].confidence_analysis),
+                    "experience_match": experience_score,
+                    "vector_similarity": vector_sims[i],
+                    "weight_config": self.weight_config
+                }
+            )
+        
+        index = np.arange(n)
+        if top_k is not None and top_k < n:
+            # argpartition picks the k best; ties at the cut keep input order like a stable sort
+            if top_k <= 0:
+                order = index[:0]
+            else:
+                kth = overall[np.argpartition(-overall, top_k - 1)[:top_k]].min()
+                selected = np.flatnonzero(overall >= kth)
+                order = selected[np.lexsort((selected, -overall[selected]))][:top_k]
+            # Averages are summed in input order here instead of rank order
+            sum_order = index
+        else:
+            order = np.lexsort((index, -overall))
+            sum_order = order
+        
+        def _mean(values: np.ndarray) -> float:
+            return sum(values[sum_order].tolist()) / n
+        
+        average_scores = {
+            "overall_score": _mean(overall),
+            "skill_match_score": _mean(reported["skill_match_score"]),
+            "confidence_score": _mean(reported["confidence_score"]),
+            "vector_similarity_score": sum(vector_sims[i] for i in sum_order.tolist()) / n,
+            "experience_match_score": _mean(reported["experience_match_score"])
+        }
+        score_distribution = {
+            "excellent_matches": int(np.count_nonzero(overall >= 85)),
+            "good_matches": int(np.count_nonzero((overall >= 70) & (overall < 85))),
+            "fair_matches": int(np.count_nonzero((overall >= 50) & (overall < 70))),
+            "poor_matches": int(np.count_nonzero(overall < 50))
+        }
+        return [_build(i) for i in order.tolist()], average_scores, score_distribution
+    
     def _analyze_search_strategy(self, search_query: SearchQuery) -> Dict[str, str]:
         """Analyze and explain search strategy"""
         strategy = {}
@@ -20,6 +20,15 @@ from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 
+try:
+    from scripts.embedding_skip_index import (
+        SkipPlan, SyncEmbeddingSkipIndex, format_skip_report, plan_reembedding
+    )
+except Exception:
+    from embedding_skip_index import (
+        SkipPlan, SyncEmbeddingSkipIndex, format_skip_report, plan_reembedding
+    )
+
 # Load environment variables
 load_dotenv()
 
@@ -37,6 +46,7 @@ class EmbeddingStats:
     total_candidates: int = 0
     embedded: int = 0
     skipped: int = 0
+    unchanged: int = 0
     failed: int = 0
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
@@ -51,6 +61,7 @@ class GeminiEmbeddingPipeline:
     # Model configuration
     MODEL_NAME = 'models/text-embedding-004'
     EMBEDDING_DIM = 768  # text-embedding-004 produces 768-dim vectors
+    MODEL_VERSION = 'text-embedding-004'  # Stored in sourcing.embeddings and the skip index
 
     def __init__(self, api_key: str = None, db_url: str = None):
         """Initialize pipeline with Gemini API and database connection"""
@@ -118,8 +129,12 @@ class GeminiEmbeddingPipeline:
         else:
             logger.info("Database connection closed")
 
-    def get_candidates_to_embed(self, limit: int = None) -> List[Dict]:
-        """Get candidates with enrichment but without embeddings, including company context"""
+    def get_candidates_to_embed(self, limit: int = None, refresh: bool = False) -> List[Dict]:
+        """Get candidates with enrichment but without embeddings, including company context
+
+        With refresh=True candidates that already have an embedding are included
+        too; the skip index then drops the ones whose text has not changed.
+        """
         conn = self.connect_db()
         cur = conn.cursor()
 
@@ -145,9 +160,10 @@ class GeminiEmbeddingPipeline:
             LEFT JOIN sourcing.embeddings e ON c.id = e.candidate_id
             LEFT JOIN company_context cc ON cc.candidate_id = c.id
             WHERE c.intelligent_analysis IS NOT NULL
-              AND e.id IS NULL
-            ORDER BY c.id
         """
+        if not refresh:
+            query += " AND e.id IS NULL"
+        query += " ORDER BY c.id"
         if limit:
             query += f" LIMIT {limit}"
 
@@ -308,7 +324,7 @@ class GeminiEmbeddingPipeline:
                     SET embedding = EXCLUDED.embedding,
                         model_version = EXCLUDED.model_version,
                         created_at = NOW()
-                """, (candidate_id, vector_str, 'text-embedding-004'))  # Must match MODEL_NAME
+                """, (candidate_id, vector_str, self.MODEL_VERSION))
 
                 conn.commit()
                 return  # Success
@@ -342,7 +358,7 @@ class GeminiEmbeddingPipeline:
                     SET embedding = EXCLUDED.embedding,
                         model_version = EXCLUDED.model_version,
                         created_at = NOW()
-                """, (candidate_id, vector_str, 'text-embedding-004'))  # Must match MODEL_NAME
+                """, (candidate_id, vector_str, self.MODEL_VERSION))
 
                 conn.commit()
                 return True
@@ -357,6 +373,30 @@ class GeminiEmbeddingPipeline:
 
         return False
 
+    def skip_index(self) -> SyncEmbeddingSkipIndex:
+        """Content-hash skip index bound to the current connection"""
+        return SyncEmbeddingSkipIndex(self.connect_db(), self.MODEL_VERSION)
+
+    def plan_skips(self, candidates: List[Dict], use_index: bool = True,
+                   dry_run: bool = False) -> Tuple[List[Dict], SkipPlan]:
+        """Drop candidates whose embedding text hash matches the skip index
+
+        Dry runs never create the index table; without it no hashes are known.
+        """
+        texts = {c['id']: self.build_embedding_text(c) for c in candidates}
+        index = self.skip_index() if use_index else None
+        if index is not None and not dry_run:
+            index.ensure_schema()
+        if index is not None and (not dry_run or index.table_exists()):
+            plan = index.plan(texts)
+        else:
+            plan = plan_reembedding(texts, {}, self.MODEL_VERSION)
+        unchanged = set(plan.unchanged)
+        remaining = [c for c in candidates if str(c['id']) not in unchanged]
+        self.stats.unchanged += len(unchanged)
+        logger.info(f"🧮 Skip index: {format_skip_report(plan.report())}")
+        return remaining, plan
+
     def process_candidate(self, candidate: Dict, max_retries: int = 3) -> Tuple[int, bool, str]:
         """Process a single candidate - generate and save embedding (thread-safe)"""
         candidate_id = candidate['id']
@@ -390,7 +430,8 @@ class GeminiEmbeddingPipeline:
         except Exception as e:
             return (candidate_id, False, str(e))
 
-    def run(self, batch_size: int = 50, delay: float = 0.1, limit: int = None, dry_run: bool = False):
+    def run(self, batch_size: int = 50, delay: float = 0.1, limit: int = None, dry_run: bool = False,
+            refresh: bool = False, use_skip_index: bool = True):
         """
         Run the embedding pipeline
 
@@ -399,14 +440,18 @@ class GeminiEmbeddingPipeline:
             delay: Seconds to wait between API calls
             limit: Maximum number of candidates to process
             dry_run: If True, don't save to database
+            refresh: Also revisit candidates that already have an embedding
+            use_skip_index: Skip candidates whose text hash is unchanged
         """
 
         self.stats = EmbeddingStats()
         self.stats.start_time = datetime.now()
 
         # Get candidates to process
-        candidates = self.get_candidates_to_embed(limit)
+        candidates = self.get_candidates_to_embed(limit, refresh=refresh)
         self.stats.total_candidates = len(candidates)
+        candidates, plan = self.plan_skips(candidates, use_index=use_skip_index, dry_run=dry_run)
+        pending_hashes: Dict[str, str] = {}
 
         if not candidates:
             logger.info("No candidates to embed. All done!")
@@ -431,6 +476,7 @@ class GeminiEmbeddingPipeline:
                 if embedding:
                     if not dry_run:
                         self.save_embedding(candidate['id'], embedding)
+                        pending_hashes.update(plan.hashes_for([candidate['id']]))
                     self.stats.embedded += 1
 
                     # Log sample output at 1, then every 100
@@ -454,6 +500,9 @@ class GeminiEmbeddingPipeline:
                     # Commit batch
                     if not dry_run:
                         self.conn.commit()
+                        if use_skip_index:
+                            self.skip_index().record(pending_hashes)
+                        pending_hashes = {}
 
                 # Rate limiting (Gemini embeddings are fast, minimal delay needed)
                 time.sleep(delay)
@@ -461,6 +510,8 @@ class GeminiEmbeddingPipeline:
             # Final commit
             if not dry_run and self.conn:
                 self.conn.commit()
+                if use_skip_index:
+                    self.skip_index().record(pending_hashes)
 
         except KeyboardInterrupt:
             logger.info("\n⚠️ Interrupted by user. Saving progress...")
@@ -478,6 +529,7 @@ class GeminiEmbeddingPipeline:
             logger.info(f"Total candidates: {self.stats.total_candidates}")
             logger.info(f"Embedded: {self.stats.embedded}")
             logger.info(f"Skipped: {self.stats.skipped}")
+            logger.info(f"Unchanged: {self.stats.unchanged}")
             logger.info(f"Failed: {self.stats.failed}")
             logger.info(f"Duration: {duration:.1f} seconds")
             logger.info(f"Rate: {self.stats.embedded / max(duration, 1) * 60:.1f} per minute")
@@ -487,13 +539,16 @@ class GeminiEmbeddingPipeline:
 
         return self.stats
 
-    def run_parallel(self, workers: int = 8, limit: int = None):
+    def run_parallel(self, workers: int = 8, limit: int = None, refresh: bool = False,
+                     use_skip_index: bool = True):
         """
         Run the embedding pipeline with parallel processing
 
         Args:
             workers: Number of parallel workers (threads)
             limit: Maximum number of candidates to process
+            refresh: Also revisit candidates that already have an embedding
+            use_skip_index: Skip candidates whose text hash is unchanged
         """
 
         self.stats = EmbeddingStats()
@@ -503,8 +558,9 @@ class GeminiEmbeddingPipeline:
         self.init_pool(min_conn=workers, max_conn=workers + 2)
 
         # Get candidates to process
-        candidates = self.get_candidates_to_embed(limit)
+        candidates = self.get_candidates_to_embed(limit, refresh=refresh)
         self.stats.total_candidates = len(candidates)
+        candidates, plan = self.plan_skips(candidates, use_index=use_skip_index)
 
         if not candidates:
             logger.info("No candidates to embed. All done!")
@@ -529,11 +585,13 @@ class GeminiEmbeddingPipeline:
                     }
 
                     # Process batch results
+                    embedded_ids = []
                     for future in as_completed(futures):
                         candidate_id, success, msg = future.result()
                         processed += 1
 
                         if success:
+                            embedded_ids.append(candidate_id)
                             with self._lock:
                                 self.stats.embedded += 1
                         else:
@@ -558,6 +616,9 @@ class GeminiEmbeddingPipeline:
                                        f"Failed: {self.stats.failed} | "
                                        f"Rate: {rate:.0f}/min")
 
+                    if use_skip_index:
+                        self.skip_index().record(plan.hashes_for(embedded_ids))
+
                     # Small delay between batches to respect rate limits
                     if batch_start + batch_size < len(candidates):
                         time.sleep(0.5)
@@ -576,6 +637,7 @@ class GeminiEmbeddingPipeline:
             logger.info(f"Total candidates: {self.stats.total_candidates}")
             logger.info(f"Embedded: {self.stats.embedded}")
             logger.info(f"Skipped: {self.stats.skipped}")
+            logger.info(f"Unchanged: {self.stats.unchanged}")
             logger.info(f"Failed: {self.stats.failed}")
             logger.info(f"Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
             logger.info(f"Rate: {self.stats.embedded / max(duration, 1) * 60:.1f} per minute")
@@ -677,12 +739,16 @@ def main():
     run_parser.add_argument('--delay', type=float, default=0.1, help='Delay between API calls')
     run_parser.add_argument('--limit', type=int, help='Limit number of candidates')
     run_parser.add_argument('--dry-run', action='store_true', help='Run without saving')
+    run_parser.add_argument('--refresh', action='store_true', help='Re-check embedded candidates via the skip index')
+    run_parser.add_argument('--no-skip-index', action='store_true', help='Embed without consulting the skip index')
 
     # Add default options for backwards compatibility
     parser.add_argument('--batch-size', type=int, default=50, help='Candidates per batch')
     parser.add_argument('--delay', type=float, default=0.1, help='Delay between API calls')
     parser.add_argument('--limit', type=int, help='Limit number of candidates')
     parser.add_argument('--dry-run', action='store_true', help='Run without saving')
+    parser.add_argument('--refresh', action='store_true', help='Re-check embedded candidates via the skip index')
+    parser.add_argument('--no-skip-index', action='store_true', help='Embed without consulting the skip index')
     parser.add_argument('--parallel', action='store_true', help='Run with parallel processing')
     parser.add_argument('--workers', type=int, default=8, help='Number of parallel workers (default: 8)')
 
@@ -699,7 +765,9 @@ def main():
             # Parallel mode (explicit --parallel flag required)
             stats = pipeline.run_parallel(
                 workers=args.workers,
-                limit=args.limit
+                limit=args.limit,
+                refresh=args.refresh,
+                use_skip_index=not args.no_skip_index
             )
 
             if stats.failed > stats.embedded:
@@ -710,7 +778,9 @@ def main():
                 batch_size=args.batch_size,
                 delay=args.delay,
                 limit=args.limit,
-                dry_run=args.dry_run
+                dry_run=args.dry_run,
+                refresh=args.refresh,
+                use_skip_index=not args.no_skip_index
             )
 
             if stats.failed > stats.embedded:
@@ -6,20 +6,25 @@ import os
 from collections import Counter
 from typing import Dict, Iterable
 
+try:
+    from scripts.eco_jsonl import is_jsonl_batch, open_jsonl  # type: ignore
+except Exception:  # pragma: no cover
+    from eco_jsonl import is_jsonl_batch, open_jsonl  # type: ignore
+
 
 def iter_jsonl(path: str) -> Iterable[Dict]:
     if os.path.isdir(path):
         for root, _, files in os.walk(path):
             for fn in files:
-                if fn.endswith(".jsonl"):
-                    with open(os.path.join(root, fn), encoding="utf-8") as f:
+                if is_jsonl_batch(fn):
+                    with open_jsonl(os.path.join(root, fn)) as f:
                         for line in f:
                             try:
                                 yield json.loads(line)
                             except Exception:
                                 continue
     else:
-        with open(path, encoding="utf-8") as f:
+        with open_jsonl(path) as f:
             for line in f:
                 try:
                     yield json.loads(line)
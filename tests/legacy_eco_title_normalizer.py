@@ -0,0 +1,68 @@
+"""
+Frozen reference for PT-BR title normalization tests and benchmarks.
+
+``legacy_normalize_title`` is normalize_title as it was before the memoized
+translate-table engine; its output is the byte-identical contract. The corpus
+helpers generate scraped-style titles and Unicode edge cases.
+"""
+import random
+import re
+import unicodedata
+from typing import List
+
+_LEGACY_ABBREVIATIONS = {
+    "sr": "sênior",
+    "pl": "pleno",
+    "jr": "júnior",
+    "eng": "engenheiro",
+    "dev": "desenvolvedor",
+    "arq": "arquiteto",
+    "coord": "coordenador",
+    "anal": "analista",
+}
+_LEGACY_GENDER = re.compile(r"\((a|o|as|os)\)", re.IGNORECASE)
+_LEGACY_PUNCTUATION = re.compile(r"[\.,;:!@#?$%&*+=<>\"'`~^ºª\[\]{}()\/_|\\-]+")
+_LEGACY_WHITESPACE = re.compile(r"\s+")
+
+
+def legacy_normalize_title(text: str) -> str:
+    """normalize_title as it was before the engine; the reference for byte-identical output"""
+    if not text:
+        return ""
+    cleaned = text.strip()
+    cleaned = _LEGACY_GENDER.sub("", cleaned)
+    cleaned = cleaned.lower()
+    cleaned = _LEGACY_PUNCTUATION.sub(" ", cleaned)
+    cleaned = _LEGACY_WHITESPACE.sub(" ", cleaned).strip()
+    tokens = cleaned.split(" ") if cleaned else []
+    expanded = " ".join(_LEGACY_ABBREVIATIONS.get(token, token) for token in tokens if token)
+    normalized = unicodedata.normalize("NFD", expanded)
+    folded = "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn").lower()
+    return _LEGACY_WHITESPACE.sub(" ", folded).strip()
+
+
+_ROLES = ["Desenvolvedor(a)", "Engenheiro(a)", "Analista", "Anal.", "Gerente", "Coordenador(a)", "Coord.",
+          "Cientista", "Arquiteto(a)", "Arq.", "Técnico(a)", "Dev", "Eng."]
+_AREAS = ["Back-end", "Front-End", "de Dados", "de Software", "de Vendas", "Financeiro", "Infraestrutura",
+          "de Produto", "de Qualidade/QA", "de Soluções", "de Manutenção", "Elétrica", "Logística"]
+_LEVELS = ["Sr", "Sr.", "Pl", "Jr", "Júnior", "Sênior", "Pleno", "Especialista", "Líder", "I", "II", "III"]
+_EXTRAS = ["", "", "", " - Remoto", " (Híbrido)", " | São Paulo", " - PJ", "  ", " #vagas"]
+
+# Inputs that exercise the slower Unicode paths and whitespace edge cases
+EDGE_CASES = [
+    "", "   ", "(a)", "SR", "Ａｎａｌｉｓｔａ", "Técnico de Manutenção", "engenheiro\tde\ndados",
+    "Coordenação de Ação Ç", "Ingénieur Système", "İstanbul Müdür", "ǅemal Ǆ", "café́", "é̖",
+    "Ωmega ΑΘΗΝΑ", "Инженер-программист", "エンジニア ガ", "xᴖ5ᴖd́y", "ª ºª", "aͣb",
+    "Desenvolvedor(A)(OS)", "sr.pl/jr", "​dev​", "naïve façade œuvre æ ø å ß",
+]
+
+
+def synthetic_titles(rows: int, unique: int, seed: int = 11) -> List[str]:
+    rng = random.Random(seed)
+    distinct = [
+        f"{rng.choice(_ROLES)} {rng.choice(_AREAS)} {rng.choice(_LEVELS)}{rng.choice(_EXTRAS)} {i % 97 or ''}"
+        for i in range(unique)
+    ]
+    # Skewed repetition: a few titles dominate, like real listings
+    weights = [1.0 / (rank + 1) for rank in range(unique)]
+    return rng.choices(distinct, weights=weights, k=rows)
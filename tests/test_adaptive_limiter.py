@@ -0,0 +1,124 @@
+"""
+Tests for the adaptive (AIMD) concurrency limiter used for Together AI calls
+"""
+
+import asyncio
+
+import pytest
+
+from cloud_run_worker.adaptive_limiter import AdaptiveConcurrencyLimiter
+
+
+def test_window_grows_additively_and_halves_once_per_round_trip():
+    async def _run():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=16)
+        for _ in range(8):
+            async with limiter.slot() as slot:
+                slot.success()
+        grown = limiter._window
+
+        # Three overloads from requests admitted together cut the window once
+        slots = []
+        for _ in range(3):
+            cm = limiter.slot()
+            slots.append((cm, await cm.__aenter__()))
+        for cm, slot in slots:
+            slot.overload()
+            await cm.__aexit__(None, None, None)
+        return grown, limiter.stats()
+
+    grown, stats = asyncio.run(_run())
+    assert 5.5 < grown < 6.0  # +1 per window's worth of successes
+    assert stats["limit"] == 2
+    assert stats["overloads"] == 3 and stats["decreases"] == 1
+
+
+def test_slots_wait_for_room_in_the_window():
+    async def _run():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(10)))
+        return peak
+
+    assert asyncio.run(_run()) == 2
+
+
+def test_backoff_is_jittered_and_honours_retry_after():
+    limiter = AdaptiveConcurrencyLimiter(backoff_base=0.5, backoff_cap=4.0)
+    delays = [limiter.backoff(3) for _ in range(200)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len({round(d, 6) for d in delays}) > 100
+    assert all(limiter.backoff(0, retry_after=2.0) >= 2.0 for _ in range(50))
+
+
+def test_window_tracks_rate_limited_mock_server(monkeypatch):
+    web = pytest.importorskip("aiohttp.web")
+    from cloud_run_worker.config import Config
+    from cloud_run_worker.models import TogetherAIRequest
+    from cloud_run_worker.together_ai_client import TogetherAIClient
+
+    capacity = 6
+    state = {"in_flight": 0, "ok": 0, "rejected": 0, "peak": 0}
+
+    async def completions(_request):
+        # The provider serves at most `capacity` concurrent requests and 429s the rest
+        if state["in_flight"] >= capacity:
+            state["rejected"] += 1
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "0"})
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            state["in_flight"] -= 1
+        state["ok"] += 1
+        return web.json_response({"choices": [{"message": {"content": "{}"}}], "usage": {"total_tokens": 10}})
+
+    async def _run():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", completions)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        monkeypatch.setenv("TOGETHER_AI_BASE_URL", f"http://127.0.0.1:{port}/v1")
+        monkeypatch.setenv("TOGETHER_AI_MAX_RETRIES", "20")
+        monkeypatch.setenv("TOGETHER_AI_INITIAL_CONCURRENCY", "2")
+        monkeypatch.setenv("TOGETHER_AI_MAX_CONCURRENCY", "64")
+        monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+        client = TogetherAIClient(Config(testing=True))
+        client.limiter.backoff_base = 0.005
+        await client.initialize()
+        request = TogetherAIRequest(messages=[{"role": "user", "content": "hi"}], model="test")
+
+        windows = []
+
+        async def caller(n):
+            for _ in range(n):
+                await client._make_api_call(request)
+                windows.append(client.limiter.limit)
+
+        try:
+            await asyncio.gather(*(caller(10) for _ in range(30)))
+        finally:
+            await client.shutdown()
+            await runner.cleanup()
+        return windows, client.limiter.stats()
+
+    windows, stats = asyncio.run(_run())
+    assert state["ok"] == 300
+    # The window climbs past the starting point, then oscillates around the provider's capacity
+    assert max(windows) >= capacity
+    assert sum(windows[-100:]) / 100 <= capacity * 2
+    assert stats["decreases"] >= 1
+    # Most attempts land; a pure fixed window of 30 would be rejected ~80% of the time
+    assert state["rejected"] < state["ok"]
@@ -21,9 +21,9 @@ def stub_normalizer(monkeypatch):
 
     module.EcoTitleNormalizer = _Normalizer
     module.normalize_title = lambda text: text.lower()
-    sys.modules["scripts.eco_title_normalizer"] = module
+    # setitem restores the real module afterwards; popping it would make later imports load a second copy
+    monkeypatch.setitem(sys.modules, "scripts.eco_title_normalizer", module)
     yield
-    sys.modules.pop("scripts.eco_title_normalizer", None)
 
 
 @pytest.fixture(autouse=True)
@@ -35,9 +35,8 @@ def stub_embedding_service(monkeypatch):
             return [[float(len(text))] * 4 for text in texts]
 
     module.EmbeddingService = _EmbeddingService
-    sys.modules["scripts.embedding_service"] = module
+    monkeypatch.setitem(sys.modules, "scripts.embedding_service", module)
     yield
-    sys.modules.pop("scripts.embedding_service", None)
 
 
 @pytest.fixture(autouse=True)
@@ -250,6 +249,126 @@ def test_clustering_engine_category_overrides(monkeypatch):
     assert payload["metrics"]["category_breakdown"]["frontend"]["method"] == "kmeans"
 
 
+def _blobs(count=120, dim=16, centers=4, seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(centers, dim))
+    return (points[rng.integers(0, centers, count)] + rng.normal(scale=0.15, size=(count, dim))).astype("float32")
+
+
+@pytest.mark.parametrize("neighbor_index", ["ball_tree", "knn_graph"])
+def test_scalable_dbscan_matches_exact_cosine_dbscan(neighbor_index):
+    from scripts.job_title_clustering_engine import ClusteringConfig, JobTitleClusteringEngine, _l2_normalize
+
+    embeddings = _blobs()
+    embeddings[1] = embeddings[0]  # duplicate vectors must stay neighbors
+    exact = JobTitleClusteringEngine(ClusteringConfig(eps=0.2, min_samples=4))
+    scalable = JobTitleClusteringEngine(
+        ClusteringConfig(eps=0.2, min_samples=4, backend="scalable", neighbor_index=neighbor_index, knn_neighbors=len(embeddings))
+    )
+    expected, _ = exact._run_dbscan(embeddings)
+    labels, _ = scalable._run_dbscan(_l2_normalize(embeddings))
+    assert len(set(expected)) > 1
+    assert np.array_equal(labels, expected)
+
+
+def test_scalable_backend_clusters_categories_in_processes():
+    from scripts.job_title_clustering_engine import JobTitleClusteringEngine, ClusteringConfig
+
+    embeddings = _blobs(count=80, dim=4, centers=2)
+    store = sys.modules["scripts.pgvector_store"].PgVectorStore()
+    store.upsert_chunks(
+        [
+            {
+                "chunk_id": f"title-{i}",
+                "chunk_type": "job_title",
+                "text": f"{'Desenvolvedor Frontend' if i % 2 else 'Engenheiro Backend'} {i}",
+                "metadata": {"frequency": 1},
+                "embedding": vector.tolist(),
+            }
+            for i, vector in enumerate(embeddings)
+        ]
+    )
+    config = ClusteringConfig(
+        method="kmeans",
+        k_range=(2, 3),
+        backend="scalable",
+        workers=2,
+        silhouette_sample_size=20,
+        category_overrides={"frontend": {"keywords": ["frontend"]}},
+    )
+    payload = JobTitleClusteringEngine(config).run()
+    metrics = payload["metrics"]
+    assert metrics["backend"] == "scalable" and metrics["wall_time_sec"] > 0
+    assert set(metrics["category_breakdown"]) == {"frontend", "default"}
+    for breakdown in metrics["category_breakdown"].values():
+        assert breakdown["cluster_count"] >= 2 and breakdown["silhouette_score"] is not None
+        assert breakdown["wall_time_sec"] >= 0
+
+def _title_chunks(embeddings, start=0):
+    return [
+        {
+            "chunk_id": f"title-{start + i}",
+            "chunk_type": "job_title",
+            "text": f"Titulo {start + i}",
+            "metadata": {"normalized_title": f"titulo {start + i}", "frequency": 1},
+            "embedding": [float(value) for value in vector],
+        }
+        for i, vector in enumerate(embeddings)
+    ]
+
+
+def test_incremental_run_assigns_only_new_titles(tmp_path, monkeypatch):
+    import scripts.job_title_clustering_engine as engine_module
+    from scripts.job_title_clustering_engine import ClusterModel, ClusteringConfig, JobTitleClusteringEngine
+
+    upserts = []
+
+    async def record(entries):
+        upserts.append(list(entries))
+
+    monkeypatch.setattr(engine_module, "clustering_dao", types.SimpleNamespace(bulk_upsert_title_clusters=record))
+    embeddings = _blobs(count=60, dim=8, centers=2)
+    store = sys.modules["scripts.pgvector_store"].PgVectorStore()
+    store.upsert_chunks(_title_chunks(embeddings))
+    config = ClusteringConfig(eps=0.1, min_samples=3, model_path=tmp_path / "clusters.npz")
+
+    payload = JobTitleClusteringEngine(config).run()
+    assert payload["metrics"]["cluster_count"] == 2 and len(upserts[-1]) == 60
+    cluster_of_first = ClusterModel.load(config.model_path).assignments["title-0"]
+
+    near = embeddings[0] * 1.01
+    far = -embeddings[0]
+    store.upsert_chunks(_title_chunks([near, far], start=60))
+    result = JobTitleClusteringEngine(config).run_incremental()
+    assert result["mode"] == "incremental"
+    assert (result["new_titles"], result["assigned"], result["outliers"]) == (2, 1, 1)
+    assert [(entry["normalized_title"], entry["cluster_id"]) for entry in upserts[-1]] == [("titulo 60", cluster_of_first)]
+    assert upserts[-1][0]["metadata"]["assignment"] == "incremental"
+
+    model = ClusterModel.load(config.model_path)
+    assert model.pending == ["title-61"] and model.assignments["title-60"] == cluster_of_first
+    assert model.counts.sum() == 61
+
+    again = JobTitleClusteringEngine(config).run_incremental()
+    assert again["new_titles"] == 0 and again["pending_rebuild"] == 1 and len(upserts) == 2
+
+
+def test_incremental_run_rebuilds_without_a_fresh_model(tmp_path):
+    from scripts.job_title_clustering_engine import ClusterModel, ClusteringConfig, JobTitleClusteringEngine
+
+    store = sys.modules["scripts.pgvector_store"].PgVectorStore()
+    store.upsert_chunks(_title_chunks(_blobs(count=40, dim=8, centers=2)))
+    config = ClusteringConfig(eps=0.1, min_samples=3, model_path=tmp_path / "clusters.npz", rebuild_after_days=7)
+
+    assert JobTitleClusteringEngine(config).run_incremental()["mode"] == "full"
+    model = ClusterModel.load(config.model_path)
+    model.built_at -= 8 * 86400
+    model.pending.append("title-x")
+    model.save(config.model_path)
+
+    assert JobTitleClusteringEngine(config).run_incremental()["mode"] == "full"
+    assert ClusterModel.load(config.model_path).pending == []
+
 def test_career_progression_detector_builds_edges(tmp_path):
     clusters = {
         "clusters": {
@@ -0,0 +1,102 @@
+"""
+Tests for the worker's non-blocking dead-letter publisher
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import Future
+
+from cloud_run_worker.dead_letter import DeadLetterPublisher
+from cloud_run_worker.work_queue import PriorityWorkQueue
+
+
+class _OutagePublisher:
+    """Pub/Sub publisher whose futures never resolve, like a stalled upstream"""
+
+    def __init__(self):
+        self.futures = []
+
+    def publish(self, topic, data, **attributes):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+class _HealthyPublisher:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, topic, data, **attributes):
+        self.messages.append((data, attributes))
+        future = Future()
+        future.set_result(f"msg-{len(self.messages)}")
+        return future
+
+
+def test_dlq_outage_does_not_stall_healthy_messages(tmp_path):
+    spill_path = str(tmp_path / "dlq.jsonl")
+
+    async def _run():
+        dlq = DeadLetterPublisher(
+            _OutagePublisher(), "projects/p/topics/dlq", spill_path, publish_timeout=0.5, max_pending=2000
+        )
+        healthy_done = []
+
+        async def handler(payload):
+            kind, index = payload
+            if kind == "fail":
+                await dlq.publish(json.dumps({"index": index}).encode(), {"candidate_id": f"c{index}"})
+            else:
+                healthy_done.append(index)
+
+        queue = PriorityWorkQueue(handler, workers=10, max_depth=2000)
+        await queue.start()
+        start = time.perf_counter()
+        for i in range(1000):
+            queue.submit(("fail", i))
+            if i % 5 == 0:
+                queue.submit(("ok", i))
+        await queue.stop(drain_timeout=5.0)
+        elapsed = time.perf_counter() - start
+
+        # Every healthy message finished while all 1,000 DLQ publishes were still outstanding
+        assert len(healthy_done) == 200
+        assert dlq.pending == 1000
+        assert elapsed < 0.5
+
+        await dlq.flush(timeout=5.0)
+        return dlq.stats()
+
+    stats = asyncio.run(_run())
+    assert stats == {"pending": 0, "published": 0, "spilled": 1000, "replayed": 0}
+    with open(spill_path, encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 1000
+
+
+def test_spill_is_replayed_on_next_start(tmp_path):
+    spill_path = str(tmp_path / "dlq.jsonl")
+
+    async def _run():
+        # Overflowing max_pending spills immediately instead of queueing more work
+        stalled = DeadLetterPublisher(_OutagePublisher(), "topic", spill_path, publish_timeout=10.0, max_pending=2)
+        for i in range(5):
+            await stalled.publish(f"m{i}".encode(), {"candidate_id": f"c{i}"})
+        assert stalled.stats()["spilled"] == 3
+        # Shutdown spills whatever is still unacknowledged
+        await stalled.flush(timeout=0.01)
+        assert stalled.stats()["spilled"] == 5
+
+        publisher = _HealthyPublisher()
+        restarted = DeadLetterPublisher(publisher, "topic", spill_path)
+        replayed = await restarted.replay_spill()
+        await restarted.flush(timeout=1.0)
+        return replayed, restarted.stats(), publisher.messages
+
+    replayed, stats, messages = asyncio.run(_run())
+    assert replayed == 5
+    assert stats["published"] == 5 and stats["spilled"] == 0
+    assert sorted(data for data, _ in messages) == [f"m{i}".encode() for i in range(5)]
+    assert messages[0][1]["candidate_id"].startswith("c")
+    assert not (tmp_path / "dlq.jsonl").exists()
+    assert not (tmp_path / "dlq.jsonl.replay").exists()
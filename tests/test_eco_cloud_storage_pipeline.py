@@ -0,0 +1,168 @@
+import gzip
+import json
+import logging
+import os
+from collections import defaultdict
+from types import SimpleNamespace
+
+from twisted.internet import defer  # type: ignore
+from twisted.internet.task import Clock  # type: ignore
+
+from scripts.batch_alias_processor import _iter_local_jsonl, aggregate_items
+from scripts.eco_scraper.dedup_store import acquire_store, release_store
+from scripts.eco_scraper.pipelines import CloudStoragePipeline, DedupPipeline
+from scripts.eco_scraper.uploads import BatchUploader, LocalDirectoryBackend
+
+
+class _Stats:
+    def __init__(self):
+        self.values = defaultdict(int)
+
+    def inc_value(self, key, count=1):
+        self.values[key] += count
+
+
+class _ManualThreads:
+    """Stand-in for the upload thread pool: calls run when the test says so."""
+
+    def __init__(self):
+        self.pending = []
+
+    def __call__(self, f, *args):
+        d = defer.Deferred()
+        self.pending.append((d, f, args))
+        return d
+
+    def run_all(self):
+        while self.pending:
+            d, f, args = self.pending.pop(0)
+            try:
+                d.callback(f(*args))
+            except Exception as e:  # noqa: BLE001
+                d.errback(e)
+
+
+def _spider():
+    return SimpleNamespace(name="vagas", logger=logging.getLogger("eco-test"), crawler=SimpleNamespace(stats=_Stats()))
+
+
+def _pipeline(tmp_path, monkeypatch, threads, **kwargs):
+    monkeypatch.setenv("ECO_OUTPUT_DIR", str(tmp_path / "eco_raw" / "20250101" / "vagas"))
+    spider = _spider()
+    pipeline = CloudStoragePipeline(batch_size=2, **kwargs)
+    pipeline.uploader = BatchUploader(
+        LocalDirectoryBackend(str(tmp_path / "gcs"), pipeline.bucket_name),
+        max_in_flight=kwargs.get("max_in_flight", 2),
+        run_in_thread=threads,
+        clock=Clock(),
+        logger=spider.logger,
+        stats=spider.crawler.stats,
+    )
+    pipeline.open_spider(spider)
+    return pipeline, spider
+
+
+def test_batches_are_gzipped_into_fake_bucket(tmp_path, monkeypatch):
+    threads = _ManualThreads()
+    pipeline, spider = _pipeline(tmp_path, monkeypatch, threads)
+    for i in range(3):
+        assert pipeline.process_item({"job_title": f"Analista {i}"}, spider) == {"job_title": f"Analista {i}"}
+    # The flush only queued work; nothing ran on the calling (reactor) thread
+    assert threads.pending and not os.listdir(pipeline._out_dir)
+
+    drained = pipeline.close_spider(spider)
+    threads.run_all()
+    assert drained.called
+
+    uploaded = tmp_path / "gcs" / pipeline.bucket_name / "job_postings" / "20250101" / "vagas"
+    assert sorted(os.listdir(uploaded)) == ["batch_0.jsonl.gz", "batch_1.jsonl.gz"]
+    with gzip.open(uploaded / "batch_0.jsonl.gz", "rt", encoding="utf-8") as f:
+        assert [json.loads(line)["job_title"] for line in f] == ["Analista 0", "Analista 1"]
+    assert spider.crawler.stats.values["eco/cloud_batches_uploaded"] == 2
+
+
+def test_uploaded_batches_feed_alias_aggregation(tmp_path, monkeypatch):
+    threads = _ManualThreads()
+    for compression in ("gzip", "none"):
+        pipeline, spider = _pipeline(tmp_path / compression, monkeypatch, threads, compression=compression)
+        for title in ["Analista de Dados", "Analista de Dados", "Desenvolvedor Backend"]:
+            pipeline.process_item({"job_title": title, "source": "vagas"}, spider)
+        pipeline.close_spider(spider)
+        threads.run_all()
+
+        aggregates = aggregate_items(_iter_local_jsonl(str(tmp_path / compression / "gcs")))
+        assert {norm: agg.total for norm, agg in aggregates.items()} == {
+            "analista de dados": 2,
+            "desenvolvedor backend": 1,
+        }
+
+
+def test_dedup_keys_are_recorded_only_for_uploaded_batches(tmp_path, monkeypatch):
+    threads = _ManualThreads()
+    db = str(tmp_path / "dedup.sqlite3")
+    store = acquire_store(db)
+    pipeline, spider = _pipeline(tmp_path, monkeypatch, threads, store=acquire_store(db))
+    dedup = DedupPipeline(acquire_store(db))
+    failing = {"attempts": 0}
+
+    class FailOnce(LocalDirectoryBackend):
+        def upload(self, file_path, blob_path, *args):
+            if blob_path.endswith("batch_0.jsonl.gz"):
+                failing["attempts"] += 1
+                raise ConnectionError("503 from storage")
+            super().upload(file_path, blob_path, *args)
+
+    pipeline.uploader.backend = FailOnce(str(tmp_path / "gcs"), pipeline.bucket_name)
+    pipeline.uploader.max_retries = 1
+    urls = [f"https://vagas.com.br/v{i}" for i in range(4)]
+    for url in urls:
+        pipeline.process_item(dedup.process_item({"source_url": url, "job_title": "Analista"}, spider), spider)
+    threads.run_all()
+
+    assert failing["attempts"] == 1
+    assert [store.seen("url", url) for url in urls] == [False, False, True, True]
+    dedup.close_spider(spider)
+    pipeline.close_spider(spider)
+    release_store(store)
+
+
+def test_item_flow_waits_when_uploads_are_at_the_cap(tmp_path, monkeypatch):
+    threads = _ManualThreads()
+    pipeline, spider = _pipeline(tmp_path, monkeypatch, threads, max_in_flight=1)
+    pipeline.process_item({"n": 1}, spider)
+    result = pipeline.process_item({"n": 2}, spider)
+
+    assert isinstance(result, defer.Deferred) and not result.called
+    threads.run_all()
+    assert result.called and result.result == {"n": 2}
+    assert spider.crawler.stats.values["eco/upload_backpressure_waits"] == 1
+
+
+def test_failed_upload_retries_on_the_clock_without_sleeping(tmp_path):
+    threads = _ManualThreads()
+    clock = Clock()
+    attempts = []
+
+    class FlakyBackend(LocalDirectoryBackend):
+        def upload(self, *args):
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("503 from storage")
+            super().upload(*args)
+
+    stats = _Stats()
+    uploader = BatchUploader(
+        FlakyBackend(str(tmp_path / "gcs")), max_retries=3, retry_base_delay=2.0,
+        run_in_thread=threads, clock=clock, stats=stats,
+    )
+    uploader.submit(['{"a": 1}'], str(tmp_path / "batch_0.jsonl"), "job_postings/x/batch_0.jsonl")
+    threads.run_all()
+    assert len(attempts) == 1 and uploader.in_flight == 1
+
+    clock.advance(2.0)
+    threads.run_all()
+    clock.advance(4.0)
+    threads.run_all()
+    assert len(attempts) == 3 and uploader.in_flight == 0
+    assert stats.values["eco/cloud_batches_uploaded"] == 1
+    assert (tmp_path / "gcs" / "eco-raw" / "job_postings" / "x" / "batch_0.jsonl.gz").exists()
@@ -0,0 +1,156 @@
+import logging
+from collections import defaultdict
+from types import SimpleNamespace
+
+import pytest
+from scrapy.exceptions import DropItem, IgnoreRequest  # type: ignore
+from scrapy.http import HtmlResponse, Request  # type: ignore
+
+from scripts.eco_scraper.dedup_store import DedupStore, ScalableBloomFilter, acquire_store, release_store
+from scripts.eco_scraper.middlewares import KnownPageStopMiddleware, KnownUrlSkipMiddleware
+from scripts.eco_scraper.pipelines import DedupPipeline
+
+DAY = 86400.0
+
+
+class _Clock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class _Stats:
+    def __init__(self):
+        self.values = defaultdict(int)
+
+    def inc_value(self, key, count=1):
+        self.values[key] += count
+
+
+def _spider():
+    return SimpleNamespace(name="vagas", logger=logging.getLogger("eco-test"), crawler=SimpleNamespace(stats=_Stats()))
+
+
+def test_keys_persist_across_runs(tmp_path):
+    db = str(tmp_path / "dedup.sqlite3")
+    store = DedupStore(db)
+    assert store.check_and_add("url", "https://vagas.com.br/v1") is False
+    assert store.check_and_add("url", "https://vagas.com.br/v1") is True
+    store.close()
+    assert (tmp_path / "dedup.sqlite3.url.bloom").exists()
+
+    reopened = DedupStore(db)
+    assert reopened.seen("url", "https://vagas.com.br/v1")
+    # New keys are answered by the loaded Bloom snapshot, without a disk lookup
+    assert not reopened.seen("url", "https://vagas.com.br/v2")
+    assert reopened.stats["disk_lookups"] == 1
+    assert not reopened.seen("alias", "https://vagas.com.br/v1")
+    reopened.close()
+
+
+def test_keys_expire_after_ttl(tmp_path):
+    clock = _Clock()
+    db = str(tmp_path / "dedup.sqlite3")
+    store = DedupStore(db, ttl_days=30, clock=clock)
+    store.check_and_add("url", "old")
+    clock.now += 20 * DAY
+    store.check_and_add("url", "recent")
+    clock.now += 15 * DAY
+    # Stale keys still in the Bloom filter are rejected by the timestamp check
+    assert not store.seen("url", "old")
+    assert store.seen("url", "recent")
+    store.close()
+
+    store = DedupStore(db, ttl_days=30, clock=clock)
+    assert store.stats["expired"] == 1
+    assert store.check_and_add("url", "old") is False
+    store.close()
+
+
+def test_concurrent_writer_is_detected_despite_stale_bloom(tmp_path):
+    db = str(tmp_path / "dedup.sqlite3")
+    first = DedupStore(db, commit_every=1)
+    second = DedupStore(db, commit_every=1)
+    assert first.check_and_add("url", "shared") is False
+    # ``second`` loaded its filter before ``first`` wrote; the insert itself reports the row
+    assert second.check_and_add("url", "shared") is True
+    first.close()
+    second.close()
+
+
+def test_scalable_bloom_keeps_false_positive_rate(tmp_path):
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"https://example.com/job/{i}")
+    assert len(bloom.slices) > 1
+    assert all(f"https://example.com/job/{i}" in bloom for i in range(5000))
+    false_positives = sum(f"https://example.com/other/{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.01
+
+    path = str(tmp_path / "snapshot.bloom")
+    bloom.save(path, saved_at=1.0)
+    loaded, saved_at = ScalableBloomFilter.load(path)
+    assert saved_at == 1.0 and len(loaded) == len(bloom)
+    assert "https://example.com/job/42" in loaded
+
+
+def test_pipeline_drops_items_from_earlier_runs(tmp_path):
+    db = str(tmp_path / "dedup.sqlite3")
+    spider = _spider()
+    store = acquire_store(db)
+    pipeline = DedupPipeline(store)
+    item = {"source_url": "https://vagas.com.br/v1", "job_title": "Analista"}
+    assert pipeline.process_item(item, spider) == item
+    # Reserved for this run only until its batch is stored
+    with pytest.raises(DropItem):
+        pipeline.process_item(dict(item), spider)
+    assert not store.seen("url", "https://vagas.com.br/v1")
+    assert store.record(["https://vagas.com.br/v1"]) == 1
+    pipeline.close_spider(spider)
+
+    pipeline = DedupPipeline(acquire_store(db))
+    with pytest.raises(DropItem):
+        pipeline.process_item(dict(item), spider)
+    pipeline.close_spider(spider)
+    assert spider.crawler.stats.values["eco/duplicates"] == 2
+
+
+def test_unrecorded_reservations_are_not_persisted(tmp_path):
+    db = str(tmp_path / "dedup.sqlite3")
+    store = DedupStore(db)
+    assert store.reserve("url", "https://vagas.com.br/v1", owner="https://vagas.com.br/v1") is False
+    assert store.reserve("url", "https://vagas.com.br/v1", owner="https://vagas.com.br/v1") is True
+    store.close()
+
+    reopened = DedupStore(db)
+    assert not reopened.seen("url", "https://vagas.com.br/v1")
+    reopened.close()
+
+
+def test_middlewares_skip_known_urls_and_stop_pagination(tmp_path):
+    store = acquire_store(str(tmp_path / "dedup.sqlite3"))
+    store.check_and_add("url", "https://vagas.com.br/v1")
+    store.check_and_add("url", "https://vagas.com.br/v2")
+    spider = _spider()
+
+    downloader = KnownUrlSkipMiddleware(acquire_store(store.path))
+    with pytest.raises(IgnoreRequest):
+        downloader.process_request(Request("https://vagas.com.br/v1"), spider)
+    assert downloader.process_request(Request("https://vagas.com.br/v3"), spider) is None
+    assert downloader.process_request(Request("https://vagas.com.br/v1", meta={"dont_dedup": True}), spider) is None
+
+    pages = KnownPageStopMiddleware(acquire_store(store.path))
+    response = HtmlResponse("https://vagas.com.br/vagas-de-analista?pagina=3", body=b"")
+    next_page = Request("https://vagas.com.br/vagas-de-analista?pagina=4")
+    known = [{"source_url": "https://vagas.com.br/v1"}, {"source_url": "https://vagas.com.br/v2"}, next_page]
+    assert list(pages.process_spider_output(response, iter(known), spider)) == known[:2]
+    mixed = [{"source_url": "https://vagas.com.br/v1"}, {"source_url": "https://vagas.com.br/v9"}, next_page]
+    assert list(pages.process_spider_output(response, iter(mixed), spider)) == mixed
+    assert spider.crawler.stats.values["eco/dedup_skipped_requests"] == 1
+    assert spider.crawler.stats.values["eco/dedup_pagination_stopped"] == 1
+
+    downloader.spider_closed(spider)
+    pages.spider_closed(spider)
+    release_store(store)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+
+import pytest
+
+from cloud_run_eco_service import occupation_index
+from cloud_run_eco_service.occupation_index import OccupationIndex, load_occupation_index, similarity, trigrams
+
+
+def _occupation(eco_id, title, evidence=0, locale='pt-BR', country='BR'):
+    return {
+        'eco_id': eco_id,
+        'display_name': title.title(),
+        'normalized_title': title,
+        'description': None,
+        'evidence_count': evidence,
+        'locale': locale,
+        'country': country,
+    }
+
+
+def _alias(eco_id, alias, confidence=0.75):
+    return {'eco_id': eco_id, 'alias': alias.title(), 'normalized_alias': alias, 'confidence': confidence}
+
+
+OCCUPATIONS = [
+    _occupation('ECO.SE.BACKEND', 'desenvolvedor backend', evidence=50),
+    _occupation('ECO.SE.FRONTEND', 'desenvolvedor frontend', evidence=80),
+    _occupation('ECO.DATA.SCIENTIST', 'cientista de dados', evidence=30),
+    _occupation('ECO.US.BACKEND', 'backend developer', locale='en-US', country='US'),
+]
+ALIASES = [
+    _alias('ECO.SE.BACKEND', 'programador backend'),
+    _alias('ECO.SE.BACKEND', 'engenheiro de software backend'),
+    _alias('ECO.DATA.SCIENTIST', 'data scientist'),
+]
+
+
+def test_trigrams_match_pg_trgm():
+    assert trigrams('word') == {'  w', ' wo', 'wor', 'ord', 'rd '}
+    # pg_trgm documentation example: similarity('word', 'two words') = 0.363636
+    assert similarity(trigrams('word'), trigrams('two words')) == pytest.approx(4 / 11)
+    assert trigrams('front-end') == trigrams('front end')
+    assert similarity(trigrams(''), trigrams('word')) == 0.0
+
+
+def test_search_matches_sql_semantics():
+    index = OccupationIndex(OCCUPATIONS, ALIASES)
+
+    rows = index.search('desenvolvedor', 'pt-BR', 'BR', 10)
+    # Title prefix matches; one row per alias of the matched occupation
+    scores = [row['score'] for row in rows]
+    assert scores == sorted(scores, reverse=True)
+    assert scores[0] == pytest.approx(similarity(trigrams('desenvolvedor backend'), trigrams('desenvolvedor')))
+    assert {row['eco_id'] for row in rows} == {'ECO.SE.BACKEND', 'ECO.SE.FRONTEND'}
+    assert len(rows) == 3
+
+    exact = index.search('cientista de dados', 'pt-BR', 'BR', 1)
+    assert exact[0]['score'] == 1.0
+    assert exact[0]['alias'] == 'Data Scientist'
+
+    by_alias = index.search('data scien', 'pt-BR', 'BR', 5)
+    assert [row['eco_id'] for row in by_alias] == ['ECO.DATA.SCIENTIST']
+    assert by_alias[0]['score'] == pytest.approx(similarity(trigrams('data scientist'), trigrams('data scien')))
+
+    assert index.search('zzzz', 'pt-BR', 'BR', 5) == []
+    assert [row['eco_id'] for row in index.search('backend', 'en-US', 'US', 5)] == ['ECO.US.BACKEND']
+
+
+def test_like_only_mode_and_wildcards():
+    index = OccupationIndex(OCCUPATIONS, ALIASES, supports_trgm=False)
+
+    rows = index.search('desenvolvedor backend', 'pt-BR', 'BR', 5)
+    assert [(row['eco_id'], row['alias'], row['score']) for row in rows] == [('ECO.SE.BACKEND', None, 1.0)]
+    assert index.search('programador', 'pt-BR', 'BR', 5) == []
+    assert index.search('desenvolvedor_%', 'pt-BR', 'BR', 5) is None
+
+
+def test_load_builds_the_index_off_the_event_loop(monkeypatch):
+    class _Conn:
+        async def fetch(self, query):
+            return OCCUPATIONS if 'eco_occupation' in query else ALIASES
+
+    build_threads = []
+
+    class _RecordingIndex(OccupationIndex):
+        def __init__(self, *args, **kwargs):
+            build_threads.append(threading.get_ident())
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(occupation_index, 'OccupationIndex', _RecordingIndex)
+    index = asyncio.run(load_occupation_index(_Conn(), supports_trgm=True))
+
+    assert index.occupation_count == len(OCCUPATIONS)
+    assert index.alias_count == len(ALIASES)
+    assert build_threads and build_threads[0] != threading.get_ident()
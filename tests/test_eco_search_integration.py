@@ -1,5 +1,6 @@
 import json
 import tempfile
+import threading
 from pathlib import Path
 from unittest import mock
 
@@ -196,3 +197,128 @@ async def test_init_resources_handles_missing_trgm(monkeypatch):
     await state.init_resources()
     assert state.supports_trgm is False
     await state.close()
+
+
+class _BatchSearchRedis:
+    def __init__(self):
+        self.data = {}
+        self.mget_calls = 0
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        store = self.data
+
+        class _Pipeline:
+            def __init__(self):
+                self.ops = []
+
+            def setex(self, key, ttl, value):
+                self.ops.append((key, value))
+                return self
+
+            async def execute(self):
+                store.update(self.ops)
+
+        return _Pipeline()
+
+
+class _BatchSearchConnection:
+    def __init__(self, calls):
+        self._calls = calls
+
+    async def fetch(self, query, locale, country, titles, limit):
+        self._calls.append(titles)
+        titles = titles if isinstance(titles, list) else [titles]
+        return [
+            {
+                'query': title,
+                'eco_id': f'ECO-{title}',
+                'display_name': title.title(),
+                'normalized_title': title,
+                'description': None,
+                'evidence_count': 1,
+                'locale': locale,
+                'country': country,
+                'alias': None,
+                'normalized_alias': None,
+                'confidence': None,
+                'score': 1.0,
+            }
+            for title in titles
+        ]
+
+
+class _BatchSearchPool:
+    def __init__(self):
+        self.calls = []
+
+    async def acquire(self):
+        return _BatchSearchConnection(self.calls)
+
+    async def release(self, conn):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_batch_search_uses_single_mget_and_set_based_queries(monkeypatch):
+    async def _noop(*_args, **_kwargs):
+        return None
+
+    pool = _BatchSearchPool()
+    redis_client = _BatchSearchRedis()
+    monkeypatch.setattr(eco_service, 'rate_limit', _noop)
+    monkeypatch.setattr(eco_service.state, 'refresh_dynamic_config', _noop)
+    monkeypatch.setattr(eco_service.state, 'pg_pool', pool)
+    monkeypatch.setattr(eco_service.settings, 'batch_search_chunk_size', 4)
+
+    titles = [f'Analista {i}' for i in range(10)] + ['analista 1 ']
+
+    async def _search():
+        return await eco_service.search_occupations(
+            request=None, q=None, locale='pt-BR', country='BR', limit=5,
+            titles=titles, user=None, redis_client=redis_client,
+        )
+
+    first = await _search()
+    assert not first.errors
+    assert len(first.results) == 11
+    assert first.results['analista 1 '].results[0].occupation.eco_id == 'ECO-analista 1'
+    assert [len(chunk) for chunk in pool.calls] == [4, 4, 2]
+    assert redis_client.mget_calls == 1
+
+    second = await _search()
+    assert all(entry.cache_hit for entry in second.results.values())
+    assert len(pool.calls) == 3
+    assert redis_client.mget_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_index_misses_are_searched_off_the_event_loop(monkeypatch):
+    async def _noop(*_args, **_kwargs):
+        return None
+
+    class _RecordingIndex:
+        def __init__(self):
+            self.threads = set()
+
+        def search(self, normalized, locale, country, limit):
+            self.threads.add(threading.get_ident())
+            return []
+
+    index = _RecordingIndex()
+    monkeypatch.setattr(eco_service, 'rate_limit', _noop)
+    monkeypatch.setattr(eco_service.state, 'refresh_dynamic_config', _noop)
+    monkeypatch.setattr(eco_service.state, 'occupation_index', index)
+
+    response = await eco_service.search_occupations(
+        request=None, q=None, locale='pt-BR', country='BR', limit=5,
+        titles=[f'Analista {i}' for i in range(5)], user=None, redis_client=_BatchSearchRedis(),
+    )
+
+    assert not response.errors and len(response.results) == 5
+    # One executor call scores every miss, on a thread other than the event loop's
+    assert len(index.threads) == 1
+    assert threading.get_ident() not in index.threads
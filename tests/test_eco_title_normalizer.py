@@ -1,6 +1,16 @@
+import importlib
+
 import pytest
 
-from scripts.eco_title_normalizer import EcoTitleNormalizer, normalize_title, normalize_title_ptbr
+from scripts import eco_title_normalizer
+from scripts.eco_title_normalizer import (
+    EcoTitleNormalizer,
+    fold_diacritics,
+    normalize_many,
+    normalize_title,
+    normalize_title_ptbr,
+)
+from tests.legacy_eco_title_normalizer import EDGE_CASES, legacy_normalize_title, synthetic_titles
 
 
 @pytest.mark.parametrize(
@@ -31,3 +41,37 @@ def test_normalizer_handles_empty_inputs():
     assert normalize_title("") == ""
     assert normalize_title(None) == ""  # type: ignore[arg-type]
     assert normalizer.normalize("   ") == ""
+
+
+def test_output_is_byte_identical_to_legacy_normalizer():
+    titles = list(dict.fromkeys(synthetic_titles(5000, 2000))) + EDGE_CASES
+    titles += [chr(cp) + "x" + chr(cp) for cp in range(0x80, 0x3000)]
+    for title in titles:
+        assert normalize_title(title).encode("utf-8") == legacy_normalize_title(title).encode("utf-8"), title
+
+
+def test_fold_diacritics():
+    assert fold_diacritics("Técnico de Manutenção") == "Tecnico de Manutencao"
+    assert fold_diacritics("Инженер ё") == "Инженер е"
+    assert fold_diacritics("") == ""
+
+
+def test_normalize_many_keeps_order_and_memoizes():
+    normalize_title.cache_clear()
+    titles = ["Dev Jr Backend", "Arq. de Soluções", "Dev Jr Backend", ""]
+    assert normalize_many(titles) == ["desenvolvedor junior backend", "arquiteto de solucoes",
+                                      "desenvolvedor junior backend", ""]
+    assert EcoTitleNormalizer().normalize_many(titles) == normalize_many(titles)
+
+    normalize_title("Dev Jr Backend")
+    normalize_title("Dev Jr Backend")
+    info = normalize_title.cache_info()
+    assert info.hits == 1 and info.maxsize == eco_title_normalizer.CACHE_SIZE
+
+
+def test_normalize_many_process_pool(monkeypatch):
+    # Workers unpickle _normalize_chunk by module name, so use whatever module sys.modules holds now
+    engine = importlib.import_module("scripts.eco_title_normalizer")
+    monkeypatch.setattr(engine, "PARALLEL_MIN_TITLES", 0)
+    titles = synthetic_titles(300, 120)
+    assert engine.normalize_many(titles, workers=2, chunksize=25) == [legacy_normalize_title(t) for t in titles]
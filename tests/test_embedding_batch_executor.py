@@ -0,0 +1,144 @@
+"""
+Tests for the pipelined embedding batch executor.
+"""
+
+import asyncio
+from typing import List
+
+import numpy as np
+import pytest
+
+from scripts.embedding_service import (
+    AdaptiveTokenBucket,
+    DeterministicEmbeddingProvider,
+    EmbeddingService,
+    PipelinedBatchExecutor,
+    ProviderRateLimitError,
+    TogetherAIEmbeddingProvider,
+    pack_batches,
+)
+
+
+class _SlowProvider(DeterministicEmbeddingProvider):
+    """Deterministic provider with latency, concurrency tracking and scripted throttling."""
+
+    def __init__(self, latency: float = 0.01, throttle_first: int = 0, retry_after: float = 0.0):
+        self.latency = latency
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls: List[List[str]] = []
+
+    async def generate_embeddings_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.throttle_first > 0:
+            self.throttle_first -= 1
+            raise ProviderRateLimitError("429", retry_after=self.retry_after)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Later batches finish first to prove ordering is restored
+            await asyncio.sleep(self.latency / len(self.calls))
+            return await super().generate_embeddings_batch(texts)
+        finally:
+            self.in_flight -= 1
+
+
+def test_pack_batches_by_tokens_and_items():
+    texts = ["a" * 40, "b" * 40, "c" * 40, "d", "e", "f"]
+    # 11 tokens each for the long texts, 1 token each for the short ones
+    assert pack_batches(texts, max_tokens=22, max_items=10) == [[0, 1], [2, 3, 4, 5]]
+    assert pack_batches(texts, max_tokens=1000, max_items=4) == [[0, 1, 2, 3], [4, 5]]
+    assert pack_batches(["x" * 400], max_tokens=10, max_items=4) == [[0]]
+
+
+def test_deterministic_batch_matches_single_embedding():
+    provider = DeterministicEmbeddingProvider()
+    texts = ["Senior Python engineer", "Gerente de vendas", ""]
+    batch = asyncio.run(provider.generate_embeddings_batch(texts))
+    for text, vector in zip(texts, batch):
+        single = asyncio.run(provider.generate_embedding(text))
+        np.testing.assert_allclose(vector, single, rtol=1e-12)
+
+
+def test_executor_keeps_order_and_bounds_concurrency():
+    provider = _SlowProvider(latency=0.02)
+    executor = PipelinedBatchExecutor(provider, max_in_flight=3, max_items_per_request=4)
+    texts = [f"text {i}" for i in range(40)]
+
+    streamed = []
+
+    async def _consume():
+        async for indices, embeddings in executor.stream(texts):
+            streamed.append(indices)
+        return await executor.run(texts)
+
+    results = asyncio.run(_consume())
+
+    assert [i for chunk in streamed for i in chunk] == list(range(40))
+    assert 1 < provider.max_in_flight <= 3
+    expected = asyncio.run(DeterministicEmbeddingProvider().generate_embeddings_batch(texts))
+    np.testing.assert_allclose(results, expected)
+
+
+def test_executor_retries_throttled_requests_with_retry_after():
+    provider = _SlowProvider(latency=0.0, throttle_first=2, retry_after=0.01)
+    executor = PipelinedBatchExecutor(
+        provider, max_in_flight=1, max_items_per_request=5, tokens_per_second=10_000
+    )
+
+    results = asyncio.run(executor.run([f"t{i}" for i in range(5)]))
+
+    assert len(results) == 5
+    assert executor.stats["throttled"] == 2
+    assert executor.stats["retries"] == 2
+    assert executor.limiter.rate < executor.limiter.max_rate
+
+
+def test_executor_gives_up_after_max_retries():
+    provider = _SlowProvider(latency=0.0, throttle_first=10, retry_after=0.0)
+    executor = PipelinedBatchExecutor(provider, max_retries=1, base_backoff_seconds=0.0)
+
+    with pytest.raises(ProviderRateLimitError):
+        asyncio.run(executor.run(["a"]))
+
+
+def test_token_bucket_throttle_halves_rate_and_recovers():
+    bucket = AdaptiveTokenBucket(tokens_per_second=100)
+    bucket.on_throttle()
+    assert bucket.rate == 50
+    bucket.on_success()
+    assert bucket.rate == 55
+
+
+def test_service_streams_chunks_in_input_order():
+    service = EmbeddingService(provider="deterministic", enable_cache=False, max_in_flight=2)
+    texts = [f"candidate {i}" for i in range(25)]
+
+    async def _collect():
+        chunks = []
+        async for chunk in service.iter_embeddings_batch(texts, batch_size=10):
+            chunks.append([result.text for result in chunk])
+        return chunks
+
+    chunks = asyncio.run(_collect())
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [text for chunk in chunks for text in chunk] == texts
+    stats = asyncio.run(service.get_stats())
+    assert stats["batching"]["requests"] == 3
+
+
+def test_together_ai_provider_needs_opt_in_for_live_calls(monkeypatch):
+    """An API key alone keeps the stub; live HTTP needs TOGETHER_EMBEDDINGS_LIVE."""
+    monkeypatch.setenv("TOGETHER_API_KEY", "test-key")
+    monkeypatch.delenv("TOGETHER_EMBEDDINGS_LIVE", raising=False)
+    # Nothing listens on the base URL, so a live call would fail
+    provider = TogetherAIEmbeddingProvider(base_url="http://127.0.0.1:9")
+    assert provider.live is False
+    batch = asyncio.run(provider.generate_embeddings_batch(["Senior Python developer"]))
+    assert batch == [asyncio.run(provider.generate_embedding("Senior Python developer"))]
+
+    monkeypatch.setenv("TOGETHER_EMBEDDINGS_LIVE", "1")
+    assert TogetherAIEmbeddingProvider().live is True
@@ -0,0 +1,136 @@
+"""
+Tests for the two-tier embedding cache used by EmbeddingService.
+"""
+
+import asyncio
+from typing import Dict, Sequence
+
+import numpy as np
+import pytest
+
+from scripts.embedding_service import (
+    EmbeddingCache,
+    EmbeddingCacheBackend,
+    EmbeddingService,
+    LocalEmbeddingLRU,
+)
+
+
+class _FakeBackend(EmbeddingCacheBackend):
+    """In-memory shared tier that counts round trips."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.store: Dict[str, np.ndarray] = {}
+        self.get_calls = 0
+        self.set_calls = 0
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        self.get_calls += 1
+        return {key: self.store[key] for key in keys if key in self.store}
+
+    async def set_many(self, entries):
+        self.set_calls += 1
+        for key, data in entries.items():
+            self.store[key] = np.asarray(data["embedding"], dtype=np.float32)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestLocalEmbeddingLRU:
+    def test_evicts_least_recently_used_by_entries(self):
+        lru = LocalEmbeddingLRU(max_entries=2)
+        lru.put("a", [1.0])
+        lru.put("b", [2.0])
+        assert lru.get("a") is not None
+        lru.put("c", [3.0])
+
+        assert lru.get("b") is None
+        assert lru.get("a") is not None
+        assert lru.evictions == 1
+
+    def test_byte_accounting_bounds_memory(self):
+        vector = np.zeros(768, dtype=np.float32)
+        lru = LocalEmbeddingLRU(max_bytes=vector.nbytes * 3)
+        for i in range(5):
+            lru.put(str(i), vector)
+
+        assert len(lru) == 3
+        assert lru.current_bytes == vector.nbytes * 3
+        assert lru.get("0") is None
+        assert lru.get("4").dtype == np.float32
+
+    def test_entries_expire(self):
+        lru = LocalEmbeddingLRU(ttl_seconds=0)
+        lru.put("a", [1.0])
+        assert lru.get("a") is None
+        assert lru.current_bytes == 0
+
+
+class TestEmbeddingCache:
+    def test_local_tier_absorbs_repeat_lookups(self):
+        backend = _FakeBackend()
+        cache = EmbeddingCache(backend=backend)
+
+        _run(cache.set_many(["a", "b"], "p", "m", [[0.5, 0.25], [1.0, 2.0]]))
+        first = _run(cache.get_many(["a", "b", "c"], "p", "m"))
+
+        assert first == [[0.5, 0.25], [1.0, 2.0], None]
+        assert backend.set_calls == 1
+        assert backend.get_calls == 1  # only the miss "c" went to the shared tier
+        stats = cache.get_stats()
+        assert stats["local_hits"] == 2
+        assert stats["misses"] == 1
+
+    def test_shared_tier_fills_local_tier(self):
+        backend = _FakeBackend()
+        writer = EmbeddingCache(backend=backend)
+        _run(writer.set_many(["a"], "p", "m", [[0.5, 0.25]]))
+
+        reader = EmbeddingCache(backend=backend)
+        assert _run(reader.get("a", "p", "m")) == [0.5, 0.25]
+        assert _run(reader.get("a", "p", "m")) == [0.5, 0.25]
+
+        stats = reader.get_stats()
+        assert stats["backend_hits"] == 1
+        assert stats["local_hits"] == 1
+        assert stats["backend_round_trips"] == 1
+
+    def test_backend_failures_degrade_to_misses(self):
+        class _Broken(_FakeBackend):
+            async def get_many(self, keys):
+                raise RuntimeError("unavailable")
+
+        cache = EmbeddingCache(backend=_Broken())
+        assert _run(cache.get("a", "p", "m")) is None
+        assert cache.get_stats()["backend_errors"] == 1
+
+
+class TestServiceCacheIntegration:
+    def test_rerun_of_unchanged_texts_costs_few_round_trips(self):
+        backend = _FakeBackend()
+        service = EmbeddingService(provider="deterministic", enable_cache=False)
+        service.cache = EmbeddingCache(backend=backend)
+        texts = [f"candidate profile {i}" for i in range(250)]
+
+        first = _run(service.generate_embeddings_batch(texts))
+        assert first.cache_hits == 0
+        assert backend.get_calls == 1
+
+        fresh = EmbeddingService(provider="deterministic", enable_cache=False)
+        fresh.cache = EmbeddingCache(backend=backend)
+        backend.get_calls = backend.set_calls = 0
+        second = _run(fresh.generate_embeddings_batch(texts))
+
+        assert second.cache_hits == len(texts)
+        assert backend.get_calls == 1
+        assert backend.set_calls == 0
+        assert [r.text for r in second.results] == texts
+        np.testing.assert_allclose(second.results[7].vector, first.results[7].vector, rtol=1e-6)
+
+        stats = _run(fresh.get_stats())
+        assert stats["cache"]["backend_hits"] == len(texts)
+        assert stats["cache"]["hit_rate"] == pytest.approx(1.0)
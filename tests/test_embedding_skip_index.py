@@ -0,0 +1,186 @@
+"""
+Tests for the content-hash skip index used by the re-embedding pipelines.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from scripts.embedding_skip_index import (
+    ASYNC_LOOKUP_SQL,
+    EmbeddingSkipIndex,
+    SyncEmbeddingSkipIndex,
+    embedding_text_hash,
+    normalize_embedding_text,
+    plan_reembedding,
+)
+
+
+class _FakeIndexTable:
+    """Minimal stand-in for the embedding_text_hashes table."""
+
+    def __init__(self):
+        self.rows = {}
+        self.lookups = 0
+        self.created = False
+
+    def lookup(self, model_version, ids):
+        self.lookups += 1
+        return [(cid, self.rows[(cid, model_version)]) for cid in ids if (cid, model_version) in self.rows]
+
+    def upsert(self, model_version, ids, hashes):
+        for cid, digest in zip(ids, hashes):
+            self.rows[(cid, model_version)] = digest
+
+
+class _FakeAsyncConnection:
+    def __init__(self, table):
+        self.table = table
+
+    async def execute(self, query, *args):
+        if "CREATE TABLE" in query:
+            self.table.created = True
+        elif "INSERT INTO" in query:
+            self.table.upsert(*args)
+
+    async def fetchval(self, query, *args):
+        assert "to_regclass" in query
+        return self.table.created
+
+    async def fetch(self, query, *args):
+        assert query == ASYNC_LOOKUP_SQL
+        return [{"candidate_id": cid, "text_hash": digest} for cid, digest in self.table.lookup(*args)]
+
+
+class _FakePool:
+    def __init__(self, table):
+        self.table = table
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield _FakeAsyncConnection(self.table)
+
+
+class _FakeCursor:
+    def __init__(self, table):
+        self.table = table
+        self._rows = []
+        self._row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        if "to_regclass" in query:
+            self._row = (self.table.created,)
+        elif "CREATE TABLE" in query:
+            self.table.created = True
+        elif "INSERT INTO" in query and params:
+            self.table.upsert(*params)
+        elif "SELECT" in query:
+            self._rows = self.table.lookup(*params)
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._row
+
+
+class _FakeDbApiConnection:
+    def __init__(self, table):
+        self.table = table
+        self.commits = 0
+
+    def cursor(self):
+        return _FakeCursor(self.table)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_normalization_ignores_cosmetic_whitespace():
+    assert normalize_embedding_text("  Senior\tPython \n\n engineer ") == "Senior Python engineer"
+    assert embedding_text_hash("Senior  Python") == embedding_text_hash("Senior Python\n")
+    assert embedding_text_hash("Senior Python") != embedding_text_hash("Senior Go")
+
+
+def test_plan_splits_changed_unchanged_and_empty():
+    existing = {"1": embedding_text_hash("same profile")}
+    plan = plan_reembedding(
+        {1: "same  profile", 2: "new profile", 3: "   "}, existing, "enriched-v1"
+    )
+
+    assert plan.unchanged == ["1"]
+    assert plan.changed == ["2"]
+    assert plan.empty == ["3"]
+    assert set(plan.hashes) == {"2"}
+
+    report = plan.report(cost_per_1k_tokens=1.0)
+    assert report["calls_saved"] == 1
+    assert report["tokens_saved"] == plan.tokens_saved > 0
+    assert report["dollars_saved"] == pytest.approx(plan.tokens_saved / 1000)
+
+
+def test_async_index_skips_candidates_after_recording():
+    table = _FakeIndexTable()
+    index = EmbeddingSkipIndex("enriched-v1", pool=_FakePool(table))
+    texts = {f"c{i}": f"profile {i}" for i in range(5)}
+
+    async def _run():
+        first = await index.plan(texts)
+        await index.record(first.hashes_for(first.changed[:3]))
+        texts["c0"] = "profile 0 with a new skill"
+        return first, await index.plan(texts)
+
+    first, second = asyncio.run(_run())
+
+    assert len(first.changed) == 5
+    assert second.unchanged == ["c1", "c2"]
+    assert second.changed == ["c0", "c3", "c4"]
+    assert table.lookups == 2
+
+
+def test_model_version_is_part_of_the_key():
+    table = _FakeIndexTable()
+    conn = _FakeDbApiConnection(table)
+    old_model = SyncEmbeddingSkipIndex(conn, "text-embedding-004")
+    new_model = SyncEmbeddingSkipIndex(conn, "text-embedding-005")
+
+    plan = old_model.plan({101: "profile"})
+    old_model.record(plan.hashes)
+
+    assert old_model.plan({101: "profile"}).unchanged == ["101"]
+    assert new_model.plan({101: "profile"}).changed == ["101"]
+    assert conn.commits == 1
+
+
+def test_table_exists_is_checked_without_ddl():
+    table = _FakeIndexTable()
+    conn = _FakeDbApiConnection(table)
+    index = SyncEmbeddingSkipIndex(conn, "text-embedding-004")
+
+    assert index.table_exists() is False
+    assert conn.commits == 0
+    index.ensure_schema()
+    assert index.table_exists() is True
+
+
+def test_read_only_async_index_treats_missing_table_as_empty():
+    table = _FakeIndexTable()
+    table.rows[("1", "enriched-v1")] = embedding_text_hash("profile")
+
+    async def _run():
+        index = await EmbeddingSkipIndex("enriched-v1", pool=_FakePool(table), read_only=True).connect()
+        return index, await index.plan({1: "profile"})
+
+    index, plan = asyncio.run(_run())
+    assert not table.created
+    assert not index.table_exists
+    assert plan.changed == ["1"] and table.lookups == 0
+    with pytest.raises(RuntimeError):
+        asyncio.run(index.record(plan.hashes))
@@ -0,0 +1,63 @@
+"""
+Tests for the worker's Firestore read/write micro-batching
+"""
+
+import asyncio
+
+from cloud_run_worker.firestore_batcher import FirestoreBatcher
+from scripts.benchmark_firestore_batcher import InMemoryFirestore
+
+
+def _db(count=5):
+    db = InMemoryFirestore()
+    db.docs.update({f"c{i}": {"name": f"Candidate {i}", "status": "pending"} for i in range(count)})
+    return db
+
+
+def test_concurrent_reads_share_one_get_all():
+    db = _db()
+    batcher = FirestoreBatcher(db, "candidates", max_batch=50, window_ms=5)
+
+    async def _run():
+        return await asyncio.gather(*(batcher.get(doc_id) for doc_id in ["c0", "c1", "c1", "missing"]))
+
+    results = asyncio.run(_run())
+
+    assert db.rpcs == 1
+    assert results[0] == {"name": "Candidate 0", "status": "pending"}
+    assert results[1] == results[2] and results[1] is not results[2]
+    assert results[3] is None
+
+
+def test_batch_size_triggers_flush_before_window():
+    db = _db(10)
+    batcher = FirestoreBatcher(db, "candidates", max_batch=4, window_ms=10_000)
+
+    async def _run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.update(f"c{i}", {"status": "enriched"}) for i in range(8))),
+            timeout=1.0,
+        )
+
+    assert asyncio.run(_run()) == [True] * 8
+    assert batcher.stats()["write_batches"] == 2
+    assert [db.docs[f"c{i}"]["status"] for i in range(10)] == ["enriched"] * 8 + ["pending"] * 2
+
+
+def test_failed_batch_reports_per_item_results():
+    db = _db(3)
+    batcher = FirestoreBatcher(db, "candidates", window_ms=1)
+
+    async def _run():
+        return await asyncio.gather(
+            batcher.update("c0", {"status": "enriched"}),
+            batcher.update("ghost", {"status": "enriched"}),
+            batcher.update("c0", {"overall_score": 0.9}),
+            batcher.update("c2", {"status": "enriched"}),
+        )
+
+    assert asyncio.run(_run()) == [True, False, True, True]
+    assert db.docs["c0"] == {"name": "Candidate 0", "status": "enriched", "overall_score": 0.9}
+    assert db.docs["c2"]["status"] == "enriched"
+    # One atomic commit that failed, then individual updates for the 3 distinct documents
+    assert db.rpcs == 4
@@ -0,0 +1,111 @@
+"""
+Tests for the Together AI response cache and in-flight coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from cloud_run_worker.llm_cache import CompletionCache, SQLiteResponseCache, prompt_cache_key
+
+
+def _result(tokens=1200):
+    return {"enriched": {"overall_score": 0.8}, "usage": {"total_tokens": tokens}}
+
+
+def test_cache_key_covers_model_prompt_version_and_params():
+    base = prompt_cache_key("model-a", "v1", "prompt", {"temperature": 0.1})
+    assert base == prompt_cache_key("model-a", "v1", "prompt", {"temperature": 0.1})
+    assert base != prompt_cache_key("model-b", "v1", "prompt", {"temperature": 0.1})
+    assert base != prompt_cache_key("model-a", "v2", "prompt", {"temperature": 0.1})
+    assert base != prompt_cache_key("model-a", "v1", "prompt ", {"temperature": 0.1})
+    assert base != prompt_cache_key("model-a", "v1", "prompt", {"temperature": 0.2})
+
+
+def test_concurrent_identical_prompts_share_one_call(tmp_path):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return _result()
+
+    async def _run():
+        cache = CompletionCache(SQLiteResponseCache(str(tmp_path / "llm.sqlite3")))
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        # A later identical prompt is served from the store
+        again = await cache.get_or_compute("k", compute)
+        await cache.close()
+        return results, again, cache.stats()
+
+    results, again, stats = asyncio.run(_run())
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ["coalesced"] * 4 + ["computed"]
+    assert again == (_result(), "cache")
+    assert stats["tokens_saved"] == 5 * 1200
+    assert stats["hit_rate"] == pytest.approx(5 / 6)
+
+
+def test_sqlite_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+
+    async def _run():
+        first = SQLiteResponseCache(path)
+        await first.set("k", _result())
+        await first.close()
+        second = SQLiteResponseCache(path)
+        value = await second.get("k")
+        missing = await second.get("other")
+        await second.close()
+        return value, missing
+
+    assert asyncio.run(_run()) == (_result(), None)
+
+
+def test_failures_reach_every_waiter_and_are_not_cached():
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("HTTP 500")
+
+    async def succeeding():
+        return _result()
+
+    async def _run():
+        cache = CompletionCache(None)
+        outcomes = await asyncio.gather(
+            cache.get_or_compute("k", failing), cache.get_or_compute("k", failing), return_exceptions=True
+        )
+        retry = await cache.get_or_compute("k", succeeding)
+        return outcomes, retry
+
+    outcomes, retry = asyncio.run(_run())
+    assert len(attempts) == 1
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert retry[1] == "computed"
+
+
+def test_cancelled_leader_hands_the_call_to_a_waiter():
+    attempts = []
+
+    async def compute():
+        attempts.append(1)
+        await asyncio.sleep(0.02)
+        return _result()
+
+    async def _run():
+        cache = CompletionCache(None)
+        leader = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get_or_compute("k", compute)) for _ in range(2)]
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        outcomes = await asyncio.gather(*waiters)
+        return leader, outcomes
+
+    leader, outcomes = asyncio.run(_run())
+    assert leader.cancelled()
+    assert len(attempts) == 2
+    assert sorted(source for _, source in outcomes) == ["coalesced", "computed"]
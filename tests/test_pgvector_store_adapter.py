@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the synchronous PgVectorStoreAdapter used by the ECO title pipelines.
+"""
+import threading
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+
+from scripts import pgvector_store_adapter
+from scripts.pgvector_store_adapter import PgVectorStoreAdapter
+
+
+class _FakeConnection:
+    async def fetch(self, query, *args):
+        return [{"candidate_id": "title_1"}, {"candidate_id": "title_2"}]
+
+
+class _FakeStore:
+    instances = []
+
+    def __init__(self):
+        self.batches = []
+        self.closed = False
+        self.loop_threads = set()
+        _FakeStore.instances.append(self)
+
+    @asynccontextmanager
+    async def get_connection(self):
+        self.loop_threads.add(threading.current_thread().name)
+        yield _FakeConnection()
+
+    async def batch_store_embeddings(self, records, batch_size=100, use_copy=False):
+        self.loop_threads.add(threading.current_thread().name)
+        self.batches.append((records, batch_size, use_copy))
+        return [f"uuid-{i}" for i in range(len(records))]
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def adapter(monkeypatch):
+    _FakeStore.instances = []
+
+    async def _create_store(connection_string=None, pool_size=10):
+        return _FakeStore()
+
+    monkeypatch.setattr(pgvector_store_adapter, "create_pgvector_store", _create_store)
+    instance = PgVectorStoreAdapter()
+    yield instance
+    instance.close()
+
+
+def _payload(chunk_id):
+    return {
+        "chunk_id": chunk_id,
+        "chunk_type": "job_title",
+        "text": chunk_id.replace("_", " "),
+        "embedding": np.random.rand(768).tolist(),
+    }
+
+
+def test_store_is_created_once_and_reused(adapter):
+    assert adapter.list_chunk_ids() == ["title_1", "title_2"]
+    adapter.upsert_chunks([_payload("title_3")])
+    assert adapter.list_chunk_ids() == ["title_1", "title_2"]
+
+    assert len(_FakeStore.instances) == 1
+    assert _FakeStore.instances[0].loop_threads == {"pgvector-adapter-loop"}
+
+
+def test_upsert_chunks_is_a_single_batched_copy(adapter):
+    adapter.upsert_chunks([_payload("title_a"), _payload("title_b"), {"chunk_id": "missing"}])
+
+    (records, _, use_copy), = _FakeStore.instances[0].batches
+    assert use_copy is True
+    assert [record.candidate_id for record in records] == ["title_a", "title_b"]
+    assert records[0].metadata == {"text": "title a", "chunk_id": "title_a"}
+
+
+def test_close_releases_store_and_thread(adapter):
+    adapter.list_chunk_ids()
+    thread = adapter._thread
+
+    adapter.close()
+
+    assert _FakeStore.instances[0].closed is True
+    assert not thread.is_alive()
+    # The adapter transparently restarts after close
+    assert adapter.list_chunk_ids() == ["title_1", "title_2"]
+    assert len(_FakeStore.instances) == 2
+
+
+def test_exit_hook_is_registered_once_per_running_loop(adapter, monkeypatch):
+    hooks = []
+    monkeypatch.setattr(pgvector_store_adapter.atexit, "register", hooks.append)
+    monkeypatch.setattr(pgvector_store_adapter.atexit, "unregister", hooks.remove)
+
+    for _ in range(3):
+        adapter.list_chunk_ids()
+        adapter.list_chunk_ids()
+        assert hooks == [adapter.close]
+        adapter.close()
+        assert hooks == []
@@ -353,19 +353,21 @@ class TestRetryLogicAndErrorHandling:
         with pytest.raises(Exception, match="Permanent failure"):
             await processor.retry_with_backoff(always_failing_function, max_retries=2)
 
-    def test_dead_letter_queue_handling(self, sample_pubsub_message):
+    @pytest.mark.asyncio
+    async def test_dead_letter_queue_handling(self, sample_pubsub_message):
         """Test sending failed messages to dead letter queue"""
         handler = PubSubHandler()
         
-        with patch.object(handler, 'dead_letter_publisher') as mock_publisher:
-            handler.send_to_dead_letter_queue(
+        with patch.object(handler, 'dead_letter') as mock_dead_letter:
+            mock_dead_letter.publish = AsyncMock()
+            await handler.send_to_dead_letter_queue(
                 sample_pubsub_message, 
                 "Processing failed after max retries"
             )
             
-            mock_publisher.publish.assert_called_once()
+            mock_dead_letter.publish.assert_awaited_once()
             # Verify message includes error details
-            published_data = mock_publisher.publish.call_args[1]['data']
+            published_data = mock_dead_letter.publish.call_args[0][0]
             error_info = json.loads(published_data)
             assert "error" in error_info
             assert "original_message" in error_info
@@ -404,19 +406,20 @@ class TestHealthChecksAndMetrics:
             mock_metrics.increment_counter.assert_called()
             mock_metrics.record_processing_time.assert_called()
 
-    def test_processing_status_tracking(self):
+    @pytest.mark.asyncio
+    async def test_processing_status_tracking(self):
         """Test tracking of processing status and progress"""
         processor = CandidateProcessor()
         
         # Start processing
-        processor.update_processing_status("test_123", ProcessingStatus.IN_PROGRESS)
-        status = processor.get_processing_status("test_123")
+        await processor.update_processing_status("test_123", ProcessingStatus.IN_PROGRESS)
+        status = await processor.get_processing_status("test_123")
         
         assert status == ProcessingStatus.IN_PROGRESS
         
         # Complete processing
-        processor.update_processing_status("test_123", ProcessingStatus.COMPLETED)
-        status = processor.get_processing_status("test_123")
+        await processor.update_processing_status("test_123", ProcessingStatus.COMPLETED)
+        status = await processor.get_processing_status("test_123")
         
         assert status == ProcessingStatus.COMPLETED
 
@@ -0,0 +1,114 @@
+"""
+Tests for the worker's pull-subscription consumer
+"""
+
+import asyncio
+import base64
+import json
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from cloud_run_worker.pull_consumer import PullConsumer, message_to_envelope
+
+
+class _FakeMessage:
+    def __init__(self, index, release):
+        self.data = json.dumps({"candidate_id": f"cand_{index}"}).encode()
+        self.attributes = {"priority": "low"}
+        self.message_id = f"msg_{index}"
+        self.publish_time = None
+        self.result = None
+        self._release = release
+
+    def ack(self):
+        self._settle("ack")
+
+    def nack(self):
+        self._settle("nack")
+
+    def _settle(self, result):
+        assert self.result is None
+        self.result = result
+        self._release()
+
+
+class _FakeSubscriber:
+    """Delivers messages from a thread, honouring flow control like the client library"""
+
+    def __init__(self, count):
+        self.count = count
+        self.messages = []
+        self.cancelled = threading.Event()
+
+    def subscribe(self, subscription, callback, flow_control):
+        slots = threading.Semaphore(flow_control.max_messages)
+        future = Future()
+        future.cancel = lambda: self.cancelled.set() or future.set_result(None)
+
+        def deliver():
+            for i in range(self.count):
+                while not slots.acquire(timeout=0.05):
+                    if self.cancelled.is_set():
+                        return
+                message = _FakeMessage(i, slots.release)
+                self.messages.append(message)
+                callback(message)
+
+        threading.Thread(target=deliver, daemon=True).start()
+        return future
+
+
+def test_holds_concurrency_and_acks_every_settled_message():
+    subscriber = _FakeSubscriber(count=60)
+    state = {"running": 0, "peak": 0}
+
+    async def handler(envelope):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        candidate = json.loads(base64.b64decode(envelope["message"]["data"]))["candidate_id"]
+        return SimpleNamespace(status="failed" if candidate.endswith("7") else "completed")
+
+    consumer = PullConsumer(subscriber, "projects/p/subscriptions/s", handler, max_messages=8, idle_timeout=0.2)
+    stats = asyncio.run(consumer.run())
+
+    assert stats["received"] == stats["acked"] == 60
+    assert state["peak"] == stats["peak_in_flight"] == 8
+    assert stats["outcomes"] == {"completed": 54, "failed": 6}
+    assert all(m.result == "ack" for m in subscriber.messages)
+    assert subscriber.cancelled.is_set()
+
+
+def test_handler_errors_are_nacked_and_stop_drains_in_flight_work():
+    subscriber = _FakeSubscriber(count=1000)
+    consumer = None
+
+    async def handler(envelope):
+        await asyncio.sleep(0.01)
+        if envelope["message"]["messageId"] == "msg_3":
+            raise RuntimeError("Firestore unavailable")
+        if consumer.received >= 20:
+            consumer.stop()
+        return SimpleNamespace(status="completed")
+
+    consumer = PullConsumer(subscriber, "projects/p/subscriptions/s", handler, max_messages=4)
+    stats = asyncio.run(consumer.run())
+
+    assert stats["in_flight"] == 0
+    assert stats["outcomes"]["error"] == 1
+    # Every delivered message was settled before the stream closed
+    assert all(m.result in ("ack", "nack") for m in subscriber.messages)
+    assert subscriber.messages[3].result == "nack"
+    # Deliveries after stop() are handed straight back without running
+    assert stats["received"] < 30
+
+
+def test_envelope_matches_push_delivery_format():
+    message = _FakeMessage(5, lambda: None)
+    envelope = message_to_envelope(message, "sub")["message"]
+    assert json.loads(base64.b64decode(envelope["data"])) == {"candidate_id": "cand_5"}
+    assert envelope["messageId"] == "msg_5"
+    assert envelope["attributes"] == {"priority": "low"}
+    assert "publishTime" not in envelope
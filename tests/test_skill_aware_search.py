@@ -0,0 +1,116 @@
+"""
+Parity tests for batch scoring in SkillAwareSearchRanker.rank_candidates.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from skill_aware_search import SkillAwareSearchRanker  # noqa: E402
+
+SKILLS = [
+    "Python", "py", "Django", "FastAPI", "JavaScript", "node.js", "React", "AWS", "cloud architecture",
+    "Kubernetes", "k8s", "Docker", "SQL", "Machine Learning", "team lead", "Leadership", "Mentoring",
+    "Project Management", "Communication", "Go",
+]
+QUERIES = [
+    "Senior Python developer with AWS and Kubernetes",
+    "Expert machine learning engineer, team lead",
+    "junior react javascript developer",
+    "director of engineering",
+    "data analyst",
+]
+
+
+def _items(rng, count):
+    return [
+        {"skill": rng.choice(SKILLS), "confidence": rng.choice([40, 55, 69.5, 70, 80, 85, 90, 100])}
+        for _ in range(count)
+    ]
+
+
+def _candidate(rng, i):
+    analysis = {
+        "explicit_skills": {
+            "technical_skills": _items(rng, rng.randint(0, 6)),
+            "tools_technologies": _items(rng, rng.randint(0, 3)),
+            "soft_skills": _items(rng, rng.randint(0, 2)),
+            "certifications": [],
+            "languages": [],
+        },
+        "inferred_skills": {
+            "highly_probable_skills": _items(rng, rng.randint(0, 3)),
+            "probable_skills": _items(rng, rng.randint(0, 3)),
+        },
+    }
+    if rng.random() < 0.8:
+        analysis["career_trajectory_analysis"] = {
+            "current_level": rng.choice(["Junior", "Mid", "Senior", "Director"]),
+            "years_experience": rng.choice([0, 1.5, 3, 6, 7.25, 11, 15, 30]),
+        }
+    if i % 17 == 0:
+        # Out-of-range confidence fails validation -> default score path
+        analysis["explicit_skills"]["technical_skills"].append({"skill": "Python", "confidence": 150})
+    return {"candidate_id": f"cand_{i}", "recruiter_analysis": analysis}
+
+
+def _dataset(seed=3, count=250):
+    rng = random.Random(seed)
+    candidates = [_candidate(rng, i) for i in range(count)]
+    # Exact duplicates produce score ties that must keep input order
+    candidates += [dict(candidates[5], candidate_id="dup_a"), dict(candidates[5], candidate_id="dup_b")]
+    similarities = [round(rng.random(), 3) for _ in candidates]
+    similarities[-3:] = [similarities[5]] * 3
+    return candidates, similarities
+
+
+@pytest.mark.parametrize("query_text", QUERIES)
+def test_batch_scoring_matches_scalar_scorer(query_text):
+    candidates, similarities = _dataset()
+    scalar = SkillAwareSearchRanker(batch_scoring=False)
+    batch = SkillAwareSearchRanker()
+    query = scalar.parse_search_query(query_text)
+
+    expected = scalar.rank_candidates(candidates, query, similarities)
+    for _ in range(2):  # second pass is served from the feature cache
+        actual = batch.rank_candidates(candidates, query, similarities)
+        assert actual.candidates == expected.candidates
+        assert actual.search_metadata == expected.search_metadata
+        assert actual.query_analysis == expected.query_analysis
+
+
+def test_top_k_returns_prefix_of_full_ranking():
+    candidates, similarities = _dataset(seed=9)
+    ranker = SkillAwareSearchRanker()
+    query = ranker.parse_search_query("Senior Python developer with AWS")
+
+    full = ranker.rank_candidates(candidates, query, similarities)
+    top = ranker.rank_candidates(candidates, query, similarities, top_k=20)
+
+    assert top.candidates == full.candidates[:20]
+    assert top.search_metadata["candidates_scored"] == len(candidates)
+    assert top.search_metadata["score_distribution"] == full.search_metadata["score_distribution"]
+    assert top.search_metadata["average_scores"] == pytest.approx(full.search_metadata["average_scores"])
+
+
+def test_unscorable_candidates_raise_like_scalar_path():
+    candidate = {
+        "candidate_id": "broken",
+        "recruiter_analysis": {
+            "explicit_skills": {
+                "technical_skills": [{"skill": "Python", "confidence": 90}],
+                "tools_technologies": [], "soft_skills": [], "certifications": [], "languages": [],
+            },
+            "inferred_skills": {"highly_probable_skills": [], "probable_skills": []},
+            "career_trajectory_analysis": {"current_level": None, "years_experience": 5},
+        },
+    }
+    query = SkillAwareSearchRanker().parse_search_query("senior python")
+
+    for ranker in (SkillAwareSearchRanker(batch_scoring=False), SkillAwareSearchRanker()):
+        with pytest.raises(AttributeError):
+            ranker.rank_candidates([candidate], query, [0.5])
@@ -0,0 +1,189 @@
+"""
+Tests for streamed Together AI completions and incremental JSON validation
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from cloud_run_worker.streaming_json import IncrementalJSONValidator, StreamValidationError
+
+SCHEMA = {"resume_analysis": "object", "recruiter_insights": "object", "overall_score": None}
+
+VALID = json.dumps({
+    "resume_analysis": {"technical_skills": ["Python", "Go"], "note": "uses \"quotes\" and {braces}"},
+    "recruiter_insights": {"strengths": ["ownership"]},
+    "overall_score": 0.82,
+})
+
+
+def _feed_in_chunks(validator, text, size=7):
+    for i in range(0, len(text), size):
+        validator.feed(text[i:i + size])
+
+
+def test_valid_object_completes_across_chunks():
+    validator = IncrementalJSONValidator(SCHEMA)
+    _feed_in_chunks(validator, "```json\n" + VALID + "\n```")
+    assert validator.complete and not validator.trailing_content
+    assert validator.seen_keys == set(SCHEMA)
+
+
+@pytest.mark.parametrize("text, message", [
+    ("Sure! Here is the analysis", "does not start"),
+    ('{"explicit_skills": {"technical_skills": [', "Unexpected field"),
+    ('{"resume_analysis": ["Python"', "should be a object"),
+    ('{"resume_analysis": {}, "overall_score": 0.5}', "Missing required field"),
+    ('{"resume_analysis": {"a": [1, 2}', "Mismatched"),
+])
+def test_malformed_or_off_schema_output_fails_early(text, message):
+    validator = IncrementalJSONValidator(SCHEMA)
+    with pytest.raises(StreamValidationError, match=message):
+        _feed_in_chunks(validator, text + " " * 10 + "x" * 500)
+    # Rejected well before the padding was consumed
+    assert len(validator.text) <= len(text) + 7
+
+
+def test_trailing_chatter_is_flagged_not_fatal():
+    validator = IncrementalJSONValidator(SCHEMA)
+    validator.feed(VALID + "\nLet me know if you need more detail.")
+    assert validator.complete and validator.trailing_content
+
+
+def _sse(content_chunks, usage=None):
+    events = [{"choices": [{"delta": {"content": chunk}}]} for chunk in content_chunks]
+    events.append({"choices": [{"delta": {}, "finish_reason": "stop"}], "usage": usage or {"total_tokens": 321}})
+    return [f"data: {json.dumps(event)}\n\n".encode() for event in events] + [b"data: [DONE]\n\n"]
+
+
+def _run_against_server(monkeypatch, handler, streaming=True, max_retries=0):
+    web = pytest.importorskip("aiohttp.web")
+    from cloud_run_worker.config import Config
+    from cloud_run_worker.metrics import MetricsCollector
+    from cloud_run_worker.together_ai_client import TogetherAIClient
+
+    async def _run():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        monkeypatch.setenv("TOGETHER_AI_BASE_URL", f"http://127.0.0.1:{port}/v1")
+        monkeypatch.setenv("TOGETHER_AI_MAX_RETRIES", str(max_retries))
+        monkeypatch.setenv("TOGETHER_AI_STREAMING", "true" if streaming else "false")
+        monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+        config = Config(testing=True)
+        client = TogetherAIClient(config)
+        client.metrics = MetricsCollector(config)
+        await client.initialize()
+        try:
+            result = await client.enrich_candidate({"name": "Ana", "resume_text": "Python engineer"})
+            return result, None, client.metrics
+        except Exception as e:
+            return None, e, client.metrics
+        finally:
+            await client.shutdown()
+            await runner.cleanup()
+
+    return asyncio.run(_run())
+
+
+def test_streamed_completion_is_parsed_and_timed(monkeypatch):
+    web = pytest.importorskip("aiohttp.web")
+
+    async def handler(request):
+        body = await request.json()
+        assert body["stream"] is True
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for event in _sse([VALID[i:i + 20] for i in range(0, len(VALID), 20)]):
+            await response.write(event)
+        return response
+
+    result, error, metrics = _run_against_server(monkeypatch, handler)
+    assert error is None
+    assert result["overall_score"] == 0.82
+    assert result["token_usage"] == {"total_tokens": 321}
+    assert metrics.stage_latencies["together_ai_time_to_first_byte"].count == 1
+    assert metrics.stage_latencies["together_ai_time_to_valid_json"].count == 1
+
+
+def test_off_schema_stream_is_aborted_early(monkeypatch):
+    web = pytest.importorskip("aiohttp.web")
+    sent = {"events": 0}
+
+    async def handler(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        chunks = ['{"explicit_skills": {"technical_skills": ['] + ['"Java", '] * 400
+        try:
+            for event in _sse(chunks):
+                await response.write(event)
+                sent["events"] += 1
+                await asyncio.sleep(0.001)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        return response
+
+    result, error, _ = _run_against_server(monkeypatch, handler)
+    assert result is None
+    assert "Unexpected field: explicit_skills" in str(error)
+    assert sent["events"] < 100
+
+
+def test_falls_back_to_regular_request_when_streaming_fails(monkeypatch):
+    web = pytest.importorskip("aiohttp.web")
+    modes = []
+
+    async def handler(request):
+        body = await request.json()
+        modes.append(body["stream"])
+        if body["stream"]:
+            return web.json_response({"error": "streaming not supported"}, status=400)
+        return web.json_response({"choices": [{"message": {"content": VALID}}], "usage": {"total_tokens": 50}})
+
+    result, error, _ = _run_against_server(monkeypatch, handler)
+    assert error is None
+    assert modes == [True, False]
+    assert result["recruiter_insights"] == {"strengths": ["ownership"]}
+
+
+def test_overloaded_stream_backs_off_instead_of_falling_back(monkeypatch):
+    web = pytest.importorskip("aiohttp.web")
+    modes = []
+
+    async def handler(request):
+        body = await request.json()
+        modes.append(body["stream"])
+        if len(modes) < 3:
+            return web.json_response({"error": "busy"}, status=429 if len(modes) == 1 else 503,
+                                     headers={"Retry-After": "0"})
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for event in _sse([VALID]):
+            await response.write(event)
+        return response
+
+    result, error, _ = _run_against_server(monkeypatch, handler, max_retries=2)
+    assert error is None
+    # Retried as a stream after backoff; never switched to a regular request
+    assert modes == [True, True, True]
+    assert result["overall_score"] == 0.82
+
+
+def test_overload_after_max_retries_is_not_retried_without_streaming(monkeypatch):
+    web = pytest.importorskip("aiohttp.web")
+    modes = []
+
+    async def handler(request):
+        modes.append((await request.json())["stream"])
+        return web.json_response({"error": "busy"}, status=429)
+
+    result, error, _ = _run_against_server(monkeypatch, handler)
+    assert result is None
+    assert "HTTP 429" in str(error)
+    assert modes == [True]
@@ -0,0 +1,90 @@
+"""
+Tests for the worker's latency histograms and Prometheus exposition
+"""
+
+import random
+import time
+
+from cloud_run_worker.config import Config
+from cloud_run_worker.latency_histogram import LatencyHistogram
+from cloud_run_worker.metrics import MetricsCollector
+
+
+def test_histogram_quantiles_within_bucket_error():
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(0.5, 1.0) for _ in range(20_000)]
+    hist = LatencyHistogram()
+    for value in samples:
+        hist.record(value)
+
+    ordered = sorted(samples)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * len(ordered)) - 1]
+        assert abs(hist.quantile(q) - exact) / exact < 0.06
+
+    snapshot = hist.snapshot()
+    assert snapshot["count"] == 20_000
+    assert snapshot["max"] == max(samples)
+    assert abs(snapshot["mean"] - sum(samples) / len(samples)) < 1e-9
+    # Memory is the bucket array, independent of how many samples were recorded
+    assert len(hist._counts) < 400
+
+
+def test_histogram_clamps_out_of_range_values():
+    hist = LatencyHistogram(min_value=0.01, max_value=10.0)
+    for value in (0.0, 0.001, 50.0):
+        hist.record(value)
+    assert hist.quantile(0.0) == 0.0
+    assert hist.quantile(1.0) == 50.0
+    assert LatencyHistogram().quantile(0.5) == 0.0
+
+
+def test_minute_buckets_do_not_collide_across_hours(monkeypatch):
+    collector = MetricsCollector(Config(testing=True))
+    now = [collector.last_minute_bucket * 60.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    collector.record_request_start("a")
+    # Same minute-of-hour, one hour later: the old bucket must not be reused
+    now[0] += 3600
+    collector.record_request_start("b")
+    assert list(collector.requests_per_minute)[-1] == 1
+    assert sum(collector.requests_per_minute) == 1
+
+
+def test_prometheus_exposition_includes_stage_summaries():
+    collector = MetricsCollector(Config(testing=True))
+    timings = {}
+    with collector.time_stage("together_ai", timings):
+        pass
+    collector.record_stage_time("firestore_read", 0.02)
+    collector.record_processing_time(1.5)
+    collector.increment_messages_processed()
+    collector.record_request_error("req", "boom", error_type='bad "json"')
+
+    text = collector.render_prometheus()
+
+    assert "together_ai" in timings
+    assert "# TYPE headhunter_worker_processing_seconds summary" in text
+    assert 'headhunter_worker_processing_seconds{quantile="0.99"}' in text
+    assert "headhunter_worker_processing_seconds_count 1" in text
+    assert 'headhunter_worker_stage_seconds_count{stage="firestore_read"} 1' in text
+    assert 'headhunter_worker_stage_seconds_count{stage="together_ai"} 1' in text
+    assert 'headhunter_worker_errors_by_type_total{error_type="bad \\"json\\""} 1' in text
+    assert "headhunter_worker_messages_processed_total 2" in text
+    assert text.endswith("\n")
+
+
+def test_llm_cache_counters_feed_prometheus():
+    collector = MetricsCollector(Config(testing=True))
+    collector.record_llm_completion("computed", {"total_tokens": 1000})
+    collector.record_llm_completion("cache", {"total_tokens": 1000})
+    collector.record_llm_completion("coalesced", {"total_tokens": 900})
+
+    stats = collector.get_llm_cache_stats()
+    assert stats["hit_rate"] == 2 / 3
+    assert stats["tokens_used"] == 1000 and stats["tokens_saved"] == 1900
+
+    text = collector.render_prometheus()
+    assert 'headhunter_worker_llm_completions_total{source="cache"} 1' in text
+    assert "headhunter_worker_llm_tokens_saved_total 1900" in text
@@ -0,0 +1,82 @@
+"""
+Tests for the Cloud Run worker's bounded priority work queue
+"""
+
+import asyncio
+
+import pytest
+
+from cloud_run_worker.work_queue import PriorityWorkQueue, WorkQueueFull
+
+
+def test_rejects_when_full_and_after_stop():
+    async def _run():
+        release = asyncio.Event()
+
+        async def handler(_payload):
+            await release.wait()
+
+        queue = PriorityWorkQueue(handler, workers=1, max_depth=2)
+        await queue.start()
+        queue.submit("a")
+        await asyncio.sleep(0)  # worker picks up "a"
+        queue.submit("b")
+        queue.submit("c")
+        with pytest.raises(WorkQueueFull):
+            queue.submit("d")
+
+        stats = queue.stats()
+        assert stats["in_flight"] == 1
+        assert stats["depth"] == 2
+        assert stats["rejected"] == 1
+
+        release.set()
+        await queue.stop(drain_timeout=1.0)
+        assert queue.completed == 3
+        with pytest.raises(WorkQueueFull):
+            queue.submit("e")
+
+    asyncio.run(_run())
+
+
+def test_weighted_lanes_prefer_high_priority_without_starvation():
+    async def _run():
+        order = []
+
+        async def handler(payload):
+            order.append(payload)
+
+        queue = PriorityWorkQueue(handler, workers=1, max_depth=100, lane_weights={"high": 2, "normal": 1, "low": 1})
+        await queue.start()
+        # Enqueue synchronously so the worker sees every lane populated
+        for i in range(4):
+            queue.submit(f"low{i}", "low")
+            queue.submit(f"normal{i}", "normal")
+            queue.submit(f"high{i}", "urgent")
+        await queue.stop(drain_timeout=1.0)
+        return order
+
+    order = asyncio.run(_run())
+    assert order[:4] == ["high0", "high1", "normal0", "low0"]
+    assert order[4:8] == ["high2", "high3", "normal1", "low1"]
+    # Once the high lane is empty the remaining lanes share the schedule
+    assert order[8:] == ["normal2", "low2", "normal3", "low3"]
+
+
+def test_handler_errors_do_not_kill_workers():
+    async def _run():
+        async def handler(payload):
+            if payload == "bad":
+                raise RuntimeError("boom")
+
+        queue = PriorityWorkQueue(handler, workers=2, max_depth=10)
+        await queue.start()
+        for payload in ("bad", "ok", "bad", "ok"):
+            queue.submit(payload)
+        await queue.stop(drain_timeout=1.0)
+        return queue.stats()
+
+    stats = asyncio.run(_run())
+    assert stats["failed"] == 2
+    assert stats["completed"] == 2
+    assert stats["wait_seconds_max"] >= 0.0
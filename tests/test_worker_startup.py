@@ -0,0 +1,146 @@
+"""
+Tests for the worker's startup profile and lazy, concurrent client initialization
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from cloud_run_worker.startup_profile import LazyInitializer, StartupProfile
+
+
+def test_profile_times_phases_and_keeps_first_mark():
+    profile = StartupProfile()
+    with profile.phase("import:slow"):
+        time.sleep(0.02)
+    first = profile.mark("ready")
+    time.sleep(0.01)
+    assert profile.mark("ready") == first
+    snapshot = profile.snapshot()
+    assert snapshot["phases"]["import:slow"] >= 0.02
+    assert snapshot["marks"]["ready"] >= 0.02
+
+
+def test_concurrent_callers_share_one_initialization():
+    calls = []
+
+    async def initializer():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+
+    async def _run():
+        lazy = LazyInitializer(initializer)
+        lazy.start()
+        assert not lazy.ready
+        await asyncio.gather(*(lazy.ensure() for _ in range(10)))
+        await lazy.ensure()
+        return lazy
+
+    lazy = asyncio.run(_run())
+    assert lazy.ready and len(calls) == 1
+
+
+def test_failed_initialization_is_retried_on_next_use():
+    attempts = []
+
+    async def initializer():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("metadata server unreachable")
+
+    async def _run():
+        lazy = LazyInitializer(initializer)
+        # A failed background warm-up is not fatal and leaves the gate closed
+        lazy.start()
+        await asyncio.sleep(0.01)
+        assert not lazy.ready and lazy.last_error == "metadata server unreachable"
+        await lazy.ensure()
+        return lazy
+
+    lazy = asyncio.run(_run())
+    assert lazy.ready and lazy.last_error is None and len(attempts) == 2
+
+
+def test_processor_initializes_clients_concurrently(monkeypatch):
+    from cloud_run_worker.candidate_processor import CandidateProcessor
+    from cloud_run_worker.config import Config
+
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "false")
+    processor = CandidateProcessor(Config(testing=True))
+
+    async def slow_init():
+        await asyncio.sleep(0.1)
+
+    monkeypatch.setattr(processor.together_ai_client, "initialize", slow_init)
+    monkeypatch.setattr(processor.firestore_client, "initialize", slow_init)
+
+    profile = StartupProfile()
+    start = time.perf_counter()
+    asyncio.run(processor.initialize(profile))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.18
+    assert profile.phases["init:together_ai"] == pytest.approx(0.1, abs=0.05)
+    assert profile.phases["init:firestore"] == pytest.approx(0.1, abs=0.05)
+
+
+class _FailingClients:
+    def __init__(self, error="metadata server unreachable"):
+        self.ready = False
+        self.last_error = error
+        self.started = 0
+
+    def start(self):
+        self.started += 1
+
+    async def ensure(self):
+        raise ConnectionError(self.last_error)
+
+
+def test_initialize_clients_reports_missing_configuration(monkeypatch):
+    from cloud_run_worker import main as worker
+
+    monkeypatch.setattr(worker, "candidate_processor", None)
+    monkeypatch.setattr(worker, "config_error", "TOGETHER_API_KEY is required in environment")
+    with pytest.raises(RuntimeError, match="TOGETHER_API_KEY"):
+        asyncio.run(worker._initialize_clients())
+
+
+def test_webhook_defers_messages_while_clients_are_down(monkeypatch):
+    from cloud_run_worker import main as worker
+
+    clients = _FailingClients()
+    monkeypatch.setattr(worker, "clients", clients)
+
+    class _Request:
+        async def json(self):
+            return {"message": {"messageId": "m-1", "data": ""}}
+
+    response = asyncio.run(worker.pubsub_webhook(_Request()))
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(worker.UNAVAILABLE_RETRY_AFTER_SECONDS)
+    # A background retry is kicked off for the next delivery
+    assert clients.started == 1
+
+
+def test_claimed_message_is_released_when_clients_cannot_start(monkeypatch):
+    from types import SimpleNamespace
+
+    from cloud_run_worker import main as worker
+
+    released = []
+
+    class _Processor:
+        async def release_message(self, message_id, candidate_id):
+            released.append((message_id, candidate_id))
+
+    parsed = SimpleNamespace(message_id="m-1", candidate_id="c-1")
+    monkeypatch.setattr(worker, "clients", _FailingClients())
+    monkeypatch.setattr(worker, "candidate_processor", _Processor())
+    monkeypatch.setattr(worker, "pubsub_handler", SimpleNamespace(parse_message=lambda data: parsed))
+    monkeypatch.setattr(worker, "metrics", SimpleNamespace(increment_error_count=lambda: None))
+
+    result = asyncio.run(worker.process_candidate_message({"message": {}}, claimed=True))
+    assert result.status == "unavailable"
+    assert released == [("m-1", "c-1")]
@@ -0,0 +1,106 @@
+"""
+Tests for the worker's processing status / idempotency store
+"""
+
+import asyncio
+
+from cloud_run_worker.status_store import (
+    CLAIMED,
+    InMemoryStatusBackend,
+    ProcessingStatusStore,
+    RedisStatusBackend,
+)
+
+
+class _FakeRedis:
+    """Just enough of redis.asyncio for SET NX EX / GET / DELETE"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_duplicate_deliveries_short_circuit_before_enrichment():
+    # Two worker instances sharing one Redis
+    redis = _FakeRedis()
+    instance_a = ProcessingStatusStore(RedisStatusBackend(redis))
+    instance_b = ProcessingStatusStore(RedisStatusBackend(redis))
+    enrich_calls = []
+
+    async def handle(store, message_id, candidate_id):
+        outcome = await store.claim(message_id, candidate_id)
+        if outcome != CLAIMED:
+            return outcome
+        enrich_calls.append(candidate_id)
+        await asyncio.sleep(0.01)
+        await store.finish(message_id, candidate_id, "completed")
+        return "completed"
+
+    async def _run():
+        first = await asyncio.gather(
+            handle(instance_a, "m1", "c1"),
+            handle(instance_b, "m1", "c1"),  # redelivery on another instance
+            handle(instance_b, "m2", "c1"),  # second message while c1 is in progress
+        )
+        # After completion the same message stays deduplicated; the locked one is redelivered and runs
+        later = [await handle(instance_a, "m1", "c1"), await handle(instance_a, "m2", "c1")]
+        return first, later, await instance_b.get_status("c1")
+
+    first, later, status = asyncio.run(_run())
+    assert first == ["completed", "duplicate", "locked"]
+    assert later == ["duplicate", "completed"]
+    assert enrich_calls == ["c1", "c1"]
+    assert status == "completed"
+    assert instance_b.stats()["duplicate_messages"] == 1
+    assert instance_b.stats()["candidate_conflicts"] == 1
+
+
+def test_failed_message_can_be_claimed_again():
+    store = ProcessingStatusStore(InMemoryStatusBackend())
+
+    async def _run():
+        assert await store.claim("m1", "c1") == CLAIMED
+        await store.finish("m1", "c1", "failed", failed=True)
+        return await store.claim("m1", "c1"), await store.get_status("c1")
+
+    assert asyncio.run(_run()) == (CLAIMED, "failed")
+
+
+def test_released_claim_leaves_no_trace():
+    store = ProcessingStatusStore(InMemoryStatusBackend())
+
+    async def _run():
+        assert await store.claim("m1", "c1") == CLAIMED
+        await store.release("m1", "c1")
+        return await store.claim("m1", "c1"), await store.get_status("c1")
+
+    assert asyncio.run(_run()) == (CLAIMED, None)
+
+
+def test_in_memory_backend_evicts_lru_and_expires():
+    backend = InMemoryStatusBackend(max_entries=2)
+
+    async def _run():
+        await backend.set("a", "1", 60)
+        await backend.set("b", "2", 60)
+        await backend.get("a")  # "b" is now least recently used
+        await backend.set("c", "3", 60)
+        values = [await backend.get(key) for key in ("a", "b", "c")]
+        await backend.set("a", "expired", 0)
+        return values, await backend.get("a"), await backend.set_if_absent("a", "again", 60)
+
+    values, expired, reclaimed = asyncio.run(_run())
+    assert values == ["1", None, "3"]
+    assert backend.evictions == 1
+    assert expired is None and reclaimed